@@ -9,10 +9,30 @@ from .models import (
 )
 from apps.core.models import College, AcademicSession
 from apps.core.serializers import UserBasicSerializer, TenantAuditMixin
+from .timetable import KIND_LAB, KIND_TIMETABLE, RESOURCE_SECTION, RESOURCE_TEACHER, TimetableOccupancy
 
 User = get_user_model()
 
 
+def _merged_values(serializer, attrs, names):
+    """Validated values overlaid on the instance being updated."""
+    return {
+        name: attrs[name] if name in attrs else getattr(serializer.instance, name, None)
+        for name in names
+    }
+
+
+def _conflict_message(conflict):
+    """Human-readable message for the first timetable clash."""
+    if conflict['resource'] == RESOURCE_SECTION:
+        return "This section already has a lecture assigned to this period."
+    if conflict['resource'] == RESOURCE_TEACHER:
+        teacher = User.objects.filter(pk=conflict['resource_id']).first()
+        name = teacher.get_full_name() if teacher else conflict['resource_id']
+        return f"Teacher {name} is already assigned to another class in this period."
+    return "This classroom is already occupied in this period."
+
+
 # ============================================================================
 # FACULTY SERIALIZERS
 # ============================================================================
@@ -372,53 +392,21 @@ class TimetableSerializer(TenantAuditMixin, serializers.ModelSerializer):
         read_only_fields = ['id', 'class_name', 'section_name', 'subject_details', 'teacher_details', 'classroom_details', 'time_details', 'created_by', 'updated_by', 'created_at', 'updated_at']
 
     def validate(self, attrs):
-        section = attrs.get('section') or (self.instance.section if self.instance else None)
-        day = attrs.get('day_of_week') if 'day_of_week' in attrs else (self.instance.day_of_week if self.instance else None)
-        time_slot = attrs.get('class_time') or (self.instance.class_time if self.instance else None)
-        subject_assignment = attrs.get('subject_assignment') or (self.instance.subject_assignment if self.instance else None)
-        classroom = attrs.get('classroom') or (self.instance.classroom if self.instance else None)
-        
-        if section and day is not None and time_slot:
-            # 1. Section Conflict
-            section_conflict = Timetable.objects.filter(
-                section=section,
-                day_of_week=day,
-                class_time=time_slot,
-                is_active=True
+        values = _merged_values(self, attrs, (
+            'class_obj', 'section', 'subject_assignment', 'day_of_week', 'class_time',
+            'classroom', 'effective_from', 'effective_to',
+        ))
+        if self.context.get('skip_conflict_check'):
+            return attrs
+        if values['section'] and values['day_of_week'] is not None and values['class_time'] and values['subject_assignment']:
+            booking = TimetableOccupancy.timetable_booking(values, pk=getattr(self.instance, 'pk', None))
+            occupancy = TimetableOccupancy.load(
+                values['class_obj'].college_id, bookings=[booking],
+                exclude=[(KIND_TIMETABLE, booking.pk)] if booking.pk else (),
             )
-            if self.instance:
-                section_conflict = section_conflict.exclude(pk=self.instance.pk)
-            if section_conflict.exists():
-                raise serializers.ValidationError("This section already has a lecture assigned to this period.")
-
-            # 2. Teacher Conflict
-            if subject_assignment and subject_assignment.teacher:
-                teacher_conflict = Timetable.objects.filter(
-                    subject_assignment__teacher=subject_assignment.teacher,
-                    day_of_week=day,
-                    class_time=time_slot,
-                    is_active=True
-                )
-                if self.instance:
-                    teacher_conflict = teacher_conflict.exclude(pk=self.instance.pk)
-                if teacher_conflict.exists():
-                    raise serializers.ValidationError(
-                        f"Teacher {subject_assignment.teacher.get_full_name()} is already assigned to another class in this period."
-                    )
-
-            # 3. Classroom Conflict
-            if classroom:
-                room_conflict = Timetable.objects.filter(
-                    classroom=classroom,
-                    day_of_week=day,
-                    class_time=time_slot,
-                    is_active=True
-                )
-                if self.instance:
-                    room_conflict = room_conflict.exclude(pk=self.instance.pk)
-                if room_conflict.exists():
-                    raise serializers.ValidationError("This classroom is already occupied in this period.")
-                    
+            conflicts = occupancy.conflicts(booking)
+            if conflicts:
+                raise serializers.ValidationError(_conflict_message(conflicts[0]))
         return attrs
 
     def __init__(self, *args, **kwargs):
@@ -464,6 +452,31 @@ class LabScheduleSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'section_name', 'subject_name', 'teacher_name', 'classroom_name', 'created_by', 'updated_by', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        values = _merged_values(self, attrs, (
+            'section', 'subject_assignment', 'day_of_week', 'start_time', 'end_time',
+            'classroom', 'batch_name', 'effective_from', 'effective_to',
+        ))
+        if values['start_time'] and values['end_time'] and values['start_time'] >= values['end_time']:
+            raise serializers.ValidationError({'end_time': "End time must be after start time."})
+        if self.context.get('skip_conflict_check'):
+            return attrs
+        if values['section'] and values['subject_assignment'] and values['day_of_week'] is not None:
+            subject_assignment = values['subject_assignment']
+            pk = getattr(self.instance, 'pk', None)
+            occupancy = TimetableOccupancy.load(
+                values['section'].class_obj.college_id,
+                section_ids=[values['section'].pk],
+                teacher_ids=filter(None, [subject_assignment.teacher_id, subject_assignment.lab_instructor_id]),
+                classroom_ids=[values['classroom'].pk] if values['classroom'] else (),
+                days=[values['day_of_week']],
+                exclude=[(KIND_LAB, pk)] if pk else (),
+            )
+            conflicts = occupancy.conflicts(occupancy.lab_booking(values, pk=pk))
+            if conflicts:
+                raise serializers.ValidationError(_conflict_message(conflicts[0]))
+        return attrs
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         request = self.context.get('request')
@@ -538,3 +551,53 @@ class BulkDeleteSerializer(serializers.Serializer):
         min_length=1,
         help_text="List of IDs to delete"
     )
+
+
+class TimetableBulkUploadSerializer(serializers.Serializer):
+    """
+    Serializer for uploading many timetable entries at once. Pass
+    skip_conflict_check in the context; the view checks conflicts for the
+    whole upload in one pass instead of per entry.
+    """
+    entries = TimetableSerializer(many=True)
+    dry_run = serializers.BooleanField(default=False, help_text="Only check for conflicts")
+
+
+class TimetableFreeSlotsSerializer(serializers.Serializer):
+    """Query parameters for the free slot lookup."""
+    teacher = serializers.UUIDField(required=False)
+    classroom = serializers.IntegerField(required=False)
+    section = serializers.IntegerField(required=False)
+    days = serializers.CharField(required=False, help_text="Comma separated days (0-6)")
+
+    def validate_days(self, value):
+        try:
+            days = sorted({int(day) for day in value.split(',') if day.strip()})
+        except ValueError:
+            raise serializers.ValidationError("Days must be comma separated integers.")
+        if any(day < 0 or day > 6 for day in days):
+            raise serializers.ValidationError("Days must be between 0 and 6.")
+        return days
+
+    def validate(self, attrs):
+        resources = [name for name in ('teacher', 'classroom', 'section') if attrs.get(name)]
+        if len(resources) != 1:
+            raise serializers.ValidationError("Specify exactly one of teacher, classroom or section.")
+        return attrs
+
+
+class TimetableGenerateSerializer(serializers.Serializer):
+    """Options for automatic timetable generation."""
+    effective_from = serializers.DateField(help_text="Date the generated timetable takes effect")
+    sections = serializers.ListField(
+        child=serializers.IntegerField(), required=False, help_text="Section IDs (default: all)"
+    )
+    days = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False,
+        help_text="Working days (default: 0-5)"
+    )
+    dry_run = serializers.BooleanField(default=False, help_text="Plan without saving")
+    allow_partial = serializers.BooleanField(
+        default=False, help_text="Save even if some lectures could not be placed"
+    )
+    seed = serializers.IntegerField(default=0, help_text="Solver seed; change it to get a different timetable")
@@ -0,0 +1,311 @@
+from datetime import date, time
+
+from django.test import TestCase
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import (
+    Class,
+    ClassTime,
+    Classroom,
+    Faculty,
+    LabSchedule,
+    Program,
+    Section,
+    Subject,
+    SubjectAssignment,
+    Timetable,
+)
+from apps.academic.serializers import TimetableSerializer
+from apps.academic.timetable import RESOURCE_CLASSROOM, RESOURCE_TEACHER, TimetableOccupancy
+from apps.academic.timetable_generator import TimetableGenerator
+from apps.academic.timetable_solver import solve_group, solve_groups
+from apps.core.models import AcademicSession, AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+
+
+class TimetableTestBase(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="TTC",
+            name="Timetable College",
+            short_name="TTC",
+            email="info@ttc.test",
+            phone="1234567891",
+            address_line1="1 Bell Rd",
+            city="City",
+            state="State",
+            pincode="000001",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="ENG", name="Engineering", short_name="ENG")
+        program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BTECH",
+            name="B.Tech",
+            short_name="BTECH",
+            program_type="ug",
+            duration=4,
+            duration_type="year",
+        )
+        self.class_obj = Class.objects.create(
+            college=self.college,
+            program=program,
+            academic_session=session,
+            name="BTECH-1",
+            semester=1,
+            year=1,
+        )
+        self.section_a = Section.objects.create(class_obj=self.class_obj, name="A")
+        self.section_b = Section.objects.create(class_obj=self.class_obj, name="B")
+        subject = Subject.objects.create(
+            college=self.college,
+            code="CS101",
+            name="Programming",
+            short_name="PRG",
+            subject_type="theory",
+            credits="4.00",
+            max_marks=100,
+            pass_marks=40,
+        )
+        self.teacher = User.objects.create_user(
+            username="teacher_ttc",
+            email="teacher@ttc.test",
+            password="dummy-pass",
+            first_name="Tia",
+            last_name="Cher",
+            college=self.college,
+            user_type=UserType.TEACHER,
+        )
+        self.assignment_a = SubjectAssignment.objects.create(
+            subject=subject, class_obj=self.class_obj, section=self.section_a, teacher=self.teacher
+        )
+        self.assignment_b = SubjectAssignment.objects.create(
+            subject=subject, class_obj=self.class_obj, section=self.section_b, teacher=self.teacher
+        )
+        self.room = Classroom.objects.create(
+            college=self.college, code="R1", name="Room 1", room_type="classroom", capacity=60
+        )
+        self.lab = Classroom.objects.create(
+            college=self.college, code="L1", name="Lab 1", room_type="lab", capacity=30
+        )
+        self.lab_2 = Classroom.objects.create(
+            college=self.college, code="L2", name="Lab 2", room_type="lab", capacity=30
+        )
+        self.first = ClassTime.objects.create(
+            college=self.college, period_number=1, start_time=time(9), end_time=time(10)
+        )
+        ClassTime.objects.create(
+            college=self.college, period_number=2, start_time=time(10), end_time=time(10, 15),
+            is_break=True, break_name="Tea",
+        )
+        self.second = ClassTime.objects.create(
+            college=self.college, period_number=3, start_time=time(10, 15), end_time=time(11, 15)
+        )
+        self.entry = Timetable.objects.create(
+            class_obj=self.class_obj,
+            section=self.section_a,
+            subject_assignment=self.assignment_a,
+            day_of_week=0,
+            class_time=self.first,
+            classroom=self.room,
+            effective_from=date(2025, 6, 1),
+        )
+
+    def _entry(self, **values):
+        attrs = {
+            'class_obj': self.class_obj,
+            'section': self.section_b,
+            'subject_assignment': self.assignment_b,
+            'day_of_week': 0,
+            'class_time': self.first,
+            'classroom': None,
+            'effective_from': date(2025, 6, 1),
+            'effective_to': None,
+        }
+        attrs.update(values)
+        return attrs
+
+
+class TimetableOccupancyTest(TimetableTestBase):
+    def test_detects_teacher_and_classroom_clashes_across_sections(self):
+        booking = TimetableOccupancy.timetable_booking(self._entry(classroom=self.room))
+        occupancy = TimetableOccupancy.load(self.college.id, bookings=[booking])
+
+        conflicts = occupancy.conflicts(booking)
+
+        self.assertEqual(
+            {conflict['resource'] for conflict in conflicts}, {RESOURCE_TEACHER, RESOURCE_CLASSROOM}
+        )
+        self.assertEqual(conflicts[0]['conflicts_with'], {'type': 'timetable', 'id': self.entry.pk})
+
+    def test_expired_ranges_and_the_edited_entry_do_not_clash(self):
+        self.entry.effective_to = date(2025, 12, 31)
+        self.entry.save()
+        later = TimetableOccupancy.timetable_booking(self._entry(effective_from=date(2026, 1, 1)))
+        occupancy = TimetableOccupancy.load(self.college.id, bookings=[later])
+        self.assertEqual(occupancy.conflicts(later), [])
+
+        serializer = TimetableSerializer(self.entry, data={'classroom': self.room.pk}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_bulk_upload_catches_clashes_within_the_upload(self):
+        bookings = [
+            TimetableOccupancy.timetable_booking(self._entry(class_time=self.second, classroom=self.lab)),
+            TimetableOccupancy.timetable_booking(
+                self._entry(section=self.section_a, subject_assignment=self.assignment_a,
+                            class_time=self.second, classroom=self.lab)
+            ),
+        ]
+        occupancy = TimetableOccupancy.load(self.college.id, bookings=bookings)
+
+        clashes = occupancy.check_many(bookings)
+
+        self.assertEqual(list(clashes), [1])
+        self.assertEqual(
+            {conflict['resource'] for conflict in clashes[1]}, {RESOURCE_TEACHER, RESOURCE_CLASSROOM}
+        )
+
+    def test_lab_schedules_occupy_overlapping_periods(self):
+        LabSchedule.objects.create(
+            subject_assignment=self.assignment_b,
+            section=self.section_b,
+            day_of_week=1,
+            start_time=time(9, 30),
+            end_time=time(11),
+            classroom=self.lab,
+            batch_name="B1",
+            effective_from=date(2025, 6, 1),
+        )
+        self.assignment_a.teacher = User.objects.create_user(
+            username="instructor_ttc",
+            email="instructor@ttc.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.TEACHER,
+        )
+        occupancy = TimetableOccupancy.load(self.college.id, classroom_ids=[self.lab.pk])
+        other_batch = occupancy.lab_booking({
+            'subject_assignment': self.assignment_a,
+            'section': self.section_b,
+            'day_of_week': 1,
+            'start_time': time(10, 30),
+            'end_time': time(11),
+            'classroom': self.lab_2,
+            'batch_name': "B2",
+        })
+        self.assertEqual(occupancy.conflicts(other_batch), [])
+
+        free = occupancy.free_slots(RESOURCE_CLASSROOM, self.lab.pk, days=[1])
+        self.assertEqual(free, [])
+
+    def test_free_slots_skip_breaks_and_booked_periods(self):
+        occupancy = TimetableOccupancy.load(self.college.id, teacher_ids=[self.teacher.pk])
+
+        free = occupancy.free_slots(RESOURCE_TEACHER, self.teacher.pk, days=[0, 1])
+
+        self.assertEqual(
+            [(slot['day_of_week'], slot['period_number']) for slot in free], [(0, 3), (1, 1), (1, 3)]
+        )
+
+    def test_single_edit_reports_teacher_clash(self):
+        serializer = TimetableSerializer(data={
+            'class_obj': self.class_obj.pk,
+            'section': self.section_b.pk,
+            'subject_assignment': self.assignment_b.pk,
+            'day_of_week': 0,
+            'class_time': self.first.pk,
+            'effective_from': '2025-06-01',
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("Teacher Tia Cher", str(serializer.errors))
+
+
+class TimetableSolverTest(TestCase):
+    def _problem(self, seed=0):
+        # 6 sections x 3 subjects x 4 lectures in 12 slots; teachers shared by pairs
+        slots = [(day, period) for day in range(4) for period in range(3)]
+        lessons = []
+        for section in range(6):
+            for subject in range(3):
+                teacher = (section // 2) * 3 + subject
+                for _ in range(4):
+                    lessons.append((
+                        len(lessons),
+                        (('section', section), ('teacher', teacher)),
+                        (section, subject),
+                    ))
+        return {'slots': slots, 'lessons': lessons, 'blocked': {('section', 0): {0}}, 'seed': seed}
+
+    def _assert_clash_free(self, problem, solution):
+        used = set()
+        for lesson_id, resources, _ in problem['lessons']:
+            slot = solution['assignments'].get(lesson_id)
+            if slot is None:
+                continue
+            for resource in resources:
+                self.assertNotIn((resource, slot), used)
+                self.assertNotIn(slot, problem['blocked'].get(resource, ()))
+                used.add((resource, slot))
+
+    def test_solution_has_no_clashes(self):
+        problem = self._problem()
+        solution = solve_group(problem)
+        self._assert_clash_free(problem, solution)
+        # Section 0 lost one slot, so exactly one of its lectures cannot fit
+        self.assertEqual(len(solution['unplaced']), 1)
+        self.assertEqual(len(solution['assignments']), len(problem['lessons']) - 1)
+
+    def test_groups_solve_in_worker_processes(self):
+        problems = [self._problem(seed) for seed in range(2)]
+        for problem, solution in zip(problems, solve_groups(problems, workers=2)):
+            self._assert_clash_free(problem, solution)
+
+
+class TimetableGeneratorTest(TimetableTestBase):
+    def setUp(self):
+        super().setUp()
+        self.assignment_a.subject.theory_hours = 3
+        self.assignment_a.subject.save()
+
+    def test_generates_and_versions_timetable(self):
+        generator = TimetableGenerator(self.college.id, date(2026, 1, 1), days=[0, 1, 2], workers=1)
+
+        summary = generator.generate()
+
+        self.assertTrue(summary['written'])
+        self.assertEqual(summary['unplaced'], [])
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.effective_to, date(2025, 12, 31))
+        generated = Timetable.objects.filter(effective_from=date(2026, 1, 1))
+        self.assertEqual(generated.count(), 6)
+        # One teacher covers both sections, so every lecture has its own slot
+        self.assertEqual(len(set(generated.values_list('day_of_week', 'class_time'))), 6)
+        self.assertEqual(set(generated.values_list('classroom', flat=True)), {self.room.pk})
+
+    def test_reports_unplaceable_lectures_without_writing(self):
+        generator = TimetableGenerator(self.college.id, date(2026, 1, 1), days=[0, 1], workers=1)
+
+        summary = generator.generate()
+
+        self.assertFalse(summary['written'])
+        self.assertEqual(sum(item['periods'] for item in summary['unplaced']), 2)
+        self.assertFalse(Timetable.objects.filter(effective_from=date(2026, 1, 1)).exists())
@@ -0,0 +1,291 @@
+"""
+Timetable occupancy index and conflict detection.
+
+Timetable entries and lab schedules are reduced to bookings of
+(day_of_week, ClassTime period) slots by a section, its teachers and a
+classroom. TimetableOccupancy loads the bookings touching a set of
+resources in three queries and indexes them by (resource, day, period), so
+checking a single edit or a whole uploaded timetable is a dictionary lookup
+per booked slot. Entries in a bulk upload are added to the index as they are
+checked, which also catches clashes inside the upload itself.
+
+Lab schedules use free start/end times; they occupy every period they
+overlap.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db.models import Q
+
+from .models import ClassTime, LabSchedule, Timetable
+
+DAYS_OF_WEEK = range(7)
+KIND_TIMETABLE = 'timetable'
+KIND_LAB = 'lab'
+RESOURCE_SECTION = 'section'
+RESOURCE_TEACHER = 'teacher'
+RESOURCE_CLASSROOM = 'classroom'
+
+
+class Booking:
+    """One timetable entry or lab schedule as a set of occupied slots."""
+
+    __slots__ = (
+        'kind', 'pk', 'day', 'periods', 'section_id', 'teacher_ids', 'classroom_id',
+        'batch', 'effective_from', 'effective_to',
+    )
+
+    def __init__(self, kind, pk, day, periods, section_id, teacher_ids=frozenset(), classroom_id=None,
+                 batch=None, effective_from=None, effective_to=None):
+        self.kind = kind
+        self.pk = pk
+        self.day = day
+        self.periods = periods
+        self.section_id = section_id
+        self.teacher_ids = teacher_ids
+        self.classroom_id = classroom_id
+        self.batch = batch
+        self.effective_from = effective_from
+        self.effective_to = effective_to
+
+    def resources(self):
+        yield RESOURCE_SECTION, self.section_id
+        for teacher_id in self.teacher_ids:
+            yield RESOURCE_TEACHER, teacher_id
+        if self.classroom_id:
+            yield RESOURCE_CLASSROOM, self.classroom_id
+
+    def overlaps(self, other):
+        """Whether both bookings are in force on at least one common date."""
+        if self.effective_to and other.effective_from and self.effective_to < other.effective_from:
+            return False
+        if other.effective_to and self.effective_from and other.effective_to < self.effective_from:
+            return False
+        return True
+
+    def ref(self):
+        return {'type': self.kind, 'id': self.pk}
+
+
+def _shares_section(booking, other):
+    """Lab batches of one section may run side by side; anything else clashes."""
+    if booking.kind == KIND_LAB and other.kind == KIND_LAB:
+        return not (booking.batch and other.batch and booking.batch != other.batch)
+    return True
+
+
+class TimetableOccupancy:
+    """Occupancy index of (resource, day, period) slots for one college."""
+
+    def __init__(self, college_id):
+        self.college_id = college_id
+        self.periods = []
+        self._slots = defaultdict(list)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, college_id, bookings=None, teacher_ids=(), classroom_ids=(), section_ids=(),
+             days=None, exclude=()):
+        """
+        Build the index from stored entries. With `bookings` (or explicit
+        resource ids), only entries sharing a section, teacher or classroom
+        with them on the same days are loaded. `exclude` holds (kind, pk)
+        pairs of stored rows being replaced, e.g. the entry under edit.
+        """
+        occupancy = cls(college_id=college_id)
+        occupancy.periods = list(
+            ClassTime.objects.all_colleges().filter(college_id=college_id, is_active=True)
+            .order_by('start_time').values('id', 'period_number', 'start_time', 'end_time', 'is_break')
+        )
+        teacher_ids, classroom_ids, section_ids = set(teacher_ids), set(classroom_ids), set(section_ids)
+        for booking in bookings or ():
+            section_ids.add(booking.section_id)
+            teacher_ids.update(booking.teacher_ids)
+            if booking.classroom_id:
+                classroom_ids.add(booking.classroom_id)
+        if bookings and days is None:
+            days = {booking.day for booking in bookings}
+        scoped = bookings is not None or teacher_ids or classroom_ids or section_ids
+        if scoped and not (teacher_ids or classroom_ids or section_ids):
+            return occupancy
+
+        excluded = set(exclude)
+        for booking in occupancy._stored_bookings(teacher_ids, classroom_ids, section_ids, days, scoped):
+            if (booking.kind, booking.pk) not in excluded:
+                occupancy.add(booking)
+        return occupancy
+
+    def _stored_bookings(self, teacher_ids, classroom_ids, section_ids, days, scoped):
+        today = date.today()
+        current = Q(is_active=True) & (Q(effective_to__isnull=True) | Q(effective_to__gte=today))
+
+        entries = Timetable.objects.filter(current, class_obj__college_id=self.college_id)
+        labs = LabSchedule.objects.filter(current, section__class_obj__college_id=self.college_id)
+        if days is not None:
+            entries = entries.filter(day_of_week__in=days)
+            labs = labs.filter(day_of_week__in=days)
+        if scoped:
+            entries = entries.filter(
+                Q(section_id__in=section_ids)
+                | Q(subject_assignment__teacher_id__in=teacher_ids)
+                | Q(classroom_id__in=classroom_ids)
+            )
+            labs = labs.filter(
+                Q(section_id__in=section_ids)
+                | Q(subject_assignment__teacher_id__in=teacher_ids)
+                | Q(subject_assignment__lab_instructor_id__in=teacher_ids)
+                | Q(classroom_id__in=classroom_ids)
+            )
+
+        for row in entries.values(
+            'id', 'section_id', 'day_of_week', 'class_time_id', 'classroom_id',
+            'subject_assignment__teacher_id', 'effective_from', 'effective_to',
+        ):
+            yield Booking(
+                kind=KIND_TIMETABLE,
+                pk=row['id'],
+                day=row['day_of_week'],
+                periods=frozenset([row['class_time_id']]),
+                section_id=row['section_id'],
+                teacher_ids=frozenset(filter(None, [row['subject_assignment__teacher_id']])),
+                classroom_id=row['classroom_id'],
+                effective_from=row['effective_from'],
+                effective_to=row['effective_to'],
+            )
+        for row in labs.values(
+            'id', 'section_id', 'day_of_week', 'start_time', 'end_time', 'classroom_id', 'batch_name',
+            'subject_assignment__teacher_id', 'subject_assignment__lab_instructor_id',
+            'effective_from', 'effective_to',
+        ):
+            yield Booking(
+                kind=KIND_LAB,
+                pk=row['id'],
+                day=row['day_of_week'],
+                periods=self.periods_between(row['start_time'], row['end_time']),
+                section_id=row['section_id'],
+                teacher_ids=frozenset(filter(None, [
+                    row['subject_assignment__teacher_id'], row['subject_assignment__lab_instructor_id'],
+                ])),
+                classroom_id=row['classroom_id'],
+                batch=row['batch_name'],
+                effective_from=row['effective_from'],
+                effective_to=row['effective_to'],
+            )
+
+    # ------------------------------------------------------------------
+    # Bookings
+    # ------------------------------------------------------------------
+
+    def periods_between(self, start_time, end_time):
+        """ClassTime ids overlapping a [start, end) time range."""
+        return frozenset(
+            period['id'] for period in self.periods
+            if period['start_time'] < end_time and start_time < period['end_time']
+        )
+
+    @staticmethod
+    def timetable_booking(attrs, pk=None):
+        """Booking for Timetable field values (model instances, as validated by DRF)."""
+        subject_assignment = attrs['subject_assignment']
+        teacher_id = subject_assignment.teacher_id if subject_assignment else None
+        classroom = attrs.get('classroom')
+        return Booking(
+            kind=KIND_TIMETABLE,
+            pk=pk,
+            day=attrs['day_of_week'],
+            periods=frozenset([attrs['class_time'].pk]),
+            section_id=attrs['section'].pk,
+            teacher_ids=frozenset(filter(None, [teacher_id])),
+            classroom_id=classroom.pk if classroom else None,
+            effective_from=attrs.get('effective_from'),
+            effective_to=attrs.get('effective_to'),
+        )
+
+    def lab_booking(self, attrs, pk=None):
+        """Booking for LabSchedule field values."""
+        subject_assignment = attrs['subject_assignment']
+        classroom = attrs.get('classroom')
+        return Booking(
+            kind=KIND_LAB,
+            pk=pk,
+            day=attrs['day_of_week'],
+            periods=self.periods_between(attrs['start_time'], attrs['end_time']),
+            section_id=attrs['section'].pk,
+            teacher_ids=frozenset(filter(None, [
+                subject_assignment.teacher_id, subject_assignment.lab_instructor_id,
+            ])),
+            classroom_id=classroom.pk if classroom else None,
+            batch=attrs.get('batch_name'),
+            effective_from=attrs.get('effective_from'),
+            effective_to=attrs.get('effective_to'),
+        )
+
+    def occupied_slots(self):
+        """{(resource, id): {(day, period_id), ...}} of everything indexed."""
+        occupied = defaultdict(set)
+        for (resource, day, period_id), bookings in self._slots.items():
+            if bookings:
+                occupied[resource].add((day, period_id))
+        return occupied
+
+    def add(self, booking):
+        for resource in booking.resources():
+            for period_id in booking.periods:
+                self._slots[(resource, booking.day, period_id)].append(booking)
+
+    def conflicts(self, booking):
+        """Clashes of `booking` with indexed bookings, one per resource and slot."""
+        found = []
+        for resource in booking.resources():
+            for period_id in sorted(booking.periods):
+                for other in self._slots.get((resource, booking.day, period_id), ()):
+                    if (other.kind, other.pk) == (booking.kind, booking.pk) and booking.pk is not None:
+                        continue
+                    if not booking.overlaps(other):
+                        continue
+                    if resource[0] == RESOURCE_SECTION and not _shares_section(booking, other):
+                        continue
+                    found.append({
+                        'resource': resource[0],
+                        'resource_id': resource[1],
+                        'day_of_week': booking.day,
+                        'class_time': period_id,
+                        'conflicts_with': other.ref(),
+                    })
+                    break
+        return found
+
+    def check_many(self, bookings):
+        """
+        Check bookings in order against the index and each other. Returns
+        {position: conflicts} for the bookings that clash.
+        """
+        clashes = {}
+        for position, booking in enumerate(bookings):
+            found = self.conflicts(booking)
+            if found:
+                clashes[position] = found
+            self.add(booking)
+        return clashes
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def free_slots(self, resource, resource_id, days=DAYS_OF_WEEK):
+        """Teaching periods (breaks excluded) on `days` where the resource is free."""
+        return [
+            {
+                'day_of_week': day,
+                'class_time': period['id'],
+                'period_number': period['period_number'],
+                'start_time': period['start_time'],
+                'end_time': period['end_time'],
+            }
+            for day in days
+            for period in self.periods
+            if not period['is_break'] and not self._slots.get(((resource, resource_id), day, period['id']))
+        ]
@@ -0,0 +1,237 @@
+"""
+Automatic weekly timetable generation.
+
+Each SubjectAssignment needs Subject.theory_hours lectures a week for every
+section it covers. The generator:
+
+1. loads sections, assignments, teaching periods, classroom capacities,
+   section strengths and everything already booked (lab schedules and the
+   timetables of sections that are not being regenerated);
+2. splits the sections into independent groups -- sections connected
+   through a shared teacher -- and solves each group in a process pool;
+3. assigns classrooms per slot by capacity, keeping a section in the same
+   room where possible;
+4. writes the result in one transaction: the previous version of the
+   regenerated sections is closed the day before `effective_from` and the
+   new entries are bulk created.
+
+The solver itself lives in timetable_solver.py. Lectures of one subject
+are spread over different days where possible.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.students.models import Student
+
+from .models import Classroom, Section, SubjectAssignment, Timetable
+from .timetable import KIND_TIMETABLE, RESOURCE_CLASSROOM, RESOURCE_SECTION, RESOURCE_TEACHER, TimetableOccupancy
+from .timetable_solver import DEFAULT_MAX_STEPS, assign_rooms, solve_groups
+
+DEFAULT_WORKING_DAYS = (0, 1, 2, 3, 4, 5)
+DEFAULT_SOLVER_WORKERS = 2
+
+
+def solver_workers():
+    return getattr(settings, 'TIMETABLE_SOLVER_WORKERS', DEFAULT_SOLVER_WORKERS)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+
+class TimetableGenerator:
+    """Generate and write a clash-free weekly timetable for a college's sections."""
+
+    def __init__(self, college_id, effective_from, user=None, section_ids=None, days=None,
+                 seed=0, max_steps=DEFAULT_MAX_STEPS, workers=None):
+        self.college_id = college_id
+        self.effective_from = effective_from
+        self.user = user
+        self.section_ids = section_ids
+        self.days = tuple(days or DEFAULT_WORKING_DAYS)
+        self.seed = seed
+        self.max_steps = max_steps
+        self.workers = solver_workers() if workers is None else workers
+
+    def sections(self):
+        sections = Section.objects.filter(
+            class_obj__college_id=self.college_id, class_obj__is_active=True, is_active=True
+        )
+        if self.section_ids:
+            sections = sections.filter(pk__in=self.section_ids)
+        return list(sections.select_related('class_obj'))
+
+    def lessons(self, sections):
+        """
+        Solver lessons (lesson_id, resources, spread_key), one per weekly
+        lecture, and lesson_id -> (section_id, subject_assignment_id).
+        """
+        by_class = defaultdict(list)
+        for section in sections:
+            by_class[section.class_obj_id].append(section.pk)
+        section_ids = {section.pk for section in sections}
+
+        lessons, sources = [], {}
+        assignments = SubjectAssignment.objects.filter(
+            class_obj_id__in=by_class, is_active=True, subject__theory_hours__gt=0,
+        ).filter(Q(section__isnull=True) | Q(section_id__in=section_ids)).values_list(
+            'id', 'class_obj_id', 'section_id', 'teacher_id', 'subject_id', 'subject__theory_hours',
+        ).order_by('id')
+        for assignment_id, class_id, section_id, teacher_id, subject_id, hours in assignments:
+            targets = [section_id] if section_id else by_class[class_id]
+            for target in targets:
+                for _ in range(hours):
+                    lesson_id = len(lessons)
+                    resources = ((RESOURCE_SECTION, target),)
+                    if teacher_id:
+                        resources += ((RESOURCE_TEACHER, teacher_id),)
+                    lessons.append((lesson_id, resources, (target, subject_id)))
+                    sources[lesson_id] = (target, assignment_id)
+        return lessons, sources
+
+    def section_strengths(self, sections):
+        enrolled = dict(
+            Student.objects.all_colleges().filter(
+                current_section_id__in=[section.pk for section in sections], is_active=True
+            ).values('current_section_id').annotate(total=Count('id')).values_list('current_section_id', 'total')
+        )
+        return {section.pk: enrolled.get(section.pk) or section.max_students for section in sections}
+
+    def existing_bookings(self, section_ids):
+        """Occupancy of lab schedules and timetables outside the regenerated sections."""
+        replaced = Timetable.objects.filter(section_id__in=section_ids).values_list('id', flat=True)
+        return TimetableOccupancy.load(
+            self.college_id, days=self.days, exclude=[(KIND_TIMETABLE, pk) for pk in replaced],
+        )
+
+    def plan(self, sections=None):
+        """Solve without writing. Returns (entries, summary)."""
+        sections = self.sections() if sections is None else sections
+        section_ids = [section.pk for section in sections]
+        occupancy = self.existing_bookings(section_ids)
+        slots = [
+            (day, period['id'])
+            for day in self.days
+            for period in occupancy.periods if not period['is_break']
+        ]
+        slot_index = {slot: index for index, slot in enumerate(slots)}
+        occupied = occupancy.occupied_slots()
+
+        lessons, sources = self.lessons(sections)
+        # Sections sharing a teacher must be solved together
+        groups = _UnionFind()
+        for _, resources, _ in lessons:
+            for resource in resources:
+                groups.union(resource, resources[0])
+        grouped = defaultdict(list)
+        for lesson in lessons:
+            grouped[groups.find(lesson[1][0])].append(lesson)
+
+        problems = []
+        for number, group_lessons in enumerate(grouped.values()):
+            resources = {resource for lesson in group_lessons for resource in lesson[1]}
+            problems.append({
+                'slots': slots,
+                'lessons': group_lessons,
+                'blocked': {
+                    resource: {slot_index[slot] for slot in occupied.get(resource, ()) if slot in slot_index}
+                    for resource in resources
+                },
+                'seed': self.seed + number,
+                'max_steps': self.max_steps,
+            })
+        solutions = solve_groups(problems, self.workers)
+
+        strengths = self.section_strengths(sections)
+        placed, unplaced = defaultdict(list), []
+        for solution in solutions:
+            for lesson_id, index in solution['assignments'].items():
+                section_id = sources[lesson_id][0]
+                placed[index].append((lesson_id, section_id, strengths.get(section_id, 0)))
+            unplaced.extend(solution['unplaced'])
+
+        rooms = list(
+            Classroom.objects.all_colleges().filter(college_id=self.college_id, is_active=True)
+            .exclude(room_type__iexact='lab').values_list('id', 'capacity')
+        )
+        blocked_rooms = defaultdict(set)
+        for (resource, room_id) in occupied:
+            if resource == RESOURCE_CLASSROOM:
+                for slot in occupied[(resource, room_id)]:
+                    if slot in slot_index:
+                        blocked_rooms[slot_index[slot]].add(room_id)
+        room_of = assign_rooms(placed, rooms, blocked_rooms)
+
+        class_of = {section.pk: section.class_obj_id for section in sections}
+        entries = []
+        for index, slot_lessons in sorted(placed.items()):
+            day, period_id = slots[index]
+            for lesson_id, section_id, _ in slot_lessons:
+                entries.append(Timetable(
+                    class_obj_id=class_of[section_id],
+                    section_id=section_id,
+                    subject_assignment_id=sources[lesson_id][1],
+                    day_of_week=day,
+                    class_time_id=period_id,
+                    classroom_id=room_of.get(lesson_id),
+                    effective_from=self.effective_from,
+                    created_by=self.user,
+                    updated_by=self.user,
+                ))
+
+        missing = defaultdict(int)
+        for lesson_id in unplaced:
+            missing[sources[lesson_id]] += 1
+        summary = {
+            'sections': len(sections),
+            'groups': len(problems),
+            'lessons': len(lessons),
+            'placed': len(entries),
+            'without_classroom': sum(1 for entry in entries if entry.classroom_id is None),
+            'unplaced': [
+                {'section': section_id, 'subject_assignment': assignment_id, 'periods': count}
+                for (section_id, assignment_id), count in sorted(missing.items())
+            ],
+            'effective_from': self.effective_from,
+        }
+        return entries, summary
+
+    def generate(self, dry_run=False, allow_partial=False):
+        """
+        Plan the timetable and, unless `dry_run` (or lessons are left unplaced
+        and not `allow_partial`), replace the sections' timetable from
+        effective_from onwards. Returns the summary with `written` set.
+        """
+        sections = self.sections()
+        entries, summary = self.plan(sections)
+        summary['written'] = False
+        if dry_run or (summary['unplaced'] and not allow_partial):
+            return summary
+
+        section_ids = [section.pk for section in sections]
+        with transaction.atomic():
+            current = Timetable.objects.filter(section_id__in=section_ids)
+            # Versions that have not started yet are superseded outright
+            current.filter(effective_from__gte=self.effective_from).delete()
+            current.filter(
+                Q(effective_to__isnull=True) | Q(effective_to__gte=self.effective_from),
+                effective_from__lt=self.effective_from,
+            ).update(effective_to=self.effective_from - timedelta(days=1))
+            Timetable.objects.bulk_create(entries, batch_size=1000)
+        summary['written'] = True
+        return summary
@@ -0,0 +1,154 @@
+"""
+Timetable solver kernels.
+
+Pure functions of plain data with no Django imports, so they can run in
+spawned worker processes. Used by apps.academic.timetable_generator.
+
+solve_group orders lessons most-constrained first and places them greedily,
+then runs a min-conflicts local search with a tabu list: an unplaced lesson
+takes the slot where it evicts the fewest other lessons, evicted lessons
+queue up to be placed again, until every lesson is placed or the step
+budget runs out. Lessons sharing a spread key (a section's subject) prefer
+different days.
+"""
+import multiprocessing
+import random
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_MAX_STEPS = 20000
+TABU_TENURE = 10
+CLASH_COST = 10
+SAME_DAY_COST = 3
+TABU_COST = 100
+
+
+def solve_group(problem):
+    """
+    Place lessons into slots so no resource is used twice in a slot.
+
+    Args:
+        problem (dict):
+            slots: list of (day, period) pairs
+            lessons: list of (lesson_id, resources, spread_key), resources
+                being hashable keys such as ('teacher', id)
+            blocked: {resource: set of slot indexes already booked}
+            seed: random seed
+            max_steps: local search step budget
+
+    Returns:
+        dict: assignments {lesson_id: slot index}, unplaced [lesson_id]
+    """
+    slots = problem['slots']
+    lessons = {lesson_id: (resources, spread_key) for lesson_id, resources, spread_key in problem['lessons']}
+    blocked = problem['blocked']
+    rng = random.Random(problem.get('seed', 0))
+
+    domains = {}
+    for lesson_id, (resources, _) in lessons.items():
+        unavailable = set()
+        for resource in resources:
+            unavailable |= blocked.get(resource, set())
+        domains[lesson_id] = [index for index in range(len(slots)) if index not in unavailable]
+
+    holders = {}                     # (resource, slot) -> lesson_id
+    spread = defaultdict(int)        # (spread_key, day) -> lessons placed that day
+    assignment = {}
+
+    def day_key(lesson_id, slot):
+        return lessons[lesson_id][1], slots[slot][0]
+
+    def place(lesson_id, slot):
+        for resource in lessons[lesson_id][0]:
+            holders[(resource, slot)] = lesson_id
+        spread[day_key(lesson_id, slot)] += 1
+        assignment[lesson_id] = slot
+
+    def remove(lesson_id):
+        slot = assignment.pop(lesson_id)
+        for resource in lessons[lesson_id][0]:
+            holders.pop((resource, slot), None)
+        spread[day_key(lesson_id, slot)] -= 1
+
+    def clashes(lesson_id, slot):
+        return {
+            holders[(resource, slot)] for resource in lessons[lesson_id][0] if (resource, slot) in holders
+        }
+
+    # Lessons with no free slot at all can never be placed
+    impossible = [lesson_id for lesson_id in lessons if not domains[lesson_id]]
+
+    order = sorted(
+        (lesson_id for lesson_id in lessons if domains[lesson_id]),
+        key=lambda lesson_id: (len(domains[lesson_id]), rng.random()),
+    )
+    unplaced = deque()
+    for lesson_id in order:
+        candidates = [slot for slot in domains[lesson_id] if not clashes(lesson_id, slot)]
+        if not candidates:
+            unplaced.append(lesson_id)
+            continue
+        place(lesson_id, min(candidates, key=lambda slot: (spread[day_key(lesson_id, slot)], rng.random())))
+
+    best_assignment, best_unplaced = dict(assignment), list(unplaced)
+    tabu = {}
+    for step in range(problem.get('max_steps', DEFAULT_MAX_STEPS)):
+        if not unplaced:
+            break
+        lesson_id = unplaced.popleft()
+        scored = []
+        for slot in domains[lesson_id]:
+            evicted = clashes(lesson_id, slot)
+            cost = len(evicted) * CLASH_COST + spread[day_key(lesson_id, slot)] * SAME_DAY_COST
+            if tabu.get((lesson_id, slot), -1) >= step:
+                cost += TABU_COST
+            scored.append((cost, rng.random(), slot, evicted))
+        _, _, slot, evicted = min(scored, key=lambda item: item[:2])
+        for other in evicted:
+            # An evicted lesson may not take its old slot back for a while
+            tabu[(other, assignment[other])] = step + TABU_TENURE
+            remove(other)
+            unplaced.append(other)
+        place(lesson_id, slot)
+        if len(unplaced) < len(best_unplaced):
+            best_assignment, best_unplaced = dict(assignment), list(unplaced)
+
+    return {'assignments': best_assignment, 'unplaced': best_unplaced + impossible}
+
+
+def solve_groups(problems, workers=1):
+    """Solve independent groups, in a process pool when `workers` > 1."""
+    if workers <= 1 or len(problems) <= 1:
+        return [solve_group(problem) for problem in problems]
+    # Spawned workers: forking a threaded web/worker process is not safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(solve_group, problems))
+
+
+def assign_rooms(placed, rooms, blocked_rooms, home_rooms=None):
+    """
+    Pick a room for every placed lesson, slot by slot: largest groups first,
+    each into its home room if free and big enough, otherwise the smallest
+    free room that fits. Lessons that fit nowhere get None.
+
+    Args:
+        placed: {slot: [(lesson_id, home_key, size)]}
+        rooms: [(room_id, capacity)]
+        blocked_rooms: {slot: set of room ids already booked}
+        home_rooms: {home_key: room_id}, filled in as rooms are assigned
+    """
+    home_rooms = {} if home_rooms is None else home_rooms
+    rooms = sorted(rooms, key=lambda room: room[1])
+    capacity = dict(rooms)
+    result = {}
+    for slot, slot_lessons in sorted(placed.items()):
+        taken = set(blocked_rooms.get(slot, ()))
+        for lesson_id, home_key, size in sorted(slot_lessons, key=lambda lesson: -lesson[2]):
+            room_id = home_rooms.get(home_key)
+            if room_id is None or room_id in taken or capacity.get(room_id, 0) < size:
+                room_id = next((room for room, seats in rooms if room not in taken and seats >= size), None)
+            if room_id is not None:
+                taken.add(room_id)
+                home_rooms.setdefault(home_key, room_id)
+            result[lesson_id] = room_id
+    return result
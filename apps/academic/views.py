@@ -1,6 +1,7 @@
 """
 DRF ViewSets for Academic app with comprehensive API documentation.
 """
+from django.db import IntegrityError, transaction
 from rest_framework import status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -33,7 +34,12 @@ from .serializers import (
     LabScheduleSerializer,
     ClassTeacherSerializer,
     BulkDeleteSerializer,
+    TimetableBulkUploadSerializer,
+    TimetableFreeSlotsSerializer,
+    TimetableGenerateSerializer,
 )
+from .timetable import DAYS_OF_WEEK, TimetableOccupancy
+from .timetable_generator import TimetableGenerator
 from apps.core.mixins import CollegeScopedModelViewSet
 
 
@@ -802,6 +808,105 @@ class TimetableViewSet(CachedStaticMixin, CollegeScopedModelViewSet):
     def perform_destroy(self, instance):
         instance.soft_delete()
 
+    @extend_schema(
+        summary="Bulk upload timetable entries",
+        description=(
+            "Validate a whole timetable against existing entries, lab schedules and itself "
+            "(section, teacher and classroom clashes) in one pass, then create it. "
+            "With dry_run only the conflict report is returned."
+        ),
+        request=TimetableBulkUploadSerializer,
+        responses={201: TimetableSerializer(many=True), 400: OpenApiResponse(description='Conflicts found')},
+        tags=['Academic - Timetable']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-upload')
+    def bulk_upload(self, request):
+        college_id = self.get_college_id(required=True)
+        context = {**self.get_serializer_context(), 'skip_conflict_check': True}
+        serializer = TimetableBulkUploadSerializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.validated_data['entries']
+
+        bookings = [TimetableOccupancy.timetable_booking(entry) for entry in entries]
+        occupancy = TimetableOccupancy.load(college_id, bookings=bookings)
+        clashes = occupancy.check_many(bookings)
+        if clashes:
+            return Response({
+                'detail': f'{len(clashes)} of {len(entries)} entries conflict.',
+                'conflicts': [
+                    {'index': index, 'conflicts': conflicts} for index, conflicts in sorted(clashes.items())
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if serializer.validated_data['dry_run']:
+            return Response({'detail': 'No conflicts found.', 'entries': len(entries)})
+
+        try:
+            with transaction.atomic():
+                created = Timetable.objects.bulk_create([
+                    Timetable(**entry, created_by=request.user, updated_by=request.user) for entry in entries
+                ])
+        except IntegrityError:
+            return Response(
+                {'detail': 'An entry for the same section, day, period and start date already exists.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(TimetableSerializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Generate timetable",
+        description=(
+            "Build a clash-free weekly timetable for all (or the given) sections from subject "
+            "assignments, class periods, classroom capacities and existing lab schedules. "
+            "The sections' current timetable is closed the day before effective_from."
+        ),
+        request=TimetableGenerateSerializer,
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['Academic - Timetable']
+    )
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        college_id = self.get_college_id(required=True)
+        serializer = TimetableGenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        generator = TimetableGenerator(
+            college_id,
+            options['effective_from'],
+            user=request.user,
+            section_ids=options.get('sections'),
+            days=options.get('days'),
+            seed=options['seed'],
+        )
+        summary = generator.generate(dry_run=options['dry_run'], allow_partial=options['allow_partial'])
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Free slots for a teacher, classroom or section",
+        parameters=[
+            OpenApiParameter(name='teacher', type=OpenApiTypes.UUID, description='Teacher (user) ID'),
+            OpenApiParameter(name='classroom', type=OpenApiTypes.INT, description='Classroom ID'),
+            OpenApiParameter(name='section', type=OpenApiTypes.INT, description='Section ID'),
+            OpenApiParameter(name='days', type=OpenApiTypes.STR, description='Comma separated days (0-6)'),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+        tags=['Academic - Timetable']
+    )
+    @action(detail=False, methods=['get'], url_path='free-slots')
+    def free_slots(self, request):
+        college_id = self.get_college_id(required=True)
+        params = TimetableFreeSlotsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        resource = next(name for name in ('teacher', 'classroom', 'section') if params.validated_data.get(name))
+        resource_id = params.validated_data[resource]
+        days = params.validated_data.get('days') or DAYS_OF_WEEK
+
+        occupancy = TimetableOccupancy.load(college_id, days=days, **{f'{resource}_ids': [resource_id]})
+        return Response({
+            'resource': resource,
+            'resource_id': resource_id,
+            'free_slots': occupancy.free_slots(resource, resource_id, days),
+        })
+
 
 # ============================================================================
 # LAB SCHEDULE VIEWSET
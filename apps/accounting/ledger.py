@@ -0,0 +1,313 @@
+"""
+Account ledger posting.
+
+AccountTransaction rows of an account form a running-balance ledger in
+(date, id) order: balance_after is the account balance once the row is
+applied and Account.balance is the balance after the last row. Credits add
+to the balance, debits subtract from it. Both are maintained here, inside
+the posting transaction:
+
+- postings lock the account row (SELECT ... FOR UPDATE), so appends to one
+  account are serialized while other accounts post in parallel;
+- an append is one INSERT plus one F() UPDATE of Account.balance;
+- a back-dated entry is inserted with the balance at its date and every
+  later row is rebased with one UPDATE adding the entry's amount;
+- post_vouchers writes a batch of vouchers with bulk INSERTs and, per
+  account, recomputes balance_after from the batch's earliest date with one
+  windowed UPDATE (running sum over the rows from that date on);
+- closing a financial year (only once it has ended) stores one
+  AccountBalanceSnapshot per account and locks the period: later postings
+  dated inside it are rejected; open_date() gives the first open day for
+  automatic postings.
+  Statements and trial balances read the latest snapshot plus the
+  transactions after it instead of the whole history.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Account, AccountBalanceSnapshot, AccountTransaction, FinancialYear, Voucher
+
+CREDIT = 'credit'
+DEBIT = 'debit'
+TRANSACTION_TYPES = (CREDIT, DEBIT)
+VOUCHER_TRANSACTION_TYPES = {'receipt': CREDIT, 'payment': DEBIT}
+BATCH_SIZE = 1000
+ZERO = Decimal('0.00')
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+SIGNED_AMOUNT = Case(
+    When(transaction_type=CREDIT, then=F('amount')),
+    default=-F('amount'),
+    output_field=MONEY,
+)
+
+
+def signed(transaction_type, amount):
+    amount = Decimal(amount)
+    return amount if transaction_type == CREDIT else -amount
+
+
+def _signed_total(transactions):
+    return transactions.aggregate(total=Coalesce(Sum(SIGNED_AMOUNT), Value(ZERO), output_field=MONEY))['total']
+
+
+def _ensure_open(college_id, dates):
+    closed = FinancialYear.objects.all_colleges().filter(
+        college_id=college_id, closed_at__isnull=False, end_date__gte=min(dates)
+    ).values_list('year', flat=True).first()
+    if closed:
+        raise ValidationError(f"Financial year {closed} is closed for posting.")
+
+
+def open_date(college_id, date):
+    """date, or the day after the college's last closed financial year when date falls inside it."""
+    closed_end = FinancialYear.objects.all_colleges().filter(
+        college_id=college_id, closed_at__isnull=False, end_date__gte=date
+    ).order_by('-end_date').values_list('end_date', flat=True).first()
+    return date if closed_end is None else closed_end + timedelta(days=1)
+
+
+def _lock_accounts(account_ids):
+    return {
+        account.pk: account
+        for account in Account.objects.all_colleges().select_for_update().filter(pk__in=account_ids).order_by('pk')
+    }
+
+
+def post(account, transaction_type, amount, date, description, reference_type=None, reference_id=None, user=None):
+    """Post one entry to the account and return the AccountTransaction."""
+    delta = signed(transaction_type, amount)
+    with transaction.atomic():
+        account = _lock_accounts([account.pk])[account.pk]
+        _ensure_open(account.college_id, [date])
+        later = AccountTransaction.objects.filter(account_id=account.pk, date__gt=date)
+        balance_before = account.balance - _signed_total(later)
+        entry = AccountTransaction.objects.create(
+            account=account,
+            transaction_type=transaction_type,
+            amount=amount,
+            date=date,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            description=description,
+            balance_after=balance_before + delta,
+            created_by=user,
+            updated_by=user,
+        )
+        later.update(balance_after=F('balance_after') + delta)
+        Account.objects.all_colleges().filter(pk=account.pk).update(
+            balance=F('balance') + delta, updated_at=timezone.now()
+        )
+    return entry
+
+
+def rebase(account_id, start_date, opening):
+    """Recompute balance_after of the account's rows dated start_date or later with one UPDATE."""
+    window = AccountTransaction.objects.filter(account_id=account_id, date__gte=start_date)
+    running = window.filter(
+        Q(date__lt=OuterRef('date')) | Q(date=OuterRef('date'), pk__lte=OuterRef('pk'))
+    ).order_by().values('account_id').annotate(total=Sum(SIGNED_AMOUNT)).values('total')
+    window.update(balance_after=Value(opening, output_field=MONEY) + Subquery(running, output_field=MONEY))
+
+
+def post_vouchers(college_id, entries, user=None):
+    """
+    Create vouchers with their account transactions.
+
+    entries are dicts with account (id), voucher_number, voucher_type,
+    transaction_type, amount, date and description. Returns the vouchers.
+    """
+    by_account = defaultdict(list)
+    for entry in entries:
+        by_account[entry['account']].append(entry)
+
+    with transaction.atomic():
+        accounts = _lock_accounts(list(by_account))
+        _ensure_open(college_id, [entry['date'] for entry in entries])
+        # Balance of each account just before its earliest entry, from the rows already posted
+        openings = {}
+        for account_id, account_entries in by_account.items():
+            start = min(entry['date'] for entry in account_entries)
+            later = AccountTransaction.objects.filter(account_id=account_id, date__gte=start)
+            openings[account_id] = (start, accounts[account_id].balance - _signed_total(later))
+
+        vouchers = Voucher.objects.bulk_create([
+            Voucher(
+                college_id=college_id,
+                account_id=entry['account'],
+                voucher_number=entry['voucher_number'],
+                voucher_type=entry['voucher_type'],
+                amount=entry['amount'],
+                date=entry['date'],
+                description=entry['description'],
+                created_by=user,
+                updated_by=user,
+            )
+            for entry in entries
+        ], batch_size=BATCH_SIZE)
+        AccountTransaction.objects.bulk_create([
+            AccountTransaction(
+                account_id=entry['account'],
+                transaction_type=entry['transaction_type'],
+                amount=entry['amount'],
+                date=entry['date'],
+                reference_type='voucher',
+                reference_id=voucher.pk,
+                description=entry['description'],
+                balance_after=ZERO,
+                created_by=user,
+                updated_by=user,
+            )
+            for entry, voucher in zip(entries, vouchers)
+        ], batch_size=BATCH_SIZE)
+
+        now = timezone.now()
+        for account_id, account_entries in by_account.items():
+            start, opening = openings[account_id]
+            rebase(account_id, start, opening)
+            delta = sum((signed(e['transaction_type'], e['amount']) for e in account_entries), ZERO)
+            Account.objects.all_colleges().filter(pk=account_id).update(balance=F('balance') + delta, updated_at=now)
+    return vouchers
+
+
+def close_financial_year(financial_year, user=None):
+    """
+    Snapshot every account of the college at the year's end and close the
+    period; raises ValidationError while the year has not ended yet.
+    """
+    college_id = financial_year.college_id
+    end = financial_year.end_date
+    if end >= timezone.localdate():
+        raise ValidationError(f"Financial year {financial_year.year} has not ended yet.")
+    with transaction.atomic():
+        account_ids = list(Account.objects.all_colleges().filter(college_id=college_id).values_list('pk', flat=True))
+        _lock_accounts(account_ids)
+        previous = dict(AccountBalanceSnapshot.objects.filter(
+            account_id__in=account_ids, closing_date__lt=financial_year.start_date,
+        ).order_by('account_id', 'closing_date').values_list('account_id', 'closing_balance'))
+        totals = {
+            row['account_id']: row
+            for row in AccountTransaction.objects.filter(
+                account_id__in=account_ids, date__range=(financial_year.start_date, end),
+            ).values('account_id').annotate(
+                credits=Sum('amount', filter=Q(transaction_type=CREDIT)),
+                debits=Sum('amount', filter=~Q(transaction_type=CREDIT)),
+                count=Count('id'),
+            ).order_by()
+        }
+        last_balance = AccountTransaction.objects.filter(
+            account_id=OuterRef('pk'), date__lte=end,
+        ).order_by('-date', '-pk').values('balance_after')[:1]
+        closings = dict(Account.objects.all_colleges().filter(pk__in=account_ids).annotate(
+            closing=Subquery(last_balance, output_field=MONEY)
+        ).values_list('pk', 'closing'))
+
+        snapshots = []
+        for account_id in account_ids:
+            row = totals.get(account_id, {})
+            credits, debits = row.get('credits') or ZERO, row.get('debits') or ZERO
+            closing = closings.get(account_id)
+            if closing is None:
+                closing = previous.get(account_id, ZERO)
+            snapshots.append(AccountBalanceSnapshot(
+                account_id=account_id,
+                financial_year=financial_year,
+                closing_date=end,
+                opening_balance=closing - credits + debits,
+                total_credits=credits,
+                total_debits=debits,
+                closing_balance=closing,
+                transaction_count=row.get('count', 0),
+                created_by=user,
+                updated_by=user,
+            ))
+        AccountBalanceSnapshot.objects.bulk_create(
+            snapshots,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['account', 'financial_year'],
+            update_fields=[
+                'closing_date', 'opening_balance', 'total_credits', 'total_debits',
+                'closing_balance', 'transaction_count', 'updated_by', 'updated_at',
+            ],
+        )
+        FinancialYear.objects.all_colleges().filter(pk=financial_year.pk).update(
+            closed_at=timezone.now(), updated_by=user
+        )
+    return snapshots
+
+
+def _latest_snapshots(account_ids, before):
+    """account_id -> (closing_date, closing_balance) of the latest snapshot closing before `before`."""
+    rows = AccountBalanceSnapshot.objects.filter(
+        account_id__in=account_ids, closing_date__lt=before,
+    ).order_by('account_id', 'closing_date').values_list('account_id', 'closing_date', 'closing_balance')
+    return {account_id: (closing_date, balance) for account_id, closing_date, balance in rows}
+
+
+def statement(account, start_date, end_date):
+    """Opening balance, entries and closing balance of the account between two dates."""
+    transactions = AccountTransaction.objects.filter(account_id=account.pk)
+    snapshot = _latest_snapshots([account.pk], start_date).get(account.pk)
+    if snapshot:
+        closing_date, balance = snapshot
+        opening = balance + _signed_total(transactions.filter(date__gt=closing_date, date__lt=start_date))
+    else:
+        opening = account.balance - _signed_total(transactions.filter(date__gte=start_date))
+    entries = list(transactions.filter(date__range=(start_date, end_date)).order_by('date', 'pk'))
+    credits = sum((e.amount for e in entries if e.transaction_type == CREDIT), ZERO)
+    debits = sum((e.amount for e in entries if e.transaction_type != CREDIT), ZERO)
+    return {
+        'account': account.pk,
+        'start_date': start_date,
+        'end_date': end_date,
+        'opening_balance': opening,
+        'total_credits': credits,
+        'total_debits': debits,
+        'closing_balance': opening + credits - debits,
+        'transactions': entries,
+    }
+
+
+def trial_balance(college_id, as_of):
+    """Per-account opening (latest snapshot), credits and debits since, and balance on as_of."""
+    accounts = list(Account.objects.all_colleges().filter(college_id=college_id).order_by('account_name', 'pk'))
+    account_ids = [account.pk for account in accounts]
+    snapshots = _latest_snapshots(account_ids, as_of)
+    # Accounts without a snapshot read their whole history; the rest only the tail after it
+    tail = Q(account_id__in=[pk for pk in account_ids if pk not in snapshots])
+    for account_id, (closing_date, _) in snapshots.items():
+        tail |= Q(account_id=account_id, date__gt=closing_date)
+    totals = {
+        row['account_id']: row
+        for row in AccountTransaction.objects.filter(tail).values('account_id').annotate(
+            credits=Sum('amount', filter=Q(transaction_type=CREDIT, date__lte=as_of)),
+            debits=Sum('amount', filter=~Q(transaction_type=CREDIT) & Q(date__lte=as_of)),
+            later=Sum(SIGNED_AMOUNT, filter=Q(date__gt=as_of)),
+        ).order_by()
+    }
+
+    rows = []
+    for account in accounts:
+        row = totals.get(account.pk, {})
+        credits, debits = row.get('credits') or ZERO, row.get('debits') or ZERO
+        if account.pk in snapshots:
+            opening = snapshots[account.pk][1]
+        else:
+            opening = account.balance - (row.get('later') or ZERO) - credits + debits
+        rows.append({
+            'account': account.pk,
+            'account_name': account.account_name,
+            'opening_balance': opening,
+            'total_credits': credits,
+            'total_debits': debits,
+            'balance': opening + credits - debits,
+        })
+    return rows
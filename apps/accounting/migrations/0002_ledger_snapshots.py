@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialyear',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True, help_text='Indicates if the record is active (soft delete)')),
+                ('closing_date', models.DateField()),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_credits', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_debits', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('closing_balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='accounting.account')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('financial_year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='accounting.financialyear')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'account_balance_snapshot',
+                'indexes': [models.Index(fields=['account', 'closing_date'], name='account_bal_account_a1b295_idx')],
+                'unique_together': {('account', 'financial_year')},
+            },
+        ),
+    ]
@@ -63,6 +63,7 @@ class FinancialYear(CollegeScopedModel):
     start_date = models.DateField()
     end_date = models.DateField()
     is_current = models.BooleanField(default=False)
+    closed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = 'financial_year'
@@ -153,3 +154,25 @@ class AccountTransaction(AuditModel):
 
     def __str__(self):
         return f"{self.transaction_type} {self.amount} on {self.date}"
+
+
+class AccountBalanceSnapshot(AuditModel):
+    """Closing balance of an account at the end of a closed financial year."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='snapshots')
+    financial_year = models.ForeignKey(FinancialYear, on_delete=models.CASCADE, related_name='snapshots')
+    closing_date = models.DateField()
+    opening_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    total_credits = models.DecimalField(max_digits=12, decimal_places=2)
+    total_debits = models.DecimalField(max_digits=12, decimal_places=2)
+    closing_balance = models.DecimalField(max_digits=12, decimal_places=2)
+    transaction_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'account_balance_snapshot'
+        unique_together = ['account', 'financial_year']
+        indexes = [
+            models.Index(fields=['account', 'closing_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.account} closing {self.closing_balance} on {self.closing_date}"
@@ -1,5 +1,10 @@
+from collections import Counter
+from decimal import Decimal
+
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 
+from .ledger import TRANSACTION_TYPES, VOUCHER_TRANSACTION_TYPES, post
 from .models import (
     IncomeCategory,
     ExpenseCategory,
@@ -9,6 +14,7 @@ from .models import (
     Voucher,
     FinancialYear,
     AccountTransaction,
+    AccountBalanceSnapshot,
 )
 
 
@@ -29,6 +35,11 @@ class AccountSerializer(serializers.ModelSerializer):
         model = Account
         fields = '__all__'
 
+    def update(self, instance, validated_data):
+        # After creation the balance is maintained by ledger postings only
+        validated_data.pop('balance', None)
+        return super().update(instance, validated_data)
+
 
 class FinancialYearSerializer(serializers.ModelSerializer):
     class Meta:
@@ -55,6 +66,82 @@ class VoucherSerializer(serializers.ModelSerializer):
 
 
 class AccountTransactionSerializer(serializers.ModelSerializer):
+    transaction_type = serializers.ChoiceField(choices=TRANSACTION_TYPES)
+
     class Meta:
         model = AccountTransaction
         fields = '__all__'
+        read_only_fields = ['balance_after']
+
+    def create(self, validated_data):
+        # Postings go through the ledger, which sets balance_after and the account balance
+        try:
+            return post(
+                validated_data['account'],
+                validated_data['transaction_type'],
+                validated_data['amount'],
+                validated_data['date'],
+                validated_data['description'],
+                reference_type=validated_data.get('reference_type'),
+                reference_id=validated_data.get('reference_id'),
+                user=validated_data.get('created_by'),
+            )
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'date': exc.messages})
+
+    def update(self, instance, validated_data):
+        changed = [
+            field for field in ('account', 'transaction_type', 'amount', 'date')
+            if field in validated_data and validated_data[field] != getattr(instance, field)
+        ]
+        if changed:
+            raise serializers.ValidationError({field: 'Posted entries cannot be changed; post a reversal.' for field in changed})
+        return super().update(instance, validated_data)
+
+
+class AccountBalanceSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AccountBalanceSnapshot
+        fields = '__all__'
+
+
+class VoucherEntrySerializer(serializers.Serializer):
+    account = serializers.IntegerField()
+    voucher_number = serializers.CharField(max_length=50)
+    voucher_type = serializers.CharField(max_length=20)
+    transaction_type = serializers.ChoiceField(choices=TRANSACTION_TYPES, required=False)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    date = serializers.DateField()
+    description = serializers.CharField()
+
+    def validate(self, attrs):
+        if 'transaction_type' not in attrs:
+            if attrs['voucher_type'] not in VOUCHER_TRANSACTION_TYPES:
+                raise serializers.ValidationError({
+                    'transaction_type': f"Required for {attrs['voucher_type']} vouchers."
+                })
+            attrs['transaction_type'] = VOUCHER_TRANSACTION_TYPES[attrs['voucher_type']]
+        return attrs
+
+
+class VoucherPostingSerializer(serializers.Serializer):
+    """A batch of vouchers to post to the college's accounts."""
+    vouchers = VoucherEntrySerializer(many=True, allow_empty=False)
+
+    def validate_vouchers(self, value):
+        college_id = self.context['college_id']
+        account_ids = {entry['account'] for entry in value}
+        found = set(Account.objects.all_colleges().filter(
+            pk__in=account_ids, college_id=college_id
+        ).values_list('pk', flat=True))
+        if account_ids - found:
+            raise serializers.ValidationError(f"Accounts not found in this college: {sorted(account_ids - found)}")
+
+        numbers = Counter(entry['voucher_number'] for entry in value)
+        repeated = sorted(number for number, count in numbers.items() if count > 1)
+        taken = sorted(Voucher.objects.all_colleges().filter(
+            voucher_number__in=list(numbers)
+        ).values_list('voucher_number', flat=True))
+        if repeated or taken:
+            raise serializers.ValidationError(f"Voucher numbers already used: {sorted(set(repeated + taken))}")
+        return value
@@ -12,9 +12,9 @@ from apps.accounting.models import (
     Expense,
     Account,
     Voucher,
-    AccountTransaction,
     IncomeCategory,
 )
+from apps.accounting.ledger import open_date, post
 
 
 def _ensure_default_account(college):
@@ -30,22 +30,16 @@ def _ensure_default_account(college):
 
 
 def _create_transaction(account, txn_type, amount, reference_type, reference_id, description, user):
-    amount = Decimal(amount)
-    new_balance = account.balance + amount if txn_type == 'credit' else account.balance - amount
-    account.balance = new_balance
-    account.save(update_fields=['balance', 'updated_at'])
-
-    AccountTransaction.objects.create(
-        account=account,
-        transaction_type=txn_type,
-        amount=amount,
-        date=timezone.now().date(),
+    # Automatic postings go to the open period, never into a closed financial year
+    post(
+        account,
+        txn_type,
+        Decimal(amount),
+        open_date(account.college_id, timezone.localdate()),
+        description,
         reference_type=reference_type,
         reference_id=reference_id,
-        description=description,
-        balance_after=new_balance,
-        created_by=user,
-        updated_by=user,
+        user=user,
     )
 
 
@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounting.ledger import close_financial_year, post, post_vouchers, statement, trial_balance
+from apps.accounting.models import (
+    Account, AccountBalanceSnapshot, AccountTransaction, FinancialYear, Income, IncomeCategory,
+)
+from apps.accounts.models import User, UserType
+from apps.core.models import College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+
+
+class AccountLedgerTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="ACL",
+            name="Ledger College",
+            short_name="ACL",
+            email="info@acl.test",
+            phone="9999999986",
+            address_line1="1 Balance Rd",
+            city="City",
+            state="State",
+            pincode="000018",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+        self.admin = User.objects.create_user(
+            username="acl_admin",
+            email="admin@acl.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+        self.bank = Account.objects.create(
+            college=self.college, account_name="Bank", account_number="001", bank_name="First", balance=1000,
+        )
+        self.cash = Account.objects.create(
+            college=self.college, account_name="Cash", account_number="002", bank_name="N/A",
+        )
+
+    def _running(self, account):
+        return list(AccountTransaction.objects.filter(account=account).order_by('date', 'id').values_list(
+            'date', 'balance_after'
+        ))
+
+    def _balance(self, account):
+        return Account.objects.all_colleges().values_list('balance', flat=True).get(pk=account.pk)
+
+    def test_back_dated_post_rebases_later_entries(self):
+        post(self.bank, 'credit', 500, date(2025, 1, 10), "Fees")
+        post(self.bank, 'debit', 200, date(2025, 1, 20), "Rent")
+        post(self.bank, 'credit', 100, date(2025, 1, 15), "Late fee")
+
+        self.assertEqual(self._running(self.bank), [
+            (date(2025, 1, 10), Decimal('1500.00')),
+            (date(2025, 1, 15), Decimal('1600.00')),
+            (date(2025, 1, 20), Decimal('1400.00')),
+        ])
+        self.assertEqual(self._balance(self.bank), Decimal('1400.00'))
+
+        self.bank.refresh_from_db()
+        report = statement(self.bank, date(2025, 1, 12), date(2025, 1, 31))
+        self.assertEqual(
+            (report['opening_balance'], report['total_credits'], report['total_debits'], report['closing_balance']),
+            (Decimal('1500.00'), Decimal('100.00'), Decimal('200.00'), Decimal('1400.00')),
+        )
+
+    def test_voucher_batch_and_year_close(self):
+        post(self.bank, 'credit', 300, date(2025, 3, 1), "Grant")
+        post_vouchers(self.college.id, [
+            {'account': self.bank.id, 'voucher_number': 'V-1', 'voucher_type': 'payment',
+             'transaction_type': 'debit', 'amount': Decimal('50'), 'date': date(2025, 2, 1), 'description': 'Ink'},
+            {'account': self.cash.id, 'voucher_number': 'V-2', 'voucher_type': 'receipt',
+             'transaction_type': 'credit', 'amount': Decimal('80'), 'date': date(2025, 3, 5), 'description': 'Sale'},
+            {'account': self.bank.id, 'voucher_number': 'V-3', 'voucher_type': 'receipt',
+             'transaction_type': 'credit', 'amount': Decimal('20'), 'date': date(2025, 4, 2), 'description': 'Fine'},
+        ], user=self.admin)
+        self.assertEqual(self._running(self.bank), [
+            (date(2025, 2, 1), Decimal('950.00')),
+            (date(2025, 3, 1), Decimal('1250.00')),
+            (date(2025, 4, 2), Decimal('1270.00')),
+        ])
+        self.assertEqual((self._balance(self.bank), self._balance(self.cash)), (Decimal('1270.00'), Decimal('80.00')))
+
+        year = FinancialYear.objects.create(
+            college=self.college, year="2024-25", start_date=date(2024, 4, 1), end_date=date(2025, 3, 31),
+        )
+        close_financial_year(year, user=self.admin)
+        snapshot = AccountBalanceSnapshot.objects.get(account=self.bank, financial_year=year)
+        self.assertEqual(
+            (snapshot.opening_balance, snapshot.closing_balance, snapshot.transaction_count),
+            (Decimal('1000.00'), Decimal('1250.00'), 2),
+        )
+        with self.assertRaises(ValidationError):
+            post(self.cash, 'credit', 10, date(2025, 3, 31), "Too late")
+
+        post(self.cash, 'debit', 30, date(2025, 4, 5), "Tea")
+        rows = {row['account']: row for row in trial_balance(self.college.id, date(2025, 4, 30))}
+        self.assertEqual(
+            (rows[self.bank.id]['opening_balance'], rows[self.bank.id]['balance']),
+            (Decimal('1250.00'), Decimal('1270.00')),
+        )
+        self.assertEqual(
+            (rows[self.cash.id]['total_debits'], rows[self.cash.id]['balance']), (Decimal('30.00'), Decimal('50.00'))
+        )
+
+    def test_year_closes_only_once_ended_and_signals_post_after_it(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        today = timezone.localdate()
+        year = FinancialYear.objects.create(
+            college=self.college, year="Running", start_date=today - timedelta(days=30), end_date=today,
+        )
+        response = client.post(
+            reverse('financialyear-close', args=[year.id]), **{'HTTP_X_COLLEGE_ID': str(self.college.id)}
+        )
+        self.assertEqual(response.status_code, 400)
+        set_current_college_id(self.college.id)
+        self.assertFalse(AccountBalanceSnapshot.objects.exists())
+
+        # A year closed early (before the check existed) does not break automatic postings
+        FinancialYear.objects.all_colleges().filter(pk=year.pk).update(
+            end_date=today + timedelta(days=5), closed_at=timezone.now()
+        )
+        category = IncomeCategory.objects.create(college=self.college, name="Donations", code="DON")
+        income = Income.objects.create(
+            college=self.college, category=category, amount=40, date=today, description="Gift",
+        )
+        entry = AccountTransaction.objects.get(reference_type='income', reference_id=income.id)
+        self.assertEqual((entry.date, entry.amount), (today + timedelta(days=6), Decimal('40.00')))
+
+    def test_bulk_post_api_validates_batch(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        headers = {'HTTP_X_COLLEGE_ID': str(self.college.id)}
+        voucher = {
+            'account': self.cash.id, 'voucher_number': 'B-1', 'voucher_type': 'receipt',
+            'amount': '25.00', 'date': '2025-05-01', 'description': 'Donation',
+        }
+        response = client.post(reverse('voucher-bulk-post'), {'vouchers': [voucher, voucher]}, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(reverse('voucher-bulk-post'), {'vouchers': [voucher]}, format='json', **headers)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self._balance(self.cash), Decimal('25.00'))
+
+        response = client.get(
+            reverse('account-statement', args=[self.cash.id]),
+            {'start_date': '2025-05-01', 'end_date': '2025-05-31'},
+            **headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['balance_after'] for row in response.data['transactions']], ['25.00'])
+
+        # Posted entries cannot be deleted; a reversing entry corrects them
+        entry = AccountTransaction.objects.get(account=self.cash)
+        response = client.delete(reverse('accounttransaction-detail', args=[entry.id]), **headers)
+        self.assertEqual(response.status_code, 405)
+        set_current_college_id(self.college.id)
+        self.assertTrue(AccountTransaction.objects.filter(pk=entry.pk).exists())
+        self.assertEqual(self._balance(self.cash), Decimal('25.00'))
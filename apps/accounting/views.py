@@ -1,5 +1,10 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
@@ -23,7 +28,24 @@ from .serializers import (
     VoucherSerializer,
     FinancialYearSerializer,
     AccountTransactionSerializer,
+    AccountBalanceSnapshotSerializer,
+    VoucherPostingSerializer,
 )
+from .ledger import close_financial_year, post_vouchers, statement, trial_balance
+
+
+def _date_params(request, *names):
+    """Parse YYYY-MM-DD query params; returns None when one is missing or invalid."""
+    values = []
+    for name in names:
+        try:
+            value = parse_date(request.query_params.get(name, ''))
+        except ValueError:
+            value = None
+        if value is None:
+            return None
+        values.append(value)
+    return values
 
 
 class IncomeCategoryViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
@@ -58,6 +80,31 @@ class AccountViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['account_name', 'created_at']
     ordering = ['account_name']
 
+    @action(detail=True, methods=['get'])
+    def statement(self, request, pk=None):
+        """Opening balance, entries and closing balance between `?start_date=` and `?end_date=`."""
+        dates = _date_params(request, 'start_date', 'end_date')
+        if dates is None or dates[0] > dates[1]:
+            return Response(
+                {'detail': 'start_date and end_date (YYYY-MM-DD, start first) are required.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = statement(self.get_object(), *dates)
+        data['transactions'] = AccountTransactionSerializer(data['transactions'], many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='trial-balance')
+    def trial_balance(self, request):
+        """Balances of the college's accounts on `?as_of=` (default today)."""
+        college_id = self.get_college_id(required=True)
+        as_of = timezone.localdate()
+        if 'as_of' in request.query_params:
+            dates = _date_params(request, 'as_of')
+            if dates is None:
+                return Response({'detail': 'as_of must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+            as_of = dates[0]
+        return Response({'as_of': as_of, 'accounts': trial_balance(college_id, as_of)}, status=status.HTTP_200_OK)
+
 
 class FinancialYearViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     queryset = FinancialYear.objects.all_colleges()
@@ -68,6 +115,16 @@ class FinancialYearViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['start_date', 'year']
     ordering = ['-start_date']
 
+    @action(detail=True, methods=['post'])
+    def close(self, request, pk=None):
+        """Snapshot every account's balance at the year's end and close the year for posting."""
+        financial_year = self.get_object()
+        try:
+            snapshots = close_financial_year(financial_year, user=request.user)
+        except DjangoValidationError as exc:
+            return Response({'detail': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(AccountBalanceSnapshotSerializer(snapshots, many=True).data, status=status.HTTP_200_OK)
+
 
 class IncomeViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     queryset = Income.objects.all_colleges()
@@ -102,6 +159,18 @@ class VoucherViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date']
 
+    @action(detail=False, methods=['post'], url_path='bulk-post')
+    def bulk_post(self, request):
+        """Create a batch of vouchers and post them to their accounts in one transaction."""
+        college_id = self.get_college_id(required=True)
+        serializer = VoucherPostingSerializer(data=request.data, context={'college_id': college_id})
+        serializer.is_valid(raise_exception=True)
+        try:
+            vouchers = post_vouchers(college_id, serializer.validated_data['vouchers'], user=request.user)
+        except DjangoValidationError as exc:
+            return Response({'detail': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(VoucherSerializer(vouchers, many=True).data, status=status.HTTP_201_CREATED)
+
 
 class AccountTransactionViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelViewSet):
     queryset = AccountTransaction.objects.select_related('account')
@@ -113,3 +182,4 @@ class AccountTransactionViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelVi
     ordering_fields = ['date', 'amount', 'created_at']
     ordering = ['-date']
     related_college_lookup = 'account__college_id'
+    http_method_names = ['get', 'post', 'put', 'patch']  # No DELETE: post a reversing entry instead
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from apps.core.search import create_search_indexes, drop_search_indexes
+
+# Must match UserViewSet.search_fields
+USER_SEARCH_FIELDS = ['username', 'email', 'first_name', 'last_name', 'phone']
+
+
+def create_indexes(apps, schema_editor):
+    create_search_indexes(schema_editor, 'user', USER_SEARCH_FIELDS)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor, 'user')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_department_is_organizational_position_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -45,6 +45,8 @@ from .serializers import (
     BulkUserTypeUpdateSerializer,
 )
 from apps.core.mixins import CollegeScopedModelViewSet, CollegeScopedReadOnlyModelViewSet
+from apps.core.exports import ExportColumn, StreamingExportMixin
+from apps.core.search import DirectorySearchFilter
 
 
 # ============================================================================
@@ -191,7 +193,7 @@ class LoginViewNoAuth(DRALoginView):
         tags=['Users']
     ),
 )
-class UserViewSet(CollegeScopedModelViewSet):
+class UserViewSet(StreamingExportMixin, CollegeScopedModelViewSet):
     """
     ViewSet for managing users in the college-scoped system.
 
@@ -200,11 +202,25 @@ class UserViewSet(CollegeScopedModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, DirectorySearchFilter]
     filterset_fields = ['user_type', 'is_active', 'is_verified', 'is_staff', 'college', 'gender']
     search_fields = ['username', 'email', 'first_name', 'last_name', 'phone']
     ordering_fields = ['username', 'email', 'date_joined', 'last_login']
     ordering = ['-date_joined']
+    export_filename = 'users_export'
+    export_columns = [
+        ExportColumn('ID', 'id', formatter=str),
+        ExportColumn('Username', 'username'),
+        ExportColumn('Email', 'email'),
+        ExportColumn(
+            'Full Name', 'first_name', 'middle_name', 'last_name',
+            formatter=lambda first, middle, last: ' '.join(p for p in (first, middle, last) if p)
+        ),
+        ExportColumn('Type', 'user_type'),
+        ExportColumn('College', 'college__name', formatter=lambda name: name or 'N/A'),
+        ExportColumn('Is Active', 'is_active'),
+        ExportColumn('Date Joined', 'date_joined'),
+    ]
 
     def get_queryset(self):
         """
@@ -366,40 +382,6 @@ class UserViewSet(CollegeScopedModelViewSet):
         serializer = UserListSerializer(users, many=True)
         return Response(serializer.data)
 
-    @extend_schema(
-        summary="Export users",
-        description="Export filtered list of users as CSV.",
-        responses={200: OpenApiTypes.BINARY},
-        tags=['Users']
-    )
-    @action(detail=False, methods=['get'])
-    def export(self, request):
-        """Export users to CSV."""
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="users_export_{timezone.now().strftime("%Y%m%d%H%M%S")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Username', 'Email', 'Full Name', 'Type', 'College', 'Is Active', 'Date Joined'])
-
-        users = self.filter_queryset(self.get_queryset())
-        
-        for user in users:
-            writer.writerow([
-                str(user.id),
-                user.username,
-                user.email,
-                user.get_full_name(),
-                user.get_user_type_display(),
-                user.college.name if user.college else 'N/A',
-                'Yes' if user.is_active else 'No',
-                user.date_joined.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        return response
-
 
 # ============================================================================
 # ROLE VIEWSET
@@ -0,0 +1,23 @@
+"""
+Management command to rebuild the attendance rollup tables from the raw
+daily and subject attendance rows.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.attendance.rollups import rebuild_student_monthly, rebuild_student_subject
+
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly and subject-wise attendance rollups from attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--college', type=int, help='Limit to one college ID')
+
+    def handle(self, *args, **options):
+        college_id = options.get('college')
+
+        monthly = rebuild_student_monthly(college_id=college_id)
+        self.stdout.write(self.style.SUCCESS(f'Monthly attendance rows rebuilt: {monthly}'))
+
+        subject = rebuild_student_subject(college_id=college_id)
+        self.stdout.write(self.style.SUCCESS(f'Subject attendance rows rebuilt: {subject}'))
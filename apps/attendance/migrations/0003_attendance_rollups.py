@@ -0,0 +1,63 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_alter_subjectassignment_subject'),
+        ('attendance', '0002_rename_attendance_attendan_51c8d9_idx_attendance__attenda_9a811d_idx_and_more'),
+        ('core', '0004_dynamicrole_hierarchypermission_hierarchyuserrole_and_more'),
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentMonthlyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('half_day_count', models.PositiveIntegerField(default=0)),
+                ('leave_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('college', models.ForeignKey(help_text='College (denormalised)', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.college')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Student Monthly Attendance',
+                'verbose_name_plural': 'Student Monthly Attendance',
+                'db_table': 'student_monthly_attendance',
+                'indexes': [models.Index(fields=['college', 'month'], name='student_mon_college_ffcaa4_idx')],
+                'unique_together': {('student', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentSubjectAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('half_day_count', models.PositiveIntegerField(default=0)),
+                ('leave_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('college', models.ForeignKey(help_text='College (denormalised)', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.college')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_attendance_totals', to='students.student')),
+                ('subject_assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_attendance_totals', to='academic.subjectassignment')),
+            ],
+            options={
+                'verbose_name': 'Student Subject Attendance',
+                'verbose_name_plural': 'Student Subject Attendance',
+                'db_table': 'student_subject_attendance',
+                'indexes': [models.Index(fields=['subject_assignment', 'student'], name='student_sub_subject_a771d9_idx'), models.Index(fields=['college'], name='student_sub_college_3dfe5a_idx')],
+                'unique_together': {('student', 'subject_assignment')},
+            },
+        ),
+    ]
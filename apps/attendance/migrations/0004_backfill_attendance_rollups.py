@@ -0,0 +1,70 @@
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+STATUS_COUNTERS = {
+    'present': 'present_count',
+    'absent': 'absent_count',
+    'late': 'late_count',
+    'half_day': 'half_day_count',
+    'leave': 'leave_count',
+}
+
+
+def _counter_aggregates():
+    aggregates = {'total_count': Count('id')}
+    for status, field in STATUS_COUNTERS.items():
+        aggregates[field] = Count('id', filter=Q(status__iexact=status))
+    return aggregates
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill the rollup tables from the attendance recorded before they existed."""
+    StudentAttendance = apps.get_model('attendance', 'StudentAttendance')
+    SubjectAttendance = apps.get_model('attendance', 'SubjectAttendance')
+    StudentMonthlyAttendance = apps.get_model('attendance', 'StudentMonthlyAttendance')
+    StudentSubjectAttendance = apps.get_model('attendance', 'StudentSubjectAttendance')
+    counters = ('total_count',) + tuple(STATUS_COUNTERS.values())
+
+    StudentMonthlyAttendance.objects.all().delete()
+    StudentMonthlyAttendance.objects.bulk_create(
+        [
+            StudentMonthlyAttendance(
+                student_id=row['student_id'],
+                college_id=row['student__college_id'],
+                month=row['month'],
+                **{field: row[field] for field in counters},
+            )
+            for row in StudentAttendance.objects.annotate(month=TruncMonth('date')).values(
+                'student_id', 'student__college_id', 'month'
+            ).annotate(**_counter_aggregates()).order_by()
+        ],
+        batch_size=1000,
+    )
+
+    StudentSubjectAttendance.objects.all().delete()
+    StudentSubjectAttendance.objects.bulk_create(
+        [
+            StudentSubjectAttendance(
+                student_id=row['student_id'],
+                college_id=row['student__college_id'],
+                subject_assignment_id=row['subject_assignment_id'],
+                **{field: row[field] for field in counters},
+            )
+            for row in SubjectAttendance.objects.values(
+                'student_id', 'student__college_id', 'subject_assignment_id'
+            ).annotate(**_counter_aggregates()).order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -4,7 +4,7 @@ Provides student and staff attendance tracking.
 """
 from django.db import models
 from django.conf import settings
-from apps.core.models import TimeStampedModel
+from apps.core.models import College, TimeStampedModel
 from apps.core.managers import CollegeManager
 from apps.students.models import Student
 from apps.teachers.models import Teacher
@@ -222,3 +222,67 @@ class AttendanceNotification(TimeStampedModel):
 
     def __str__(self):
         return f"Notification for {self.attendance.student.get_full_name()} - {self.notification_type}"
+
+
+class AttendanceCounters(models.Model):
+    """
+    Status counters shared by the attendance rollup tables. Rows are kept in
+    step with the raw attendance tables by the attendance signals, using
+    F() deltas, so dashboards read percentages without scanning raw rows.
+    """
+    college = models.ForeignKey(College, on_delete=models.CASCADE, related_name='+', help_text="College (denormalised)")
+    total_count = models.PositiveIntegerField(default=0)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    half_day_count = models.PositiveIntegerField(default=0)
+    leave_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def percentage(self):
+        if not self.total_count:
+            return 0
+        return round(self.present_count * 100 / self.total_count, 2)
+
+
+class StudentMonthlyAttendance(AttendanceCounters):
+    """Daily attendance counters per student per calendar month."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='monthly_attendance')
+    month = models.DateField(help_text="First day of the month")
+
+    class Meta:
+        db_table = 'student_monthly_attendance'
+        verbose_name = 'Student Monthly Attendance'
+        verbose_name_plural = 'Student Monthly Attendance'
+        unique_together = ['student', 'month']
+        indexes = [
+            models.Index(fields=['college', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.month:%Y-%m}: {self.present_count}/{self.total_count}"
+
+
+class StudentSubjectAttendance(AttendanceCounters):
+    """Subject attendance counters per student per subject assignment."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='subject_attendance_totals')
+    subject_assignment = models.ForeignKey(
+        SubjectAssignment, on_delete=models.CASCADE, related_name='student_attendance_totals'
+    )
+
+    class Meta:
+        db_table = 'student_subject_attendance'
+        verbose_name = 'Student Subject Attendance'
+        verbose_name_plural = 'Student Subject Attendance'
+        unique_together = ['student', 'subject_assignment']
+        indexes = [
+            models.Index(fields=['subject_assignment', 'student']),
+            models.Index(fields=['college']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} / {self.subject_assignment_id}: {self.present_count}/{self.total_count}"
@@ -0,0 +1,185 @@
+"""
+Incremental maintenance of the attendance rollup tables.
+
+Every StudentAttendance / SubjectAttendance write turns into a small set of
+counter deltas (+1 on create, -1/+1 on a status or date change, -1 on delete)
+applied with F() expressions, so concurrent markings never lose updates.
+Decrements are clamped at zero so a counter that missed a row can never
+violate the unsigned column.
+rebuild_* recompute the tables from the raw rows for backfills and repairs.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest, TruncMonth
+
+from .models import (
+    StudentAttendance,
+    StudentMonthlyAttendance,
+    StudentSubjectAttendance,
+    SubjectAttendance,
+)
+
+STATUS_COUNTERS = {
+    'present': 'present_count',
+    'absent': 'absent_count',
+    'late': 'late_count',
+    'half_day': 'half_day_count',
+    'leave': 'leave_count',
+}
+COUNTER_FIELDS = ('total_count',) + tuple(STATUS_COUNTERS.values())
+
+
+def status_counter(status):
+    """Counter field for a status; statuses are stored in mixed case."""
+    return STATUS_COUNTERS.get((status or '').strip().lower())
+
+
+def _deltas(status, sign):
+    deltas = {'total_count': sign}
+    counter = status_counter(status)
+    if counter:
+        deltas[counter] = sign
+    return deltas
+
+
+def apply_delta(model, keys, deltas, college_id):
+    """
+    Add `deltas` to the counters of the rollup row identified by `keys`,
+    creating the row on first use.
+    """
+    updates = {
+        field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items() if delta
+    }
+    if not updates:
+        return
+    if model.objects.filter(**keys).update(**updates):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Nothing to decrement (row predates the rollups); rebuild fixes it
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(college_id=college_id, **keys, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**keys).update(**updates)
+
+
+def _month(value):
+    return value.replace(day=1)
+
+
+def student_attendance_changed(instance, previous=None, deleted=False):
+    """
+    Update StudentMonthlyAttendance for a saved or deleted StudentAttendance.
+    `previous` is the row's (status, date) as stored before this write.
+    """
+    current = (instance.status, instance.date)
+    if previous == current and not deleted:
+        return
+    college_id = instance.student.college_id
+    if previous:
+        old_status, old_date = previous
+        apply_delta(
+            StudentMonthlyAttendance,
+            {'student_id': instance.student_id, 'month': _month(old_date)},
+            _deltas(old_status, -1),
+            college_id,
+        )
+    if not deleted:
+        apply_delta(
+            StudentMonthlyAttendance,
+            {'student_id': instance.student_id, 'month': _month(instance.date)},
+            _deltas(instance.status, 1),
+            college_id,
+        )
+
+
+def subject_attendance_changed(instance, previous=None, deleted=False):
+    """
+    Update StudentSubjectAttendance for a saved or deleted SubjectAttendance.
+    `previous` is the row's (status, subject_assignment_id) before this write.
+    """
+    current = (instance.status, instance.subject_assignment_id)
+    if previous == current and not deleted:
+        return
+    college_id = instance.student.college_id
+    if previous:
+        old_status, old_assignment_id = previous
+        apply_delta(
+            StudentSubjectAttendance,
+            {'student_id': instance.student_id, 'subject_assignment_id': old_assignment_id},
+            _deltas(old_status, -1),
+            college_id,
+        )
+    if not deleted:
+        apply_delta(
+            StudentSubjectAttendance,
+            {'student_id': instance.student_id, 'subject_assignment_id': instance.subject_assignment_id},
+            _deltas(instance.status, 1),
+            college_id,
+        )
+
+
+def _counter_aggregates():
+    aggregates = {'total_count': Count('id')}
+    for status, field in STATUS_COUNTERS.items():
+        aggregates[field] = Count('id', filter=Q(status__iexact=status))
+    return aggregates
+
+
+def rebuild_student_monthly(student_ids=None, college_id=None):
+    """Recompute StudentMonthlyAttendance from StudentAttendance."""
+    source = StudentAttendance.objects.all_colleges()
+    targets = StudentMonthlyAttendance.objects.all()
+    if student_ids is not None:
+        source = source.filter(student_id__in=student_ids)
+        targets = targets.filter(student_id__in=student_ids)
+    if college_id:
+        source = source.filter(student__college_id=college_id)
+        targets = targets.filter(college_id=college_id)
+
+    rows = [
+        StudentMonthlyAttendance(
+            student_id=row['student_id'],
+            college_id=row['student__college_id'],
+            month=row['month'],
+            **{field: row[field] for field in COUNTER_FIELDS},
+        )
+        for row in source.annotate(month=TruncMonth('date')).values(
+            'student_id', 'student__college_id', 'month'
+        ).annotate(**_counter_aggregates()).order_by()
+    ]
+    with transaction.atomic():
+        targets.delete()
+        StudentMonthlyAttendance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_student_subject(student_ids=None, college_id=None):
+    """Recompute StudentSubjectAttendance from SubjectAttendance."""
+    source = SubjectAttendance.objects.all_colleges()
+    targets = StudentSubjectAttendance.objects.all()
+    if student_ids is not None:
+        source = source.filter(student_id__in=student_ids)
+        targets = targets.filter(student_id__in=student_ids)
+    if college_id:
+        source = source.filter(student__college_id=college_id)
+        targets = targets.filter(college_id=college_id)
+
+    rows = [
+        StudentSubjectAttendance(
+            student_id=row['student_id'],
+            college_id=row['student__college_id'],
+            subject_assignment_id=row['subject_assignment_id'],
+            **{field: row[field] for field in COUNTER_FIELDS},
+        )
+        for row in source.values(
+            'student_id', 'student__college_id', 'subject_assignment_id'
+        ).annotate(**_counter_aggregates()).order_by()
+    ]
+    with transaction.atomic():
+        targets.delete()
+        StudentSubjectAttendance.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,175 @@
+"""
+Roster read path for the attendance marking screens.
+
+The class and subject attendance endpoints need every student of a section
+together with that day's attendance row. On a cache miss the roster is read
+LEFT JOINed to the day's attendance in one query (FilteredRelation); the
+roster part is then cached, so later requests only run a single indexed
+attendance lookup. Rosters change on enrolment events only: any Student save
+or delete bumps a per-college version that is part of the cache key.
+
+The roster cache is the 'attendance_roster' alias, which must be shared by all
+workers (Redis, see ATTENDANCE_ROSTER_CACHE_URL); a per-process cache would
+keep serving rosters another worker has invalidated. When the alias is not
+configured every request uses the joined query.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import FilteredRelation, Q
+
+from apps.students.models import Student
+from .models import StudentAttendance, SubjectAttendance
+
+ROSTER_FIELDS = ('id', 'admission_number', 'roll_number', 'first_name', 'middle_name', 'last_name')
+ROSTER_ORDERING = ('roll_number', 'first_name', 'id')
+_MARKER_FIELDS = ('marked_by__id', 'marked_by__first_name', 'marked_by__last_name')
+
+
+ROSTER_CACHE_ALIAS = 'attendance_roster'
+
+
+def _cache():
+    if ROSTER_CACHE_ALIAS not in settings.CACHES:
+        return None
+    return caches[ROSTER_CACHE_ALIAS]
+
+
+def _roster_timeout():
+    return getattr(settings, 'ATTENDANCE_ROSTER_CACHE_SECONDS', 6 * 60 * 60)
+
+
+def _version_key(college_id):
+    return f'attendance_roster_version:{college_id or "all"}'
+
+
+def _roster_key(cache, college_id, class_id, section_id):
+    version = cache.get(_version_key(college_id)) or 0
+    return f'attendance_roster:{college_id or "all"}:{class_id}:{section_id}:v{version}'
+
+
+def invalidate_rosters(college_id=None):
+    """Expire cached rosters for a college (and the unscoped 'all' view)."""
+    cache = _cache()
+    if cache is None:
+        return
+    for key in {_version_key(college_id), _version_key(None)}:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def _full_name(row):
+    parts = (row['first_name'], row['middle_name'], row['last_name'])
+    return ' '.join(part for part in parts if part)
+
+
+def _marked_by_name(first_name, last_name):
+    if not first_name:
+        return None
+    return f"{first_name} {last_name or ''}".strip()
+
+
+def _roster_queryset(class_id, section_id, college_id):
+    students = Student.objects.all_colleges().filter(
+        current_class_id=class_id, current_section_id=section_id
+    )
+    if college_id:
+        students = students.filter(college_id=college_id)
+    return students
+
+
+def _load(class_id, section_id, college_id, joined_queryset, attendance_fields, fetch_attendance):
+    """
+    Return (roster, attendance_by_student). Uses the cached roster when
+    available; otherwise reads roster and attendance together via
+    `joined_queryset` and caches the roster.
+    """
+    cache = _cache()
+    if cache is not None:
+        key = _roster_key(cache, college_id, class_id, section_id)
+        roster = cache.get(key)
+        if roster is not None:
+            return roster, fetch_attendance([row['id'] for row in roster])
+
+    roster = []
+    attendance = {}
+    for row in joined_queryset.values(*ROSTER_FIELDS, *attendance_fields).order_by(*ROSTER_ORDERING, 'att__id'):
+        if roster and roster[-1]['id'] == row['id']:
+            continue  # several matching rows (e.g. periods); keep the first like the old [:1]
+        roster.append({field: row[field] for field in ROSTER_FIELDS})
+        if row['att__id'] is not None:
+            attendance[row['id']] = {field[len('att__'):]: row[field] for field in attendance_fields}
+    if cache is not None:
+        cache.set(key, roster, _roster_timeout())
+    return roster, attendance
+
+
+def _rows(roster, attendance, fields):
+    result = []
+    for student in roster:
+        record = attendance.get(student['id'], {})
+        row = {
+            'student_id': student['id'],
+            'admission_number': student['admission_number'],
+            'roll_number': student['roll_number'],
+            'student_name': _full_name(student),
+            'attendance_id': record.get('id'),
+            'status': record.get('status'),
+        }
+        for field in fields:
+            row[field] = record.get(field)
+        row['remarks'] = record.get('remarks')
+        row['marked_by'] = record.get('marked_by__id')
+        row['marked_by_name'] = _marked_by_name(
+            record.get('marked_by__first_name'), record.get('marked_by__last_name')
+        )
+        result.append(row)
+    return result
+
+
+def class_attendance_rows(class_id, section_id, date, college_id=None):
+    """Section roster with each student's StudentAttendance for `date`."""
+    record_fields = ('id', 'status', 'check_in_time', 'check_out_time', 'remarks') + _MARKER_FIELDS
+
+    def fetch_attendance(student_ids):
+        return {
+            record.pop('student_id'): record
+            for record in StudentAttendance.objects.all_colleges().filter(
+                student_id__in=student_ids, date=date
+            ).values('student_id', *record_fields)
+        }
+
+    joined = _roster_queryset(class_id, section_id, college_id).annotate(
+        att=FilteredRelation('daily_attendance', condition=Q(daily_attendance__date=date))
+    )
+    roster, attendance = _load(
+        class_id, section_id, college_id, joined,
+        tuple(f'att__{field}' for field in record_fields), fetch_attendance,
+    )
+    return _rows(roster, attendance, ('check_in_time', 'check_out_time'))
+
+
+def subject_attendance_rows(subject_assignment, date, period_id=None, college_id=None):
+    """Roster of the assignment's section with each student's SubjectAttendance."""
+    record_fields = ('id', 'status', 'remarks') + _MARKER_FIELDS
+    condition = Q(subject_attendance__subject_assignment_id=subject_assignment.pk, subject_attendance__date=date)
+    filters = {'subject_assignment_id': subject_assignment.pk, 'date': date}
+    if period_id:
+        condition &= Q(subject_attendance__period_id=period_id)
+        filters['period_id'] = period_id
+
+    def fetch_attendance(student_ids):
+        attendance = {}
+        for record in SubjectAttendance.objects.all_colleges().filter(
+            student_id__in=student_ids, **filters
+        ).order_by('id').values('student_id', *record_fields):
+            attendance.setdefault(record.pop('student_id'), record)
+        return attendance
+
+    joined = _roster_queryset(
+        subject_assignment.class_obj_id, subject_assignment.section_id, college_id
+    ).annotate(att=FilteredRelation('subject_attendance', condition=condition))
+    roster, attendance = _load(
+        subject_assignment.class_obj_id, subject_assignment.section_id, college_id, joined,
+        tuple(f'att__{field}' for field in record_fields), fetch_attendance,
+    )
+    return _rows(roster, attendance, ())
@@ -1,10 +1,32 @@
 """
 Signals for Attendance app.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
+from apps.students.models import Student
 from .models import StudentAttendance, SubjectAttendance, StaffAttendance, AttendanceNotification
+from .roster import invalidate_rosters
+from .rollups import student_attendance_changed, subject_attendance_changed
+
+
+@receiver(pre_save, sender=StudentAttendance)
+def student_attendance_pre_save(sender, instance, **kwargs):
+    """Remember the stored status/date so the rollup can move the counts."""
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = sender.objects.all_colleges().filter(
+            pk=instance.pk
+        ).values_list('status', 'date').first()
+
+
+@receiver(pre_save, sender=SubjectAttendance)
+def subject_attendance_pre_save(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = sender.objects.all_colleges().filter(
+            pk=instance.pk
+        ).values_list('status', 'subject_assignment_id').first()
 
 
 @receiver(post_save, sender=StudentAttendance)
@@ -12,9 +34,11 @@ def student_attendance_post_save(sender, instance, created, **kwargs):
     """
     Post-save signal for StudentAttendance model.
     - If 'absent' or 'late', create AttendanceNotification for parents
-    - Calculate daily attendance
+    - Update the student's monthly attendance rollup
     - Log activity
     """
+    student_attendance_changed(instance, previous=getattr(instance, '_rollup_previous', None))
+
     if created or instance.status in ['absent', 'late']:
         # Create notification for parents if absent or late
         if instance.status in ['absent', 'late']:
@@ -36,9 +60,6 @@ def student_attendance_post_save(sender, instance, created, **kwargs):
                     )
                     print(f"Notification created: {message}")
 
-        # TODO: Calculate daily attendance percentage
-        print(f"Daily Attendance: Calculating for {instance.student.get_full_name()}")
-
         # TODO: Log activity
         print(f"Activity Log: Attendance marked for {instance.student.get_full_name()} - {instance.status}")
 
@@ -47,16 +68,21 @@ def student_attendance_post_save(sender, instance, created, **kwargs):
 def subject_attendance_post_save(sender, instance, created, **kwargs):
     """
     Post-save signal for SubjectAttendance model.
-    - Calculate subject-wise attendance percentage
-    - Update overall attendance
+    - Update the student's subject-wise attendance rollup
     """
-    if created:
-        # TODO: Calculate subject-wise attendance percentage
-        subject_name = instance.subject_assignment.subject.name
-        print(f"Subject Attendance: Calculating for {instance.student.get_full_name()} in {subject_name}")
+    subject_attendance_changed(instance, previous=getattr(instance, '_rollup_previous', None))
+
+
+@receiver(post_delete, sender=StudentAttendance)
+def student_attendance_post_delete(sender, instance, **kwargs):
+    student_attendance_changed(instance, previous=(instance.status, instance.date), deleted=True)
 
-        # TODO: Update overall attendance
-        print(f"Overall Attendance: Updated for {instance.student.get_full_name()}")
+
+@receiver(post_delete, sender=SubjectAttendance)
+def subject_attendance_post_delete(sender, instance, **kwargs):
+    subject_attendance_changed(
+        instance, previous=(instance.status, instance.subject_assignment_id), deleted=True
+    )
 
 
 @receiver(post_save, sender=StaffAttendance)
@@ -114,3 +140,10 @@ def process_attendance_notifications():
             notification.error_message = str(e)
             notification.save()
 """
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_attendance_rosters(sender, instance, **kwargs):
+    """Enrolment changes (new student, section move, removal) expire cached rosters."""
+    invalidate_rosters(instance.college_id)
@@ -0,0 +1,178 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import Class, Faculty, Program, Section, Subject, SubjectAssignment
+from apps.attendance.models import (
+    StudentAttendance,
+    StudentMonthlyAttendance,
+    StudentSubjectAttendance,
+    SubjectAttendance,
+)
+from apps.attendance.rollups import rebuild_student_monthly, rebuild_student_subject
+from apps.core.models import AcademicSession, AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.students.models import Student
+
+
+class AttendanceRollupTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="RUP",
+            name="Rollup College",
+            short_name="RUP",
+            email="info@rup.test",
+            phone="9999999992",
+            address_line1="1 Tally Rd",
+            city="City",
+            state="State",
+            pincode="000010",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="COM", name="Commerce", short_name="COM")
+        program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BCOM",
+            name="B.Com",
+            short_name="BCOM",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.class_obj = Class.objects.create(
+            college=self.college,
+            program=program,
+            academic_session=session,
+            name="BCOM-1",
+            semester=1,
+            year=1,
+        )
+        self.section = Section.objects.create(class_obj=self.class_obj, name="A")
+        subject = Subject.objects.create(
+            college=self.college,
+            code="ACC",
+            name="Accounting",
+            short_name="ACC",
+            subject_type="theory",
+            credits=4,
+            max_marks=100,
+            pass_marks=40,
+        )
+        self.assignment = SubjectAssignment.objects.create(
+            subject=subject, class_obj=self.class_obj, section=self.section
+        )
+        user = User.objects.create_user(
+            username="rup_student",
+            email="stu@rup.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        self.student = Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number="RUP-1",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number="RUP-REG-1",
+            roll_number="1",
+            program=program,
+            current_class=self.class_obj,
+            current_section=self.section,
+            academic_year=year,
+            first_name="Stu",
+            last_name="One",
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email="stu@rup.test",
+        )
+
+    def _mark(self, day, status):
+        return StudentAttendance.objects.create(
+            student=self.student,
+            class_obj=self.class_obj,
+            section=self.section,
+            date=day,
+            status=status,
+        )
+
+    def _monthly(self, month):
+        return StudentMonthlyAttendance.objects.get(student=self.student, month=month)
+
+    def test_daily_attendance_writes_move_monthly_counters(self):
+        self._mark(date(2025, 7, 1), "present")
+        late = self._mark(date(2025, 7, 2), "LATE")
+        absent = self._mark(date(2025, 7, 3), "absent")
+
+        july = self._monthly(date(2025, 7, 1))
+        self.assertEqual((july.total_count, july.present_count, july.late_count, july.absent_count), (3, 1, 1, 1))
+
+        late.status = "present"
+        late.save()
+        absent.date = date(2025, 8, 1)
+        absent.save()
+
+        july.refresh_from_db()
+        self.assertEqual((july.total_count, july.present_count, july.late_count, july.absent_count), (2, 2, 0, 0))
+        self.assertEqual(july.percentage, 100)
+        self.assertEqual(self._monthly(date(2025, 8, 1)).absent_count, 1)
+
+        absent.delete()
+        self.assertEqual(self._monthly(date(2025, 8, 1)).total_count, 0)
+
+    def test_subject_attendance_counters_and_rebuild_agree(self):
+        for day, status in ((1, "present"), (2, "absent"), (3, "present")):
+            SubjectAttendance.objects.create(
+                student=self.student, subject_assignment=self.assignment,
+                date=date(2025, 7, day), status=status,
+            )
+            self._mark(date(2025, 7, day), status)
+        totals = StudentSubjectAttendance.objects.get(student=self.student, subject_assignment=self.assignment)
+        self.assertEqual((totals.total_count, totals.present_count), (3, 2))
+        self.assertEqual(totals.percentage, 66.67)
+
+        incremental = list(StudentMonthlyAttendance.objects.values('month', 'total_count', 'present_count'))
+        StudentMonthlyAttendance.objects.all().delete()
+        StudentSubjectAttendance.objects.all().delete()
+
+        self.assertEqual(rebuild_student_monthly(college_id=self.college.id), 1)
+        self.assertEqual(rebuild_student_subject(student_ids=[self.student.id]), 1)
+        self.assertEqual(
+            list(StudentMonthlyAttendance.objects.values('month', 'total_count', 'present_count')), incremental
+        )
+        self.assertEqual(StudentSubjectAttendance.objects.get(student=self.student).absent_count, 1)
+
+    def test_decrement_of_row_missing_from_rollup_stays_at_zero(self):
+        present = self._mark(date(2025, 7, 1), "present")
+        # A row recorded before the rollups existed: counted nowhere
+        StudentMonthlyAttendance.objects.filter(student=self.student).update(total_count=0, present_count=0)
+
+        present.status = "absent"
+        present.save()
+        july = self._monthly(date(2025, 7, 1))
+        self.assertEqual((july.total_count, july.present_count, july.absent_count), (1, 0, 1))
+
+        present.delete()
+        july.refresh_from_db()
+        self.assertEqual((july.total_count, july.absent_count), (0, 0))
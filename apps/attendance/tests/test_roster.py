@@ -0,0 +1,153 @@
+from datetime import date
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import Class, Faculty, Program, Section
+from apps.attendance.models import StudentAttendance
+from apps.attendance.roster import class_attendance_rows
+from apps.core.models import AcademicSession, AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.students.models import Student
+
+LOCMEM_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'attendance_roster': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'roster-tests'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ClassAttendanceRosterTest(TestCase):
+    def setUp(self):
+        caches['attendance_roster'].clear()
+        self.college = College.objects.create(
+            code="ROS",
+            name="Roster College",
+            short_name="ROS",
+            email="info@ros.test",
+            phone="9999999991",
+            address_line1="1 Roll Call Rd",
+            city="City",
+            state="State",
+            pincode="000009",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=self.year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="ART", name="Arts", short_name="ART")
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BA",
+            name="B.A",
+            short_name="BA",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.class_obj = Class.objects.create(
+            college=self.college,
+            program=self.program,
+            academic_session=session,
+            name="BA-1",
+            semester=1,
+            year=1,
+        )
+        self.section = Section.objects.create(class_obj=self.class_obj, name="A")
+        self.first = self._student(1)
+        self.second = self._student(2)
+        self.marker = User.objects.create_user(
+            username="ros_teacher",
+            email="teacher@ros.test",
+            password="dummy-pass",
+            first_name="Tia",
+            last_name="Marker",
+            college=self.college,
+            user_type=UserType.TEACHER,
+        )
+        StudentAttendance.objects.create(
+            student=self.first,
+            class_obj=self.class_obj,
+            section=self.section,
+            date=date(2025, 7, 1),
+            status="present",
+            marked_by=self.marker,
+        )
+
+    def _student(self, roll):
+        user = User.objects.create_user(
+            username=f"ros_student_{roll}",
+            email=f"ros{roll}@ros.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        return Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number=f"ROS-{roll}",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number=f"ROS-REG-{roll}",
+            roll_number=str(roll),
+            program=self.program,
+            current_class=self.class_obj,
+            current_section=self.section,
+            academic_year=self.year,
+            first_name="Stu",
+            last_name=str(roll),
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email=f"ros{roll}@ros.test",
+        )
+
+    def test_roster_is_joined_with_days_attendance(self):
+        with self.assertNumQueries(1):
+            rows = class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+
+        self.assertEqual([row['student_id'] for row in rows], [self.first.id, self.second.id])
+        self.assertEqual(rows[0]['status'], "present")
+        self.assertEqual(rows[0]['marked_by_name'], "Tia Marker")
+        self.assertIsNone(rows[1]['attendance_id'])
+
+    def test_cached_roster_reads_attendance_only(self):
+        class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+
+        with self.assertNumQueries(1):
+            rows = class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-02", self.college.id)
+        self.assertEqual([row['status'] for row in rows], [None, None])
+
+    def test_enrolment_change_invalidates_roster(self):
+        class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+        self._student(3)
+
+        rows = class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+
+        self.assertEqual(len(rows), 3)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_without_shared_cache_roster_is_read_every_time(self):
+        class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+        Student.objects.filter(pk=self.second.pk).update(current_section=None)
+
+        with self.assertNumQueries(1):
+            rows = class_attendance_rows(self.class_obj.id, self.section.id, "2025-07-01", self.college.id)
+        self.assertEqual([row['student_id'] for row in rows], [self.first.id])
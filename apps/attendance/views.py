@@ -30,6 +30,7 @@ from .serializers import (
     StudentWithSubjectAttendanceSerializer,
 )
 from apps.core.mixins import CollegeScopedModelViewSet, RelatedCollegeScopedModelViewSet
+from .roster import class_attendance_rows, subject_attendance_rows
 
 
 # ============================================================================
@@ -273,16 +274,6 @@ class StudentAttendanceViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelVie
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        from apps.students.models import Student
-        from django.db.models import OuterRef, Subquery, F, Value, CharField
-        from django.db.models.functions import Concat
-
-        # Get all students in the specified class and section
-        students = Student.objects.filter(
-            current_class_id=class_obj_id,
-            current_section_id=section_id
-        ).select_related('user')
-
         # Apply college scoping
         college_id = self.get_college_id(required=False)
         user = getattr(request, 'user', None)
@@ -294,49 +285,12 @@ class StudentAttendanceViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelVie
             )
         )
 
-        if college_id != 'all' and not (is_global_user and not college_id):
-            if not college_id:
-                college_id = self.get_college_id(required=True)
-            students = students.filter(college_id=college_id)
-
-        # Subquery to get attendance records for the specified date
-        attendance_subquery = StudentAttendance.objects.filter(
-            student_id=OuterRef('id'),
-            date=date
-        ).values('id', 'status', 'check_in_time', 'check_out_time', 'remarks', 'marked_by__id', 'marked_by__first_name', 'marked_by__last_name')[:1]
-
-        # Annotate students with attendance data
-        students_with_attendance = students.annotate(
-            attendance_id=Subquery(attendance_subquery.values('id')),
-            attendance_status=Subquery(attendance_subquery.values('status')),
-            attendance_check_in=Subquery(attendance_subquery.values('check_in_time')),
-            attendance_check_out=Subquery(attendance_subquery.values('check_out_time')),
-            attendance_remarks=Subquery(attendance_subquery.values('remarks')),
-            attendance_marked_by_id=Subquery(attendance_subquery.values('marked_by__id')),
-            attendance_marked_by_fname=Subquery(attendance_subquery.values('marked_by__first_name')),
-            attendance_marked_by_lname=Subquery(attendance_subquery.values('marked_by__last_name'))
-        ).order_by('roll_number', 'first_name')
-
-        # Build response data
-        result = []
-        for student in students_with_attendance:
-            marked_by_name = None
-            if student.attendance_marked_by_fname:
-                marked_by_name = f"{student.attendance_marked_by_fname} {student.attendance_marked_by_lname or ''}".strip()
-
-            result.append({
-                'student_id': student.id,
-                'admission_number': student.admission_number,
-                'roll_number': student.roll_number,
-                'student_name': student.get_full_name(),
-                'attendance_id': student.attendance_id,
-                'status': student.attendance_status,
-                'check_in_time': student.attendance_check_in,
-                'check_out_time': student.attendance_check_out,
-                'remarks': student.attendance_remarks,
-                'marked_by': student.attendance_marked_by_id,
-                'marked_by_name': marked_by_name,
-            })
+        if college_id == 'all' or (is_global_user and not college_id):
+            college_id = None
+        elif not college_id:
+            college_id = self.get_college_id(required=True)
+
+        result = class_attendance_rows(class_obj_id, section_id, date, college_id=college_id)
 
         serializer = StudentWithAttendanceSerializer(result, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -512,59 +466,14 @@ class SubjectAttendanceViewSet(RelatedCollegeScopedModelViewSet):
             return Response({'detail': 'subject_assignment and date are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         from apps.academic.models import SubjectAssignment
-        from apps.students.models import Student
-        from django.db.models import OuterRef, Subquery
 
         try:
             sa = SubjectAssignment.objects.get(id=subject_assignment_id)
         except SubjectAssignment.DoesNotExist:
             return Response({'detail': 'Invalid subject assignment.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get students in the class/section of this subject assignment
-        students = Student.objects.filter(
-            current_class=sa.class_obj,
-            current_section=sa.section
-        ).select_related('user')
-
-        # Subquery for attendance
-        attendance_filters = {
-            'student_id': OuterRef('id'),
-            'subject_assignment_id': subject_assignment_id,
-            'date': date
-        }
-        if period_id:
-            attendance_filters['period_id'] = period_id
-
-        attendance_subquery = SubjectAttendance.objects.filter(**attendance_filters).values(
-            'id', 'status', 'remarks', 'marked_by__id', 'marked_by__first_name', 'marked_by__last_name'
-        )[:1]
-
-        students_with_attendance = students.annotate(
-            attendance_id=Subquery(attendance_subquery.values('id')),
-            attendance_status=Subquery(attendance_subquery.values('status')),
-            attendance_remarks=Subquery(attendance_subquery.values('remarks')),
-            attendance_marked_by_id=Subquery(attendance_subquery.values('marked_by__id')),
-            attendance_marked_by_fname=Subquery(attendance_subquery.values('marked_by__first_name')),
-            attendance_marked_by_lname=Subquery(attendance_subquery.values('marked_by__last_name'))
-        ).order_by('roll_number', 'first_name')
-
-        result = []
-        for student in students_with_attendance:
-            marked_by_name = None
-            if student.attendance_marked_by_fname:
-                marked_by_name = f"{student.attendance_marked_by_fname} {student.attendance_marked_by_lname or ''}".strip()
-
-            result.append({
-                'student_id': student.id,
-                'admission_number': student.admission_number,
-                'roll_number': student.roll_number,
-                'student_name': student.get_full_name(),
-                'attendance_id': student.attendance_id,
-                'status': student.attendance_status,
-                'remarks': student.attendance_remarks,
-                'marked_by': student.attendance_marked_by_id,
-                'marked_by_name': marked_by_name,
-            })
+        # The class already pins the roster to one college
+        result = subject_attendance_rows(sa, date, period_id=period_id)
 
         serializer = StudentWithSubjectAttendanceSerializer(result, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -27,7 +27,8 @@ def process_bulk_message(bulk_message_id):
     Process bulk message: send to recipients (placeholder) and update counts.
     """
     try:
-        bulk = BulkMessage.objects.get(pk=bulk_message_id)
+        # Runs outside a request (worker, cron), so there is no current college
+        bulk = BulkMessage.objects.all_colleges().get(pk=bulk_message_id)
     except BulkMessage.DoesNotExist:
         return f"BulkMessage {bulk_message_id} not found"
 
@@ -12,6 +12,7 @@ from .models import (
     SystemSetting,
     NotificationSetting,
     ActivityLog,
+    UploadedFile,
     OrganizationNode,
     DynamicRole,
     HierarchyPermission,
@@ -312,6 +313,16 @@ class ActivityLogAdmin(CollegeAwareAdmin):
     ip_address_display.short_description = 'IP Address'
 
 
+@admin.register(UploadedFile)
+class UploadedFileAdmin(admin.ModelAdmin):
+    """Admin interface for UploadedFile model."""
+    list_display = ['s3_key', 'content_type', 'size', 'created_by', 'created_at']
+    list_filter = ['folder', 'content_type', 'created_at']
+    search_fields = ['s3_key', 'filename', 'description', 'created_by__username']
+    readonly_fields = ['s3_key', 'filename', 'folder', 'content_type', 'size', 'etag', 'created_at', 'updated_at']
+    ordering = ['-created_at']
+
+
 # ============================================================================
 # ORGANIZATIONAL HIERARCHY ADMIN
 # ============================================================================
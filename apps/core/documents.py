@@ -0,0 +1,92 @@
+"""
+HTML-to-PDF rendering helpers shared by single-document and batch rendering.
+
+Templates are compiled once per process and reused for every document.
+WeasyPrint layout is CPU bound and holds the GIL, so batches hand
+pre-rendered HTML to a process pool; the PDF
+conversion itself is a pure function of the HTML, which also lets callers
+skip documents whose HTML (and therefore PDF) has not changed.
+"""
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.template.loader import get_template
+
+try:
+    from weasyprint import HTML
+    WEASYPRINT_AVAILABLE = True
+except Exception:
+    WEASYPRINT_AVAILABLE = False
+
+DEFAULT_RENDER_WORKERS = 2
+
+
+@lru_cache(maxsize=None)
+def compiled_template(template_path):
+    """Load and compile a template once per process."""
+    return get_template(template_path)
+
+
+def render_html(template_path, context):
+    return compiled_template(template_path).render(context)
+
+
+def content_hash(html):
+    """Fingerprint of a document's rendered HTML."""
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def html_to_pdf(html):
+    """Convert HTML to PDF bytes; None when WeasyPrint is unavailable."""
+    if not WEASYPRINT_AVAILABLE:
+        return None
+    buffer = BytesIO()
+    HTML(string=html).write_pdf(buffer)
+    return buffer.getvalue()
+
+
+def render_pdf(template_path, context):
+    """Render one template straight to PDF bytes."""
+    if not WEASYPRINT_AVAILABLE:
+        return None
+    return html_to_pdf(render_html(template_path, context))
+
+
+def render_workers():
+    return getattr(settings, 'DOCUMENT_RENDER_WORKERS', DEFAULT_RENDER_WORKERS)
+
+
+def _convert_one(html):
+    """(pdf_bytes, error) for one document; a failure never aborts the batch."""
+    try:
+        return html_to_pdf(html), None
+    except Exception as exc:
+        return None, str(exc) or exc.__class__.__name__
+
+
+def convert_many(documents, workers=None):
+    """
+    Convert (key, html) pairs to PDFs, yielding (key, pdf_bytes, error) as
+    each finishes; `error` is the message of a document that failed to
+    convert. Uses a process pool when `workers` > 1, otherwise converts
+    inline.
+    """
+    workers = render_workers() if workers is None else workers
+    documents = list(documents)
+    if workers <= 1 or len(documents) <= 1:
+        for key, html in documents:
+            yield (key, *_convert_one(html))
+        return
+
+    keys = [key for key, _ in documents]
+    # Spawned workers: forking a threaded web/worker process is not safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        chunksize = max(1, len(documents) // (workers * 4))
+        for key, (pdf, error) in zip(
+            keys, pool.map(_convert_one, [html for _, html in documents], chunksize=chunksize)
+        ):
+            yield key, pdf, error
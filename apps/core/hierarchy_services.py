@@ -146,6 +146,60 @@ class TeamAutoAssignmentService:
                     }
                 )
 
+    @staticmethod
+    def assign_students_to_teams_bulk(students):
+        """
+        Batched form of assign_student_to_teams for bulk imports and promotions.
+        Resolves class teachers and their teams for all sections at once and
+        inserts memberships in a single statement.
+        """
+        from apps.academic.models import ClassTeacher
+
+        section_ids = {s.current_section_id for s in students if s.current_section_id}
+        if not section_ids:
+            return 0
+
+        teacher_by_section = dict(
+            ClassTeacher.objects.filter(
+                section_id__in=section_ids, is_current=True, is_active=True
+            ).values_list('section_id', 'teacher_id')
+        )
+        team_by_teacher = dict(
+            Team.objects.filter(
+                node__user_id__in=set(teacher_by_section.values()), node__is_active=True
+            ).values_list('node__user_id', 'id')
+        )
+
+        members = []
+        for student in students:
+            team_id = team_by_teacher.get(teacher_by_section.get(student.current_section_id))
+            if team_id:
+                members.append(HierarchyTeamMember(
+                    team_id=team_id,
+                    user_id=student.user_id,
+                    auto_assigned=True,
+                    assignment_reason='Student in class teacher\'s section',
+                    role_in_team='member',
+                ))
+        HierarchyTeamMember.objects.bulk_create(members, ignore_conflicts=True)
+        return len(members)
+
+    @staticmethod
+    def remove_students_from_section_teams(user_ids, section_ids):
+        """
+        Drop the auto-assigned memberships of these students in the teams of
+        the sections' class teachers, e.g. the sections they were promoted out of.
+        """
+        from apps.academic.models import ClassTeacher
+
+        teacher_ids = ClassTeacher.objects.filter(
+            section_id__in=section_ids, is_current=True, is_active=True
+        ).values('teacher_id')
+        deleted, _ = HierarchyTeamMember.objects.filter(
+            user_id__in=user_ids, auto_assigned=True, team__node__user_id__in=teacher_ids
+        ).delete()
+        return deleted
+
     @staticmethod
     def assign_teacher_to_teams(teacher):
         """
@@ -0,0 +1,330 @@
+"""
+Bulk CSV/XLSX import pipeline.
+
+Rows are validated and written chunk by chunk: each chunk is validated as a
+set (one query per uniqueness check instead of one per row), written with
+bulk_create inside its own transaction, and then any side effects that
+post_save signals would normally perform are applied in batch. Because each
+chunk commits independently and existing natural keys are skipped, an
+interrupted import can simply be re-run (or resumed from `start_row`).
+"""
+import csv
+import io
+import logging
+from datetime import date, datetime
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db import transaction
+from django.utils.crypto import get_random_string
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except Exception:
+    OPENPYXL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y/%m/%d')
+FIRST_DATA_ROW = 2  # Row 1 holds the headers, matching spreadsheet numbering
+
+
+def normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _clean_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def read_tabular_file(uploaded_file):
+    """
+    Yield rows of an uploaded .csv or .xlsx file as dicts keyed by
+    normalised header names. Files are read lazily.
+    """
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+    if name.endswith('.xlsx'):
+        if not OPENPYXL_AVAILABLE:
+            raise ValidationError({'file': 'XLSX import requires openpyxl; upload a CSV file instead.'})
+        workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [normalize_header(cell) for cell in next(rows, [])]
+        for values in rows:
+            yield {header: _clean_cell(value) for header, value in zip(headers, values) if header}
+        workbook.close()
+        return
+
+    if name and not name.endswith('.csv'):
+        raise ValidationError({'file': 'Only .csv and .xlsx files are supported.'})
+
+    # UploadedFile wraps the real file object, which is what TextIOWrapper needs
+    stream = io.TextIOWrapper(getattr(uploaded_file, 'file', uploaded_file), encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+    headers = [normalize_header(cell) for cell in next(reader, [])]
+    for values in reader:
+        yield {header: _clean_cell(value) for header, value in zip(headers, values) if header}
+
+
+def parse_date(value):
+    """Parse a spreadsheet date cell; returns None when it cannot be parsed."""
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def import_password(raw_password=None):
+    """
+    Hash an explicit password, otherwise return an unusable one. Hashing is
+    deliberately slow, so imports only pay for it when a password is supplied.
+    Users imported without one cannot log in until they set a password
+    through the password reset flow (dj-rest-auth's password/reset/).
+    """
+    if raw_password:
+        return make_password(raw_password)
+    return UNUSABLE_PASSWORD_PREFIX + get_random_string(40)
+
+
+def create_user_profiles(college_id, users):
+    """
+    Bulk equivalent of the User post_save handlers: creates profiles and
+    clears the hierarchy cache once for the whole batch.
+    """
+    from apps.accounts.models import UserProfile
+    from apps.core.hierarchy_signals import _clear_hierarchy_cache
+
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user.pk, college_id=college_id) for user in users],
+        ignore_conflicts=True,
+    )
+    _clear_hierarchy_cache()
+
+
+def record_bulk_activity(college_id, user, model_name, objects):
+    """Single INSERT standing in for auto_log_model_changes on bulk-created rows."""
+    from apps.core.models import ActivityLog
+
+    ActivityLog.objects.bulk_create([
+        ActivityLog(
+            college_id=college_id,
+            user=user,
+            action='create',
+            model_name=model_name,
+            object_id=str(obj.pk),
+            description=f"{model_name} created: {str(obj)[:100]}",
+            metadata={'source': 'bulk_import'},
+        )
+        for obj in objects
+    ])
+
+
+class ImportRow:
+    """One source row moving through the pipeline."""
+
+    __slots__ = ('number', 'data', 'cleaned', 'errors')
+
+    def __init__(self, number, data):
+        self.number = number
+        self.data = data
+        self.cleaned = {}
+        self.errors = {}
+
+    def error(self, field, message):
+        self.errors.setdefault(field, []).append(message)
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+
+class BulkImportPipeline:
+    """
+    Base class for chunked bulk imports.
+
+    Subclasses implement:
+        prepare()            - pre-resolve lookups once per import
+        clean_row(row)       - per-row parsing into row.cleaned
+        validate_chunk(rows) - set-based checks (uniqueness etc.) for a chunk
+        persist(rows)        - bulk write a chunk of valid rows; returns count
+        after_persist(...)   - batched side effects (optional)
+    """
+    chunk_size = 500
+    required_columns = ()
+    key_column = None
+
+    def __init__(self, college_id, user=None, dry_run=False, start_row=FIRST_DATA_ROW,
+                 chunk_size=None, skip_existing=True):
+        self.college_id = college_id
+        self.user = user
+        self.dry_run = dry_run
+        self.start_row = max(start_row or FIRST_DATA_ROW, FIRST_DATA_ROW)
+        self.chunk_size = chunk_size or self.chunk_size
+        self.skip_existing = skip_existing
+        self._seen = {}
+        self.result = {
+            'dry_run': dry_run,
+            'total': 0,
+            'created': 0,
+            'skipped': 0,
+            'failed': 0,
+            'last_row': None,
+            'errors': [],
+        }
+
+    # Hooks ---------------------------------------------------------------
+
+    def prepare(self):
+        pass
+
+    def clean_row(self, row):
+        raise NotImplementedError
+
+    def validate_chunk(self, rows):
+        pass
+
+    def existing_keys(self, keys):
+        """Natural keys already in the database; such rows are skipped on re-runs."""
+        return set()
+
+    def persist(self, rows):
+        raise NotImplementedError
+
+    def flag_duplicates(self, rows, field, queryset, lookup=None):
+        """Reject values repeated within the file or already present in `queryset`."""
+        lookup = lookup or field
+        seen = self._seen.setdefault(field, set())
+        values = {row.cleaned[field] for row in rows if row.cleaned.get(field)}
+        existing = set(queryset.filter(**{f'{lookup}__in': values}).values_list(lookup, flat=True))
+        for row in rows:
+            value = row.cleaned.get(field)
+            if not value:
+                continue
+            if value in existing:
+                row.error(field, f"'{value}' already exists.")
+            elif value in seen:
+                row.error(field, f"'{value}' appears more than once in this file.")
+            seen.add(value)
+
+    # Driver --------------------------------------------------------------
+
+    def run(self, rows):
+        self.prepare()
+        chunk = []
+        for number, data in enumerate(rows, start=FIRST_DATA_ROW):
+            if number < self.start_row:
+                continue
+            chunk.append(ImportRow(number, data))
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._process_chunk(chunk)
+        return self.result
+
+    def _process_chunk(self, chunk):
+        self.result['total'] += len(chunk)
+        self.result['last_row'] = chunk[-1].number
+
+        for row in chunk:
+            missing = [col for col in self.required_columns if row.data.get(col) in (None, '')]
+            for column in missing:
+                row.error(column, 'This field is required.')
+            if not missing:
+                self.clean_row(row)
+
+        if self.skip_existing and self.key_column:
+            existing = self.existing_keys({
+                row.cleaned[self.key_column] for row in chunk
+                if row.is_valid and row.cleaned.get(self.key_column)
+            })
+        else:
+            existing = set()
+
+        pending = []
+        for row in chunk:
+            if row.is_valid and row.cleaned.get(self.key_column) in existing:
+                self.result['skipped'] += 1
+            else:
+                pending.append(row)
+
+        self.validate_chunk([row for row in pending if row.is_valid])
+
+        valid = []
+        for row in pending:
+            if row.is_valid:
+                valid.append(row)
+            else:
+                self.result['failed'] += 1
+                self.result['errors'].append({'row': row.number, 'errors': row.errors})
+
+        if not valid:
+            return
+        if self.dry_run:
+            self.result['created'] += len(valid)
+            return
+
+        try:
+            with transaction.atomic():
+                self.result['created'] += self.persist(valid)
+        except Exception as exc:
+            logger.exception("Import chunk ending at row %s failed", chunk[-1].number)
+            self.result['failed'] += len(valid)
+            for row in valid:
+                self.result['errors'].append({'row': row.number, 'errors': {'non_field_errors': [str(exc)]}})
+
+
+class BulkImportRequestSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV or XLSX file; first row holds the column headers")
+    dry_run = serializers.BooleanField(default=False, help_text="Validate only, write nothing")
+    start_row = serializers.IntegerField(
+        default=FIRST_DATA_ROW,
+        min_value=FIRST_DATA_ROW,
+        help_text="Spreadsheet row to resume from (headers are row 1)"
+    )
+
+
+def run_bulk_import(view, request, pipeline_class):
+    """
+    Shared body for `bulk_import` viewset actions: validates the upload,
+    resolves the target college and runs `pipeline_class` over the file.
+    """
+    from rest_framework import status
+    from rest_framework.response import Response
+
+    serializer = BulkImportRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    college_id = view.get_college_id(required=True)
+    if college_id in (None, 'all'):
+        college_id = getattr(request.user, 'college_id', None)
+    if not college_id:
+        raise ValidationError({'detail': 'Select a college to import into.'})
+
+    data = serializer.validated_data
+    pipeline = pipeline_class(
+        college_id,
+        user=request.user,
+        dry_run=data['dry_run'],
+        start_row=data['start_row'],
+    )
+    result = pipeline.run(read_tabular_file(data['file']))
+    # Partial imports succeed; the per-row errors tell the user what to fix
+    failed_outright = result['failed'] and not result['created'] and not data['dry_run']
+    return Response(
+        result,
+        status=status.HTTP_400_BAD_REQUEST if failed_outright else status.HTTP_200_OK
+    )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dynamicrole_hierarchypermission_hierarchyuserrole_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True, help_text='Indicates if the record is active (soft delete)')),
+                ('s3_key', models.CharField(help_text='S3 key of the object', max_length=500, unique=True)),
+                ('filename', models.CharField(help_text='File name part of the key', max_length=255)),
+                ('folder', models.CharField(blank=True, help_text='Subfolder the file was uploaded to', max_length=100)),
+                ('content_type', models.CharField(help_text='MIME type stored with the object', max_length=100)),
+                ('size', models.BigIntegerField(help_text='Object size in bytes')),
+                ('etag', models.CharField(blank=True, help_text='S3 ETag of the object', max_length=100)),
+                ('description', models.CharField(blank=True, help_text='Optional description given at upload', max_length=500)),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Uploaded File',
+                'verbose_name_plural': 'Uploaded Files',
+                'db_table': 'uploaded_file',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_by', 'created_at'], name='uploaded_fi_created_90c3fd_idx'), models.Index(fields=['folder'], name='uploaded_fi_folder_11c60b_idx')],
+            },
+        ),
+    ]
@@ -680,6 +680,65 @@ class ActivityLog(models.Model):
         return f"{self.action} - {self.model_name} by {self.user} at {self.timestamp}"
 
 
+# ============================================================================
+# FILE UPLOADS
+# ============================================================================
+
+
+class UploadedFile(AuditModel):
+    """
+    A file stored in S3, recorded once its upload completed.
+
+    Browser uploads go straight to the bucket (presigned POST/PUT or
+    multipart); the completion callback reads the object back from S3 and
+    stores what S3 reports, not what the client claims.
+    """
+    s3_key = models.CharField(
+        max_length=500,
+        unique=True,
+        help_text="S3 key of the object"
+    )
+    filename = models.CharField(
+        max_length=255,
+        help_text="File name part of the key"
+    )
+    folder = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Subfolder the file was uploaded to"
+    )
+    content_type = models.CharField(
+        max_length=100,
+        help_text="MIME type stored with the object"
+    )
+    size = models.BigIntegerField(
+        help_text="Object size in bytes"
+    )
+    etag = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="S3 ETag of the object"
+    )
+    description = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Optional description given at upload"
+    )
+
+    class Meta:
+        db_table = 'uploaded_file'
+        verbose_name = 'Uploaded File'
+        verbose_name_plural = 'Uploaded Files'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'created_at']),
+            models.Index(fields=['folder']),
+        ]
+
+    def __str__(self):
+        return self.s3_key
+
+
 # ============================================================================
 # PERMISSION SYSTEM MODELS
 # ============================================================================
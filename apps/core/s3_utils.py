@@ -1,17 +1,35 @@
 """
 S3 file upload utilities for AWS S3 integration.
 Handles file uploads, validation, and URL generation.
+
+Two upload paths:
+
+- direct: the browser asks for a presigned POST/PUT (or a multipart upload
+  with one presigned URL per part), sends the bytes straight to the bucket
+  and then calls the completion endpoint, which reads the object back with
+  HEAD and records it. The bucket CORS rules must allow the app origin and
+  expose the ETag header for multipart parts.
+- server-side: imports, generated PDFs and other files the app itself
+  holds are uploaded from a thread pool, one file per worker, and every
+  file above MULTIPART_THRESHOLD is sent in MULTIPART_CHUNK_SIZE parts by
+  boto3's transfer manager.
 """
+import logging
 import os
 import uuid
+import math
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from decouple import config
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, BotoCoreError
 from django.core.exceptions import ValidationError
 
+logger = logging.getLogger(__name__)
+
 
 class S3FileUploader:
     """
@@ -47,6 +65,17 @@ class S3FileUploader:
         'image/svg+xml': '.svg',
     }
 
+    # Server-side transfers: multipart above the threshold, in chunks of this size
+    MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+    # Parallel files of upload_multiple_files and parallel parts per file
+    UPLOAD_WORKERS = 8
+    PART_CONCURRENCY = 4
+
+    # S3 multipart limits: parts of at least 5 MB (but the last), at most 10,000 parts
+    MIN_PART_SIZE = 5 * 1024 * 1024
+    MAX_PARTS = 10000
+
     def __init__(self):
         """Initialize S3 client with credentials from environment variables."""
         self.aws_access_key_id = config('AWS_ACCESS_KEY_ID', default='')
@@ -54,16 +83,25 @@ class S3FileUploader:
         self.bucket_name = config('AWS_STORAGE_BUCKET_NAME', default='')
         self.region_name = config('AWS_S3_REGION_NAME', default='ap-south-1')
         self.prefix = config('AWS_S3_PREFIX', default='college/')
+        # S3-compatible endpoint (MinIO, local stand-ins); None means AWS
+        self.endpoint_url = config('AWS_S3_ENDPOINT_URL', default=None)
+        self.max_upload_size = config('AWS_S3_MAX_UPLOAD_SIZE', default=5 * 1024 ** 3, cast=int)
 
         if not all([self.aws_access_key_id, self.aws_secret_access_key, self.bucket_name]):
             raise ValueError("AWS S3 credentials not properly configured in environment variables")
 
-        # Initialize S3 client
+        # Initialize S3 client (boto3 clients are thread-safe and shared by the upload workers)
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key,
-            region_name=self.region_name
+            region_name=self.region_name,
+            endpoint_url=self.endpoint_url
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.MULTIPART_THRESHOLD,
+            multipart_chunksize=self.MULTIPART_CHUNK_SIZE,
+            max_concurrency=self.PART_CONCURRENCY,
         )
 
     def validate_file(self, file) -> tuple[bool, Optional[str]]:
@@ -71,7 +109,7 @@ class S3FileUploader:
         Validate uploaded file for type and extension.
 
         Args:
-            file: Django UploadedFile object
+            file: Django UploadedFile object (or any File with a name)
 
         Returns:
             tuple: (is_valid, error_message)
@@ -79,9 +117,27 @@ class S3FileUploader:
         if not file:
             return False, "No file provided"
 
+        return self.validate_upload(file.name, self.content_type_of(file), getattr(file, 'size', None))
+
+    def validate_upload(
+        self,
+        filename: str,
+        content_type: Optional[str],
+        size: Optional[int] = None
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Validate a file by name, MIME type and size, before or after it reaches S3.
+
+        Args:
+            filename: File name (its extension is checked)
+            content_type: MIME type the file is stored with
+            size: Size in bytes, when known
+
+        Returns:
+            tuple: (is_valid, error_message)
+        """
         # Get file extension
-        file_name = file.name.lower()
-        file_ext = os.path.splitext(file_name)[1]
+        file_ext = os.path.splitext(filename.lower())[1]
 
         # Check if extension is allowed
         all_allowed_extensions = (
@@ -93,12 +149,24 @@ class S3FileUploader:
             return False, f"File type '{file_ext}' not allowed. Allowed types: {', '.join(all_allowed_extensions)}"
 
         # Validate MIME type
-        content_type = file.content_type
         if content_type not in self.ALLOWED_MIME_TYPES:
             return False, f"Invalid file MIME type: {content_type}"
 
+        if size is not None and size > self.max_upload_size:
+            return False, f"File too large: {size} bytes (max {self.max_upload_size})"
+
         return True, None
 
+    def content_type_of(self, file) -> Optional[str]:
+        """MIME type of a Django UploadedFile, else guessed from the file name."""
+        return getattr(file, 'content_type', None) or mimetypes.guess_type(file.name)[0]
+
+    def file_url(self, s3_key: str) -> str:
+        """Public URL of an object (path-style on custom endpoints)."""
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket_name}/{s3_key}"
+        return f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{s3_key}"
+
     def generate_unique_filename(self, original_filename: str, folder: str = '') -> str:
         """
         Generate a unique filename with timestamp and UUID.
@@ -141,8 +209,12 @@ class S3FileUploader:
         """
         Upload a single file to S3.
 
+        Files above MULTIPART_THRESHOLD are sent as a multipart upload with
+        PART_CONCURRENCY parts in flight.
+
         Args:
-            file: Django UploadedFile object
+            file: Django UploadedFile object, or a File (e.g. ContentFile) whose
+                  MIME type is guessed from its name
             folder: Subfolder in S3 bucket (default: 'uploads')
             metadata: Optional metadata dictionary
 
@@ -160,11 +232,12 @@ class S3FileUploader:
 
         # Generate unique filename
         s3_key = self.generate_unique_filename(file.name, folder)
+        content_type = self.content_type_of(file)
 
         try:
             # Prepare upload parameters
             extra_args = {
-                'ContentType': file.content_type,
+                'ContentType': content_type,
             }
 
             # Add metadata if provided
@@ -176,19 +249,17 @@ class S3FileUploader:
                 file,
                 self.bucket_name,
                 s3_key,
-                ExtraArgs=extra_args
+                ExtraArgs=extra_args,
+                Config=self.transfer_config
             )
 
-            # Generate file URL
-            file_url = f"https://{self.bucket_name}.s3.{self.region_name}.amazonaws.com/{s3_key}"
-
             return {
                 'success': True,
-                'file_url': file_url,
+                'file_url': self.file_url(s3_key),
                 's3_key': s3_key,
                 'filename': file.name,
                 'size': file.size,
-                'content_type': file.content_type
+                'content_type': content_type
             }
 
         except (ClientError, BotoCoreError) as e:
@@ -198,46 +269,288 @@ class S3FileUploader:
         self,
         files: List,
         folder: str = 'uploads',
-        metadata: Optional[Dict[str, str]] = None
+        metadata: Optional[Dict[str, str]] = None,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
-        Upload multiple files to S3 (max 5 files at a time).
+        Upload multiple files to S3 in parallel, one file per worker thread.
+
+        Meant for server-side bulk uploads (imports, generated documents);
+        browsers should upload directly with presigned requests instead.
 
         Args:
-            files: List of Django UploadedFile objects
+            files: List of Django UploadedFile / File objects
             folder: Subfolder in S3 bucket (default: 'uploads')
             metadata: Optional metadata dictionary
+            max_workers: Parallel uploads (default: UPLOAD_WORKERS)
 
         Returns:
-            dict: Results with successful uploads and errors
+            dict: Results with successful uploads and errors, in the order of files
         """
         if not files:
             raise ValidationError("No files provided")
 
-        if len(files) > 5:
-            raise ValidationError("Maximum 5 files allowed per upload")
-
-        results = {
-            'successful_uploads': [],
-            'failed_uploads': [],
-            'total_files': len(files),
-            'success_count': 0,
-            'error_count': 0
-        }
-
-        for file in files:
+        def upload(file):
             try:
-                upload_result = self.upload_file(file, folder, metadata)
-                results['successful_uploads'].append(upload_result)
-                results['success_count'] += 1
+                return True, self.upload_file(file, folder, metadata)
             except (ValidationError, Exception) as e:
-                results['failed_uploads'].append({
+                return False, {
                     'filename': file.name if hasattr(file, 'name') else 'unknown',
                     'error': str(e)
-                })
-                results['error_count'] += 1
+                }
+
+        workers = min(max_workers or self.UPLOAD_WORKERS, len(files))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='s3-upload') as pool:
+            outcomes = list(pool.map(upload, files))
+
+        successful = [result for ok, result in outcomes if ok]
+        failed = [result for ok, result in outcomes if not ok]
+        return {
+            'successful_uploads': successful,
+            'failed_uploads': failed,
+            'total_files': len(files),
+            'success_count': len(successful),
+            'error_count': len(failed)
+        }
+
+    # ------------------------------------------------------------------
+    # Direct browser uploads
+    # ------------------------------------------------------------------
+
+    def _new_upload_key(self, filename: str, content_type: str, size: int, folder: str) -> str:
+        is_valid, error_message = self.validate_upload(filename, content_type, size)
+        if not is_valid:
+            raise ValidationError(error_message)
+        return self.generate_unique_filename(filename, folder)
+
+    def generate_presigned_post(
+        self,
+        filename: str,
+        content_type: str,
+        size: int,
+        folder: str = 'uploads',
+        metadata: Optional[Dict[str, str]] = None,
+        expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Presign a browser form POST of one file straight to the bucket.
+
+        The policy pins the key, the Content-Type, the metadata and a size of
+        at most `size` bytes, so the browser cannot upload anything else.
+
+        Returns:
+            dict: method, url, fields (to send before the file), s3_key, expiration_seconds
+
+        Raises:
+            ValidationError: If the file is not allowed
+            Exception: If presigning fails
+        """
+        s3_key = self._new_upload_key(filename, content_type, size, folder)
+        fields = {'Content-Type': content_type}
+        conditions = [{'Content-Type': content_type}, ['content-length-range', 1, size]]
+        for name, value in (metadata or {}).items():
+            fields[f'x-amz-meta-{name}'] = value
+            conditions.append({f'x-amz-meta-{name}': value})
+
+        try:
+            post = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expiration
+            )
+        except (ClientError, BotoCoreError) as e:
+            raise Exception(f"Failed to presign upload: {str(e)}")
+
+        return {
+            'method': 'POST',
+            'url': post['url'],
+            'fields': post['fields'],
+            's3_key': s3_key,
+            'expiration_seconds': expiration
+        }
+
+    def generate_presigned_put(
+        self,
+        filename: str,
+        content_type: str,
+        size: int,
+        folder: str = 'uploads',
+        metadata: Optional[Dict[str, str]] = None,
+        expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Presign a single PUT of one file straight to the bucket.
+
+        The returned headers are part of the signature and must be sent as-is.
+
+        Returns:
+            dict: method, url, headers, s3_key, expiration_seconds
 
-        return results
+        Raises:
+            ValidationError: If the file is not allowed
+            Exception: If presigning fails
+        """
+        s3_key = self._new_upload_key(filename, content_type, size, folder)
+        metadata = metadata or {}
+
+        try:
+            url = self.s3_client.generate_presigned_url(
+                'put_object',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': s3_key,
+                    'ContentType': content_type,
+                    'ContentLength': size,
+                    'Metadata': metadata
+                },
+                ExpiresIn=expiration
+            )
+        except (ClientError, BotoCoreError) as e:
+            raise Exception(f"Failed to presign upload: {str(e)}")
+
+        headers = {'Content-Type': content_type}
+        headers.update({f'x-amz-meta-{name}': value for name, value in metadata.items()})
+        return {
+            'method': 'PUT',
+            'url': url,
+            'headers': headers,
+            's3_key': s3_key,
+            'expiration_seconds': expiration
+        }
+
+    def part_size_for(self, size: int) -> int:
+        """Smallest whole-MB part size of at least MIN_PART_SIZE that fits size in MAX_PARTS parts."""
+        megabyte = 1024 * 1024
+        part_size = max(self.MIN_PART_SIZE, math.ceil(size / self.MAX_PARTS))
+        return math.ceil(part_size / megabyte) * megabyte
+
+    def create_multipart_upload(
+        self,
+        filename: str,
+        content_type: str,
+        size: int,
+        folder: str = 'uploads',
+        metadata: Optional[Dict[str, str]] = None,
+        expiration: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Start a multipart upload and presign a PUT for each of its parts.
+
+        The browser sends byte range [(n - 1) * part_size, n * part_size) of
+        the file to the URL of part n, in any order and in parallel, keeps the
+        ETag response header of each part and passes them to
+        complete_multipart_upload().
+
+        Returns:
+            dict: upload_id, s3_key, part_size, parts ([{part_number, url}]), expiration_seconds
+
+        Raises:
+            ValidationError: If the file is not allowed
+            Exception: If S3 rejects the upload
+        """
+        s3_key = self._new_upload_key(filename, content_type, size, folder)
+        part_size = self.part_size_for(size)
+
+        try:
+            upload = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                ContentType=content_type,
+                Metadata=metadata or {}
+            )
+            parts = [
+                {
+                    'part_number': part_number,
+                    'url': self.s3_client.generate_presigned_url(
+                        'upload_part',
+                        Params={
+                            'Bucket': self.bucket_name,
+                            'Key': s3_key,
+                            'UploadId': upload['UploadId'],
+                            'PartNumber': part_number
+                        },
+                        ExpiresIn=expiration
+                    )
+                }
+                for part_number in range(1, max(1, math.ceil(size / part_size)) + 1)
+            ]
+        except (ClientError, BotoCoreError) as e:
+            raise Exception(f"Failed to start multipart upload: {str(e)}")
+
+        return {
+            'upload_id': upload['UploadId'],
+            's3_key': s3_key,
+            'part_size': part_size,
+            'parts': parts,
+            'expiration_seconds': expiration
+        }
+
+    def complete_multipart_upload(self, s3_key: str, upload_id: str, parts: List[Dict[str, Any]]) -> None:
+        """
+        Assemble the uploaded parts into the final object.
+
+        Args:
+            s3_key: S3 key of the upload
+            upload_id: Id returned by create_multipart_upload()
+            parts: [{'part_number': int, 'etag': str}] of every uploaded part
+
+        Raises:
+            ValidationError: If S3 rejects the parts (missing, too small, wrong ETag)
+        """
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    'Parts': [
+                        {'PartNumber': part['part_number'], 'ETag': part['etag']}
+                        for part in sorted(parts, key=lambda part: part['part_number'])
+                    ]
+                }
+            )
+        except ClientError as e:
+            raise ValidationError(f"Failed to complete multipart upload: {str(e)}")
+
+    def abort_multipart_upload(self, s3_key: str, upload_id: str) -> bool:
+        """
+        Abort a multipart upload and free its stored parts.
+
+        Returns:
+            bool: True if aborted, False otherwise
+        """
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                UploadId=upload_id
+            )
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logger.warning("Error aborting multipart upload %s: %s", upload_id, e)
+            return False
+
+    def head_file(self, s3_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read an object's stored attributes.
+
+        Returns:
+            dict: size, content_type, etag and metadata, or None if the object does not exist
+        """
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise Exception(f"Failed to read file from S3: {str(e)}")
+        return {
+            'size': head['ContentLength'],
+            'content_type': head.get('ContentType', ''),
+            'etag': head.get('ETag', '').strip('"'),
+            'metadata': head.get('Metadata', {})
+        }
 
     def delete_file(self, s3_key: str) -> bool:
         """
@@ -0,0 +1,240 @@
+"""
+Directory search for people lists (students, guardians, users).
+
+DRF's SearchFilter turns `?search=` into one `icontains` per search field,
+ORed together: a sequential scan of the whole table per keystroke of the
+front-desk "type a name" box. DirectorySearchFilter instead matches a single
+search document -- the lower-cased search fields joined by spaces:
+
+- on PostgreSQL the document is indexed twice by create_search_indexes()
+  (called from migrations): a GIN index over its `simple` tsvector for
+  ranked word-prefix matching, and a pg_trgm GIN index for substring
+  matches (emails, phone fragments). Both are expression indexes, so
+  PostgreSQL keeps them current on every write, bulk writes included.
+- elsewhere (the SQLite test database) an in-process NgramIndex of the
+  document is built per model and rebuilt whenever the table's row count or
+  latest updated_at changes.
+
+Search fields must be columns of the model itself. Results are ordered by
+rank unless the request asks for an explicit ordering.
+"""
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import BooleanField, Case, Count, FloatField, IntegerField, Max, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+MAX_SEARCH_TOKENS = 8
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def search_tokens(text):
+    """Lower-cased word tokens of a search string."""
+    return _TOKEN_RE.findall((text or '').lower())[:MAX_SEARCH_TOKENS]
+
+
+def _document_sql(columns, table=None, using=connection):
+    """
+    SQL for the search document. Columns are sorted so that queries and
+    indexes built from the same fields always produce the same expression.
+    """
+    qn = using.ops.quote_name
+    prefix = f'{qn(table)}.' if table else ''
+    parts = " || ' ' || ".join(f"coalesce({prefix}{qn(column)}, '')" for column in sorted(columns))
+    return f'lower({parts})'
+
+
+def _index_names(table):
+    return f'{table}_search_fts', f'{table}_search_trgm'
+
+
+def create_search_indexes(schema_editor, table, columns):
+    """Create the full-text and trigram indexes of a search document (PostgreSQL only)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    qn = schema_editor.connection.ops.quote_name
+    document = _document_sql(columns, using=schema_editor.connection)
+    fts_name, trgm_name = _index_names(table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {qn(fts_name)} ON {qn(table)} "
+        f"USING gin (to_tsvector('simple'::regconfig, {document}))"
+    )
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {qn(trgm_name)} ON {qn(table)} USING gin (({document}) gin_trgm_ops)'
+    )
+
+
+def drop_search_indexes(schema_editor, table):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    qn = schema_editor.connection.ops.quote_name
+    for name in _index_names(table):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {qn(name)}')
+
+
+# ----------------------------------------------------------------------
+# Fallback n-gram index
+# ----------------------------------------------------------------------
+
+
+class NgramIndex:
+    """
+    In-memory index of search documents by word trigram, plus one- and
+    two-letter word prefixes so short tokens still match.
+
+    A document matches when every query token occurs in one of its words:
+    as the whole word (scores 3), a prefix (2) or elsewhere (1), three
+    letters or more needed for the last case.
+    """
+
+    def __init__(self, rows=()):
+        self.words = {}
+        self.postings = defaultdict(set)
+        for pk, document in rows:
+            self.add(pk, document)
+
+    @staticmethod
+    def _grams(word):
+        grams = {'^' + word[:1], '^' + word[:2]}
+        grams.update(word[start:start + 3] for start in range(len(word) - 2))
+        return grams
+
+    def add(self, pk, document):
+        words = search_tokens(document) if isinstance(document, str) else document
+        self.words[pk] = words
+        for word in words:
+            for gram in self._grams(word):
+                self.postings[gram].add(pk)
+
+    def _candidates(self, token):
+        if len(token) < 3:
+            return self.postings.get('^' + token, set())
+        grams = [self.postings.get(token[start:start + 3], set()) for start in range(len(token) - 2)]
+        return set.intersection(*sorted(grams, key=len))
+
+    @staticmethod
+    def _score(token, words):
+        best = 0
+        for word in words:
+            if word == token:
+                return 3
+            if word.startswith(token):
+                best = 2
+            elif best < 1 and len(token) >= 3 and token in word:
+                best = 1
+        return best
+
+    def search(self, tokens):
+        """[(pk, score)] of matching documents, best first."""
+        if not tokens:
+            return []
+        candidates = None
+        for token in sorted(tokens, key=len, reverse=True):
+            found = self._candidates(token)
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        results = []
+        for pk in candidates:
+            scores = [self._score(token, self.words[pk]) for token in tokens]
+            if all(scores):
+                results.append((pk, sum(scores)))
+        results.sort(key=lambda result: (-result[1], str(result[0])))
+        return results
+
+
+_fallback_indexes = {}
+_fallback_lock = threading.Lock()
+
+
+def fallback_index(model, fields):
+    """The cached NgramIndex of a model's search document, rebuilt when the table changes."""
+    fields = tuple(sorted(fields))
+    manager = model._base_manager
+    has_updated_at = any(field.name == 'updated_at' for field in model._meta.fields)
+    fingerprint = tuple(manager.aggregate(
+        rows=Count('pk'), **({'updated': Max('updated_at')} if has_updated_at else {})
+    ).values())
+    key = (model._meta.label, fields)
+    with _fallback_lock:
+        cached = _fallback_indexes.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+    index = NgramIndex(
+        (row[0], search_tokens(' '.join(str(value) for value in row[1:] if value)))
+        for row in manager.values_list('pk', *fields).iterator()
+    )
+    with _fallback_lock:
+        _fallback_indexes[key] = (fingerprint, index)
+    return index
+
+
+# ----------------------------------------------------------------------
+# Querying
+# ----------------------------------------------------------------------
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_queryset(queryset, fields, text):
+    """
+    Filter `queryset` to rows whose search document matches `text`,
+    annotated with `search_rank` (higher is better).
+    """
+    tokens = search_tokens(text)
+    if not tokens:
+        return queryset
+    if connection.vendor != 'postgresql':
+        ranked = fallback_index(queryset.model, fields).search(tokens)
+        if not ranked:
+            return queryset.none()
+        return queryset.filter(pk__in=[pk for pk, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in ranked],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+    document = _document_sql(fields, queryset.model._meta.db_table)
+    vector = f"to_tsvector('simple'::regconfig, {document})"
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    phrase = ' '.join(text.lower().split())
+    return queryset.filter(
+        RawSQL(
+            f"({vector} @@ to_tsquery('simple'::regconfig, %s) OR {document} LIKE %s)",
+            (tsquery, f'%{_escape_like(phrase)}%'),
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f"ts_rank({vector}, to_tsquery('simple'::regconfig, %s)) + similarity({document}, %s)",
+            (tsquery, phrase),
+            output_field=FloatField(),
+        )
+    )
+
+
+class DirectorySearchFilter(filters.SearchFilter):
+    """
+    Indexed `?search=` for views whose search_fields are plain columns.
+    List it after OrderingFilter so rank ordering applies when the request
+    has no explicit `ordering`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return queryset
+        queryset = search_queryset(queryset, fields, ' '.join(terms))
+        if api_settings.ORDERING_PARAM in request.query_params or 'search_rank' not in queryset.query.annotations:
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by, 'pk')
@@ -0,0 +1,92 @@
+import csv
+import io
+import zipfile
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import User
+from apps.core.exports import ExportColumn, iter_csv, iter_export_rows, iter_xlsx
+from apps.core.models import College
+
+
+def _make_college(code="EXP01"):
+    return College.objects.create(
+        code=code,
+        name=f"Export College {code}",
+        short_name=code,
+        email=f"{code.lower()}@example.com",
+        phone="1234567890",
+        address_line1="123 Main St",
+        city="Bengaluru",
+        state="Karnataka",
+        pincode="560001",
+        country="India",
+    )
+
+
+class ExportEngineTest(TestCase):
+    def test_iter_export_rows_uses_values_and_formatters(self):
+        _make_college("EXP01")
+        _make_college("EXP02")
+        columns = [
+            ExportColumn('Code', 'code'),
+            ExportColumn('Label', 'code', 'short_name', formatter=lambda code, short: f"{code}/{short}"),
+            ExportColumn('Active', 'is_active'),
+        ]
+
+        with self.assertNumQueries(1):
+            rows = list(iter_export_rows(College.objects.order_by('code'), columns, chunk_size=1))
+
+        self.assertEqual(rows, [['EXP01', 'EXP01/EXP01', 'Yes'], ['EXP02', 'EXP02/EXP02', 'Yes']])
+
+    def test_csv_stream(self):
+        content = ''.join(iter_csv(['A', 'B'], [[1, 'x,y'], [2, 'z']]))
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [['A', 'B'], ['1', 'x,y'], ['2', 'z']])
+
+    def test_xlsx_stream_is_valid_workbook(self):
+        rows = ([i, f"row <{i}>"] for i in range(1200))
+        payload = b''.join(iter_xlsx(['Num', 'Text'], rows, rows_per_flush=100))
+
+        with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+            self.assertIn('xl/workbook.xml', archive.namelist())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+        self.assertIn('<row r="1201">', sheet)
+        self.assertIn('row &lt;1199&gt;', sheet)
+
+
+class UserExportViewTest(APITestCase):
+    def setUp(self):
+        self.college = _make_college("EXP03")
+        self.admin = User.objects.create_superuser(
+            username="exportadmin",
+            email="exportadmin@example.com",
+            password="pass1234",
+        )
+        self.client.force_authenticate(self.admin)
+        self.headers = {"HTTP_X_COLLEGE_ID": "all"}
+        self.url = reverse("accounts:user-export")
+
+    def test_csv_export_streams_filtered_users(self):
+        resp = self.client.get(self.url, **self.headers)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(resp.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0][:3], ['ID', 'Username', 'Email'])
+        self.assertIn('exportadmin', [row[1] for row in rows[1:]])
+
+    def test_xlsx_export(self):
+        resp = self.client.get(self.url, {'file_format': 'xlsx'}, **self.headers)
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('.xlsx', resp['Content-Disposition'])
+        with zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content))) as archive:
+            self.assertIn('exportadmin', archive.read('xl/worksheets/sheet1.xml').decode('utf-8'))
+
+    def test_unknown_format_rejected(self):
+        resp = self.client.get(self.url, {'file_format': 'pdf'}, **self.headers)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
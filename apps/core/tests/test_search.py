@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import User
+from apps.core.search import NgramIndex, fallback_index, search_tokens
+
+
+class NgramIndexTest(TestCase):
+    def setUp(self):
+        self.index = NgramIndex([
+            (1, 'Asha Rao asha.rao@imp.test 9000000001'),
+            (2, 'Ashwin Kumar ashwin@imp.test 9000000002'),
+            (3, 'Ravi Rao ravi@imp.test 9111111111'),
+        ])
+
+    def test_every_token_must_match_and_exact_words_rank_first(self):
+        self.assertEqual(self.index.search(search_tokens('ash')), [(1, 2), (2, 2)])
+        self.assertEqual(self.index.search(search_tokens('rao')), [(1, 3), (3, 3)])
+        self.assertEqual([pk for pk, _ in self.index.search(search_tokens('Rao as'))], [1])
+        self.assertEqual(self.index.search(search_tokens('rao kumar')), [])
+
+    def test_short_tokens_match_word_prefixes_only(self):
+        self.assertEqual([pk for pk, _ in self.index.search(['ra'])], [1, 3])
+        self.assertEqual(self.index.search(['ao']), [])
+        # Three letters or more also match inside words, e.g. phone fragments
+        self.assertEqual([pk for pk, _ in self.index.search(['111'])], [3])
+
+
+class DirectorySearchViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="searchadmin",
+            email="searchadmin@example.com",
+            password="pass1234",
+        )
+        people = (
+            ("arao", "Asha", "Rao"),
+            ("akumar", "Ashwin", "Kumar"),
+            ("rrao", "Ravi", "Rao"),
+            ("rmehta", "Raoul", "Mehta"),
+        )
+        for username, first, last in people:
+            User.objects.create_user(
+                username=username, email=f"{username}@example.com", password="pass1234",
+                first_name=first, last_name=last,
+            )
+        self.client.force_authenticate(self.admin)
+        self.headers = {"HTTP_X_COLLEGE_ID": "all"}
+        self.url = reverse("accounts:user-list")
+
+    def _usernames(self, **params):
+        resp = self.client.get(self.url, params, **self.headers)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [row['username'] for row in resp.data['results']]
+
+    def test_search_is_ranked_unless_ordering_is_given(self):
+        # Exact word matches first, ties in the view's default order (newest first)
+        self.assertEqual(self._usernames(search='rao'), ['rrao', 'arao', 'rmehta'])
+        self.assertEqual(self._usernames(search='rao as'), ['arao'])
+        self.assertEqual(self._usernames(search='rao', ordering='username'), ['arao', 'rmehta', 'rrao'])
+
+    def test_index_is_rebuilt_when_rows_change(self):
+        self.assertEqual(self._usernames(search='priya'), [])
+        User.objects.create_user(username="psen", email="psen@example.com", password="pass1234", first_name="Priya")
+        self.assertEqual(self._usernames(search='priya'), ['psen'])
+        index = fallback_index(User, ['username', 'email', 'first_name', 'last_name', 'phone'])
+        self.assertIs(index, fallback_index(User, ['phone', 'last_name', 'first_name', 'email', 'username']))
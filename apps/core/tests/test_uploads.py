@@ -0,0 +1,146 @@
+import os
+from unittest import mock, skipUnless
+
+import boto3
+import requests
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import User
+from apps.core.models import UploadedFile
+from apps.core.s3_utils import S3FileUploader
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto is a test-only dependency
+    mock_aws = None
+
+S3_ENV = {
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_STORAGE_BUCKET_NAME': 'test-uploads',
+    'AWS_S3_REGION_NAME': 'ap-south-1',
+    'AWS_S3_PREFIX': 'college/',
+}
+
+
+@skipUnless(mock_aws, "moto is not installed")
+class DirectUploadTest(APITestCase):
+    """Uploads against moto's in-process S3 stand-in."""
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, S3_ENV)
+        env.start()
+        self.addCleanup(env.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        self.s3 = boto3.client('s3', region_name='ap-south-1')
+        self.s3.create_bucket(
+            Bucket='test-uploads', CreateBucketConfiguration={'LocationConstraint': 'ap-south-1'}
+        )
+
+        self.user = User.objects.create_user(username="uploader", email="up@example.com", password="pass1234")
+        self.client.force_authenticate(self.user)
+
+    def _complete(self, payload):
+        return self.client.post(reverse('core:upload-complete'), payload, format='json')
+
+    def test_presigned_post_and_put_then_complete(self):
+        body = b'%PDF-1.4 report'
+        response = self.client.post(reverse('core:upload-presigned-upload'), {
+            'filename': 'Term Report.pdf', 'content_type': 'application/pdf', 'size': len(body),
+            'folder': 'reports', 'description': 'Term 1',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        presigned = response.data
+        self.assertTrue(presigned['s3_key'].startswith('college/reports/'))
+
+        # Completing before the upload reached S3 records nothing
+        self.assertEqual(self._complete({'s3_key': presigned['s3_key']}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload = requests.post(
+            presigned['url'], data=presigned['fields'], files={'file': ('report.pdf', body)}
+        )
+        self.assertLess(upload.status_code, 300)
+        response = self._complete({'s3_key': presigned['s3_key']})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(
+            (response.data['size'], response.data['content_type'], response.data['folder'], response.data['description']),
+            (len(body), 'application/pdf', 'reports', 'Term 1'),
+        )
+        self.assertEqual(self._complete({'s3_key': presigned['s3_key']}).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('core:upload-presigned-upload'), {
+            'filename': 'photo.png', 'content_type': 'image/png', 'size': 4, 'method': 'PUT',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        upload = requests.put(response.data['url'], data=b'\x89PNG', headers=response.data['headers'])
+        self.assertEqual(upload.status_code, 200)
+        self.assertEqual(self._complete({'s3_key': response.data['s3_key']}).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UploadedFile.objects.filter(created_by=self.user).count(), 2)
+
+    def test_presign_rejects_disallowed_files(self):
+        response = self.client.post(reverse('core:upload-presigned-upload'), {
+            'filename': 'tool.exe', 'content_type': 'application/octet-stream', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_multipart_upload_and_foreign_completion(self):
+        size = 11 * 1024 * 1024
+        response = self.client.post(reverse('core:upload-multipart'), {
+            'filename': 'archive.pdf', 'content_type': 'application/pdf', 'size': size,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        started = response.data
+        self.assertEqual((started['part_size'], len(started['parts'])), (5 * 1024 * 1024, 3))
+
+        parts = []
+        for part in started['parts']:
+            offset = (part['part_number'] - 1) * started['part_size']
+            chunk = b'x' * (min(size, offset + started['part_size']) - offset)
+            upload = requests.put(part['url'], data=chunk)
+            self.assertEqual(upload.status_code, 200)
+            parts.append({'part_number': part['part_number'], 'etag': upload.headers['ETag']})
+
+        # Another user can neither complete nor abort it, and S3 is left untouched
+        other = User.objects.create_user(username="other", email="other@example.com", password="pass1234")
+        self.client.force_authenticate(other)
+        payload = {'s3_key': started['s3_key'], 'upload_id': started['upload_id'], 'parts': parts}
+        response = self._complete(payload)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        abort = {'s3_key': started['s3_key'], 'upload_id': started['upload_id']}
+        response = self.client.delete(reverse('core:upload-multipart'), abort, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(self.s3.list_multipart_uploads(Bucket='test-uploads').get('Uploads', [])), 1)
+
+        self.client.force_authenticate(self.user)
+        response = self._complete(payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(UploadedFile.objects.get().size, size)
+
+        response = self.client.post(reverse('core:upload-multipart'), {
+            'filename': 'draft.pdf', 'content_type': 'application/pdf', 'size': size,
+        }, format='json')
+        abort = {'s3_key': response.data['s3_key'], 'upload_id': response.data['upload_id']}
+        response = self.client.delete(reverse('core:upload-multipart'), abort, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertNotIn('Uploads', self.s3.list_multipart_uploads(Bucket='test-uploads'))
+
+    def test_server_side_bulk_upload_is_parallel_and_multipart(self):
+        uploader = S3FileUploader()
+        files = [ContentFile(b'row,%d\n' % index, name=f'import_{index}.txt') for index in range(12)]
+        files.append(ContentFile(b'y' * (S3FileUploader.MULTIPART_THRESHOLD + 1), name='statement.pdf'))
+        files.append(ContentFile(b'MZ', name='tool.exe'))
+
+        results = uploader.upload_multiple_files(files, folder='imports', metadata={'source': 'import'})
+        self.assertEqual((results['success_count'], results['error_count']), (13, 1))
+        self.assertEqual(results['failed_uploads'][0]['filename'], 'tool.exe')
+
+        large = results['successful_uploads'][-1]
+        head = self.s3.head_object(Bucket='test-uploads', Key=large['s3_key'])
+        # Multipart objects carry an ETag of the form "<md5>-<parts>"
+        self.assertTrue(head['ETag'].strip('"').endswith('-2'))
+        self.assertEqual((head['ContentType'], head['Metadata']), ('application/pdf', {'source': 'import'}))
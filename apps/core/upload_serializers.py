@@ -4,6 +4,8 @@ Handles validation and data structure for S3 file uploads.
 """
 from rest_framework import serializers
 
+from .models import UploadedFile
+
 
 class SingleFileUploadSerializer(serializers.Serializer):
     """
@@ -130,3 +132,133 @@ class PresignedUrlSerializer(serializers.Serializer):
         if not value:
             raise serializers.ValidationError("S3 key is required.")
         return value
+
+
+class DirectUploadSerializer(serializers.Serializer):
+    """
+    Serializer for starting a direct browser-to-S3 upload.
+    """
+    filename = serializers.CharField(
+        required=True,
+        max_length=255,
+        help_text="Name of the file to upload (its extension must be allowed)"
+    )
+    content_type = serializers.CharField(
+        required=True,
+        max_length=100,
+        help_text="MIME type the browser will send the file with"
+    )
+    size = serializers.IntegerField(
+        required=True,
+        min_value=1,
+        help_text="File size in bytes"
+    )
+    folder = serializers.CharField(
+        required=False,
+        default='uploads',
+        max_length=100,
+        help_text="Subfolder in S3 bucket (optional, default: 'uploads')"
+    )
+    description = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=500,
+        help_text="Optional description/metadata for the file"
+    )
+    expiration = serializers.IntegerField(
+        required=False,
+        default=3600,
+        min_value=60,
+        max_value=604800,  # Max 7 days
+        help_text="Expiration of the presigned request(s) in seconds (default: 3600 = 1 hour)"
+    )
+
+
+class PresignedUploadSerializer(DirectUploadSerializer):
+    """
+    Serializer for presigning a single-request browser upload.
+    """
+    method = serializers.ChoiceField(
+        choices=['POST', 'PUT'],
+        required=False,
+        default='POST',
+        help_text="POST (HTML form upload with a signed policy) or PUT (raw body)"
+    )
+
+
+class MultipartAbortSerializer(serializers.Serializer):
+    """
+    Serializer for aborting a multipart upload.
+    """
+    s3_key = serializers.CharField(
+        required=True,
+        max_length=500,
+        help_text="S3 key returned when the upload was started"
+    )
+    upload_id = serializers.CharField(
+        required=True,
+        max_length=1024,
+        help_text="Upload id returned when the upload was started"
+    )
+
+
+class UploadedPartSerializer(serializers.Serializer):
+    """
+    Serializer for one uploaded part of a multipart upload.
+    """
+    part_number = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField(max_length=100, help_text="ETag response header of the part upload")
+
+
+class UploadCompleteSerializer(serializers.Serializer):
+    """
+    Serializer for the completion callback of a direct upload.
+    """
+    s3_key = serializers.CharField(
+        required=True,
+        max_length=500,
+        help_text="S3 key returned when the upload was started"
+    )
+    upload_id = serializers.CharField(
+        required=False,
+        max_length=1024,
+        help_text="Upload id, for multipart uploads only"
+    )
+    parts = UploadedPartSerializer(
+        many=True,
+        required=False,
+        help_text="Uploaded parts, for multipart uploads only"
+    )
+    description = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=500,
+        help_text="Optional description/metadata for the file"
+    )
+
+    def validate(self, attrs):
+        """Multipart uploads need their parts; single uploads have none."""
+        if attrs.get('upload_id') and not attrs.get('parts'):
+            raise serializers.ValidationError({'parts': "Parts are required to complete a multipart upload."})
+        if attrs.get('parts') and not attrs.get('upload_id'):
+            raise serializers.ValidationError({'upload_id': "Parts are only accepted for a multipart upload."})
+        return attrs
+
+
+class UploadedFileSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a recorded upload.
+    """
+    file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadedFile
+        fields = [
+            'id', 's3_key', 'file_url', 'filename', 'folder', 'content_type',
+            'size', 'etag', 'description', 'created_by', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_file_url(self, obj):
+        uploader = self.context.get('uploader')
+        return uploader.file_url(obj.s3_key) if uploader else None
@@ -1,6 +1,12 @@
 """
 API views for S3 file upload functionality.
 Provides endpoints for uploading, deleting, and managing files in AWS S3.
+
+Browsers should upload directly to the bucket: PresignedUploadView (one
+request) or MultipartUploadView (large files, parallel parts), followed by
+UploadCompleteView, which verifies the object and records an UploadedFile.
+SingleFileUploadView and MultipleFileUploadView proxy the bytes through
+the app server and are kept for small files.
 """
 from rest_framework import status
 from rest_framework.views import APIView
@@ -8,8 +14,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
+from django.core import signing
 from django.core.exceptions import ValidationError
 
+from .models import UploadedFile
 from .s3_utils import S3FileUploader
 from .upload_serializers import (
     SingleFileUploadSerializer,
@@ -17,10 +25,52 @@ from .upload_serializers import (
     FileUploadResponseSerializer,
     MultipleFileUploadResponseSerializer,
     FileDeleteSerializer,
-    PresignedUrlSerializer
+    PresignedUrlSerializer,
+    DirectUploadSerializer,
+    PresignedUploadSerializer,
+    MultipartAbortSerializer,
+    UploadCompleteSerializer,
+    UploadedFileSerializer
 )
 
 
+def _upload_metadata(request, description=''):
+    """
+    S3 metadata of a direct upload; uploaded-by is checked again on completion.
+
+    Browsers send metadata as x-amz-meta-* headers, so names use hyphens:
+    proxies and S3-compatible servers may drop or rewrite underscores.
+    """
+    metadata = {
+        'uploaded-by': str(request.user.id),
+        'username': request.user.username,
+    }
+    if description:
+        metadata['description'] = description
+    return metadata
+
+
+MULTIPART_SALT = 'apps.core.upload_views.multipart'
+
+
+def _sign_upload_id(request, upload_id):
+    """
+    Upload id handed to the browser: S3's id signed with the uploader's user
+    id. An unfinished multipart upload has no readable metadata, so this is
+    what lets completion and abort check the owner before touching S3.
+    """
+    return signing.Signer(salt=MULTIPART_SALT).sign(f'{request.user.id}:{upload_id}')
+
+
+def _own_upload_id(request, signed_upload_id):
+    """S3 upload id of a signed upload id, or None unless request.user started the upload."""
+    try:
+        user_id, _, upload_id = signing.Signer(salt=MULTIPART_SALT).unsign(signed_upload_id).partition(':')
+    except signing.BadSignature:
+        return None
+    return upload_id if user_id == str(request.user.id) else None
+
+
 class SingleFileUploadView(APIView):
     """
     API endpoint for uploading a single file to S3.
@@ -304,3 +354,262 @@ class PresignedUrlView(APIView):
                 {'error': f'URL generation failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class PresignedUploadView(APIView):
+    """
+    API endpoint for presigning a direct browser upload to S3.
+
+    POST /api/upload/presigned-upload/
+    - Returns a presigned POST (url + form fields) or PUT (url + headers)
+    - The browser sends the file straight to the bucket, then calls
+      /api/upload/complete/ with the returned s3_key
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=PresignedUploadSerializer,
+        responses={
+            200: {'description': 'Presigned upload generated successfully'},
+            400: {'description': 'Validation error'},
+            500: {'description': 'Presigning failed'}
+        },
+        description="Presign a direct upload of one file to AWS S3 (form POST or PUT)."
+    )
+    def post(self, request):
+        """Presign a single-request upload."""
+        serializer = PresignedUploadSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        metadata = _upload_metadata(request, data.get('description', ''))
+
+        try:
+            uploader = S3FileUploader()
+            presign = (
+                uploader.generate_presigned_post if data['method'] == 'POST' else uploader.generate_presigned_put
+            )
+            result = presign(
+                data['filename'], data['content_type'], data['size'],
+                data['folder'], metadata, data['expiration']
+            )
+            return Response(result, status=status.HTTP_200_OK)
+
+        except ValidationError as e:
+            return Response(
+                {'error': e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Presigning failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class MultipartUploadView(APIView):
+    """
+    API endpoint for direct multipart uploads of large files to S3.
+
+    POST /api/upload/multipart/
+    - Starts a multipart upload and returns one presigned PUT URL per part
+    - The browser uploads the parts in parallel, then calls
+      /api/upload/complete/ with the upload_id and the parts' ETags
+    - The upload_id is signed for the caller: only they can complete or abort it
+
+    DELETE /api/upload/multipart/
+    - Aborts an unfinished multipart upload
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=DirectUploadSerializer,
+        responses={
+            200: {'description': 'Multipart upload started'},
+            400: {'description': 'Validation error'},
+            500: {'description': 'Upload could not be started'}
+        },
+        description="Start a direct multipart upload to AWS S3 with presigned part URLs."
+    )
+    def post(self, request):
+        """Start a multipart upload."""
+        serializer = DirectUploadSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        metadata = _upload_metadata(request, data.get('description', ''))
+
+        try:
+            uploader = S3FileUploader()
+            result = uploader.create_multipart_upload(
+                data['filename'], data['content_type'], data['size'],
+                data['folder'], metadata, data['expiration']
+            )
+            result['upload_id'] = _sign_upload_id(request, result['upload_id'])
+            return Response(result, status=status.HTTP_200_OK)
+
+        except ValidationError as e:
+            return Response(
+                {'error': e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Upload could not be started: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @extend_schema(
+        request=MultipartAbortSerializer,
+        responses={
+            200: {'description': 'Multipart upload aborted'},
+            400: {'description': 'Validation error'},
+            403: {'description': 'Upload was started by another user'},
+            500: {'description': 'Abort failed'}
+        },
+        description="Abort an unfinished multipart upload and free its parts."
+    )
+    def delete(self, request):
+        """Abort a multipart upload."""
+        serializer = MultipartAbortSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        s3_key = serializer.validated_data['s3_key']
+        upload_id = _own_upload_id(request, serializer.validated_data['upload_id'])
+        if upload_id is None:
+            return Response(
+                {'error': 'Upload was started by another user'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            uploader = S3FileUploader()
+            if uploader.abort_multipart_upload(s3_key, upload_id):
+                return Response(
+                    {'message': 'Upload aborted', 's3_key': s3_key},
+                    status=status.HTTP_200_OK
+                )
+            return Response(
+                {'error': 'Failed to abort upload'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        except Exception as e:
+            return Response(
+                {'error': f'Abort failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class UploadCompleteView(APIView):
+    """
+    API endpoint called once a direct upload has reached S3.
+
+    POST /api/upload/complete/
+    - Completes multipart uploads (upload_id + parts)
+    - Reads the object back from S3, checks it was uploaded by the caller
+      and is an allowed file, and records it as an UploadedFile
+    - Disallowed objects are deleted from the bucket
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=UploadCompleteSerializer,
+        responses={
+            200: UploadedFileSerializer,
+            201: UploadedFileSerializer,
+            400: {'description': 'Validation error or file not uploaded'},
+            403: {'description': 'File was uploaded by another user'},
+            500: {'description': 'Completion failed'}
+        },
+        description="Complete a direct upload to AWS S3 and record the file's metadata."
+    )
+    def post(self, request):
+        """Verify and record a direct upload."""
+        serializer = UploadCompleteSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {'error': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        s3_key = data['s3_key']
+
+        try:
+            uploader = S3FileUploader()
+            if not s3_key.startswith(uploader.prefix):
+                return Response({'error': 'Unknown upload key'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if data.get('upload_id'):
+                upload_id = _own_upload_id(request, data['upload_id'])
+                if upload_id is None:
+                    return Response(
+                        {'error': 'File was uploaded by another user'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+                uploader.complete_multipart_upload(s3_key, upload_id, data['parts'])
+
+            stored = uploader.head_file(s3_key)
+            if stored is None:
+                return Response(
+                    {'error': 'File not found in S3; upload it before completing'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if stored['metadata'].get('uploaded-by') != str(request.user.id):
+                return Response(
+                    {'error': 'File was uploaded by another user'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            folder, _, filename = s3_key[len(uploader.prefix):].rpartition('/')
+            is_valid, error_message = uploader.validate_upload(filename, stored['content_type'], stored['size'])
+            if not is_valid:
+                uploader.delete_file(s3_key)
+                return Response({'error': error_message}, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = {
+                'filename': filename,
+                'folder': folder,
+                'content_type': stored['content_type'],
+                'size': stored['size'],
+                'etag': stored['etag'],
+                'description': data.get('description', stored['metadata'].get('description', '')),
+                'updated_by': request.user,
+            }
+            record, created = UploadedFile.objects.update_or_create(
+                s3_key=s3_key,
+                defaults=fields,
+                create_defaults={**fields, 'created_by': request.user},
+            )
+            return Response(
+                UploadedFileSerializer(record, context={'uploader': uploader}).data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+            )
+
+        except ValidationError as e:
+            return Response(
+                {'error': e.messages[0]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Completion failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -20,6 +20,9 @@ from .upload_views import (
     MultipleFileUploadView,
     FileDeleteView,
     PresignedUrlView,
+    PresignedUploadView,
+    MultipartUploadView,
+    UploadCompleteView,
 )
 from .hierarchy_views import (
     OrganizationNodeViewSet,
@@ -59,4 +62,7 @@ urlpatterns = [
     path('upload/multiple/', MultipleFileUploadView.as_view(), name='upload-multiple'),
     path('upload/delete/', FileDeleteView.as_view(), name='upload-delete'),
     path('upload/presigned-url/', PresignedUrlView.as_view(), name='upload-presigned-url'),
+    path('upload/presigned-upload/', PresignedUploadView.as_view(), name='upload-presigned-upload'),
+    path('upload/multipart/', MultipartUploadView.as_view(), name='upload-multipart'),
+    path('upload/complete/', UploadCompleteView.as_view(), name='upload-complete'),
 ]
@@ -305,6 +305,11 @@ class ExamResultSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
 
 
+class ExamResultProcessSerializer(serializers.Serializer):
+    """Scope of an exam result processing run."""
+    section_id = serializers.IntegerField(required=False, allow_null=True)
+
+
 # ============================================================================
 # PROGRESS CARD SERIALIZERS
 # ============================================================================
@@ -0,0 +1,147 @@
+"""
+Exam result processing.
+
+ExamResultService turns the StudentMarks of an exam into graded, ranked
+ExamResult rows with a fixed number of set-based queries, independent of
+the number of students:
+
+1. one UPDATE per marks register grades every subject mark against the
+   college's MarksGrade bands (a CASE over the bands);
+2. one GROUP BY query sums marks per student, maps the percentage onto
+   the same bands and ranks students with DENSE_RANK();
+3. one bulk INSERT ... ON CONFLICT upserts the ExamResult rows.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When, Window,
+)
+from django.db.models.functions import Coalesce, DenseRank
+
+from .models import ExamResult, MarksGrade, MarksRegister, StudentMarks
+
+CENT = Decimal('0.01')
+RESULT_PASS = 'PASS'
+RESULT_FAIL = 'FAIL'
+
+
+class ExamResultService:
+    """Compute subject grades, totals, overall grades and ranks for an exam."""
+
+    def __init__(self, exam, user=None):
+        self.exam = exam
+        self.user = user
+
+    def grade_bands(self):
+        """Active grade bands of the exam's college, highest first."""
+        return list(
+            MarksGrade.objects.all_colleges().filter(
+                college_id=self.exam.college_id, is_active=True
+            ).order_by('-min_percentage').values_list('grade', 'min_percentage')
+        )
+
+    def marks(self, section_id=None):
+        queryset = StudentMarks.objects.filter(register__exam=self.exam, is_active=True)
+        if section_id:
+            queryset = queryset.filter(student__current_section_id=section_id)
+        return queryset
+
+    def grade_subject_marks(self, section_id=None, bands=None):
+        """Set StudentMarks.grade from the bands; absent students get no grade."""
+        if bands is None:
+            bands = self.grade_bands()
+        registers = MarksRegister.objects.filter(exam=self.exam, is_active=True)
+        marks = self.marks(section_id)
+        updated = 0
+        for register_id, max_marks in registers.values_list('id', 'max_marks'):
+            register_marks = marks.filter(register_id=register_id)
+            if not bands or not max_marks:
+                updated += register_marks.update(grade=None)
+                continue
+            # Compare raw marks against each band's cut-off for this register
+            grade = Case(
+                When(is_absent=True, then=Value(None)),
+                *[
+                    When(total_marks__gte=min_percentage * max_marks / 100, then=Value(band))
+                    for band, min_percentage in bands
+                ],
+                default=Value(None),
+            )
+            updated += register_marks.update(grade=grade)
+        return updated
+
+    def student_totals(self, section_id=None, bands=None):
+        """
+        Per-student totals with percentage, overall grade and dense rank
+        (ties share a rank), best first.
+        """
+        if bands is None:
+            bands = self.grade_bands()
+        percentage = ExpressionWrapper(
+            F('obtained') * Value(Decimal('100')) / F('maximum'),
+            output_field=DecimalField(max_digits=12, decimal_places=4),
+        )
+        overall_grade = Case(
+            *[When(percentage__gte=min_percentage, then=Value(band)) for band, min_percentage in bands],
+            default=Value(None),
+            output_field=CharField(),
+        )
+
+        return self.marks(section_id).values('student_id').annotate(
+            obtained=Coalesce(Sum('total_marks'), Value(Decimal('0'))),
+            maximum=Sum('register__max_marks'),
+            failed_subjects=Count(
+                'id', filter=Q(is_absent=True) | Q(total_marks__lt=F('register__pass_marks'))
+            ),
+        ).filter(maximum__gt=0).annotate(
+            percentage=percentage,
+        ).annotate(
+            overall_grade=overall_grade,
+            rank=Window(DenseRank(), order_by=F('percentage').desc()),
+        ).order_by('rank', 'student_id')
+
+    def process(self, section_id=None):
+        """
+        Grade, total and rank the exam for its class (or one section) and
+        upsert ExamResult rows. Ranks are relative to the processed students.
+        Returns a summary dict.
+        """
+        with transaction.atomic():
+            bands = self.grade_bands()
+            graded = self.grade_subject_marks(section_id, bands)
+            results = []
+            for row in self.student_totals(section_id, bands):
+                passed = row['failed_subjects'] == 0
+                results.append(ExamResult(
+                    student_id=row['student_id'],
+                    exam=self.exam,
+                    total_marks=row['maximum'],
+                    marks_obtained=row['obtained'],
+                    percentage=Decimal(row['percentage']).quantize(CENT, rounding=ROUND_HALF_UP),
+                    grade=row['overall_grade'],
+                    result_status=RESULT_PASS if passed else RESULT_FAIL,
+                    rank=row['rank'],
+                    created_by=self.user,
+                    updated_by=self.user,
+                ))
+            ExamResult.objects.bulk_create(
+                results,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['student', 'exam'],
+                update_fields=[
+                    'total_marks', 'marks_obtained', 'percentage', 'grade',
+                    'result_status', 'rank', 'updated_by', 'updated_at',
+                ],
+            )
+
+        passed = sum(1 for result in results if result.result_status == RESULT_PASS)
+        return {
+            'exam': self.exam.pk,
+            'section': section_id,
+            'subject_marks_graded': graded,
+            'results': len(results),
+            'passed': passed,
+            'failed': len(results) - passed,
+        }
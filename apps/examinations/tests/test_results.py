@@ -0,0 +1,151 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import AcademicSession, Class, Faculty, Program, Section, Subject
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.examinations.models import Exam, ExamResult, ExamType, MarksGrade, MarksRegister, StudentMarks
+from apps.examinations.services import ExamResultService
+from apps.students.models import Student
+
+
+class ExamResultServiceTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="RES",
+            name="Result College",
+            short_name="RES",
+            email="info@res.test",
+            phone="9999999993",
+            address_line1="1 Merit Rd",
+            city="City",
+            state="State",
+            pincode="000011",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=self.year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.class_obj = Class.objects.create(
+            college=self.college,
+            program=self.program,
+            academic_session=session,
+            name="BSC-1",
+            semester=1,
+            year=1,
+        )
+        self.section = Section.objects.create(class_obj=self.class_obj, name="A")
+        for grade, low, high in (("A", 80, 100), ("B", 60, 79.99), ("C", 40, 59.99), ("F", 0, 39.99)):
+            MarksGrade.objects.create(
+                college=self.college, name=grade, grade=grade, min_percentage=low, max_percentage=high
+            )
+        exam_type = ExamType.objects.create(college=self.college, name="Final", code="FIN")
+        self.exam = Exam.objects.create(
+            college=self.college,
+            name="Final Exam",
+            exam_type=exam_type,
+            class_obj=self.class_obj,
+            academic_session=session,
+            start_date=date(2025, 11, 1),
+            end_date=date(2025, 11, 15),
+        )
+        self.registers = [
+            MarksRegister.objects.create(
+                exam=self.exam, subject=self._subject(code), section=self.section, max_marks=100, pass_marks=40
+            )
+            for code in ("PHY", "CHE")
+        ]
+
+    def _subject(self, code):
+        return Subject.objects.create(
+            college=self.college, code=code, name=code, short_name=code, subject_type="theory",
+            credits=4, max_marks=100, pass_marks=40,
+        )
+
+    def _student(self, roll, *marks):
+        user = User.objects.create_user(
+            username=f"res_student_{roll}",
+            email=f"res{roll}@res.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        student = Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number=f"RES-{roll}",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number=f"RES-REG-{roll}",
+            program=self.program,
+            current_class=self.class_obj,
+            current_section=self.section,
+            academic_year=self.year,
+            first_name="Stu",
+            last_name=str(roll),
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email=f"res{roll}@res.test",
+        )
+        for register, value in zip(self.registers, marks):
+            StudentMarks.objects.create(
+                register=register, student=student,
+                total_marks=value or 0, is_absent=value is None,
+            )
+        return student
+
+    def test_results_are_graded_ranked_and_upserted(self):
+        top = self._student(1, 90, 80)
+        tied = self._student(2, 80, 90)
+        middle = self._student(3, 70, 60)
+        failed = self._student(4, 95, None)
+
+        with self.assertNumQueries(8):
+            summary = ExamResultService(self.exam).process()
+
+        self.assertEqual((summary['results'], summary['passed'], summary['failed']), (4, 3, 1))
+        results = {result.student_id: result for result in ExamResult.objects.filter(exam=self.exam)}
+        self.assertEqual(results[top.id].percentage, Decimal('85.00'))
+        self.assertEqual((results[top.id].rank, results[tied.id].rank), (1, 1))
+        self.assertEqual((results[middle.id].rank, results[middle.id].grade), (2, "B"))
+        self.assertEqual((results[failed.id].rank, results[failed.id].grade, results[failed.id].result_status), (3, "C", "FAIL"))
+        self.assertEqual(
+            list(StudentMarks.objects.filter(student=failed).order_by('register_id').values_list('grade', flat=True)),
+            ["A", None],
+        )
+
+        StudentMarks.objects.filter(student=middle).update(total_marks=100)
+        ExamResultService(self.exam).process(section_id=self.section.id)
+
+        self.assertEqual(ExamResult.objects.filter(exam=self.exam).count(), 4)
+        self.assertEqual(ExamResult.objects.get(student=middle).rank, 1)
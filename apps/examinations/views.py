@@ -1,5 +1,7 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
@@ -31,7 +33,9 @@ from .serializers import (
     ProgressCardSerializer,
     MarkSheetSerializer,
     TabulationSheetSerializer,
+    ExamResultProcessSerializer,
 )
+from .services import ExamResultService
 
 
 class MarksGradeViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
@@ -66,6 +70,19 @@ class ExamViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['start_date', 'end_date', 'name']
     ordering = ['-start_date']
 
+    @action(detail=True, methods=['post'], url_path='process-results', serializer_class=ExamResultProcessSerializer)
+    def process_results(self, request, pk=None):
+        """
+        Grade the exam's subject marks and (re)compute totals, overall grades
+        and ranks for its class, or for one section. Safe to re-run after
+        marks are corrected.
+        """
+        exam = self.get_object()
+        serializer = ExamResultProcessSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        summary = ExamResultService(exam, user=request.user).process(**serializer.validated_data)
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class ExamScheduleViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelViewSet):
     queryset = ExamSchedule.objects.select_related('exam', 'subject', 'classroom', 'invigilator')
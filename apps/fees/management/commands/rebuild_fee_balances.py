@@ -0,0 +1,52 @@
+"""
+Management command to allocate unallocated collections and rebuild the
+denormalised StudentFeeBalance rows.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.fees.models import FeeAllocation, FeeCollection, FeeStructure
+from apps.fees.services import FeeLedgerService, settled_collections_q
+from apps.students.models import Student
+
+
+class Command(BaseCommand):
+    help = 'Allocate settled fee collections to fee structures and rebuild student fee balances'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--college', type=int, help='Limit to one college ID')
+        parser.add_argument(
+            '--skip-allocation', action='store_true',
+            help='Only rebuild balances; do not allocate pending collections'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        college_id = options.get('college')
+        batch_size = options['batch_size']
+
+        if not options['skip_allocation']:
+            collections = FeeCollection.objects.filter(settled_collections_q()).exclude(
+                id__in=FeeAllocation.objects.values('collection_id')
+            ).order_by('payment_date', 'id')
+            # Skip students with nothing to allocate against (surplus stays as advance)
+            collections = collections.filter(
+                student_id__in=FeeStructure.objects.values('student_id')
+            )
+            if college_id:
+                collections = collections.filter(student__college_id=college_id)
+
+            allocated = 0
+            for collection in collections.iterator(chunk_size=batch_size):
+                if FeeLedgerService.allocate_collection(collection):
+                    allocated += 1
+            self.stdout.write(self.style.SUCCESS(f'Collections allocated: {allocated}'))
+
+        students = Student.objects.all_colleges().order_by('id')
+        if college_id:
+            students = students.filter(college_id=college_id)
+        student_ids = list(students.values_list('id', flat=True))
+
+        rebuilt = 0
+        for start in range(0, len(student_ids), batch_size):
+            rebuilt += FeeLedgerService.recompute_balances(student_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Student balances rebuilt: {rebuilt}'))
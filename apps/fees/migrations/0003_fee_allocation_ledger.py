@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dynamicrole_hierarchypermission_hierarchyuserrole_and_more'),
+        ('fees', '0002_alter_bankpayment_options_and_more'),
+        ('students', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True, help_text='Indicates if the record is active (soft delete)')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='fees.feecollection')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('fee_structure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='fees.feestructure')),
+                ('installment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocations', to='fees.feeinstallment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_allocations', to='students.student')),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'fee_allocation',
+                'indexes': [models.Index(fields=['collection'], name='fee_allocat_collect_cb3a18_idx'), models.Index(fields=['student', 'fee_structure'], name='fee_allocat_student_2afb27_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentFeeBalance',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fee_balance', serialize=False, to='students.student')),
+                ('total_due', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('outstanding', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('advance', models.DecimalField(decimal_places=2, default=0, help_text='Collected amount not yet allocated to any fee structure', max_digits=12)),
+                ('next_due_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('college', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_fee_balances', to='core.college')),
+            ],
+            options={
+                'db_table': 'student_fee_balance',
+                'indexes': [models.Index(fields=['college', 'outstanding'], name='student_fee_college_b9ed56_idx'), models.Index(fields=['college', 'next_due_date'], name='student_fee_college_4cfb57_idx')],
+            },
+        ),
+    ]
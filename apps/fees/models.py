@@ -261,3 +261,55 @@ class FeeReminder(AuditModel):
 
     def __str__(self):
         return f"Reminder for {self.student} on {self.reminder_date}"
+
+
+class FeeAllocation(AuditModel):
+    """
+    Ledger entry applying part of a FeeCollection to a FeeStructure (and,
+    when the structure has a schedule, to one of its installments).
+    """
+    collection = models.ForeignKey(FeeCollection, on_delete=models.CASCADE, related_name='allocations')
+    fee_structure = models.ForeignKey(FeeStructure, on_delete=models.CASCADE, related_name='allocations')
+    installment = models.ForeignKey(
+        FeeInstallment, on_delete=models.SET_NULL, null=True, blank=True, related_name='allocations'
+    )
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='fee_allocations')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        db_table = 'fee_allocation'
+        indexes = [
+            models.Index(fields=['collection']),
+            models.Index(fields=['student', 'fee_structure']),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} of collection {self.collection_id} to structure {self.fee_structure_id}"
+
+
+class StudentFeeBalance(models.Model):
+    """
+    Denormalised per-student fee position, maintained by the allocation
+    engine so defaulter lists and balance summaries are indexed lookups.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name='fee_balance')
+    college = models.ForeignKey(College, on_delete=models.CASCADE, related_name='student_fee_balances')
+    total_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    outstanding = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    advance = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0,
+        help_text="Collected amount not yet allocated to any fee structure"
+    )
+    next_due_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'student_fee_balance'
+        indexes = [
+            models.Index(fields=['college', 'outstanding']),
+            models.Index(fields=['college', 'next_due_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}: outstanding {self.outstanding}"
@@ -20,6 +20,7 @@ from .models import (
     BankPayment,
     OnlinePayment,
     FeeReminder,
+    StudentFeeBalance,
 )
 from apps.students.models import Student
 from apps.core.serializers import UserBasicSerializer
@@ -83,6 +84,23 @@ class FeeMasterSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'college_name', 'program_name', 'academic_year_name', 'fee_type_name']
 
 
+# ============================================================================
+# FEE ASSIGNMENT SERIALIZERS
+# ============================================================================
+
+
+class FeeAssignmentSerializer(serializers.Serializer):
+    """Audience and schedule for assigning a fee master in bulk."""
+    due_date = serializers.DateField(help_text="Due date of the first installment")
+    installments = serializers.IntegerField(default=1, min_value=1, max_value=12)
+    interval_months = serializers.IntegerField(default=1, min_value=1, max_value=12)
+    reminder_days_before = serializers.IntegerField(default=7, min_value=0, max_value=90)
+    reminder_type = serializers.ChoiceField(choices=['email', 'sms', 'notification'], default='email')
+    class_id = serializers.IntegerField(required=False, allow_null=True)
+    section_id = serializers.IntegerField(required=False, allow_null=True)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+
+
 # Nested serializers for read-only display
 class StudentDisplaySerializer(serializers.ModelSerializer):
     """Serializer for displaying student name in fee structures"""
@@ -285,3 +303,15 @@ class FeeReminderSerializer(serializers.ModelSerializer):
         if instance.student:
             representation['student_name'] = instance.student.get_full_name()
         return representation
+
+
+class StudentFeeBalanceSerializer(serializers.ModelSerializer):
+    student_details = StudentDisplaySerializer(source='student', read_only=True)
+
+    class Meta:
+        model = StudentFeeBalance
+        fields = [
+            'student', 'student_details', 'college', 'total_due', 'total_paid',
+            'outstanding', 'advance', 'next_due_date', 'updated_at'
+        ]
+        read_only_fields = fields
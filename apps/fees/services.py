@@ -0,0 +1,448 @@
+"""
+Fee assignment and allocation engines.
+
+FeeAssignmentService assigns a FeeMaster to every student in an audience
+(program, class, section and/or category) in one transaction: structures,
+installments and reminders are written with bulk_create instead of one
+fee_structure_post_save per student. Students that already hold a structure for the fee master are
+skipped, so an assignment can safely be re-run after new admissions.
+
+FeeLedgerService applies each settled FeeCollection to the student's
+outstanding structures and installments in due-date order, recording a
+FeeAllocation per slice and keeping StudentFeeBalance up to date. When a
+collection is deleted or its amount/status changes, a refund is recorded or
+a structure is edited, the student's ledger is rebuilt from the allocations
+up (rebuild_student), so balances never keep money that is no longer there.
+"""
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Case, F, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from apps.students.models import Student
+from .models import (
+    FeeAllocation,
+    FeeCollection,
+    FeeInstallment,
+    FeeMaster,
+    FeeRefund,
+    FeeReminder,
+    FeeStructure,
+    StudentFeeBalance,
+    StudentFeeDiscount,
+)
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+
+# Collection statuses are free text and historically mixed case
+SETTLED_COLLECTION_STATUSES = ('paid', 'completed', 'success')
+
+
+def settled_collections_q(prefix=''):
+    """Q object matching collections that represent money actually received."""
+    query = Q()
+    for value in SETTLED_COLLECTION_STATUSES:
+        query |= Q(**{f'{prefix}status__iexact': value})
+    return query
+
+
+def is_settled(collection):
+    return (collection.status or '').lower() in SETTLED_COLLECTION_STATUSES
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    # Clamp to the last day of the target month (e.g. Jan 31 + 1 month)
+    for day in (value.day, 30, 29, 28):
+        try:
+            return value.replace(year=year, month=month, day=day)
+        except ValueError:
+            continue
+
+
+def discounted_amount(amount, discounts):
+    """
+    Apply a student's discounts to a fee amount. Percentage discounts are
+    taken off the original amount, fixed discounts are subtracted as-is;
+    the result never drops below zero.
+    """
+    total_off = Decimal('0')
+    for discount in discounts:
+        if discount.percentage:
+            total_off += amount * discount.percentage / Decimal('100')
+        elif discount.amount:
+            total_off += discount.amount
+    return max(amount - total_off, Decimal('0')).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def split_installments(amount, count):
+    """Split `amount` into `count` parts; rounding remainder goes on the last one."""
+    share = (amount / count).quantize(CENT, rounding=ROUND_HALF_UP)
+    parts = [share] * (count - 1)
+    parts.append(amount - share * (count - 1))
+    return parts
+
+
+class FeeAssignmentService:
+    """Bulk-assign a FeeMaster to an audience of students."""
+
+    def __init__(self, fee_master, user=None):
+        self.fee_master = fee_master
+        self.user = user
+
+    def audience(self, class_id=None, section_id=None, category_id=None):
+        """Active, non-alumni students of the fee master's program, optionally narrowed."""
+        queryset = Student.objects.all_colleges().filter(
+            college_id=self.fee_master.college_id,
+            program_id=self.fee_master.program_id,
+            is_active=True,
+            is_alumni=False,
+        )
+        if class_id:
+            queryset = queryset.filter(current_class_id=class_id)
+        if section_id:
+            queryset = queryset.filter(current_section_id=section_id)
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+        return queryset
+
+    def assign(self, due_date, installments=1, interval_months=1, reminder_days_before=7,
+               reminder_type='email', class_id=None, section_id=None, category_id=None):
+        """
+        Create fee structures for every student in the audience who does not
+        already have one for this fee master.
+
+        Each structure is split into `installments` parts due `interval_months`
+        apart starting at `due_date`, and gets a reminder `reminder_days_before`
+        each installment is due. Returns a summary dict.
+        """
+        fee_master = self.fee_master
+        with transaction.atomic():
+            # Serialises concurrent assignments of the same fee master so the
+            # "already assigned" check below stays accurate.
+            FeeMaster.objects.all_colleges().select_for_update().filter(pk=fee_master.pk).first()
+
+            student_ids = list(
+                self.audience(class_id, section_id, category_id).values_list('id', flat=True)
+            )
+            already_assigned = set(
+                FeeStructure.objects.filter(
+                    fee_master=fee_master, student_id__in=student_ids
+                ).values_list('student_id', flat=True)
+            )
+            targets = [sid for sid in student_ids if sid not in already_assigned]
+            if not targets:
+                return self._summary(len(student_ids), 0, 0, Decimal('0'))
+
+            discounts = {}
+            for student_discount in StudentFeeDiscount.objects.filter(
+                student_id__in=targets, is_active=True, discount__is_active=True
+            ).select_related('discount'):
+                discounts.setdefault(student_discount.student_id, []).append(student_discount.discount)
+
+            structures = []
+            for student_id in targets:
+                amount = discounted_amount(fee_master.amount, discounts.get(student_id, ()))
+                structures.append(FeeStructure(
+                    student_id=student_id,
+                    fee_master=fee_master,
+                    amount=amount,
+                    due_date=due_date,
+                    balance=amount,
+                    is_paid=amount == 0,
+                    created_by=self.user,
+                    updated_by=self.user,
+                ))
+            FeeStructure.objects.bulk_create(structures)
+
+            due_dates = [_add_months(due_date, i * interval_months) for i in range(installments)]
+            installment_rows = []
+            reminder_rows = []
+            today = timezone.localdate()
+            for structure in structures:
+                if structure.amount == 0:
+                    continue
+                for number, (part, part_due) in enumerate(
+                    zip(split_installments(structure.amount, installments), due_dates), start=1
+                ):
+                    installment_rows.append(FeeInstallment(
+                        student_id=structure.student_id,
+                        fee_structure=structure,
+                        installment_number=number,
+                        amount=part,
+                        due_date=part_due,
+                        created_by=self.user,
+                        updated_by=self.user,
+                    ))
+                    reminder_rows.append(FeeReminder(
+                        student_id=structure.student_id,
+                        fee_structure=structure,
+                        reminder_date=max(part_due - timedelta(days=reminder_days_before), today),
+                        reminder_type=reminder_type,
+                        status='pending',
+                        message=f"Installment {number} of {part} due on {part_due} for {fee_master}",
+                        created_by=self.user,
+                        updated_by=self.user,
+                    ))
+            FeeInstallment.objects.bulk_create(installment_rows)
+            FeeReminder.objects.bulk_create(reminder_rows)
+            FeeLedgerService.apply_advance(targets, self.user)
+
+        total = sum((s.amount for s in structures), Decimal('0'))
+        return self._summary(len(student_ids), len(structures), len(installment_rows), total)
+
+    def _summary(self, audience, created, installments, total):
+        return {
+            'fee_master': self.fee_master.pk,
+            'audience': audience,
+            'created': created,
+            'skipped': audience - created,
+            'installments': installments,
+            'total_amount': str(total),
+        }
+
+
+class FeeLedgerService:
+    """Applies collections to fee structures and maintains StudentFeeBalance."""
+
+    @staticmethod
+    def allocate_collection(collection, user=None):
+        """
+        Allocate a settled collection to the student's outstanding structures,
+        oldest due date first, spreading each slice across the structure's
+        unpaid installments. Any surplus is kept as advance on the student's
+        balance. Re-allocating an already allocated collection is a no-op.
+        """
+        if not is_settled(collection) or not collection.is_active:
+            return []
+
+        student_id = collection.student_id
+        with transaction.atomic():
+            # The balance row doubles as the per-student lock
+            balance = StudentFeeBalance.objects.select_for_update().filter(student_id=student_id).first()
+            if FeeAllocation.objects.filter(collection=collection).exists():
+                return []
+
+            allocations, remaining = FeeLedgerService._allocate(collection, collection.amount, user)
+
+            if balance is None:
+                FeeLedgerService.recompute_balances([student_id])
+            else:
+                allocated = collection.amount - remaining
+                StudentFeeBalance.objects.filter(pk=student_id).update(
+                    total_paid=F('total_paid') + collection.amount,
+                    outstanding=F('outstanding') - allocated,
+                    advance=F('advance') + remaining,
+                    next_due_date=FeeStructure.objects.filter(
+                        student_id=student_id, is_active=True, balance__gt=0
+                    ).order_by().values('student_id').annotate(next_due=Min('due_date')).values('next_due')[:1],
+                )
+        return allocations
+
+    @staticmethod
+    def _allocate(collection, amount, user=None):
+        """
+        Spread `amount` of the collection over the student's outstanding
+        structures and installments. Returns (allocations, unallocated rest).
+        """
+        user = user or collection.created_by
+        student_id = collection.student_id
+        structures = list(
+            FeeStructure.objects.select_for_update().filter(
+                student_id=student_id, is_active=True, balance__gt=0
+            ).order_by('due_date', 'id')
+        )
+        structure_ids = [structure.pk for structure in structures]
+        installments = {}
+        for installment in FeeInstallment.objects.filter(
+            fee_structure_id__in=structure_ids, is_paid=False
+        ).order_by('due_date', 'installment_number'):
+            installments.setdefault(installment.fee_structure_id, []).append(installment)
+        already_paid = dict(
+            FeeAllocation.objects.filter(
+                installment__fee_structure_id__in=structure_ids
+            ).values('installment_id').annotate(total=Sum('amount')).values_list('installment_id', 'total')
+        )
+
+        remaining = amount
+        allocations = []
+        covered_installments = []
+        for structure in structures:
+            take = min(structure.balance, remaining)
+            if take <= 0:
+                break
+            left = take
+            for installment in installments.get(structure.pk, ()):
+                due = installment.amount - already_paid.get(installment.pk, ZERO)
+                if due <= 0:
+                    covered_installments.append(installment.pk)
+                    continue
+                part = min(due, left)
+                allocations.append(FeeAllocation(
+                    collection=collection, fee_structure=structure, installment=installment,
+                    student_id=student_id, amount=part, created_by=user, updated_by=user,
+                ))
+                if part == due:
+                    covered_installments.append(installment.pk)
+                left -= part
+                if left <= 0:
+                    break
+            if left > 0:
+                allocations.append(FeeAllocation(
+                    collection=collection, fee_structure=structure,
+                    student_id=student_id, amount=left, created_by=user, updated_by=user,
+                ))
+
+            FeeStructure.objects.filter(pk=structure.pk).update(
+                paid_amount=F('paid_amount') + take,
+                balance=F('balance') - take,
+                is_paid=Case(When(balance__lte=take, then=Value(True)), default=Value(False)),
+            )
+            remaining -= take
+
+        FeeAllocation.objects.bulk_create(allocations)
+        if covered_installments:
+            FeeInstallment.objects.filter(pk__in=covered_installments).update(
+                is_paid=True, paid_date=collection.payment_date
+            )
+        return allocations, remaining
+
+    @staticmethod
+    def release_allocations(allocations):
+        """
+        Take the given allocations back off their structures and installments
+        and delete them. Structure balances are re-derived from amount and
+        paid_amount, so edited structure amounts are picked up as well.
+        """
+        released = list(
+            allocations.order_by().values('fee_structure_id').annotate(total=Sum('amount'))
+            .values_list('fee_structure_id', 'total')
+        )
+        installment_ids = list(
+            allocations.filter(installment__isnull=False).values_list('installment_id', flat=True)
+        )
+        for structure_id, total in released:
+            FeeStructure.objects.filter(pk=structure_id).update(
+                paid_amount=Greatest(F('paid_amount') - total, Value(ZERO))
+            )
+        if installment_ids:
+            FeeInstallment.objects.filter(pk__in=installment_ids).update(is_paid=False, paid_date=None)
+        allocations.delete()
+        return [structure_id for structure_id, _ in released]
+
+    @staticmethod
+    def rebuild_student(student_id, user=None):
+        """
+        Re-derive one student's ledger from scratch: release every allocation,
+        re-sync structure balances with their amounts, then allocate the
+        active settled collections again, oldest first. Refunds are taken off
+        the most recent collections. Used whenever a collection, refund or
+        structure changes in a way incremental allocation cannot follow.
+        """
+        with transaction.atomic():
+            StudentFeeBalance.objects.select_for_update().filter(student_id=student_id).first()
+            FeeLedgerService.release_allocations(FeeAllocation.objects.filter(student_id=student_id))
+            FeeStructure.objects.filter(student_id=student_id).update(
+                balance=Greatest(F('amount') - F('paid_amount'), Value(ZERO)),
+                is_paid=Case(When(amount__lte=F('paid_amount'), then=Value(True)), default=Value(False)),
+            )
+
+            collections = list(
+                FeeCollection.objects.filter(
+                    settled_collections_q(), student_id=student_id, is_active=True
+                ).order_by('payment_date', 'id')
+            )
+            refunded = FeeRefund.objects.filter(student_id=student_id, is_active=True).aggregate(
+                total=Coalesce(Sum('amount'), ZERO)
+            )['total']
+            available = {}
+            for collection in reversed(collections):
+                returned = min(collection.amount, refunded)
+                refunded -= returned
+                available[collection.pk] = collection.amount - returned
+            for collection in collections:
+                if available[collection.pk] > 0:
+                    FeeLedgerService._allocate(collection, available[collection.pk], user)
+
+            FeeLedgerService.recompute_balances([student_id])
+
+    @staticmethod
+    def apply_advance(student_ids, user=None):
+        """
+        Recompute the students' balances, first spending any advance on
+        structures created since it was paid.
+        """
+        student_ids = list(student_ids)
+        with_advance = set(
+            StudentFeeBalance.objects.filter(student_id__in=student_ids, advance__gt=0)
+            .values_list('student_id', flat=True)
+        )
+        for student_id in with_advance:
+            FeeLedgerService.rebuild_student(student_id, user)
+        return FeeLedgerService.recompute_balances(
+            [student_id for student_id in student_ids if student_id not in with_advance]
+        )
+
+    @staticmethod
+    def recompute_balances(student_ids):
+        """
+        Rebuild StudentFeeBalance rows for the given students from the
+        structures, collections, refunds and allocations. total_paid is net
+        of refunds. Used after structures are created and by the
+        rebuild_fee_balances command.
+        """
+        student_ids = list(student_ids)
+        if not student_ids:
+            return 0
+
+        dues = {
+            row['student_id']: row
+            for row in FeeStructure.objects.filter(
+                student_id__in=student_ids, is_active=True
+            ).values('student_id').annotate(
+                total_due=Coalesce(Sum('amount'), ZERO),
+                outstanding=Coalesce(Sum('balance'), ZERO),
+                next_due_date=Min('due_date', filter=Q(balance__gt=0)),
+            )
+        }
+        paid = dict(
+            FeeCollection.objects.filter(settled_collections_q(), student_id__in=student_ids, is_active=True)
+            .values('student_id').annotate(total=Sum('amount')).values_list('student_id', 'total')
+        )
+        refunded = dict(
+            FeeRefund.objects.filter(student_id__in=student_ids, is_active=True)
+            .values('student_id').annotate(total=Sum('amount')).values_list('student_id', 'total')
+        )
+        allocated = dict(
+            FeeAllocation.objects.filter(student_id__in=student_ids)
+            .values('student_id').annotate(total=Sum('amount')).values_list('student_id', 'total')
+        )
+
+        balances = []
+        for student_id, college_id in Student.objects.all_colleges().filter(
+            id__in=student_ids
+        ).values_list('id', 'college_id'):
+            due = dues.get(student_id, {})
+            total_paid = max((paid.get(student_id) or ZERO) - (refunded.get(student_id) or ZERO), ZERO)
+            balances.append(StudentFeeBalance(
+                student_id=student_id,
+                college_id=college_id,
+                total_due=due.get('total_due', ZERO),
+                total_paid=total_paid,
+                outstanding=due.get('outstanding', ZERO),
+                advance=max(total_paid - (allocated.get(student_id) or ZERO), ZERO),
+                next_due_date=due.get('next_due_date'),
+            ))
+        StudentFeeBalance.objects.bulk_create(
+            balances,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=['college', 'total_due', 'total_paid', 'outstanding', 'advance', 'next_due_date', 'updated_at'],
+        )
+        return len(balances)
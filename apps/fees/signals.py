@@ -2,7 +2,7 @@
 Signals for Fees app.
 Lightweight implementations to avoid breaking tests; replace with full business logic as needed.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.db import transaction
 from django.utils import timezone
@@ -13,8 +13,33 @@ from .models import (
     FeeStructure,
     FeeInstallment,
     FeeFine,
+    FeeRefund,
     FeeReminder,
 )
+from .services import FeeLedgerService
+
+
+# Fields whose change invalidates what a collection/structure put on the ledger
+COLLECTION_LEDGER_FIELDS = ('student_id', 'amount', 'status', 'is_active')
+STRUCTURE_LEDGER_FIELDS = ('amount', 'due_date', 'is_active')
+
+
+def _ledger_state(model, pk, fields):
+    if pk is None:
+        return None
+    return model.objects.filter(pk=pk).values(*fields).first()
+
+
+def _ledger_changed(instance, fields):
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous is None:
+        return True
+    return any(previous[field] != getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=FeeCollection)
+def fee_collection_pre_save(sender, instance, **kwargs):
+    instance._ledger_previous = _ledger_state(FeeCollection, instance.pk, COLLECTION_LEDGER_FIELDS)
 
 
 @receiver(post_save, sender=FeeCollection)
@@ -22,9 +47,16 @@ def fee_collection_post_save(sender, instance, created, **kwargs):
     """
     On new collection:
     - Generate a simple receipt if one does not exist.
-    - Update fee structures is left as a TODO (no direct relation to structure on model).
+    - Allocate settled collections to outstanding fee structures.
+    On update, a change of amount, status, student or active flag rebuilds
+    the student's ledger so what the collection paid is reversed or re-applied.
     """
     if not created:
+        if _ledger_changed(instance, COLLECTION_LEDGER_FIELDS):
+            previous = instance._ledger_previous
+            if previous and previous['student_id'] != instance.student_id:
+                FeeLedgerService.rebuild_student(previous['student_id'])
+            FeeLedgerService.rebuild_student(instance.student_id)
         return
 
     # Create a basic receipt if none exists for this collection
@@ -37,18 +69,46 @@ def fee_collection_post_save(sender, instance, created, **kwargs):
             updated_by=instance.updated_by,
         )
 
-    # TODO: Apply collection to FeeStructure (update paid_amount/balance) when mapping is defined.
+    FeeLedgerService.allocate_collection(instance)
+
     # TODO: Clear pending reminders and send receipt notifications.
 
 
+@receiver(pre_delete, sender=FeeCollection)
+def fee_collection_pre_delete(sender, instance, **kwargs):
+    """Take the collection's allocations back off the structures before they cascade away."""
+    FeeLedgerService.release_allocations(instance.allocations.all())
+
+
+@receiver(post_delete, sender=FeeCollection)
+def fee_collection_post_delete(sender, instance, **kwargs):
+    FeeLedgerService.rebuild_student(instance.student_id)
+
+
+@receiver([post_save, post_delete], sender=FeeRefund)
+def fee_refund_changed(sender, instance, **kwargs):
+    """Refunds return money already paid; rebuild the student's ledger net of them."""
+    FeeLedgerService.rebuild_student(instance.student_id)
+
+
+@receiver(pre_save, sender=FeeStructure)
+def fee_structure_pre_save(sender, instance, **kwargs):
+    instance._ledger_previous = _ledger_state(FeeStructure, instance.pk, STRUCTURE_LEDGER_FIELDS)
+
+
 @receiver(post_save, sender=FeeStructure)
 def fee_structure_post_save(sender, instance, created, **kwargs):
     """
     On new fee structure:
     - Ensure at least one installment exists.
     - Placeholder for scheduling reminders/notifications.
+    - Spend any advance the student already holds on it.
+    On update, a changed amount, due date or active flag rebuilds the
+    student's ledger so balance and allocations follow the new amount.
     """
     if not created:
+        if _ledger_changed(instance, STRUCTURE_LEDGER_FIELDS):
+            FeeLedgerService.rebuild_student(instance.student_id)
         return
 
     # Create a single installment covering the full amount if none exist.
@@ -76,6 +136,8 @@ def fee_structure_post_save(sender, instance, created, **kwargs):
             updated_by=instance.updated_by,
         )
 
+    FeeLedgerService.apply_advance([instance.student_id])
+
     # TODO: Send notifications to student/parent.
 
 
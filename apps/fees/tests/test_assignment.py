@@ -0,0 +1,266 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import Faculty, Program
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.fees.models import (
+    FeeAllocation,
+    FeeCollection,
+    FeeDiscount,
+    FeeGroup,
+    FeeInstallment,
+    FeeMaster,
+    FeeRefund,
+    FeeReminder,
+    FeeStructure,
+    FeeType,
+    StudentFeeBalance,
+    StudentFeeDiscount,
+)
+from apps.fees.services import FeeAssignmentService, FeeLedgerService, split_installments
+from apps.students.models import Student
+
+
+class FeeServiceTestBase(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="FAS",
+            name="Fee Assignment College",
+            short_name="FAS",
+            email="info@fas.test",
+            phone="9999999992",
+            address_line1="1 Fee Rd",
+            city="City",
+            state="State",
+            pincode="000008",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="ENG", name="Engineering", short_name="ENG")
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BTECH",
+            name="B.Tech",
+            short_name="BTECH",
+            program_type="ug",
+            duration=4,
+            duration_type="year",
+        )
+        group = FeeGroup.objects.create(college=self.college, name="Tuition", code="TUI")
+        fee_type = FeeType.objects.create(college=self.college, fee_group=group, name="Semester Fee", code="SEM")
+        self.fee_master = FeeMaster.objects.create(
+            college=self.college,
+            program=self.program,
+            academic_year=self.year,
+            semester=1,
+            fee_type=fee_type,
+            amount=Decimal("1000.00"),
+        )
+        self.students = [self._student(i) for i in range(3)]
+        discount = FeeDiscount.objects.create(
+            college=self.college, name="Merit", code="MERIT", discount_type="percentage", percentage=10
+        )
+        StudentFeeDiscount.objects.create(
+            student=self.students[0], discount=discount, applied_date=date(2025, 6, 1)
+        )
+
+    def _student(self, index):
+        user = User.objects.create_user(
+            username=f"fas_student_{index}",
+            email=f"fas{index}@fas.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        return Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number=f"FAS-{index}",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number=f"FAS-REG-{index}",
+            program=self.program,
+            academic_year=self.year,
+            first_name="Stu",
+            last_name=str(index),
+            date_of_birth=date(2007, 1, 1),
+            gender="male",
+            email=f"fas{index}@fas.test",
+        )
+
+
+
+class FeeAssignmentServiceTest(FeeServiceTestBase):
+    def test_assign_creates_structures_installments_and_reminders(self):
+        summary = FeeAssignmentService(self.fee_master).assign(due_date=date(2025, 7, 31), installments=3)
+
+        self.assertEqual((summary['created'], summary['installments']), (3, 9))
+        discounted = FeeStructure.objects.get(student=self.students[0])
+        self.assertEqual(discounted.amount, Decimal("900.00"))
+        self.assertEqual(discounted.balance, Decimal("900.00"))
+        self.assertEqual(
+            list(discounted.installments.order_by('installment_number').values_list('due_date', flat=True)),
+            [date(2025, 7, 31), date(2025, 8, 31), date(2025, 9, 30)],
+        )
+        self.assertEqual(FeeReminder.objects.filter(fee_structure__fee_master=self.fee_master).count(), 9)
+
+    def test_assign_is_idempotent(self):
+        service = FeeAssignmentService(self.fee_master)
+        service.assign(due_date=date(2025, 7, 31))
+        late_joiner = self._student(9)
+
+        summary = service.assign(due_date=date(2025, 7, 31))
+
+        self.assertEqual((summary['created'], summary['skipped']), (1, 3))
+        self.assertEqual(FeeStructure.objects.filter(fee_master=self.fee_master).count(), 4)
+        self.assertEqual(FeeInstallment.objects.filter(student=late_joiner).count(), 1)
+
+    def test_split_installments_keeps_total(self):
+        parts = split_installments(Decimal("100.00"), 3)
+        self.assertEqual(parts, [Decimal("33.33"), Decimal("33.33"), Decimal("33.34")])
+
+
+class FeeLedgerServiceTest(FeeServiceTestBase):
+    def setUp(self):
+        super().setUp()
+        self.student = self.students[1]
+        FeeAssignmentService(self.fee_master).assign(due_date=date(2025, 7, 31), installments=2)
+        self.structure = FeeStructure.objects.get(student=self.student)
+
+    def _collect(self, amount, status="paid"):
+        return FeeCollection.objects.create(
+            student=self.student,
+            amount=Decimal(amount),
+            payment_method="cash",
+            payment_date=date(2025, 7, 1),
+            status=status,
+        )
+
+    def test_collection_is_allocated_in_due_date_order(self):
+        balance = StudentFeeBalance.objects.get(student=self.student)
+        self.assertEqual((balance.total_due, balance.outstanding), (Decimal("1000.00"), Decimal("1000.00")))
+
+        self._collect("700.00")
+
+        self.structure.refresh_from_db()
+        self.assertEqual((self.structure.paid_amount, self.structure.balance), (Decimal("700.00"), Decimal("300.00")))
+        self.assertFalse(self.structure.is_paid)
+        first, second = self.structure.installments.order_by('installment_number')
+        self.assertTrue(first.is_paid)
+        self.assertFalse(second.is_paid)
+        balance.refresh_from_db()
+        self.assertEqual((balance.total_paid, balance.outstanding), (Decimal("700.00"), Decimal("300.00")))
+        self.assertEqual(balance.next_due_date, date(2025, 7, 31))
+
+        self._collect("500.00")
+
+        self.structure.refresh_from_db()
+        self.assertTrue(self.structure.is_paid)
+        self.assertFalse(self.structure.installments.filter(is_paid=False).exists())
+        balance.refresh_from_db()
+        self.assertEqual((balance.outstanding, balance.advance), (Decimal("0.00"), Decimal("200.00")))
+        self.assertIsNone(balance.next_due_date)
+
+    def test_pending_collection_allocates_once_when_settled(self):
+        collection = self._collect("300.00", status="pending")
+        self.assertFalse(FeeAllocation.objects.filter(collection=collection).exists())
+
+        collection.status = "COMPLETED"
+        collection.save()
+        collection.save()
+
+        self.assertEqual(FeeAllocation.objects.filter(collection=collection).count(), 1)
+        self.structure.refresh_from_db()
+        self.assertEqual(self.structure.balance, Decimal("700.00"))
+
+    def test_recompute_matches_incremental_balance(self):
+        self._collect("450.00")
+        incremental = StudentFeeBalance.objects.values().get(student=self.student)
+
+        FeeLedgerService.recompute_balances([self.student.pk])
+
+        rebuilt = StudentFeeBalance.objects.values().get(student=self.student)
+        incremental.pop('updated_at')
+        rebuilt.pop('updated_at')
+        self.assertEqual(incremental, rebuilt)
+
+    def _state(self):
+        self.structure.refresh_from_db()
+        balance = StudentFeeBalance.objects.get(student=self.student)
+        return (
+            self.structure.paid_amount, self.structure.balance,
+            balance.total_paid, balance.outstanding, balance.advance,
+        )
+
+    def test_collection_changes_are_reversed(self):
+        first = self._collect("700.00")
+        second = self._collect("500.00")
+        self.assertEqual(self._state()[4], Decimal("200.00"))
+
+        second.amount = Decimal("100.00")
+        second.save()
+        self.assertEqual(
+            self._state(),
+            (Decimal("800.00"), Decimal("200.00"), Decimal("800.00"), Decimal("200.00"), Decimal("0.00")),
+        )
+
+        second.status = "failed"
+        second.save()
+        self.assertEqual(self._state()[:2], (Decimal("700.00"), Decimal("300.00")))
+
+        first.soft_delete()
+        self.assertEqual(
+            self._state(), (Decimal("0.00"), Decimal("1000.00"), Decimal("0.00"), Decimal("1000.00"), Decimal("0.00"))
+        )
+        self.assertFalse(self.structure.installments.filter(is_paid=True).exists())
+
+        third = self._collect("400.00")
+        third.delete()
+        self.assertEqual(self._state()[:2], (Decimal("0.00"), Decimal("1000.00")))
+        self.assertFalse(FeeAllocation.objects.filter(student=self.student).exists())
+
+    def test_refund_reduces_paid_and_allocations(self):
+        self._collect("1000.00")
+        refund = FeeRefund.objects.create(
+            student=self.student, amount=Decimal("250.00"), reason="Overcharge",
+            refund_date=date(2025, 7, 5), payment_method="cash",
+        )
+        self.assertEqual(
+            self._state(), (Decimal("750.00"), Decimal("250.00"), Decimal("750.00"), Decimal("250.00"), Decimal("0.00"))
+        )
+
+        refund.delete()
+        self.assertEqual(self._state()[:2], (Decimal("1000.00"), Decimal("0.00")))
+
+    def test_structure_update_and_advance_for_later_structures(self):
+        self._collect("1200.00")
+        self.assertEqual(self._state()[4], Decimal("200.00"))
+
+        self.structure.amount = Decimal("1100.00")
+        self.structure.save()
+        self.assertEqual(
+            self._state(), (Decimal("1100.00"), Decimal("0.00"), Decimal("1200.00"), Decimal("0.00"), Decimal("100.00"))
+        )
+
+        later = FeeStructure.objects.create(
+            student=self.student, fee_master=self.fee_master, amount=Decimal("300.00"),
+            balance=Decimal("300.00"), due_date=date(2025, 12, 31),
+        )
+        later.refresh_from_db()
+        self.assertEqual((later.paid_amount, later.balance), (Decimal("100.00"), Decimal("200.00")))
+        balance = StudentFeeBalance.objects.get(student=self.student)
+        self.assertEqual((balance.outstanding, balance.advance), (Decimal("200.00"), Decimal("0.00")))
@@ -18,6 +18,7 @@ from .views import (
     BankPaymentViewSet,
     OnlinePaymentViewSet,
     FeeReminderViewSet,
+    StudentFeeBalanceViewSet,
 )
 
 router = DefaultRouter()
@@ -35,6 +36,7 @@ router.register(r'fee-refunds', FeeRefundViewSet, basename='feerefund')
 router.register(r'bank-payments', BankPaymentViewSet, basename='bankpayment')
 router.register(r'online-payments', OnlinePaymentViewSet, basename='onlinepayment')
 router.register(r'fee-reminders', FeeReminderViewSet, basename='feereminder')
+router.register(r'fee-balances', StudentFeeBalanceViewSet, basename='studentfeebalance')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,9 +1,16 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+import django_filters
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
-from apps.core.mixins import CollegeScopedModelViewSet, RelatedCollegeScopedModelViewSet
+from apps.core.mixins import (
+    CollegeScopedModelViewSet,
+    CollegeScopedReadOnlyModelViewSet,
+    RelatedCollegeScopedModelViewSet,
+)
 from .models import (
     FeeGroup,
     FeeType,
@@ -19,11 +26,14 @@ from .models import (
     BankPayment,
     OnlinePayment,
     FeeReminder,
+    StudentFeeBalance,
 )
+from .services import FeeAssignmentService
 from .serializers import (
     FeeGroupSerializer,
     FeeTypeSerializer,
     FeeMasterSerializer,
+    FeeAssignmentSerializer,
     FeeStructureSerializer,
     FeeDiscountSerializer,
     StudentFeeDiscountSerializer,
@@ -35,6 +45,7 @@ from .serializers import (
     BankPaymentSerializer,
     OnlinePaymentSerializer,
     FeeReminderSerializer,
+    StudentFeeBalanceSerializer,
 )
 
 
@@ -69,6 +80,22 @@ class FeeMasterViewSet(CollegeScopedModelViewSet):
     ordering_fields = ['semester', 'amount', 'created_at']
     ordering = ['semester']
 
+    @action(detail=True, methods=['post'], serializer_class=FeeAssignmentSerializer)
+    def assign(self, request, pk=None):
+        """
+        Assign this fee master to every student of its program (optionally
+        narrowed by class, section or category). Safe to re-run: students who
+        already have a structure for this fee master are skipped.
+        """
+        fee_master = self.get_object()
+        serializer = FeeAssignmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        summary = FeeAssignmentService(fee_master, user=request.user).assign(**serializer.validated_data)
+        return Response(
+            summary,
+            status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK
+        )
+
 
 class FeeDiscountViewSet(CollegeScopedModelViewSet):
     queryset = FeeDiscount.objects.all_colleges()
@@ -193,3 +220,32 @@ class FeeReminderViewSet(RelatedCollegeScopedModelViewSet):
     ordering_fields = ['reminder_date', 'created_at']
     ordering = ['-reminder_date']
     related_college_lookup = 'student__college_id'
+
+
+class StudentFeeBalanceFilter(django_filters.FilterSet):
+    program = django_filters.NumberFilter(field_name='student__program')
+    class_obj = django_filters.NumberFilter(field_name='student__current_class')
+    section = django_filters.NumberFilter(field_name='student__current_section')
+    min_outstanding = django_filters.NumberFilter(field_name='outstanding', lookup_expr='gte')
+    defaulters = django_filters.BooleanFilter(method='filter_defaulters')
+    due_before = django_filters.DateFilter(field_name='next_due_date', lookup_expr='lte')
+
+    class Meta:
+        model = StudentFeeBalance
+        fields = ['student']
+
+    def filter_defaulters(self, queryset, name, value):
+        if value:
+            return queryset.filter(outstanding__gt=0)
+        return queryset.filter(outstanding__lte=0)
+
+
+class StudentFeeBalanceViewSet(CollegeScopedReadOnlyModelViewSet):
+    """Per-student fee position maintained by the allocation ledger."""
+    queryset = StudentFeeBalance.objects.select_related('student')
+    serializer_class = StudentFeeBalanceSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = StudentFeeBalanceFilter
+    ordering_fields = ['outstanding', 'next_due_date', 'total_paid']
+    ordering = ['-outstanding']
@@ -0,0 +1,37 @@
+"""
+Management command for the monthly hostel billing run.
+
+Run it at the start of each month from cron, and again after admission
+day: it creates the month's HostelFee for every current allocation not
+billed yet.
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.hostel.services import HostelBillingService
+
+
+def _month(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly hostel fees of all current allocations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=_month, help='Month to bill (YYYY-MM, default: current month)')
+        parser.add_argument('--college', type=int, help='Limit to one college ID')
+        parser.add_argument('--hostel', type=int, help='Limit to one hostel ID')
+        parser.add_argument('--dry-run', action='store_true', help='Report without writing')
+
+    def handle(self, *args, **options):
+        month = options.get('month') or timezone.localdate()
+        summary = HostelBillingService(
+            month.year, month.month, college_id=options.get('college'), hostel_id=options.get('hostel'),
+        ).run(dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{month:%Y-%m}: {summary['billed']} fees ({summary['amount']}) "
+            f"{'written' if summary['written'] else 'to write'}, {summary['already_billed']} already billed"
+        ))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:20
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef
+
+
+def end_duplicate_allocations(apps, schema_editor):
+    """Keep only the newest current allocation of each bed."""
+    HostelAllocation = apps.get_model('hostel', 'HostelAllocation')
+    shared_beds = (
+        HostelAllocation.objects.filter(is_current=True)
+        .values('bed_id').annotate(total=Count('id')).filter(total__gt=1).values_list('bed_id', flat=True)
+    )
+    for bed_id in list(shared_beds):
+        newest = HostelAllocation.objects.filter(bed_id=bed_id, is_current=True).latest('from_date', 'id')
+        HostelAllocation.objects.filter(bed_id=bed_id, is_current=True).exclude(pk=newest.pk).update(is_current=False)
+
+
+def backfill_occupancy(apps, schema_editor):
+    Bed = apps.get_model('hostel', 'Bed')
+    Room = apps.get_model('hostel', 'Room')
+    Hostel = apps.get_model('hostel', 'Hostel')
+    HostelAllocation = apps.get_model('hostel', 'HostelAllocation')
+    current = Exists(HostelAllocation.objects.filter(bed_id=OuterRef('pk'), is_current=True))
+    Bed.objects.filter(current).update(status='occupied')
+    Bed.objects.filter(~current, status='occupied').update(status='vacant')
+    for model, field in ((Room, 'room_id'), (Hostel, 'hostel_id')):
+        counts = dict(
+            HostelAllocation.objects.filter(is_current=True).values_list(field).annotate(total=Count('id'))
+        )
+        objs = list(model.objects.all())
+        for obj in objs:
+            obj.occupied_beds = counts.get(obj.pk, 0)
+        model.objects.bulk_update(objs, ['occupied_beds'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel', '0002_alter_bed_options_alter_hostel_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hostel',
+            name='occupied_beds',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(end_duplicate_allocations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hostelallocation',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('bed',), name='unique_current_bed_allocation'),
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
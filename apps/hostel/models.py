@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 from apps.core.models import CollegeScopedModel, AuditModel, College
 from apps.teachers.models import Teacher
@@ -12,6 +13,7 @@ class Hostel(CollegeScopedModel):
     hostel_type = models.CharField(max_length=10)
     address = models.TextField(null=True, blank=True)
     capacity = models.IntegerField()
+    occupied_beds = models.IntegerField(default=0)
     warden = models.ForeignKey(Teacher, on_delete=models.SET_NULL, null=True, blank=True, related_name='wardened_hostels')
     contact_number = models.CharField(max_length=20, null=True, blank=True)
 
@@ -92,6 +94,14 @@ class HostelAllocation(AuditModel):
         indexes = [
             models.Index(fields=['student', 'hostel', 'room', 'bed', 'is_current']),
         ]
+        constraints = [
+            # At most one current allocation per bed
+            models.UniqueConstraint(
+                fields=['bed'],
+                condition=Q(is_current=True),
+                name='unique_current_bed_allocation',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} -> {self.hostel} ({self.room}/{self.bed})"
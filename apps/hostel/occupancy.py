@@ -0,0 +1,78 @@
+"""
+Hostel bed occupancy.
+
+Bed.status is the occupancy state of a bed; Room.occupied_beds and
+Hostel.occupied_beds are its per-room and per-hostel counters (vacancies
+are capacity minus occupied beds). All three are derived from current
+allocations inside the transaction that creates or ends them:
+
+- beds are claimed with a conditional UPDATE (vacant -> occupied), so two
+  concurrent allocators cannot both take one; the partial unique
+  constraint on current allocations per bed backs this up;
+- counters are recomputed from current allocations with one UPDATE per
+  table for every touched room and hostel, rather than +1/-1 arithmetic
+  that drifts whenever a write is missed.
+
+Beds in any other state (e.g. under maintenance) are never allocated and
+keep their status while vacant.
+"""
+from django.db.models import Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Bed, Hostel, HostelAllocation, Room
+
+BED_VACANT = 'vacant'
+BED_OCCUPIED = 'occupied'
+
+
+def _current_allocations(**lookups):
+    return HostelAllocation.objects.filter(is_current=True, **lookups)
+
+
+def vacant_beds(hostel_id):
+    """Allocatable beds of a hostel: vacant, active and without a current allocation."""
+    return Bed.objects.filter(
+        room__hostel_id=hostel_id, status=BED_VACANT, is_active=True, room__is_active=True
+    ).exclude(Exists(_current_allocations(bed_id=OuterRef('pk'))))
+
+
+def claim_beds(bed_ids):
+    """Mark vacant beds occupied. Returns how many were still vacant."""
+    return Bed.objects.filter(pk__in=bed_ids, status=BED_VACANT).update(
+        status=BED_OCCUPIED, updated_at=timezone.now()
+    )
+
+
+def sync_beds(bed_ids):
+    """Set the status of beds from their current allocations."""
+    now = timezone.now()
+    beds = Bed.objects.filter(pk__in=bed_ids)
+    current = Exists(_current_allocations(bed_id=OuterRef('pk')))
+    beds.filter(current).exclude(status=BED_OCCUPIED).update(status=BED_OCCUPIED, updated_at=now)
+    beds.filter(~current, status=BED_OCCUPIED).update(status=BED_VACANT, updated_at=now)
+
+
+def _count(field):
+    return Coalesce(Subquery(
+        _current_allocations(**{field: OuterRef('pk')}).order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    ), Value(0))
+
+
+def refresh_counters(room_ids=(), hostel_ids=()):
+    """Recompute occupied_beds of the given rooms and hostels."""
+    now = timezone.now()
+    if room_ids:
+        Room.objects.filter(pk__in=set(room_ids)).update(occupied_beds=_count('room_id'), updated_at=now)
+    if hostel_ids:
+        Hostel.objects.all_colleges().filter(pk__in=set(hostel_ids)).update(
+            occupied_beds=_count('hostel_id'), updated_at=now
+        )
+
+
+def sync_occupancy(bed_ids=(), room_ids=(), hostel_ids=()):
+    """Bring bed states and counters in line with current allocations."""
+    if bed_ids:
+        sync_beds(bed_ids)
+    refresh_counters(room_ids, hostel_ids)
@@ -1,5 +1,7 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
+from apps.students.models import Student
 from apps.teachers.models import Teacher
 from apps.teachers.serializers import FlexibleTeacherField
 
@@ -13,14 +15,19 @@ class HostelSerializer(serializers.ModelSerializer):
     college_name = serializers.SerializerMethodField()
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     updated_by_name = serializers.CharField(source='updated_by.get_full_name', read_only=True)
+    vacant_beds = serializers.SerializerMethodField()
     def get_college_name(self, obj):
         if not obj.college:
             return ''
         return obj.college.short_name or obj.college.name or ''
 
+    def get_vacant_beds(self, obj):
+        return max(obj.capacity - obj.occupied_beds, 0)
+
     class Meta:
         model = Hostel
         fields = '__all__'
+        read_only_fields = ['occupied_beds']
 
 
 class RoomTypeSerializer(serializers.ModelSerializer):
@@ -35,9 +42,15 @@ class RoomSerializer(serializers.ModelSerializer):
 
     hostel_name = serializers.CharField(source='hostel.name', read_only=True)
     room_type_name = serializers.CharField(source='room_type.name', read_only=True)
+    vacant_beds = serializers.SerializerMethodField()
+
+    def get_vacant_beds(self, obj):
+        return max(obj.capacity - obj.occupied_beds, 0)
+
     class Meta:
         model = Room
         fields = '__all__'
+        read_only_fields = ['occupied_beds']
 
 
 class BedSerializer(serializers.ModelSerializer):
@@ -59,6 +72,30 @@ class HostelAllocationSerializer(serializers.ModelSerializer):
         model = HostelAllocation
         fields = '__all__'
 
+    def validate(self, attrs):
+        bed = attrs.get('bed', getattr(self.instance, 'bed', None))
+        room = attrs.get('room', getattr(self.instance, 'room', None))
+        hostel = attrs.get('hostel', getattr(self.instance, 'hostel', None))
+        if bed and room and bed.room_id != room.pk:
+            raise serializers.ValidationError({'bed': 'Bed is not in the selected room.'})
+        if room and hostel and room.hostel_id != hostel.pk:
+            raise serializers.ValidationError({'room': 'Room is not in the selected hostel.'})
+        return attrs
+
+    def _save_allocation(self, save, *args):
+        # The partial unique constraint rejects a second current allocation of a bed
+        try:
+            with transaction.atomic():
+                return save(*args)
+        except IntegrityError:
+            raise serializers.ValidationError({'bed': 'Bed already has a current allocation.'})
+
+    def create(self, validated_data):
+        return self._save_allocation(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._save_allocation(super().update, instance, validated_data)
+
 
 class HostelFeeSerializer(serializers.ModelSerializer):
 
@@ -74,4 +111,64 @@ class HostelFeeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = HostelFee
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class AllocationRequestSerializer(serializers.Serializer):
+    """One student of a bulk allocation batch."""
+    student = serializers.IntegerField(help_text="Student ID")
+    room_types = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list,
+        help_text="Preferred room type IDs, best first (default: the batch preferences)"
+    )
+
+
+class BulkAllocationSerializer(serializers.Serializer):
+    """Batch of students to place in vacant beds of one hostel."""
+    hostel = serializers.IntegerField(help_text="Hostel ID")
+    from_date = serializers.DateField(required=False, help_text="Allocation start date (default: today)")
+    students = serializers.ListField(child=AllocationRequestSerializer(), min_length=1, max_length=2000)
+    room_types = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list,
+        help_text="Preferred room type IDs for students without their own preferences"
+    )
+    allow_other_room_types = serializers.BooleanField(
+        default=True, help_text="Use any vacant bed when the preferred room types are full"
+    )
+    remarks = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    dry_run = serializers.BooleanField(default=False, help_text="Preview without saving")
+
+    def validate(self, attrs):
+        college_id = self.context['college_id']
+        if not Hostel.objects.all_colleges().filter(pk=attrs['hostel'], college_id=college_id).exists():
+            raise serializers.ValidationError({'hostel': 'Hostel not found in this college.'})
+
+        student_ids = {row['student'] for row in attrs['students']}
+        known = set(Student.objects.all_colleges().filter(pk__in=student_ids, college_id=college_id)
+                    .values_list('id', flat=True))
+        if known != student_ids:
+            raise serializers.ValidationError({'students': f'Unknown students: {sorted(student_ids - known)}'})
+
+        room_types = set(attrs['room_types']).union(*(row['room_types'] for row in attrs['students']))
+        known = set(RoomType.objects.filter(pk__in=room_types, hostel_id=attrs['hostel'])
+                    .values_list('id', flat=True))
+        if known != room_types:
+            raise serializers.ValidationError({'room_types': f'Unknown room types: {sorted(room_types - known)}'})
+
+        attrs['requests'] = [
+            (row['student'], row['room_types'] or attrs['room_types']) for row in attrs['students']
+        ]
+        return attrs
+
+
+class MonthlyBillingSerializer(serializers.Serializer):
+    """Month to bill with the monthly hostel billing run."""
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    month = serializers.IntegerField(min_value=1, max_value=12)
+    hostel = serializers.IntegerField(required=False, allow_null=True, help_text="Limit to one hostel")
+    due_date = serializers.DateField(required=False, help_text="Due date (default: first day of the month)")
+    dry_run = serializers.BooleanField(default=False, help_text="Preview without saving")
+
+    def validate_hostel(self, value):
+        if value and not Hostel.objects.all_colleges().filter(pk=value, college_id=self.context['college_id']).exists():
+            raise serializers.ValidationError('Hostel not found in this college.')
+        return value
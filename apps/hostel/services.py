@@ -0,0 +1,260 @@
+"""
+Hostel batch operations.
+
+HostelAllocationService places an admission-day batch of students in one
+transaction with a fixed number of queries, whatever the batch size:
+
+1. one query finds students of the batch that already have a current
+   allocation (they are skipped) and one locks the hostel's vacant beds
+   (FOR UPDATE SKIP LOCKED where supported), ordered by floor, room and
+   bed so rooms fill up one after another;
+2. students are placed in request order: in the first of their preferred
+   room types with a vacant bed, otherwise (if allowed) in the room type
+   with the most vacant beds;
+3. one UPDATE claims the beds, a bulk INSERT writes the allocations and
+   two UPDATEs refresh the room and hostel occupancy counters.
+
+bulk_create skips the allocation signals, so no placeholder first-month
+fee is created for the batch; the monthly billing run bills it.
+
+HostelBillingService is the monthly billing run:
+
+1. one query selects the allocations current during the month with their
+   room type's monthly fee, and one finds those already billed;
+2. one bulk INSERT (ignore_conflicts, backed by the allocation/month/year
+   unique constraint) writes the missing HostelFee rows;
+3. finance gets one aggregated income delta per college for the rows
+   written instead of the per-row sync_hostel_fee signal work.
+
+Re-running a month bills only allocations added since the last run.
+Both services accept dry_run and return the same summary without writing.
+"""
+import calendar
+from collections import OrderedDict, defaultdict, deque
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from finance.models import AppIncome
+from finance.signals import record_app_income
+
+from .models import HostelAllocation, HostelFee
+from .occupancy import claim_beds, refresh_counters, vacant_beds
+
+ALLOCATION_BATCH_SIZE = 500
+FEE_BATCH_SIZE = 1000
+FINANCE_APP = 'hostel'
+
+
+class BedsUnavailable(Exception):
+    """Beds picked for a batch were taken by a concurrent allocation."""
+
+
+class HostelAllocationService:
+    """Assign a batch of students to vacant beds of one hostel."""
+
+    def __init__(self, hostel_id, from_date=None, allow_other_room_types=True, remarks=None, user=None):
+        self.hostel_id = hostel_id
+        self.from_date = from_date or timezone.localdate()
+        self.allow_other_room_types = allow_other_room_types
+        self.remarks = remarks
+        self.user = user
+
+    def _bed_pools(self):
+        """room_type_id -> deque of (bed_id, room_id), in fill order."""
+        beds = vacant_beds(self.hostel_id).select_for_update(skip_locked=True, of=('self',)).order_by(
+            'room__floor', 'room__room_number', 'bed_number', 'pk'
+        ).values_list('id', 'room_id', 'room__room_type_id')
+        pools = OrderedDict()
+        for bed_id, room_id, room_type_id in beds:
+            pools.setdefault(room_type_id, deque()).append((bed_id, room_id))
+        return pools
+
+    def plan(self, requests):
+        """
+        Place `requests`, a list of (student_id, [preferred room type ids]).
+        Returns (placements, summary); placements are (student_id, bed_id, room_id).
+        """
+        student_ids = [student_id for student_id, _ in requests]
+        allocated = set(HostelAllocation.objects.filter(
+            student_id__in=student_ids, is_current=True
+        ).values_list('student_id', flat=True))
+        pools = self._bed_pools()
+
+        placements, unplaced, preferred = [], [], 0
+        seen = set()
+        for student_id, room_types in requests:
+            if student_id in allocated or student_id in seen:
+                continue
+            seen.add(student_id)
+            pool = next((pools[room_type] for room_type in room_types if pools.get(room_type)), None)
+            if pool is not None:
+                preferred += 1
+            elif self.allow_other_room_types or not room_types:
+                pool = max((pool for pool in pools.values() if pool), key=len, default=None)
+            if pool is None:
+                unplaced.append(student_id)
+                continue
+            bed_id, room_id = pool.popleft()
+            placements.append((student_id, bed_id, room_id))
+
+        summary = {
+            'hostel': self.hostel_id,
+            'from_date': self.from_date,
+            'requested': len(requests),
+            'allocated': len(placements),
+            'preferred': preferred,
+            'already_allocated': sorted(allocated),
+            'unplaced': unplaced,
+            'vacant_beds_left': sum(len(pool) for pool in pools.values()),
+            'allocations': [
+                {'student': student_id, 'room': room_id, 'bed': bed_id}
+                for student_id, bed_id, room_id in placements
+            ],
+        }
+        return placements, summary
+
+    def allocate(self, requests, dry_run=False):
+        """
+        Plan and write the batch in one transaction unless `dry_run`.
+        Returns the plan summary with `written` set; raises BedsUnavailable
+        if a concurrent allocation took one of the planned beds.
+        """
+        with transaction.atomic():
+            placements, summary = self.plan(requests)
+            summary['written'] = False
+            if dry_run or not placements:
+                return summary
+            if claim_beds([bed_id for _, bed_id, _ in placements]) != len(placements):
+                raise BedsUnavailable('Some beds were allocated concurrently; retry the batch.')
+            try:
+                HostelAllocation.objects.bulk_create([
+                    HostelAllocation(
+                        student_id=student_id,
+                        hostel_id=self.hostel_id,
+                        room_id=room_id,
+                        bed_id=bed_id,
+                        from_date=self.from_date,
+                        is_current=True,
+                        remarks=self.remarks,
+                        created_by=self.user,
+                        updated_by=self.user,
+                    )
+                    for student_id, bed_id, room_id in placements
+                ], batch_size=ALLOCATION_BATCH_SIZE)
+            except IntegrityError as exc:
+                # The partial unique constraint caught a bed taken meanwhile
+                raise BedsUnavailable('Some beds were allocated concurrently; retry the batch.') from exc
+            refresh_counters({room_id for _, _, room_id in placements}, [self.hostel_id])
+        summary['written'] = True
+        return summary
+
+
+class HostelBillingService:
+    """Create the HostelFee rows of one month for all current allocations."""
+
+    def __init__(self, year, month, college_id=None, hostel_id=None, due_date=None, user=None):
+        self.year = year
+        self.month = month
+        self.month_start = date(year, month, 1)
+        self.month_end = date(year, month, calendar.monthrange(year, month)[1])
+        self.college_id = college_id
+        self.hostel_id = hostel_id
+        self.due_date = due_date or self.month_start
+        self.user = user
+
+    def allocations(self):
+        """Active allocations current at any point of the month."""
+        queryset = HostelAllocation.objects.filter(
+            is_current=True,
+            is_active=True,
+            from_date__lte=self.month_end,
+        ).filter(Q(to_date__isnull=True) | Q(to_date__gte=self.month_start))
+        if self.college_id:
+            queryset = queryset.filter(hostel__college_id=self.college_id)
+        if self.hostel_id:
+            queryset = queryset.filter(hostel_id=self.hostel_id)
+        return queryset
+
+    def plan(self):
+        """[(allocation_id, monthly fee, college_id)] still to bill, and the number already billed."""
+        rows = list(self.allocations().values_list(
+            'id', 'room__room_type__monthly_fee', 'hostel__college_id'
+        ).order_by('id'))
+        billed = self._billed([row[0] for row in rows])
+        return [row for row in rows if row[0] not in billed], len(billed)
+
+    def _billed(self, allocation_ids):
+        """Allocation ids among `allocation_ids` that already have the month's fee."""
+        return set(HostelFee.objects.filter(
+            allocation_id__in=allocation_ids, year=self.year, month=self.month
+        ).values_list('allocation_id', flat=True))
+
+    def _lock_month(self):
+        # Concurrent runs for a month queue up on its finance income row
+        AppIncome.objects.get_or_create(app_name=FINANCE_APP, month=self.month_start)
+        list(AppIncome.objects.select_for_update().filter(
+            app_name=FINANCE_APP, month=self.month_start
+        ).values_list('pk', flat=True))
+
+    def run(self, dry_run=False):
+        """Bill the month in one transaction unless `dry_run`. Returns a summary dict."""
+        with transaction.atomic():
+            if not dry_run:
+                self._lock_month()
+            to_bill, already_billed = self.plan()
+            total = sum((fee or Decimal('0.00') for _, fee, _ in to_bill), Decimal('0.00'))
+            summary = {
+                'year': self.year,
+                'month': self.month,
+                'due_date': self.due_date,
+                'billed': len(to_bill),
+                'already_billed': already_billed,
+                'amount': total,
+                'written': False,
+            }
+            if dry_run or not to_bill:
+                return summary
+            # A fee created meanwhile by the per-allocation path is skipped by
+            # ignore_conflicts and already booked its own income; only rows
+            # this insert actually wrote are posted to finance
+            allocation_ids = [allocation_id for allocation_id, _, _ in to_bill]
+            billed_before = self._billed(allocation_ids)
+            HostelFee.objects.bulk_create([
+                HostelFee(
+                    allocation_id=allocation_id,
+                    month=self.month,
+                    year=self.year,
+                    amount=fee or Decimal('0.00'),
+                    due_date=self.due_date,
+                    created_by=self.user,
+                    updated_by=self.user,
+                )
+                for allocation_id, fee, _ in to_bill
+            ], batch_size=FEE_BATCH_SIZE, ignore_conflicts=True)
+            inserted = self._billed(allocation_ids) - billed_before
+            to_bill = [row for row in to_bill if row[0] in inserted]
+            summary.update(
+                billed=len(to_bill),
+                already_billed=already_billed + len(allocation_ids) - len(to_bill),
+                amount=sum((fee or Decimal('0.00') for _, fee, _ in to_bill), Decimal('0.00')),
+            )
+            by_college = defaultdict(lambda: [Decimal('0.00'), 0])
+            for _, fee, college_id in to_bill:
+                by_college[college_id][0] += fee or Decimal('0.00')
+                by_college[college_id][1] += 1
+            for college_id, (amount, count) in sorted(by_college.items()):
+                record_app_income(
+                    FINANCE_APP,
+                    amount,
+                    count,
+                    f'Hostel fees {self.month_start:%B %Y}',
+                    'HostelFee',
+                    self.month_start,
+                    college_id=college_id,
+                )
+        summary['written'] = True
+        return summary
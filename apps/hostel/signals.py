@@ -1,30 +1,39 @@
 """
 Signals for Hostel app.
-Lightweight updates for occupancy and fees; extend with full logic as needed.
+Occupancy (see occupancy.py) is synced for the beds, rooms and hostels an
+allocation touches, before and after each change; fees are placeholders.
 """
 from datetime import date
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import HostelAllocation, HostelFee, Bed, Room
+from .models import HostelAllocation, HostelFee
+from .occupancy import sync_occupancy
 
 
-def _update_room_and_bed(allocation, occupy=True):
-    bed = allocation.bed
-    room = allocation.room
-    if bed:
-        bed.status = 'occupied' if occupy else 'vacant'
-        bed.save(update_fields=['status', 'updated_at'])
-    if room:
-        delta = 1 if occupy else -1
-        room.occupied_beds = max(0, room.occupied_beds + delta)
-        room.save(update_fields=['occupied_beds', 'updated_at'])
+def _placement(bed_id, room_id, hostel_id):
+    return {'bed_ids': {bed_id}, 'room_ids': {room_id}, 'hostel_ids': {hostel_id}}
+
+
+@receiver(pre_save, sender=HostelAllocation)
+def hostel_allocation_pre_save(sender, instance, **kwargs):
+    # Remember the old placement so a moved or ended allocation frees it
+    instance._previous_placement = None
+    if instance.pk:
+        previous = HostelAllocation.objects.filter(pk=instance.pk).values_list(
+            'bed_id', 'room_id', 'hostel_id'
+        ).first()
+        if previous:
+            instance._previous_placement = _placement(*previous)
 
 
 @receiver(post_save, sender=HostelAllocation)
 def hostel_allocation_post_save(sender, instance, created, **kwargs):
+    placement = _placement(instance.bed_id, instance.room_id, instance.hostel_id)
+    for key, ids in (getattr(instance, '_previous_placement', None) or {}).items():
+        placement[key] |= ids
+    sync_occupancy(**placement)
     if created:
-        _update_room_and_bed(instance, occupy=True)
         # Create a single current month fee record as a placeholder
         if not instance.fees.exists():
             today = date.today()
@@ -39,9 +48,9 @@ def hostel_allocation_post_save(sender, instance, created, **kwargs):
             )
 
 
-@receiver(pre_delete, sender=HostelAllocation)
-def hostel_allocation_pre_delete(sender, instance, using, **kwargs):
-    _update_room_and_bed(instance, occupy=False)
+@receiver(post_delete, sender=HostelAllocation)
+def hostel_allocation_post_delete(sender, instance, using, **kwargs):
+    sync_occupancy(**_placement(instance.bed_id, instance.room_id, instance.hostel_id))
 
 
 @receiver(post_save, sender=HostelFee)
@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.hostel.models import HostelAllocation, HostelFee
+from apps.hostel.services import HostelAllocationService, HostelBillingService
+from finance.models import AppIncome, FinanceTransaction
+
+from .test_occupancy import HostelTestCase
+
+
+class HostelBillingTest(HostelTestCase):
+    def setUp(self):
+        super().setUp()
+        s1, s2, s3, s4, _ = self.students
+        HostelAllocationService(self.hostel.id, from_date=date(2025, 7, 1)).allocate([
+            (s1.id, [self.single.id]), (s2.id, []), (s3.id, []), (s4.id, []),
+        ])
+
+    def _income(self):
+        return AppIncome.objects.values_list('amount', 'transaction_count').get(
+            app_name='hostel', month=date(2025, 8, 1)
+        )
+
+    def test_month_is_billed_once_with_one_finance_delta(self):
+        summary = HostelBillingService(2025, 8, college_id=self.college.id).run()
+
+        self.assertEqual((summary['billed'], summary['amount']), (4, Decimal('18000.00')))
+        fees = HostelFee.objects.filter(year=2025, month=8)
+        self.assertEqual(sorted(fees.values_list('amount', flat=True)), [4000, 4000, 4000, 6000])
+        self.assertEqual(set(fees.values_list('due_date', flat=True)), {date(2025, 8, 1)})
+        self.assertEqual(self._income(), (Decimal('18000.00'), 4))
+        self.assertEqual(FinanceTransaction.objects.filter(app='hostel').count(), 1)
+
+        # Re-running bills nothing twice; new allocations are picked up
+        again = HostelBillingService(2025, 8).run()
+        self.assertEqual((again['billed'], again['already_billed']), (0, 4))
+        ended = HostelAllocation.objects.get(student=self.students[3])
+        ended.is_current = False
+        ended.to_date = date(2025, 8, 20)
+        ended.save()
+        HostelAllocationService(self.hostel.id, from_date=date(2025, 8, 21)).allocate([(self.students[4].id, [])])
+
+        again = HostelBillingService(2025, 8).run()
+        self.assertEqual((again['billed'], again['already_billed']), (1, 3))
+        self.assertEqual(fees.count(), 5)
+        self.assertEqual(self._income(), (Decimal('22000.00'), 5))
+
+    def test_fees_created_concurrently_are_not_booked_twice(self):
+        service = HostelBillingService(2025, 8, college_id=self.college.id)
+        stale_plan = service.plan()
+        single = HostelAllocation.objects.get(student=self.students[0])
+        # Billed through the per-allocation path after the run planned its rows
+        HostelFee.objects.create(
+            allocation=single, month=8, year=2025, amount=Decimal('6000.00'), due_date=date(2025, 8, 1),
+        )
+
+        with mock.patch.object(HostelBillingService, 'plan', return_value=stale_plan):
+            summary = service.run()
+
+        self.assertEqual(
+            (summary['billed'], summary['already_billed'], summary['amount']), (3, 1, Decimal('12000.00'))
+        )
+        self.assertEqual(HostelFee.objects.filter(year=2025, month=8).count(), 4)
+        self.assertEqual(self._income(), (Decimal('12000.00'), 3))
+
+    def test_generate_month_api_dry_run(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(
+            reverse('hostelfee-generate-month'),
+            {'year': 2025, 'month': 6, 'dry_run': True},
+            format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        # Allocations starting in July are not billed for June
+        self.assertEqual((response.data['billed'], response.data['written']), (0, False))
+
+        response = client.post(
+            reverse('hostelfee-generate-month'),
+            {'year': 2025, 'month': 7, 'dry_run': True},
+            format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+        self.assertEqual(response.data['billed'], 4)
+        self.assertFalse(HostelFee.objects.exists())
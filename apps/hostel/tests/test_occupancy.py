@@ -0,0 +1,181 @@
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.academic.models import Faculty, Program
+from apps.accounts.models import User, UserType
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.hostel.models import Bed, Hostel, HostelAllocation, Room, RoomType
+from apps.hostel.services import HostelAllocationService
+from apps.students.models import Student
+
+
+class HostelTestCase(TestCase):
+    """A hostel with single and double rooms and five unallocated students."""
+
+    def setUp(self):
+        self.college = College.objects.create(
+            code="HOC",
+            name="Occupancy College",
+            short_name="HOC",
+            email="info@hoc.test",
+            phone="9999999989",
+            address_line1="1 Dorm Rd",
+            city="City",
+            state="State",
+            pincode="000015",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.hostel = Hostel.objects.create(college=self.college, name="North", hostel_type="boys", capacity=5)
+        self.single = RoomType.objects.create(hostel=self.hostel, name="Single", capacity=1, monthly_fee=6000)
+        self.double = RoomType.objects.create(hostel=self.hostel, name="Double", capacity=2, monthly_fee=4000)
+        self.room_1 = Room.objects.create(
+            hostel=self.hostel, room_type=self.single, room_number="101", floor="1", capacity=1,
+        )
+        self.room_2 = Room.objects.create(
+            hostel=self.hostel, room_type=self.double, room_number="102", floor="1", capacity=2,
+        )
+        self.room_3 = Room.objects.create(
+            hostel=self.hostel, room_type=self.double, room_number="201", floor="2", capacity=2,
+        )
+        self.bed_1a = Bed.objects.create(room=self.room_1, bed_number="A")
+        self.bed_2a = Bed.objects.create(room=self.room_2, bed_number="A")
+        self.bed_2b = Bed.objects.create(room=self.room_2, bed_number="B")
+        self.bed_3a = Bed.objects.create(room=self.room_3, bed_number="A")
+        Bed.objects.create(room=self.room_3, bed_number="B", status="maintenance")
+        self.students = [self._student(number) for number in range(1, 6)]
+        self.admin = User.objects.create_user(
+            username="hoc_admin",
+            email="admin@hoc.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+
+    def _student(self, number):
+        user = User.objects.create_user(
+            username=f"hoc_student_{number}",
+            email=f"hoc{number}@hoc.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        return Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number=f"HOC-{number}",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number=f"HOC-REG-{number}",
+            program=self.program,
+            academic_year=self.year,
+            first_name="Stu",
+            last_name=str(number),
+            date_of_birth=date(2007, 1, 1),
+            gender="male",
+            email=f"hoc{number}@hoc.test",
+        )
+
+    def _occupied(self):
+        rooms = dict(Room.objects.values_list('room_number', 'occupied_beds'))
+        return rooms, Hostel.objects.values_list('occupied_beds', flat=True).get(pk=self.hostel.pk)
+
+
+class HostelOccupancyTest(HostelTestCase):
+    def test_batch_fills_preferred_room_types_then_any_vacant_bed(self):
+        s1, s2, s3, s4, s5 = self.students
+        service = HostelAllocationService(self.hostel.id, from_date=date(2025, 7, 1), user=self.admin)
+        summary = service.allocate([
+            (s1.id, [self.single.id]),
+            (s2.id, [self.single.id]),
+            (s3.id, []),
+            (s4.id, [self.double.id]),
+            (s5.id, []),
+        ])
+
+        self.assertTrue(summary['written'])
+        self.assertEqual((summary['allocated'], summary['preferred'], summary['unplaced']), (4, 2, [s5.id]))
+        beds = dict(HostelAllocation.objects.values_list('student_id', 'bed_id'))
+        self.assertEqual(beds, {
+            s1.id: self.bed_1a.id, s2.id: self.bed_2a.id, s3.id: self.bed_2b.id, s4.id: self.bed_3a.id,
+        })
+        self.assertEqual(self._occupied(), ({'101': 1, '102': 2, '201': 1}, 4))
+        self.assertEqual(
+            sorted(Bed.objects.values_list('status', flat=True)),
+            ['maintenance', 'occupied', 'occupied', 'occupied', 'occupied'],
+        )
+
+        # Re-running skips students that already have a bed
+        again = service.allocate([(s1.id, []), (s5.id, [])])
+        self.assertEqual((again['already_allocated'], again['unplaced']), ([s1.id], [s5.id]))
+
+    def test_one_current_allocation_per_bed_and_ending_frees_it(self):
+        s1, s2 = self.students[:2]
+        allocation = HostelAllocation.objects.create(
+            student=s1, hostel=self.hostel, room=self.room_2, bed=self.bed_2a, from_date=date(2025, 7, 1),
+        )
+        self.assertEqual(self._occupied(), ({'101': 0, '102': 1, '201': 0}, 1))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            HostelAllocation.objects.create(
+                student=s2, hostel=self.hostel, room=self.room_2, bed=self.bed_2a, from_date=date(2025, 7, 1),
+            )
+
+        allocation.is_current = False
+        allocation.to_date = date(2025, 12, 31)
+        allocation.save()
+        self.bed_2a.refresh_from_db()
+        self.assertEqual(self.bed_2a.status, 'vacant')
+        self.assertEqual(self._occupied(), ({'101': 0, '102': 0, '201': 0}, 0))
+
+    def test_bulk_allocate_api_dry_run_and_vacancies(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        headers = {'HTTP_X_COLLEGE_ID': str(self.college.id)}
+        response = client.post(
+            reverse('hostelallocation-bulk-allocate'),
+            {
+                'hostel': self.hostel.id,
+                'students': [{'student': student.id} for student in self.students[:2]],
+                'room_types': [self.single.id],
+                'allow_other_room_types': False,
+                'dry_run': True,
+            },
+            format='json',
+            **headers,
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(response.data['written'])
+        self.assertEqual(response.data['unplaced'], [self.students[1].id])
+        self.assertFalse(HostelAllocation.objects.exists())
+
+        HostelAllocationService(self.hostel.id).allocate([(self.students[0].id, [self.double.id])])
+        response = client.get(reverse('hostel-vacancies', args=[self.hostel.id]), **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['occupied'], response.data['vacant']), (1, 4))
+        vacant = {row['room_type_name']: row['vacant'] for row in response.data['room_types']}
+        self.assertEqual(vacant, {'Single': 1, 'Double': 3})
@@ -1,5 +1,8 @@
-from rest_framework import filters, viewsets
+from django.db.models import F, Sum
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
@@ -12,7 +15,10 @@ from .serializers import (
     BedSerializer,
     HostelAllocationSerializer,
     HostelFeeSerializer,
+    BulkAllocationSerializer,
+    MonthlyBillingSerializer,
 )
+from .services import BedsUnavailable, HostelAllocationService, HostelBillingService
 
 
 class HostelViewSet(CollegeScopedModelViewSet):
@@ -25,6 +31,24 @@ class HostelViewSet(CollegeScopedModelViewSet):
     ordering_fields = ['name', 'capacity', 'created_at']
     ordering = ['name']
 
+    @action(detail=True, methods=['get'])
+    def vacancies(self, request, pk=None):
+        """Vacant beds per room type, from the room occupancy counters."""
+        hostel = self.get_object()
+        rows = Room.objects.filter(hostel=hostel, is_active=True).values(
+            'room_type_id', room_type_name=F('room_type__name'), monthly_fee=F('room_type__monthly_fee'),
+        ).annotate(
+            capacity=Sum('capacity'), occupied=Sum('occupied_beds'),
+        ).order_by('room_type_id')
+        room_types = [{**row, 'vacant': max(row['capacity'] - row['occupied'], 0)} for row in rows]
+        return Response({
+            'hostel': hostel.pk,
+            'capacity': hostel.capacity,
+            'occupied': hostel.occupied_beds,
+            'vacant': max(hostel.capacity - hostel.occupied_beds, 0),
+            'room_types': room_types,
+        }, status=status.HTTP_200_OK)
+
 
 class RoomTypeViewSet(RelatedCollegeScopedModelViewSet):
     queryset = RoomType.objects.select_related('hostel')
@@ -69,6 +93,26 @@ class HostelAllocationViewSet(RelatedCollegeScopedModelViewSet):
     ordering = ['-from_date']
     related_college_lookup = 'hostel__college_id'
 
+    @action(detail=False, methods=['post'], url_path='bulk-allocate')
+    def bulk_allocate(self, request):
+        """Place a batch of students in vacant beds of one hostel in one transaction."""
+        college_id = self.get_college_id(required=True)
+        serializer = BulkAllocationSerializer(data=request.data, context={'college_id': college_id})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        service = HostelAllocationService(
+            data['hostel'],
+            from_date=data.get('from_date'),
+            allow_other_room_types=data['allow_other_room_types'],
+            remarks=data.get('remarks'),
+            user=request.user,
+        )
+        try:
+            summary = service.allocate(data['requests'], dry_run=data['dry_run'])
+        except BedsUnavailable as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class HostelFeeViewSet(RelatedCollegeScopedModelViewSet):
     queryset = HostelFee.objects.select_related('allocation__hostel', 'allocation__student')
@@ -79,3 +123,20 @@ class HostelFeeViewSet(RelatedCollegeScopedModelViewSet):
     ordering_fields = ['due_date', 'created_at']
     ordering = ['-due_date']
     related_college_lookup = 'allocation__hostel__college_id'
+
+    @action(detail=False, methods=['post'], url_path='generate-month')
+    def generate_month(self, request):
+        """Bill a month for every current allocation; safe to re-run."""
+        college_id = self.get_college_id(required=True)
+        serializer = MonthlyBillingSerializer(data=request.data, context={'college_id': college_id})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        service = HostelBillingService(
+            data['year'],
+            data['month'],
+            college_id=college_id,
+            hostel_id=data.get('hostel'),
+            due_date=data.get('due_date'),
+            user=request.user,
+        )
+        return Response(service.run(dry_run=data['dry_run']), status=status.HTTP_200_OK)
@@ -0,0 +1,189 @@
+"""
+Leave balance ledger.
+
+LeaveBalance holds one row per teacher, leave type and academic year:
+
+    total_days    = carried_forward_days + days accrued so far
+    used_days     = days of approved applications
+    balance_days  = total_days - used_days
+
+Only paid leave types are tracked; unpaid leave is loss of pay in the
+payroll run. The row is changed in place, never read-modified-written:
+
+- an application moves to 'approved' with a conditional UPDATE (anything
+  but approved -> approved), and only the request that moved it debits
+  its days with one F() UPDATE guarded by balance_days >= days, so a
+  re-saved approval or two concurrent approvers cannot debit twice and no
+  balance goes below zero;
+- an approved application moving to any other status (rejected,
+  cancelled, ...) is credited back the same way;
+- an approved application whose teacher, leave type, dates or day count
+  are edited is credited its previous days and debited the new ones in
+  one transaction;
+- a balance is read with one query on the (teacher, leave_type,
+  academic_year) unique index.
+
+A row created on first use starts at the days accrued so far: the yearly
+allowance pro-rated by the months of the academic year started, the same
+monthly accrual LeaveAccrualService grants.
+
+The balance of an application is the one of the academic year containing
+its from_date. Accrual and carry-forward are LeaveAccrualService's job.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.models import AcademicYear
+
+from .models import LeaveApplication, LeaveBalance
+
+STATUS_APPROVED = 'approved'
+TRANSITION_APPROVED = 'approved'
+TRANSITION_WITHDRAWN = 'withdrawn'
+BALANCE_FIELDS = ('total_days', 'used_days', 'balance_days', 'carried_forward_days')
+
+
+def months_started(academic_year, as_of):
+    """Months of the academic year started on as_of, between 0 and 12."""
+    start, end = academic_year.start_date, academic_year.end_date
+    as_of = min(as_of, end)
+    months = (as_of.year - start.year) * 12 + as_of.month - start.month + 1
+    return max(0, min(months, 12))
+
+
+def accrued_days(leave_type, academic_year, as_of=None):
+    """Days of the leave type accrued in the academic year by as_of (default today)."""
+    months = months_started(academic_year, as_of or timezone.localdate())
+    return leave_type.max_days_per_year * months // 12
+
+
+def _accrued_days(leave_type, academic_year_id):
+    academic_year = AcademicYear.objects.all_colleges().filter(pk=academic_year_id).first()
+    return 0 if academic_year is None else accrued_days(leave_type, academic_year)
+
+
+def academic_year_for(college_id, on_date):
+    """The college's academic year containing on_date, else its current one."""
+    years = AcademicYear.objects.all_colleges().filter(college_id=college_id)
+    year_id = years.filter(start_date__lte=on_date, end_date__gte=on_date).values_list('id', flat=True).first()
+    if year_id is None:
+        year_id = years.filter(is_current=True).values_list('id', flat=True).first()
+    return year_id
+
+
+def leave_balance(teacher_id, leave_type_id, academic_year_id):
+    """Balance fields of one ledger row, or None when the row does not exist yet."""
+    return LeaveBalance.objects.filter(
+        teacher_id=teacher_id,
+        leave_type_id=leave_type_id,
+        academic_year_id=academic_year_id,
+    ).values(*BALANCE_FIELDS).first()
+
+
+def available_days(teacher_id, leave_type, on_date, college_id):
+    """Days the teacher can still take; a missing row means the days accrued so far."""
+    year_id = academic_year_for(college_id, on_date)
+    balance = leave_balance(teacher_id, leave_type.id, year_id)
+    return _accrued_days(leave_type, year_id) if balance is None else balance['balance_days']
+
+
+def _ledger_row(application, academic_year_id):
+    """Filter for the application's ledger row, creating it with the days accrued so far if missing."""
+    leave_type = application.leave_type
+    rows = LeaveBalance.objects.filter(
+        teacher_id=application.teacher_id,
+        leave_type_id=leave_type.id,
+        academic_year_id=academic_year_id,
+    )
+    if not rows.exists():
+        accrued = _accrued_days(leave_type, academic_year_id)
+        LeaveBalance.objects.get_or_create(
+            teacher_id=application.teacher_id,
+            leave_type_id=leave_type.id,
+            academic_year_id=academic_year_id,
+            defaults={
+                'total_days': accrued,
+                'used_days': 0,
+                'balance_days': accrued,
+                'created_by': application.updated_by,
+                'updated_by': application.updated_by,
+            },
+        )
+    return rows
+
+
+def _academic_year(application):
+    year_id = academic_year_for(application.teacher.college_id, application.from_date)
+    if year_id is None:
+        raise ValidationError("No academic year covers the leave dates.")
+    return year_id
+
+
+def debit(application):
+    """Take the application's days from its balance; raises ValidationError when too few are left."""
+    days = application.total_days
+    updated = _ledger_row(application, _academic_year(application)).filter(balance_days__gte=days).update(
+        used_days=F('used_days') + days,
+        balance_days=F('balance_days') - days,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        raise ValidationError(f"Insufficient {application.leave_type.name} balance for {days} days.")
+
+
+def credit(application):
+    """Give the application's days back to its balance."""
+    days = application.total_days
+    year_id = academic_year_for(application.teacher.college_id, application.from_date)
+    LeaveBalance.objects.filter(
+        teacher_id=application.teacher_id,
+        leave_type_id=application.leave_type_id,
+        academic_year_id=year_id,
+        used_days__gte=days,
+    ).update(
+        used_days=F('used_days') - days,
+        balance_days=F('balance_days') + days,
+        updated_at=timezone.now(),
+    )
+
+
+def set_application_status(application, status):
+    """
+    Move an application to status and post the ledger entry of the move.
+
+    Returns TRANSITION_APPROVED or TRANSITION_WITHDRAWN when the move
+    approved or withdrew the application (whatever its leave type), None
+    when it did neither.
+    """
+    applications = LeaveApplication.objects.filter(pk=application.pk)
+    changes = {'status': status, 'updated_at': timezone.now()}
+    with transaction.atomic():
+        if status == STATUS_APPROVED:
+            moved = applications.exclude(status=STATUS_APPROVED).update(**changes)
+            if moved and application.leave_type.is_paid:
+                debit(application)
+            transition = TRANSITION_APPROVED if moved else None
+        else:
+            moved = applications.filter(status=STATUS_APPROVED).update(**changes)
+            if moved and application.leave_type.is_paid:
+                credit(application)
+            if not moved:
+                applications.exclude(status=status).update(**changes)
+            transition = TRANSITION_WITHDRAWN if moved else None
+    application.status = status
+    return transition
+
+
+def rebook(application, previous):
+    """
+    Move an approved application's days from its previous ledger entry to
+    its current one: previous is the application as last saved. Raises
+    ValidationError, changing nothing, when the new balance is too low.
+    """
+    with transaction.atomic():
+        if previous.leave_type.is_paid:
+            credit(previous)
+        if application.leave_type.is_paid:
+            debit(application)
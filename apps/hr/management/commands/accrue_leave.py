@@ -0,0 +1,51 @@
+"""
+Management command for the leave accrual run.
+
+Run it once at the start of each academic year with --carry-forward, and
+monthly from cron for --period monthly colleges: each run recomputes the
+grant so far and never grants a month twice.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import AcademicYear
+from apps.hr.services import ACCRUAL_PERIODS, PERIOD_YEARLY, LeaveAccrualService
+
+
+class Command(BaseCommand):
+    help = 'Accrue paid leave balances for an academic year'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--college', type=int, help='Limit to one college ID')
+        parser.add_argument('--academic-year', type=int, help='Academic year ID (default: each college\'s current year)')
+        parser.add_argument('--period', choices=ACCRUAL_PERIODS, default=PERIOD_YEARLY)
+        parser.add_argument('--as-of', type=date.fromisoformat, help='Monthly accrual date (YYYY-MM-DD, default: today)')
+        parser.add_argument('--carry-forward', action='store_true', help='Carry the previous year\'s balances first')
+        parser.add_argument('--dry-run', action='store_true', help='Report without writing')
+
+    def handle(self, *args, **options):
+        years = AcademicYear.objects.all_colleges()
+        if options.get('academic_year'):
+            years = years.filter(pk=options['academic_year'])
+        else:
+            years = years.filter(is_current=True)
+        if options.get('college'):
+            years = years.filter(college_id=options['college'])
+        years = list(years.values_list('college_id', 'id'))
+        if not years:
+            raise CommandError('No matching academic year.')
+
+        for college_id, year_id in years:
+            summary = LeaveAccrualService(
+                college_id, year_id, period=options['period'], as_of=options.get('as_of'),
+            ).run(carry_forward=options['carry_forward'], dry_run=options['dry_run'])
+            granted = ', '.join(f"{row['code']}={row['entitlement']}" for row in summary['leave_types']) or 'none'
+            self.stdout.write(self.style.SUCCESS(
+                f"College {college_id}, year {year_id}: {summary['teachers']} teachers, {granted} "
+                f"{'written' if summary['written'] else 'to write'}"
+            ))
+            if summary['overdrawn']:
+                self.stdout.write(self.style.WARNING(
+                    f"  {summary['overdrawn']} balances have used more days than accrued"
+                ))
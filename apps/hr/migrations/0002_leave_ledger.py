@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leavebalance',
+            name='carried_forward_days',
+            field=models.IntegerField(default=0, help_text='Days carried from the previous academic year'),
+        ),
+        migrations.AddField(
+            model_name='leavetype',
+            name='carry_forward_limit',
+            field=models.IntegerField(default=0, help_text='Max unused days carried into the next academic year'),
+        ),
+    ]
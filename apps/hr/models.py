@@ -23,6 +23,7 @@ class LeaveType(CollegeScopedModel):
     code = models.CharField(max_length=20, help_text="Code")
     max_days_per_year = models.IntegerField(help_text="Max days per year")
     is_paid = models.BooleanField(default=True, help_text="Paid leave")
+    carry_forward_limit = models.IntegerField(default=0, help_text="Max unused days carried into the next academic year")
     description = models.TextField(null=True, blank=True, help_text="Description")
 
     class Meta:
@@ -125,6 +126,7 @@ class LeaveBalance(AuditModel):
     total_days = models.IntegerField(help_text="Total days")
     used_days = models.IntegerField(default=0, help_text="Used days")
     balance_days = models.IntegerField(help_text="Balance days")
+    carried_forward_days = models.IntegerField(default=0, help_text="Days carried from the previous academic year")
 
     class Meta:
         db_table = 'leave_balance'
@@ -137,7 +139,7 @@ class LeaveBalance(AuditModel):
         return f"{self.teacher.get_full_name()} - {self.leave_type} ({self.balance_days} days left)"
 
     def clean(self):
-        if self.total_days < 0 or self.used_days < 0 or self.balance_days < 0:
+        if min(self.total_days, self.used_days, self.balance_days, self.carried_forward_days) < 0:
             raise ValidationError("Days cannot be negative.")
 
 
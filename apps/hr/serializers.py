@@ -3,6 +3,8 @@ DRF Serializers for HR app models.
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 
 from .models import (
     LeaveType,
@@ -16,7 +18,10 @@ from .models import (
     PayrollItem,
     Payslip,
 )
+from apps.core.models import AcademicYear
 from apps.core.serializers import UserBasicSerializer, TenantAuditMixin
+from .leave_ledger import available_days
+from .services import ACCRUAL_PERIODS, PERIOD_YEARLY, STAGES, STAGE_PREVIEW
 
 User = get_user_model()
 
@@ -34,7 +39,7 @@ class LeaveTypeSerializer(TenantAuditMixin, serializers.ModelSerializer):
         model = LeaveType
         fields = [
             'id', 'college', 'college_name', 'name', 'code',
-            'max_days_per_year', 'is_paid', 'description', 'is_active',
+            'max_days_per_year', 'is_paid', 'carry_forward_limit', 'description', 'is_active',
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'college_name', 'created_by', 'updated_by', 'created_at', 'updated_at']
@@ -116,8 +121,32 @@ class LeaveApplicationSerializer(TenantAuditMixin, serializers.ModelSerializer):
                 'teacher': 'Only teachers and admins can create leave applications.'
             })
 
+        leave_type = data.get('leave_type')
+        if self.instance is None and leave_type and leave_type.is_paid and data.get('from_date'):
+            teacher = data['teacher']
+            available = available_days(teacher.id, leave_type, data['from_date'], teacher.college_id)
+            if data.get('total_days', 0) > available:
+                raise serializers.ValidationError({
+                    'total_days': f'Only {available} days of {leave_type.name} left.'
+                })
+
         return data
 
+    def create(self, validated_data):
+        # Approving debits the leave balance; roll back when it is too low
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'status': exc.messages})
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'status': exc.messages})
+
 
 # ============================================================================
 # LEAVE APPROVAL SERIALIZERS
@@ -143,6 +172,21 @@ class LeaveApprovalSerializer(TenantAuditMixin, serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
 
+    def create(self, validated_data):
+        # Approving debits the leave balance; roll back when it is too low
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'status': exc.messages})
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'status': exc.messages})
+
 
 # ============================================================================
 # LEAVE BALANCE SERIALIZERS
@@ -160,6 +204,7 @@ class LeaveBalanceSerializer(TenantAuditMixin, serializers.ModelSerializer):
         fields = [
             'id', 'teacher', 'teacher_name', 'leave_type', 'leave_type_name',
             'academic_year', 'academic_year_name', 'total_days', 'used_days', 'balance_days',
+            'carried_forward_days',
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -168,6 +213,20 @@ class LeaveBalanceSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
 
 
+class LeaveAccrualSerializer(serializers.Serializer):
+    """Academic year and period of a leave accrual run."""
+    academic_year = serializers.IntegerField()
+    period = serializers.ChoiceField(choices=ACCRUAL_PERIODS, default=PERIOD_YEARLY)
+    as_of = serializers.DateField(required=False, allow_null=True, help_text="Monthly accrual date (default: today)")
+    carry_forward = serializers.BooleanField(default=False, help_text="Carry the previous year's balances first")
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_academic_year(self, value):
+        if not AcademicYear.objects.all_colleges().filter(pk=value, college_id=self.context['college_id']).exists():
+            raise serializers.ValidationError('Academic year not found in this college.')
+        return value
+
+
 # ============================================================================
 # SALARY STRUCTURE SERIALIZERS
 # ============================================================================
@@ -281,6 +340,14 @@ class PayrollSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
 
 
+class PayrollRunSerializer(serializers.Serializer):
+    """Month and stage of a payroll run."""
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    month = serializers.IntegerField(min_value=1, max_value=12)
+    stage = serializers.ChoiceField(choices=STAGES, default=STAGE_PREVIEW)
+    payment_date = serializers.DateField(required=False, allow_null=True, help_text="Set on finalize")
+
+
 # ============================================================================
 # PAYROLL ITEM SERIALIZERS
 # ============================================================================
@@ -0,0 +1,427 @@
+"""
+HR batch operations.
+
+PayrollRunService computes a college's payroll for a month with a fixed
+number of queries, whatever the number of teachers:
+
+1. one query each loads the teachers, their salary structure current for
+   the month (latest effective_from wins), its components, the college's
+   active Deduction rules, approved unpaid leave overlapping the month and
+   absent / half-day StaffAttendance counts;
+2. per teacher, in memory:
+     gross       = structure gross salary + allowance components
+     deductions  = deduction components + Deduction rules (fixed, or a
+                   percentage of the structure gross) + loss of pay
+     loss of pay = structure gross / days in month * unpaid days, where
+                   unpaid days are unpaid leave days in the month plus
+                   absent days plus half of the half days
+     net         = gross - deductions, never below zero
+3. the run goes through three stages:
+     preview   returns the computed payroll without writing;
+     lock      bulk-creates Payroll rows (status 'locked') with their
+               PayrollItem rows, replacing the month's earlier locked rows;
+               teachers with a payroll in any other status are skipped;
+     finalize  marks the locked rows processed with one UPDATE, bulk-creates
+               their Payslip rows and posts one aggregated finance expense.
+
+Bulk writes skip the Payroll signals (payslip generation and the per-row
+finance sync), which the finalize stage replaces.
+
+LeaveAccrualService grants a college's paid leave for an academic year
+(see leave_ledger for how approvals debit it):
+
+1. one bulk INSERT (ignore_conflicts, backed by the teacher/leave type/
+   academic year unique constraint) creates the missing LeaveBalance rows
+   of active teachers;
+2. carry-forward, when asked for, sets carried_forward_days per leave type
+   with one UPDATE: the previous year's balance_days capped at the leave
+   type's carry_forward_limit (0 carries nothing);
+3. accrual sets, per leave type, with one UPDATE:
+     total_days   = carried_forward_days + entitlement, or used_days when
+                    more has already been taken (counted as overdrawn in
+                    the run summary)
+     balance_days = total_days - used_days
+   where entitlement is max_days_per_year for a yearly grant, or the
+   months started so far * max_days_per_year / 12 (rounded down) for a
+   monthly one.
+
+Accrual recomputes from used_days instead of adding to the balance, so
+re-running it (e.g. monthly from cron) never grants a month twice.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from apps.attendance.models import StaffAttendance
+from apps.teachers.models import Teacher
+from finance.signals import record_app_expense
+
+from apps.core.models import AcademicYear
+from .leave_ledger import accrued_days, months_started
+from .models import Deduction, LeaveApplication, LeaveBalance, LeaveType, Payroll, PayrollItem, Payslip, SalaryComponent, SalaryStructure
+
+STAGE_PREVIEW = 'preview'
+STAGE_LOCK = 'lock'
+STAGE_FINALIZE = 'finalize'
+STAGES = (STAGE_PREVIEW, STAGE_LOCK, STAGE_FINALIZE)
+STATUS_LOCKED = 'locked'
+STATUS_PROCESSED = 'processed'
+ALLOWANCE = 'allowance'
+DEDUCTION = 'deduction'
+LOSS_OF_PAY = 'Loss of pay'
+FINANCE_APP = 'hr'
+BATCH_SIZE = 1000
+PERIOD_YEARLY = 'yearly'
+PERIOD_MONTHLY = 'monthly'
+ACCRUAL_PERIODS = (PERIOD_YEARLY, PERIOD_MONTHLY)
+CENTS = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+class PayrollRunService:
+    """Preview, lock and finalize one month's payroll for a college."""
+
+    def __init__(self, college_id, year, month, payment_date=None, user=None):
+        self.college_id = college_id
+        self.year = year
+        self.month = month
+        self.days_in_month = calendar.monthrange(year, month)[1]
+        self.month_start = date(year, month, 1)
+        self.month_end = date(year, month, self.days_in_month)
+        self.payment_date = payment_date
+        self.user = user
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+
+    def structures(self):
+        """teacher_id -> SalaryStructure current for the month."""
+        structures = SalaryStructure.objects.filter(
+            teacher__college_id=self.college_id,
+            teacher__is_active=True,
+            is_current=True,
+            is_active=True,
+            effective_from__lte=self.month_end,
+        ).filter(
+            Q(effective_to__isnull=True) | Q(effective_to__gte=self.month_start)
+        ).order_by('teacher_id', '-effective_from', '-id')
+        current = {}
+        for structure in structures:
+            current.setdefault(structure.teacher_id, structure)
+        return current
+
+    def components(self, structure_ids):
+        by_structure = defaultdict(list)
+        for component in SalaryComponent.objects.filter(
+            structure_id__in=structure_ids, is_active=True
+        ).order_by('id'):
+            by_structure[component.structure_id].append(component)
+        return by_structure
+
+    def deduction_rules(self):
+        return list(Deduction.objects.all_colleges().filter(college_id=self.college_id, is_active=True).order_by('code'))
+
+    def unpaid_days(self, teacher_ids):
+        """teacher_id -> unpaid days in the month (Decimal)."""
+        days = defaultdict(Decimal)
+        leaves = LeaveApplication.objects.filter(
+            teacher_id__in=teacher_ids,
+            status='approved',
+            is_active=True,
+            leave_type__is_paid=False,
+            from_date__lte=self.month_end,
+            to_date__gte=self.month_start,
+        ).values_list('teacher_id', 'from_date', 'to_date')
+        for teacher_id, from_date, to_date in leaves:
+            overlap = (min(to_date, self.month_end) - max(from_date, self.month_start)).days + 1
+            days[teacher_id] += overlap
+        attendance = StaffAttendance.objects.all_colleges().filter(
+            teacher_id__in=teacher_ids,
+            date__range=(self.month_start, self.month_end),
+        ).values('teacher_id').annotate(
+            absent=Count('id', filter=Q(status='absent')),
+            half=Count('id', filter=Q(status='half_day')),
+        ).order_by()
+        for row in attendance:
+            days[row['teacher_id']] += row['absent'] + Decimal(row['half']) / 2
+        return days
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+
+    def compute(self):
+        """Returns ({teacher_id: payroll dict}, [teacher ids without a salary structure])."""
+        teacher_ids = list(Teacher.objects.all_colleges().filter(
+            college_id=self.college_id, is_active=True
+        ).values_list('id', flat=True))
+        structures = self.structures()
+        components = self.components([structure.id for structure in structures.values()])
+        rules = self.deduction_rules()
+        unpaid = self.unpaid_days(list(structures))
+
+        payrolls = {}
+        for teacher_id in teacher_ids:
+            structure = structures.get(teacher_id)
+            if structure is None:
+                continue
+            base = structure.gross_salary
+            items = [(c.component_name, c.component_type, c.amount) for c in components[structure.id]]
+            for rule in rules:
+                if rule.deduction_type == 'percentage' and rule.percentage is not None:
+                    items.append((rule.name, DEDUCTION, _money(base * rule.percentage / 100)))
+                elif rule.amount is not None:
+                    items.append((rule.name, DEDUCTION, _money(rule.amount)))
+            unpaid_days = min(unpaid.get(teacher_id, Decimal('0')), self.days_in_month)
+            if unpaid_days:
+                items.append((LOSS_OF_PAY, DEDUCTION, _money(base / self.days_in_month * unpaid_days)))
+
+            allowances = sum((amount for _, kind, amount in items if kind == ALLOWANCE), Decimal('0.00'))
+            deductions = sum((amount for _, kind, amount in items if kind != ALLOWANCE), Decimal('0.00'))
+            gross = base + allowances
+            payrolls[teacher_id] = {
+                'teacher': teacher_id,
+                'salary_structure': structure.id,
+                'gross_salary': _money(gross),
+                'total_allowances': _money(allowances),
+                'total_deductions': _money(deductions),
+                'net_salary': _money(max(gross - deductions, Decimal('0.00'))),
+                'unpaid_days': unpaid_days,
+                'items': items,
+            }
+        missing = [teacher_id for teacher_id in teacher_ids if teacher_id not in structures]
+        return payrolls, missing
+
+    def _summary(self, stage, payrolls, missing, skipped=()):
+        return {
+            'year': self.year,
+            'month': self.month,
+            'stage': stage,
+            'teachers': len(payrolls),
+            'gross_total': sum((p['gross_salary'] for p in payrolls.values()), Decimal('0.00')),
+            'deductions_total': sum((p['total_deductions'] for p in payrolls.values()), Decimal('0.00')),
+            'net_total': sum((p['net_salary'] for p in payrolls.values()), Decimal('0.00')),
+            'without_structure': missing,
+            'skipped': sorted(skipped),
+            'written': False,
+        }
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _month_payrolls(self):
+        return Payroll.objects.filter(teacher__college_id=self.college_id, year=self.year, month=self.month)
+
+    def preview(self):
+        payrolls, missing = self.compute()
+        summary = self._summary(STAGE_PREVIEW, payrolls, missing)
+        summary['payrolls'] = [
+            {**{key: value for key, value in payroll.items() if key != 'items'},
+             'items': [{'component_name': n, 'component_type': t, 'amount': a} for n, t, a in payroll['items']]}
+            for payroll in payrolls.values()
+        ]
+        return summary
+
+    def lock(self):
+        """Write the month's payroll as locked rows, replacing earlier locked rows."""
+        with transaction.atomic():
+            existing = self._month_payrolls()
+            existing.filter(status=STATUS_LOCKED).delete()
+            skipped = set(existing.values_list('teacher_id', flat=True))
+            payrolls, missing = self.compute()
+            payrolls = {teacher_id: p for teacher_id, p in payrolls.items() if teacher_id not in skipped}
+
+            created = Payroll.objects.bulk_create([
+                Payroll(
+                    teacher_id=teacher_id,
+                    month=self.month,
+                    year=self.year,
+                    salary_structure_id=payroll['salary_structure'],
+                    gross_salary=payroll['gross_salary'],
+                    total_allowances=payroll['total_allowances'],
+                    total_deductions=payroll['total_deductions'],
+                    net_salary=payroll['net_salary'],
+                    status=STATUS_LOCKED,
+                    remarks=f"Unpaid days: {payroll['unpaid_days']}" if payroll['unpaid_days'] else None,
+                    created_by=self.user,
+                    updated_by=self.user,
+                )
+                for teacher_id, payroll in payrolls.items()
+            ], batch_size=BATCH_SIZE)
+            PayrollItem.objects.bulk_create([
+                PayrollItem(
+                    payroll=row,
+                    component_name=name,
+                    component_type=kind,
+                    amount=amount,
+                    created_by=self.user,
+                    updated_by=self.user,
+                )
+                for row in created
+                for name, kind, amount in payrolls[row.teacher_id]['items']
+            ], batch_size=BATCH_SIZE)
+        summary = self._summary(STAGE_LOCK, payrolls, missing, skipped)
+        summary['written'] = True
+        return summary
+
+    def finalize(self):
+        """Process the locked rows: payslips plus one finance posting. Nothing is recomputed."""
+        today = timezone.localdate()
+        with transaction.atomic():
+            locked = list(self._month_payrolls().filter(status=STATUS_LOCKED).select_for_update(of=('self',)).values_list(
+                'id', 'teacher_id', 'gross_salary', 'total_deductions', 'net_salary'
+            ))
+            payroll_ids = [row[0] for row in locked]
+            Payroll.objects.filter(pk__in=payroll_ids).update(
+                status=STATUS_PROCESSED,
+                payment_date=self.payment_date,
+                updated_by=self.user,
+                updated_at=timezone.now(),
+            )
+            Payslip.objects.bulk_create([
+                Payslip(
+                    payroll_id=payroll_id,
+                    slip_number=f"PAY-{self.year}{self.month:02d}-{teacher_id}",
+                    issue_date=today,
+                    created_by=self.user,
+                    updated_by=self.user,
+                )
+                for payroll_id, teacher_id, *_ in locked
+            ], batch_size=BATCH_SIZE)
+            net_total = sum((row[4] for row in locked), Decimal('0.00'))
+            record_app_expense(
+                FINANCE_APP,
+                net_total,
+                len(locked),
+                f'Payroll {self.month_start:%B %Y}',
+                'Payroll',
+                self.month_start,
+                college_id=self.college_id,
+            )
+        payrolls = {
+            teacher_id: {'gross_salary': gross, 'total_deductions': deductions, 'net_salary': net}
+            for _, teacher_id, gross, deductions, net in locked
+        }
+        summary = self._summary(STAGE_FINALIZE, payrolls, [])
+        summary['written'] = True
+        return summary
+
+    def run(self, stage=STAGE_PREVIEW):
+        return {STAGE_PREVIEW: self.preview, STAGE_LOCK: self.lock, STAGE_FINALIZE: self.finalize}[stage]()
+
+
+class LeaveAccrualService:
+    """Grant a college's paid leave for one academic year, with optional carry-forward."""
+
+    def __init__(self, college_id, academic_year_id, period=PERIOD_YEARLY, as_of=None, user=None):
+        self.college_id = college_id
+        self.academic_year = AcademicYear.objects.all_colleges().get(pk=academic_year_id, college_id=college_id)
+        self.period = period
+        self.as_of = as_of or timezone.localdate()
+        self.user = user
+
+    def leave_types(self):
+        return list(LeaveType.objects.all_colleges().filter(
+            college_id=self.college_id, is_active=True, is_paid=True
+        ).order_by('code'))
+
+    def months_started(self):
+        return months_started(self.academic_year, self.as_of)
+
+    def entitlement(self, leave_type):
+        if self.period == PERIOD_YEARLY:
+            return leave_type.max_days_per_year
+        return accrued_days(leave_type, self.academic_year, self.as_of)
+
+    def previous_year_id(self):
+        return AcademicYear.objects.all_colleges().filter(
+            college_id=self.college_id, start_date__lt=self.academic_year.start_date
+        ).order_by('-start_date').values_list('id', flat=True).first()
+
+    def _balances(self, leave_type):
+        return LeaveBalance.objects.filter(
+            academic_year_id=self.academic_year.id, leave_type_id=leave_type.id
+        )
+
+    def _create_rows(self, leave_types):
+        teacher_ids = list(Teacher.objects.all_colleges().filter(
+            college_id=self.college_id, is_active=True
+        ).values_list('id', flat=True))
+        LeaveBalance.objects.bulk_create([
+            LeaveBalance(
+                teacher_id=teacher_id,
+                leave_type_id=leave_type.id,
+                academic_year_id=self.academic_year.id,
+                total_days=0,
+                used_days=0,
+                balance_days=0,
+                created_by=self.user,
+                updated_by=self.user,
+            )
+            for leave_type in leave_types
+            for teacher_id in teacher_ids
+        ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(teacher_ids)
+
+    def _carry_forward(self, leave_type, from_year_id):
+        previous = LeaveBalance.objects.filter(
+            teacher_id=OuterRef('teacher_id'), leave_type_id=leave_type.id, academic_year_id=from_year_id,
+        ).values('balance_days')[:1]
+        self._balances(leave_type).update(carried_forward_days=Least(
+            Coalesce(Subquery(previous), Value(0)), Value(leave_type.carry_forward_limit)
+        ))
+
+    def run(self, carry_forward=False, dry_run=False):
+        """Accrue every paid leave type; carry_forward first carries the previous year's balances."""
+        leave_types = self.leave_types()
+        from_year_id = self.previous_year_id() if carry_forward else None
+        summary = {
+            'academic_year': self.academic_year.id,
+            'period': self.period,
+            'as_of': self.as_of,
+            'carried_from': from_year_id,
+            'leave_types': [
+                {
+                    'leave_type': leave_type.id,
+                    'code': leave_type.code,
+                    'entitlement': self.entitlement(leave_type),
+                    'carry_forward_limit': leave_type.carry_forward_limit,
+                }
+                for leave_type in leave_types
+            ],
+            'teachers': Teacher.objects.all_colleges().filter(college_id=self.college_id, is_active=True).count(),
+            'overdrawn': 0,
+            'written': False,
+        }
+        if dry_run:
+            return summary
+
+        now = timezone.now()
+        with transaction.atomic():
+            summary['teachers'] = self._create_rows(leave_types)
+            for leave_type in leave_types:
+                if from_year_id is not None:
+                    self._carry_forward(leave_type, from_year_id)
+                granted = F('carried_forward_days') + self.entitlement(leave_type)
+                # Days already taken stay in total_days; such rows are reported, not hidden
+                summary['overdrawn'] += self._balances(leave_type).filter(used_days__gt=granted).count()
+                total = Greatest(granted, F('used_days'))
+                self._balances(leave_type).update(
+                    total_days=total,
+                    balance_days=total - F('used_days'),
+                    updated_by=self.user,
+                    updated_at=now,
+                )
+        summary['written'] = True
+        return summary
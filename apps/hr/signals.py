@@ -5,26 +5,56 @@ Handles leave approvals, balances, attendance updates, and payroll processing.
 from datetime import timedelta
 from decimal import Decimal
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from apps.attendance.models import StaffAttendance
-from apps.core.models import AcademicYear
+from .leave_ledger import TRANSITION_APPROVED, TRANSITION_WITHDRAWN, rebook, set_application_status
 from .models import (
     LeaveApplication,
     LeaveApproval,
-    LeaveBalance,
     Payroll,
     PayrollItem,
     Payslip,
 )
 
+# Fields that decide which ledger row an application's days are booked on, and how many
+LEDGER_FIELDS = ('teacher_id', 'leave_type_id', 'from_date', 'to_date', 'total_days')
+
 
 def _days_between(start_date, end_date):
     return (end_date - start_date).days + 1
 
 
+@receiver(pre_save, sender=LeaveApplication)
+def leave_application_pre_save(sender, instance, **kwargs):
+    """
+    Status changes go through the leave ledger: save the previous status and
+    let post_save make the move, so balances are debited or credited once.
+    Edits of an approved application's ledger fields move its days from the
+    previous entry to the new one before the save.
+    """
+    instance._requested_status = instance.status
+    instance._rebooked_from = None
+    update_fields = kwargs.get('update_fields')
+    fields = LEDGER_FIELDS if update_fields is None else [
+        field for field in LEDGER_FIELDS if {field, field.removesuffix('_id')} & set(update_fields)
+    ]
+    previous = None
+    if instance.pk:
+        previous = LeaveApplication.objects.filter(pk=instance.pk).values('status', *LEDGER_FIELDS).first()
+    if previous and previous['status'] == 'approved' and any(
+        getattr(instance, field) != previous[field] for field in fields
+    ):
+        before = LeaveApplication(pk=instance.pk, **{field: previous[field] for field in LEDGER_FIELDS})
+        rebook(instance, before)
+        instance._rebooked_from = before
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    instance.status = previous['status'] if previous else 'pending'
+
+
 @receiver(post_save, sender=LeaveApplication)
 def leave_application_post_save(sender, instance, created, **kwargs):
     """
@@ -40,41 +70,23 @@ def leave_application_post_save(sender, instance, created, **kwargs):
                 'remarks': None,
             },
         )
+    rebooked_from = getattr(instance, '_rebooked_from', None)
+    if rebooked_from is not None:
+        _clear_staff_attendance_for_leave(rebooked_from)
+        _create_staff_attendance_for_leave(instance)
+    requested = getattr(instance, '_requested_status', instance.status)
+    if requested != instance.status:
+        _move_application(instance, requested)
     print(f"[HR] Leave application {instance.id} submitted by {instance.teacher}.")
 
 
-def _apply_leave_balance(application):
-    """
-    Update leave balance based on approved application.
-    """
-    teacher = application.teacher
-    leave_type = application.leave_type
-    academic_year = AcademicYear.objects.filter(college=teacher.college, is_current=True).first()
-
-    balance, _ = LeaveBalance.objects.get_or_create(
-        teacher=teacher,
-        leave_type=leave_type,
-        academic_year=academic_year,
-        defaults={
-            'total_days': leave_type.max_days_per_year,
-            'used_days': 0,
-            'balance_days': leave_type.max_days_per_year,
-            'created_by': application.created_by,
-            'updated_by': application.updated_by,
-        },
-    )
-    balance.used_days += application.total_days
-    balance.balance_days = max(0, balance.total_days - balance.used_days)
-    balance.save(update_fields=['used_days', 'balance_days', 'updated_at'])
-
-
 def _create_staff_attendance_for_leave(application):
     """
     Mark staff attendance as on_leave for the date range.
     """
     current_date = application.from_date
     while current_date <= application.to_date:
-        StaffAttendance.objects.get_or_create(
+        StaffAttendance.objects.all_colleges().get_or_create(
             teacher=application.teacher,
             date=current_date,
             defaults={
@@ -86,18 +98,38 @@ def _create_staff_attendance_for_leave(application):
         current_date += timedelta(days=1)
 
 
+def _clear_staff_attendance_for_leave(application):
+    """
+    Remove the on_leave attendance of a withdrawn leave.
+    """
+    StaffAttendance.objects.all_colleges().filter(
+        teacher_id=application.teacher_id,
+        date__range=(application.from_date, application.to_date),
+        status='on_leave',
+    ).delete()
+
+
+def _move_application(application, status):
+    """
+    Move the application through the leave ledger and follow up on attendance.
+    """
+    transition = set_application_status(application, status)
+    if transition == TRANSITION_APPROVED:
+        _create_staff_attendance_for_leave(application)
+        print(f"[HR] Leave application {application.id} approved.")
+    elif transition == TRANSITION_WITHDRAWN:
+        _clear_staff_attendance_for_leave(application)
+
+
 @receiver(post_save, sender=LeaveApproval)
 def leave_approval_post_save(sender, instance, created, **kwargs):
     """
-    On approval, adjust leave balance and staff attendance.
+    An approval decision moves its application, which debits or credits the
+    leave balance and updates staff attendance.
     """
-    if instance.status != 'approved':
+    if instance.status == 'pending':
         return
-
-    application = instance.application
-    _apply_leave_balance(application)
-    _create_staff_attendance_for_leave(application)
-    print(f"[HR] Leave application {application.id} approved.")
+    _move_application(instance.application, instance.status)
 
 
 @receiver(post_save, sender=Payroll)
@@ -0,0 +1,204 @@
+from datetime import date
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserType
+from apps.attendance.models import StaffAttendance
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.hr.leave_ledger import available_days, leave_balance
+from apps.hr.models import LeaveApplication, LeaveApproval, LeaveBalance, LeaveType
+from apps.hr.services import PERIOD_MONTHLY, LeaveAccrualService
+from apps.teachers.models import Teacher
+
+
+class LeaveLedgerTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="LVL",
+            name="Leave College",
+            short_name="LVL",
+            email="info@lvl.test",
+            phone="9999999987",
+            address_line1="1 Holiday Rd",
+            city="City",
+            state="State",
+            pincode="000017",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.last_year = AcademicYear.objects.create(
+            college=self.college, year="2024-2025", start_date=date(2024, 6, 1), end_date=date(2025, 5, 31),
+        )
+        self.year = AcademicYear.objects.create(
+            college=self.college, year="2025-2026", start_date=date(2025, 6, 1), end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        self.admin = User.objects.create_user(
+            username="lvl_admin",
+            email="admin@lvl.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+        self.teachers = []
+        for name in ("dee", "eli"):
+            user = User.objects.create_user(
+                username=f"lvl_{name}",
+                email=f"{name}@lvl.test",
+                password="dummy-pass",
+                college=self.college,
+                user_type=UserType.TEACHER,
+            )
+            self.teachers.append(Teacher.objects.get(user=user))
+        self.casual = LeaveType.objects.create(
+            college=self.college, name="Casual leave", code="CL", max_days_per_year=12, carry_forward_limit=5,
+        )
+        self.sick = LeaveType.objects.create(college=self.college, name="Sick leave", code="SL", max_days_per_year=6)
+        LeaveType.objects.create(
+            college=self.college, name="Leave without pay", code="LWP", max_days_per_year=30, is_paid=False,
+        )
+
+    def _apply(self, teacher, days, leave_type=None, start=date(2025, 9, 1)):
+        return LeaveApplication.objects.create(
+            teacher=teacher, leave_type=leave_type or self.casual, from_date=start,
+            to_date=date(start.year, start.month, start.day + days - 1), total_days=days, reason="Rest",
+        )
+
+    def _balance(self, teacher, leave_type=None):
+        balance = leave_balance(teacher.id, (leave_type or self.casual).id, self.year.id)
+        return balance['total_days'], balance['used_days'], balance['balance_days']
+
+    def test_accrual_with_carry_forward_is_idempotent(self):
+        dee, eli = self.teachers
+        LeaveBalance.objects.create(
+            teacher=dee, leave_type=self.casual, academic_year=self.last_year,
+            total_days=12, used_days=4, balance_days=8,
+        )
+        LeaveBalance.objects.create(
+            teacher=dee, leave_type=self.sick, academic_year=self.last_year,
+            total_days=6, used_days=0, balance_days=6,
+        )
+
+        service = LeaveAccrualService(self.college.id, self.year.id, period=PERIOD_MONTHLY, as_of=date(2025, 8, 15))
+        summary = service.run(carry_forward=True)
+        self.assertEqual(summary['carried_from'], self.last_year.id)
+        self.assertEqual(
+            [(row['code'], row['entitlement']) for row in summary['leave_types']], [('CL', 3), ('SL', 1)]
+        )
+        # Casual leave carries at most 5 days, sick leave carries nothing; unpaid leave has no balance
+        self.assertEqual(self._balance(dee), (8, 0, 8))
+        self.assertEqual(self._balance(eli), (3, 0, 3))
+        self.assertEqual(self._balance(dee, self.sick), (1, 0, 1))
+        self.assertEqual(LeaveBalance.objects.filter(academic_year=self.year).count(), 4)
+
+        application = self._apply(dee, 2)
+        application.status = 'approved'
+        application.save()
+        self.assertEqual(self._balance(dee), (8, 2, 6))
+        for as_of in (date(2025, 9, 1), date(2025, 9, 30)):
+            LeaveAccrualService(self.college.id, self.year.id, period=PERIOD_MONTHLY, as_of=as_of).run()
+        self.assertEqual(self._balance(dee), (9, 2, 7))
+
+        LeaveAccrualService(self.college.id, self.year.id).run()
+        self.assertEqual(self._balance(eli), (12, 0, 12))
+
+    def test_approval_debits_once_and_withdrawal_credits(self):
+        dee = self.teachers[0]
+        LeaveAccrualService(self.college.id, self.year.id).run()
+        application = self._apply(dee, 3)
+        approval = application.approvals.get()
+
+        approval.status = 'approved'
+        approval.save()
+        approval.save()
+        self.assertEqual(self._balance(dee), (12, 3, 9))
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'approved')
+        self.assertEqual(StaffAttendance.objects.all_colleges().filter(teacher=dee, status='on_leave').count(), 3)
+
+        application.status = 'cancelled'
+        application.save()
+        application.save()
+        self.assertEqual(self._balance(dee), (12, 0, 12))
+        self.assertFalse(StaffAttendance.objects.all_colleges().filter(teacher=dee).exists())
+
+        # Approving more than is left changes nothing
+        big = self._apply(dee, 13, start=date(2025, 10, 1))
+        with self.assertRaises(ValidationError):
+            LeaveApproval.objects.create(application=big, status='approved', approval_date=date(2025, 9, 20))
+        big.refresh_from_db()
+        self.assertEqual((big.status, self._balance(dee)), ('pending', (12, 0, 12)))
+
+    def test_missing_row_starts_at_accrued_days_and_edits_rebook(self):
+        dee = self.teachers[0]
+        application = self._apply(dee, 2)
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2025, 8, 20)):
+            self.assertEqual(available_days(dee.id, self.casual, date(2025, 9, 1), self.college.id), 3)
+            application.status = 'approved'
+            application.save()
+        self.assertEqual(self._balance(dee), (3, 2, 1))
+
+        application.total_days = 1
+        application.to_date = date(2025, 9, 1)
+        application.save()
+        self.assertEqual(self._balance(dee), (3, 1, 2))
+        self.assertEqual(
+            list(StaffAttendance.objects.all_colleges().filter(teacher=dee).values_list('date', flat=True)),
+            [date(2025, 9, 1)],
+        )
+
+        application.leave_type = self.sick
+        application.save()
+        self.assertEqual(self._balance(dee), (3, 0, 3))
+        self.assertEqual(leave_balance(dee.id, self.sick.id, self.year.id)['used_days'], 1)
+
+        application.total_days = 9
+        with self.assertRaises(ValidationError):
+            application.save()
+        application.refresh_from_db()
+        self.assertEqual(application.total_days, 1)
+
+        # Accrual never lowers total_days below the days taken, and reports it
+        LeaveBalance.objects.filter(teacher=dee, leave_type=self.casual).update(used_days=5, balance_days=0)
+        summary = LeaveAccrualService(
+            self.college.id, self.year.id, period=PERIOD_MONTHLY, as_of=date(2025, 8, 15)
+        ).run()
+        self.assertEqual(summary['overdrawn'], 1)
+        self.assertEqual(self._balance(dee), (5, 5, 0))
+
+    def test_api_rejects_overdraft_and_looks_up_balances(self):
+        dee = self.teachers[0]
+        LeaveAccrualService(self.college.id, self.year.id).run()
+        LeaveBalance.objects.filter(teacher=dee, leave_type=self.sick).update(used_days=5, balance_days=1)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        headers = {'HTTP_X_COLLEGE_ID': str(self.college.id)}
+
+        response = client.post(reverse('leaveapplication-list'), {
+            'teacher': dee.id, 'leave_type': self.sick.id, 'from_date': '2025-11-03', 'to_date': '2025-11-04',
+            'total_days': 2, 'reason': 'Flu',
+        }, format='json', **headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('total_days', response.data)
+
+        response = client.get(
+            reverse('leavebalance-lookup'), {'teacher': dee.id, 'date': '2025-11-03'}, **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row['leave_type']: row['balance_days'] for row in response.data}, {self.casual.id: 12, self.sick.id: 1}
+        )
+        self.assertEqual(client.get(reverse('leavebalance-lookup'), **headers).status_code, 400)
+
+        response = client.post(
+            reverse('leavebalance-accrue'), {'academic_year': self.year.id, 'dry_run': True}, format='json', **headers,
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['teachers'], response.data['written']), (2, False))
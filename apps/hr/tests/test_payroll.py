@@ -0,0 +1,156 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserType
+from apps.attendance.models import StaffAttendance
+from apps.core.models import College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.hr.models import (
+    Deduction,
+    LeaveApplication,
+    LeaveType,
+    Payroll,
+    PayrollItem,
+    Payslip,
+    SalaryComponent,
+    SalaryStructure,
+)
+from apps.hr.services import PayrollRunService
+from apps.teachers.models import Teacher
+from finance.models import AppExpense, FinanceTransaction
+
+
+class PayrollRunTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="PAY",
+            name="Payroll College",
+            short_name="PAY",
+            email="info@pay.test",
+            phone="9999999988",
+            address_line1="1 Ledger Rd",
+            city="City",
+            state="State",
+            pincode="000016",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.admin = User.objects.create_user(
+            username="pay_admin",
+            email="admin@pay.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+        self.teachers = []
+        for name in ("ana", "bo", "cal"):
+            user = User.objects.create_user(
+                username=f"pay_{name}",
+                email=f"{name}@pay.test",
+                password="dummy-pass",
+                college=self.college,
+                user_type=UserType.TEACHER,
+            )
+            # Teacher users get a profile from the accounts post_save signal
+            self.teachers.append(Teacher.objects.get(user=user))
+        ana, bo, _ = self.teachers
+
+        SalaryStructure.objects.create(
+            teacher=ana, effective_from=date(2024, 4, 1), effective_to=date(2025, 3, 31),
+            basic_salary=15000, gross_salary=25000, is_current=True,
+        )
+        structure = SalaryStructure.objects.create(
+            teacher=ana, effective_from=date(2025, 4, 1), basic_salary=20000, gross_salary=30000,
+        )
+        SalaryComponent.objects.create(
+            structure=structure, component_name="Transport", component_type="allowance", amount=1000,
+        )
+        SalaryComponent.objects.create(
+            structure=structure, component_name="Tax", component_type="deduction", amount=500,
+        )
+        SalaryStructure.objects.create(
+            teacher=bo, effective_from=date(2025, 4, 1), basic_salary=15000, gross_salary=20000,
+        )
+        Deduction.objects.create(
+            college=self.college, name="Provident fund", code="PF", deduction_type="percentage", percentage=10,
+        )
+        Deduction.objects.create(
+            college=self.college, name="Professional tax", code="PT", deduction_type="fixed", amount=200,
+        )
+
+        unpaid = LeaveType.objects.create(
+            college=self.college, name="Leave without pay", code="LWP", max_days_per_year=30, is_paid=False,
+        )
+        LeaveApplication.objects.create(
+            teacher=ana, leave_type=unpaid, from_date=date(2025, 8, 30), to_date=date(2025, 9, 2),
+            total_days=4, reason="Travel", status="approved",
+        )
+        StaffAttendance.objects.create(teacher=ana, date=date(2025, 9, 10), status="absent")
+        StaffAttendance.objects.create(teacher=ana, date=date(2025, 9, 11), status="half_day")
+        StaffAttendance.objects.create(teacher=bo, date=date(2025, 9, 10), status="present")
+
+    def _service(self):
+        return PayrollRunService(self.college.id, 2025, 9, payment_date=date(2025, 9, 30), user=self.admin)
+
+    def test_preview_lock_and_finalize(self):
+        ana, bo, cal = self.teachers
+        preview = self._service().run('preview')
+        self.assertFalse(preview['written'])
+        self.assertEqual(preview['without_structure'], [cal.id])
+        rows = {row['teacher']: row for row in preview['payrolls']}
+        # 2 unpaid leave days in September, 1 absent and 1 half day: 3.5 days of 30000 / 30
+        self.assertEqual(rows[ana.id]['unpaid_days'], Decimal('3.5'))
+        self.assertEqual(
+            (rows[ana.id]['gross_salary'], rows[ana.id]['total_deductions'], rows[ana.id]['net_salary']),
+            (Decimal('31000.00'), Decimal('7200.00'), Decimal('23800.00')),
+        )
+        self.assertEqual(rows[bo.id]['net_salary'], Decimal('17800.00'))
+        self.assertFalse(Payroll.objects.exists())
+
+        self._service().run('lock')
+        locked = self._service().run('lock')
+        self.assertEqual((locked['teachers'], locked['net_total']), (2, Decimal('41600.00')))
+        self.assertEqual(list(Payroll.objects.values_list('status', flat=True).distinct()), ['locked'])
+        self.assertEqual(PayrollItem.objects.filter(payroll__teacher=ana).count(), 5)
+        self.assertEqual(
+            PayrollItem.objects.get(payroll__teacher=ana, component_name="Loss of pay").amount, Decimal('3500.00')
+        )
+
+        finalized = self._service().run('finalize')
+        self.assertEqual(finalized['net_total'], Decimal('41600.00'))
+        self.assertEqual(
+            set(Payroll.objects.values_list('status', 'payment_date')), {('processed', date(2025, 9, 30))}
+        )
+        self.assertEqual(
+            sorted(Payslip.objects.values_list('slip_number', flat=True)),
+            sorted(f"PAY-202509-{teacher.id}" for teacher in (ana, bo)),
+        )
+        expense = AppExpense.objects.get(app_name='hr', month=date(2025, 9, 1))
+        self.assertEqual((expense.amount, expense.transaction_count), (Decimal('41600.00'), 2))
+        self.assertEqual(FinanceTransaction.objects.filter(app='hr').count(), 1)
+
+        # Processed payrolls are never replaced by a later lock
+        relock = self._service().run('lock')
+        self.assertEqual((relock['teachers'], sorted(relock['skipped'])), (0, sorted([ana.id, bo.id])))
+
+    def test_run_endpoint_previews(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post(
+            reverse('payroll-run'),
+            {'year': 2025, 'month': 9},
+            format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['stage'], response.data['teachers']), ('preview', 2))
+        self.assertEqual(client.post(
+            reverse('payroll-run'), {'year': 2025, 'month': 9, 'stage': 'pay'}, format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        ).status_code, 400)
@@ -1,5 +1,9 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
@@ -23,13 +27,17 @@ from .serializers import (
     LeaveApplicationSerializer,
     LeaveApprovalSerializer,
     LeaveBalanceSerializer,
+    LeaveAccrualSerializer,
     SalaryStructureSerializer,
     SalaryComponentSerializer,
     DeductionSerializer,
     PayrollSerializer,
+    PayrollRunSerializer,
     PayrollItemSerializer,
     PayslipSerializer,
 )
+from .leave_ledger import academic_year_for
+from .services import LeaveAccrualService, PayrollRunService
 
 
 class LeaveTypeViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
@@ -69,6 +77,44 @@ class LeaveBalanceViewSet(RelatedCollegeScopedModelViewSet):
     ordering_fields = ['balance_days', 'used_days', 'created_at']
     ordering = ['-balance_days']
 
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """A teacher's balances for the academic year of `?date=` (default today), optionally one `?leave_type=`."""
+        college_id = self.get_college_id(required=True)
+        try:
+            teacher_id = int(request.query_params['teacher'])
+            leave_type_id = request.query_params.get('leave_type')
+            leave_type_id = int(leave_type_id) if leave_type_id else None
+            raw_date = request.query_params.get('date')
+            on_date = parse_date(raw_date) if raw_date else timezone.localdate()
+            if on_date is None:
+                raise ValueError
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'teacher (id) is required; leave_type must be an id and date YYYY-MM-DD.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        balances = self.get_queryset().filter(
+            teacher_id=teacher_id, academic_year_id=academic_year_for(college_id, on_date),
+        )
+        if leave_type_id is not None:
+            balances = balances.filter(leave_type_id=leave_type_id)
+        serializer = LeaveBalanceSerializer(balances, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def accrue(self, request):
+        """Accrue the college's paid leave for an academic year, optionally carrying last year's balances."""
+        college_id = self.get_college_id(required=True)
+        serializer = LeaveAccrualSerializer(data=request.data, context={'college_id': college_id})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        service = LeaveAccrualService(
+            college_id, data['academic_year'], period=data['period'], as_of=data.get('as_of'), user=request.user,
+        )
+        summary = service.run(carry_forward=data['carry_forward'], dry_run=data['dry_run'])
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class SalaryStructureViewSet(RelatedCollegeScopedModelViewSet):
     queryset = SalaryStructure.objects.select_related('teacher')
@@ -107,6 +153,18 @@ class PayrollViewSet(RelatedCollegeScopedModelViewSet):
     ordering_fields = ['year', 'month', 'net_salary', 'created_at']
     ordering = ['-year', '-month']
 
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """Preview, lock or finalize the college's payroll for a month."""
+        college_id = self.get_college_id(required=True)
+        serializer = PayrollRunSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        service = PayrollRunService(
+            college_id, data['year'], data['month'], payment_date=data.get('payment_date'), user=request.user,
+        )
+        return Response(service.run(data['stage']), status=status.HTTP_200_OK)
+
 
 class PayrollItemViewSet(RelatedCollegeScopedModelViewSet):
     queryset = PayrollItem.objects.select_related('payroll', 'payroll__teacher')
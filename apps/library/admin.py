@@ -64,3 +64,4 @@ class LibraryFineAdmin(admin.ModelAdmin):
 class BookReservationAdmin(admin.ModelAdmin):
     list_display = ('book', 'member', 'reservation_date', 'status', 'is_active')
     list_filter = ('status', 'reservation_date', 'is_active')
+    readonly_fields = ('status', 'hold_until')
@@ -0,0 +1,177 @@
+"""
+Book availability and reservation queues.
+
+Book.available_quantity counts the copies on the shelf that any member may
+borrow. It only changes through conditional UPDATEs with F() expressions,
+so concurrent issues and returns can neither lose an update nor push the
+counter outside 0..quantity:
+
+- issuing takes a copy off the shelf, unless the member collects a copy
+  held for their reservation, which is then fulfilled;
+- returning a copy hands it to the head of the book's reservation queue
+  (the oldest pending reservation is approved, i.e. the copy is held for
+  that member) or puts it back on the shelf when nobody is waiting;
+- cancelling an approved reservation passes its held copy on the same way;
+- a copy is held for LIBRARY_RESERVATION_HOLD_DAYS; expire_holds() (run by
+  the daily circulation sweep) expires approved reservations that were not
+  collected in time, or were soft-deleted, and passes their copies on.
+
+Reservation status only changes here: the API and admin expose it
+read-only and deleting a reservation cancels it first.
+
+A book's queue is its pending reservations ordered by reservation date,
+then id. book_availability() answers "availability of these books" for
+the catalogue in three queries, whatever the number of books.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import Book, BookIssue, BookReservation, IssueStatus, ReservationStatus
+
+OPEN_ISSUE_STATUSES = (IssueStatus.ISSUED, IssueStatus.OVERDUE)
+DEFAULT_HOLD_DAYS = 3
+
+
+def hold_days():
+    return getattr(settings, 'LIBRARY_RESERVATION_HOLD_DAYS', DEFAULT_HOLD_DAYS)
+
+
+def take_copy(book_id):
+    """Take one copy off the shelf. Returns False when none is left."""
+    return bool(Book.objects.all_colleges().filter(pk=book_id, available_quantity__gt=0).update(
+        available_quantity=F('available_quantity') - 1, updated_at=timezone.now()
+    ))
+
+
+def put_back_copy(book_id):
+    """Return one copy to the shelf, never above the book's quantity."""
+    return bool(Book.objects.all_colleges().filter(
+        pk=book_id, available_quantity__lt=F('quantity')
+    ).update(available_quantity=F('available_quantity') + 1, updated_at=timezone.now()))
+
+
+def reservation_queue(book_id):
+    """Pending reservations of a book, first in line first."""
+    return BookReservation.objects.filter(
+        book_id=book_id, status=ReservationStatus.PENDING, is_active=True
+    ).order_by('reservation_date', 'id')
+
+
+def _transition(reservation_ids, from_status, to_status, **values):
+    return BookReservation.objects.filter(pk__in=reservation_ids, status=from_status).update(
+        status=to_status, updated_at=timezone.now(), **values
+    )
+
+
+def check_out(issue):
+    """
+    Account for a new issue: fulfil the member's held or pending reservation
+    for the book and take a shelf copy unless one was held for them.
+    Raises ValidationError when no copy is available.
+    """
+    reservations = dict(BookReservation.objects.filter(
+        book_id=issue.book_id,
+        member_id=issue.member_id,
+        status__in=(ReservationStatus.PENDING, ReservationStatus.APPROVED),
+        is_active=True,
+    ).values_list('id', 'status'))
+    held = [pk for pk, status in reservations.items() if status == ReservationStatus.APPROVED]
+    if not (held and _transition(held[:1], ReservationStatus.APPROVED, ReservationStatus.FULFILLED)):
+        if not take_copy(issue.book_id):
+            raise ValidationError(f"No copy of '{issue.book}' is available.")
+    pending = [pk for pk, status in reservations.items() if status == ReservationStatus.PENDING]
+    if pending:
+        _transition(pending, ReservationStatus.PENDING, ReservationStatus.FULFILLED)
+
+
+def pass_on_copy(book_id):
+    """
+    Hold a freed copy for the first reservation in the queue, or shelve it.
+    Returns the approved reservation id, if any.
+    """
+    hold_until = timezone.localdate() + timedelta(days=hold_days())
+    for reservation_id in reservation_queue(book_id).values_list('id', flat=True):
+        # A concurrent return may approve the same head; try the next one
+        if _transition([reservation_id], ReservationStatus.PENDING, ReservationStatus.APPROVED, hold_until=hold_until):
+            return reservation_id
+    put_back_copy(book_id)
+    return None
+
+
+def cancel_reservation(reservation):
+    """Cancel a reservation, passing on the copy it held. Returns the approved successor id."""
+    with transaction.atomic():
+        was_held = _transition([reservation.pk], ReservationStatus.APPROVED, ReservationStatus.CANCELLED)
+        if not was_held:
+            _transition([reservation.pk], ReservationStatus.PENDING, ReservationStatus.CANCELLED)
+        successor = pass_on_copy(reservation.book_id) if was_held else None
+    reservation.refresh_from_db(fields=['status', 'updated_at'])
+    return successor
+
+
+def expire_holds(today=None, college_id=None):
+    """
+    Expire approved reservations whose hold ran out (or that were
+    soft-deleted while holding a copy) and pass each copy on. Returns the
+    number of holds expired.
+    """
+    today = today or timezone.localdate()
+    stale = BookReservation.objects.filter(status=ReservationStatus.APPROVED).filter(
+        Q(is_active=False)
+        | Q(hold_until__lt=today)
+        # Approved before hold_until existed
+        | Q(hold_until__isnull=True, updated_at__date__lt=today - timedelta(days=hold_days()))
+    )
+    if college_id:
+        stale = stale.filter(book__college_id=college_id)
+    expired = 0
+    for reservation_id, book_id in stale.values_list('id', 'book_id'):
+        with transaction.atomic():
+            if _transition([reservation_id], ReservationStatus.APPROVED, ReservationStatus.EXPIRED):
+                pass_on_copy(book_id)
+                expired += 1
+    return expired
+
+
+def book_availability(book_ids, books=None):
+    """
+    {book_id: availability} for the given books: shelf copies, total copies,
+    queue length, copies held for reservations and the earliest due date of
+    the copies on loan. `books` narrows the lookup, e.g. to a college.
+    """
+    books = Book.objects.all_colleges() if books is None else books
+    availability = {
+        row['id']: {
+            'book': row['id'],
+            'quantity': row['quantity'],
+            'available': row['available_quantity'],
+            'queue_length': 0,
+            'held': 0,
+            'next_due_date': None,
+        }
+        for row in books.filter(pk__in=list(book_ids)).values(
+            'id', 'quantity', 'available_quantity'
+        )
+    }
+    if not availability:
+        return availability
+    reservations = BookReservation.objects.filter(
+        book_id__in=availability, is_active=True,
+        status__in=(ReservationStatus.PENDING, ReservationStatus.APPROVED),
+    ).values('book_id').annotate(
+        waiting=Count('id', filter=Q(status=ReservationStatus.PENDING)),
+        held=Count('id', filter=Q(status=ReservationStatus.APPROVED)),
+    ).order_by()
+    for row in reservations:
+        availability[row['book_id']].update(queue_length=row['waiting'], held=row['held'])
+    loans = BookIssue.objects.filter(
+        book_id__in=availability, status__in=OPEN_ISSUE_STATUSES, return_date__isnull=True, is_active=True,
+    ).values('book_id').annotate(next_due_date=Min('due_date')).order_by()
+    for row in loans:
+        availability[row['book_id']]['next_due_date'] = row['next_due_date']
+    return availability
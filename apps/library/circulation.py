@@ -0,0 +1,215 @@
+"""
+Daily library circulation sweep.
+
+CirculationSweep replaces per-issue reminder tasks with one daily batch:
+
+1. one range query over the indexed due_date/status columns selects every
+   open issue that is overdue or due within the reminder window;
+2. overdue fines are computed per member type (LIBRARY_FINE_PER_DAY) and
+   upserted: one unpaid LibraryFine per issue holds the fine accrued so far,
+   less anything already paid;
+3. one UPDATE flips issues past their due date to overdue;
+4. reminders (due in 3 days, due tomorrow, first day overdue) are queued
+   as one BulkMessage per college with a MessageLog row per recipient;
+5. reservation holds that were not collected in time expire and their
+   copies go to the next member in line.
+
+Running the sweep twice on the same day refreshes fines but does not send
+reminders again.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from apps.communication.models import BulkMessage, MessageLog
+
+from .availability import expire_holds
+from .models import BookIssue, IssueStatus, LibraryFine, MemberType
+
+DEFAULT_FINE_PER_DAY = {
+    MemberType.STUDENT: Decimal('5.00'),
+    MemberType.TEACHER: Decimal('5.00'),
+}
+STAGE_DUE_IN_3_DAYS = 'due_in_3_days'
+STAGE_DUE_TOMORROW = 'due_tomorrow'
+STAGE_OVERDUE = 'overdue'
+# Days relative to the due date on which each reminder goes out
+REMINDER_STAGES = {-3: STAGE_DUE_IN_3_DAYS, -1: STAGE_DUE_TOMORROW, 1: STAGE_OVERDUE}
+REMINDER_MESSAGE_TYPE = 'Email'
+REMINDER_TITLE = 'Library reminders {date}'
+OPEN_STATUSES = (IssueStatus.ISSUED, IssueStatus.OVERDUE)
+
+
+def fine_per_day(member_type):
+    """Daily late fine for a member type, from LIBRARY_FINE_PER_DAY."""
+    rates = {**DEFAULT_FINE_PER_DAY, **getattr(settings, 'LIBRARY_FINE_PER_DAY', {})}
+    return Decimal(str(rates.get(member_type, DEFAULT_FINE_PER_DAY[MemberType.STUDENT])))
+
+
+def late_fine(member_type, due_date, on_date):
+    """Fine for returning (or still holding) a book on `on_date`."""
+    days_late = (on_date - due_date).days
+    return fine_per_day(member_type) * days_late if days_late > 0 else Decimal('0.00')
+
+
+def reminder_message(stage, title, due_date):
+    return {
+        STAGE_DUE_IN_3_DAYS: f"Reminder: '{title}' is due on {due_date} (3 days left).",
+        STAGE_DUE_TOMORROW: f"Reminder: '{title}' is due tomorrow ({due_date}).",
+        STAGE_OVERDUE: f"Overdue: '{title}' was due on {due_date}. Please return immediately.",
+    }[stage]
+
+
+class CirculationSweep:
+    """Fines, overdue flags and reminders for all open book issues."""
+
+    def __init__(self, today=None, college_id=None, user=None):
+        self.today = today or timezone.localdate()
+        self.college_id = college_id
+        self.user = user
+
+    def open_issues(self):
+        """Open issues due on or before the furthest reminder date."""
+        queryset = BookIssue.objects.filter(
+            status__in=OPEN_STATUSES,
+            return_date__isnull=True,
+            is_active=True,
+            due_date__lte=self.today - timedelta(days=min(REMINDER_STAGES)),
+        )
+        if self.college_id:
+            queryset = queryset.filter(book__college_id=self.college_id)
+        return queryset
+
+    def _rows(self):
+        return list(self.open_issues().values(
+            'id', 'due_date', 'member_id', 'member__member_type', 'book__college_id', 'book__title',
+            'member__student__user_id', 'member__student__user__email',
+            'member__teacher__user_id', 'member__teacher__user__email',
+        ).order_by('due_date', 'id'))
+
+    def update_fines(self, overdue):
+        """Upsert one unpaid accrued fine per overdue issue. Returns (created, updated)."""
+        if not overdue:
+            return 0, 0
+        existing = {
+            row['book_issue_id']: row
+            for row in LibraryFine.objects.filter(
+                book_issue_id__in=[row['id'] for row in overdue], is_active=True
+            ).values('book_issue_id').annotate(
+                paid=Sum('amount', filter=Q(is_paid=True)),
+                open_id=Max('id', filter=Q(is_paid=False)),
+            ).order_by()
+        }
+        open_fines = LibraryFine.objects.in_bulk(
+            [row['open_id'] for row in existing.values() if row['open_id']]
+        )
+        now = timezone.now()
+        to_create, to_update = [], []
+        for row in overdue:
+            accrued = late_fine(row['member__member_type'], row['due_date'], self.today)
+            fines = existing.get(row['id'], {})
+            amount = accrued - (fines.get('paid') or Decimal('0.00'))
+            reason = f"Overdue fine for '{row['book__title']}' ({(self.today - row['due_date']).days} days)"
+            fine = open_fines.get(fines.get('open_id'))
+            if fine is not None:
+                fine.amount, fine.reason, fine.fine_date = max(amount, Decimal('0.00')), reason, self.today
+                fine.updated_by, fine.updated_at = self.user, now
+                to_update.append(fine)
+            elif amount > 0:
+                to_create.append(LibraryFine(
+                    member_id=row['member_id'],
+                    book_issue_id=row['id'],
+                    amount=amount,
+                    reason=reason,
+                    fine_date=self.today,
+                    created_by=self.user,
+                    updated_by=self.user,
+                ))
+        LibraryFine.objects.bulk_create(to_create, batch_size=1000)
+        LibraryFine.objects.bulk_update(
+            to_update, ['amount', 'reason', 'fine_date', 'updated_by', 'updated_at'], batch_size=1000
+        )
+        return len(to_create), len(to_update)
+
+    def mark_overdue(self):
+        return self.open_issues().filter(status=IssueStatus.ISSUED, due_date__lt=self.today).update(
+            status=IssueStatus.OVERDUE, updated_by=self.user, updated_at=timezone.now()
+        )
+
+    def queue_reminders(self, rows):
+        """One BulkMessage per college with a MessageLog per reminder. Returns reminders queued."""
+        title = REMINDER_TITLE.format(date=self.today)
+        by_college = defaultdict(list)
+        for row in rows:
+            stage = REMINDER_STAGES.get((self.today - row['due_date']).days)
+            user_id = row['member__student__user_id'] or row['member__teacher__user_id']
+            if stage and user_id:
+                by_college[row['book__college_id']].append((row, stage, user_id))
+        if not by_college:
+            return 0
+
+        already_sent = set(BulkMessage.objects.all_colleges().filter(
+            college_id__in=by_college, title=title
+        ).values_list('college_id', flat=True))
+        queued = 0
+        for college_id, reminders in by_college.items():
+            if college_id in already_sent:
+                continue
+            # bulk_create skips the post_save hook, so processing starts only
+            # once every log row exists
+            bulk, = BulkMessage.objects.all_colleges().bulk_create([BulkMessage(
+                college_id=college_id,
+                title=title,
+                message_type=REMINDER_MESSAGE_TYPE,
+                recipient_type='library_members',
+                total_recipients=len(reminders),
+                status='queued',
+                created_by=self.user,
+                updated_by=self.user,
+            )])
+            MessageLog.objects.bulk_create([
+                MessageLog(
+                    bulk_message=bulk,
+                    recipient_id=user_id,
+                    message_type=REMINDER_MESSAGE_TYPE,
+                    phone_email=row['member__student__user__email'] or row['member__teacher__user__email'] or '',
+                    message=reminder_message(stage, row['book__title'], row['due_date']),
+                    created_by=self.user,
+                    updated_by=self.user,
+                )
+                for row, stage, user_id in reminders
+            ], batch_size=1000)
+            transaction.on_commit(lambda bulk=bulk: _release(bulk))
+            queued += len(reminders)
+        return queued
+
+    def run(self):
+        """Run the sweep in one transaction. Returns a summary dict."""
+        with transaction.atomic():
+            rows = self._rows()
+            overdue = [row for row in rows if row['due_date'] < self.today]
+            fines_created, fines_updated = self.update_fines(overdue)
+            marked = self.mark_overdue()
+            reminders = self.queue_reminders(rows)
+            holds_expired = expire_holds(self.today, self.college_id)
+        return {
+            'date': self.today,
+            'open_issues': len(rows),
+            'overdue': len(overdue),
+            'marked_overdue': marked,
+            'fines_created': fines_created,
+            'fines_updated': fines_updated,
+            'reminders_queued': reminders,
+            'holds_expired': holds_expired,
+        }
+
+
+def _release(bulk):
+    """Hand a queued reminder batch to the bulk message pipeline."""
+    bulk.status = 'pending'
+    bulk.save(update_fields=['status', 'updated_at'])
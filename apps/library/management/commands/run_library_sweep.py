@@ -0,0 +1,27 @@
+"""
+Management command for the daily library circulation sweep.
+
+Run it once a day from cron: it computes overdue fines, flags overdue
+issues and queues due date reminders for all open book issues.
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.library.circulation import CirculationSweep
+
+
+class Command(BaseCommand):
+    help = 'Compute overdue fines, mark overdue issues and queue due date reminders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--college', type=int, help='Limit to one college ID')
+        parser.add_argument('--date', type=date.fromisoformat, help='Run as of this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        summary = CirculationSweep(today=options.get('date'), college_id=options.get('college')).run()
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['open_issues']} open issues, {summary['marked_overdue']} marked overdue, "
+            f"{summary['fines_created']} fines created, {summary['fines_updated']} updated, "
+            f"{summary['reminders_queued']} reminders queued, {summary['holds_expired']} reservation holds expired"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookreservation',
+            name='hold_until',
+            field=models.DateField(blank=True, help_text="Last day an approved reservation's copy is held", null=True),
+        ),
+        migrations.AlterField(
+            model_name='bookreservation',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('fulfilled', 'Fulfilled'), ('expired', 'Expired')], default='pending', help_text='Status', max_length=20),
+        ),
+    ]
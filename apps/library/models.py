@@ -29,6 +29,7 @@ class ReservationStatus(models.TextChoices):
     APPROVED = 'approved', 'Approved'
     CANCELLED = 'cancelled', 'Cancelled'
     FULFILLED = 'fulfilled', 'Fulfilled'
+    EXPIRED = 'expired', 'Expired'
 
 
 class BookCategory(CollegeScopedModel):
@@ -335,6 +336,11 @@ class BookReservation(AuditModel):
         default=ReservationStatus.PENDING,
         help_text="Status"
     )
+    hold_until = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Last day an approved reservation's copy is held"
+    )
     remarks = models.TextField(null=True, blank=True, help_text="Remarks")
 
     class Meta:
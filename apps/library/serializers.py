@@ -3,6 +3,8 @@ DRF Serializers for Library app models.
 """
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 
 from .models import (
     BookCategory,
@@ -13,6 +15,7 @@ from .models import (
     BookReturn,
     LibraryFine,
     BookReservation,
+    IssueStatus,
 )
 from apps.core.serializers import UserBasicSerializer, TenantAuditMixin
 
@@ -78,6 +81,16 @@ class BookSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
 
 
+class BookAvailabilitySerializer(serializers.Serializer):
+    """Live availability of a book for the catalogue."""
+    book = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    available = serializers.IntegerField(help_text="Copies on the shelf")
+    queue_length = serializers.IntegerField(help_text="Pending reservations")
+    held = serializers.IntegerField(help_text="Copies held for approved reservations")
+    next_due_date = serializers.DateField(allow_null=True, help_text="Earliest due date of copies on loan")
+
+
 # ============================================================================
 # LIBRARY MEMBER SERIALIZERS
 # ============================================================================
@@ -198,6 +211,14 @@ class BookIssueSerializer(TenantAuditMixin, serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
 
+    def create(self, validated_data):
+        # The issue signal takes the copy; roll the issue back when none is left
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({'book': exc.messages})
+
 
 # ============================================================================
 # BOOK RETURN SERIALIZERS
@@ -226,6 +247,12 @@ class BookReturnSerializer(TenantAuditMixin, serializers.ModelSerializer):
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
 
+    def validate(self, attrs):
+        issue = attrs.get('issue')
+        if self.instance is None and issue is not None and issue.status == IssueStatus.RETURNED:
+            raise serializers.ValidationError({'issue': 'This issue has already been returned.'})
+        return attrs
+
 
 # ============================================================================
 # LIBRARY FINE SERIALIZERS
@@ -309,12 +336,13 @@ class BookReservationSerializer(TenantAuditMixin, serializers.ModelSerializer):
         fields = [
             'id', 'book', 'book_title', 'member', 'member_id',
             'student_name', 'teacher_name', 'reservation_date',
-            'status', 'status_display', 'remarks',
+            'status', 'status_display', 'hold_until', 'remarks',
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
+        # Status moves only through issue/return/cancel, which hand held copies on
         read_only_fields = [
             'id', 'book_title', 'member_id', 'student_name',
-            'teacher_name', 'status_display',
+            'teacher_name', 'status', 'status_display', 'hold_until',
             'created_by', 'updated_by', 'created_at', 'updated_at'
         ]
 
@@ -1,57 +1,56 @@
 """
 Signals for Library app.
-Handles inventory updates, fines, and reminder scheduling.
+Handles inventory updates and fines. Copy counts and reservation queues
+are kept by availability.py; due date reminders and overdue fines are
+handled by the daily circulation sweep (circulation.py).
 """
 from decimal import Decimal
-from django.db.models.signals import post_save
+from django.db.models import Sum
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import BookIssue, BookReturn, LibraryFine, IssueStatus
-from .tasks import schedule_due_date_reminders
-
-
-def _adjust_book_availability(book, delta):
-    """
-    Increment or decrement the available_quantity safely.
-    """
-    if not book:
-        return
-    book.available_quantity = max(0, min(book.quantity, book.available_quantity + delta))
-    book.save(update_fields=['available_quantity', 'updated_at'])
+from .availability import cancel_reservation, check_out, pass_on_copy
+from .circulation import late_fine
+from .models import BookIssue, BookReservation, BookReturn, LibraryFine, IssueStatus
 
 
 @receiver(post_save, sender=BookIssue)
 def handle_book_issue(sender, instance, created, **kwargs):
     """
     On new issue:
-    - Reduce available copies
+    - Take a copy off the shelf or collect the member's held reservation
+      (raises ValidationError when no copy is available)
     - Send notification placeholder
-    - Schedule due date reminders
     """
     if not created:
         return
 
-    _adjust_book_availability(instance.book, delta=-1)
+    check_out(instance)
 
     # Notification placeholder
     print(f"[Library] Book '{instance.book}' issued to {instance.member} (due {instance.due_date}).")
 
-    # Schedule reminders (Celery if available, sync fallback otherwise)
-    schedule_due_date_reminders(instance.id)
-
 
 @receiver(post_save, sender=BookReturn)
 def handle_book_return(sender, instance, created, **kwargs):
     """
     On return:
-    - Increase available copies
+    - Hold the copy for the next reservation in line, or shelve it
     - Calculate fines (late + damage)
     - Update issue status and return date
     """
     issue = instance.issue
 
     if created:
-        _adjust_book_availability(issue.book, delta=1)
+        # Only the return that takes the issue off loan passes its copy on, so
+        # a second return of the same issue cannot shelve a copy twice
+        returned = BookIssue.objects.filter(
+            pk=issue.pk, status__in=[IssueStatus.ISSUED, IssueStatus.OVERDUE]
+        ).update(status=IssueStatus.RETURNED, return_date=instance.return_date, updated_at=timezone.now())
+        if returned:
+            issue.status, issue.return_date = IssueStatus.RETURNED, instance.return_date
+            pass_on_copy(issue.book_id)
 
     # Update issue status/return date
     if issue:
@@ -65,30 +64,39 @@ def handle_book_return(sender, instance, created, **kwargs):
         if updated_fields:
             issue.save(update_fields=updated_fields + ['updated_at'])
 
-    # Compute fine
+    # Compute fine; the sweep's accrued overdue fine for the issue is
+    # settled into the same unpaid fine row
     fine_total = Decimal(instance.fine_amount or 0) + Decimal(instance.damage_charges or 0)
-    if issue and issue.due_date and instance.return_date and instance.return_date > issue.due_date:
-        days_late = (instance.return_date - issue.due_date).days
-        fine_total += Decimal(days_late) * Decimal('5.00')  # basic per-day fine
+    if issue and issue.due_date and instance.return_date:
+        fine_total += late_fine(issue.member.member_type, issue.due_date, instance.return_date)
 
-    if fine_total > 0 and issue:
-        fine, created_fine = LibraryFine.objects.get_or_create(
-            member=issue.member,
-            book_issue=issue,
-            fine_date=instance.return_date,
-            defaults={
-                'amount': fine_total,
-                'reason': f"Late return fine for '{issue.book}'",
-                'remarks': instance.remarks,
-                'created_by': instance.created_by,
-                'updated_by': instance.updated_by,
-            },
-        )
-        if not created_fine and fine.amount != fine_total:
-            fine.amount = fine_total
+    if issue:
+        fines = LibraryFine.objects.filter(book_issue=issue, is_active=True)
+        fine_total -= fines.filter(is_paid=True).aggregate(paid=Sum('amount'))['paid'] or 0
+        fine = fines.filter(is_paid=False).order_by('-id').first()
+        if fine is None and fine_total > 0:
+            LibraryFine.objects.create(
+                member=issue.member,
+                book_issue=issue,
+                fine_date=instance.return_date,
+                amount=fine_total,
+                reason=f"Late return fine for '{issue.book}'",
+                remarks=instance.remarks,
+                created_by=instance.created_by,
+                updated_by=instance.updated_by,
+            )
+        elif fine is not None and fine.amount != max(fine_total, 0):
+            fine.amount = max(fine_total, 0)
+            fine.fine_date = instance.return_date
             fine.reason = f"Late/damage fine for '{issue.book}'"
             fine.remarks = instance.remarks
-            fine.save(update_fields=['amount', 'reason', 'remarks', 'updated_at'])
+            fine.save(update_fields=['amount', 'fine_date', 'reason', 'remarks', 'updated_at'])
 
     # Placeholder for notifying member about return processing
     print(f"[Library] Return processed for {issue.book} from {issue.member} on {instance.return_date}.")
+
+
+@receiver(pre_delete, sender=BookReservation)
+def handle_reservation_delete(sender, instance, **kwargs):
+    """Deleting a reservation cancels it first, so a copy it held is passed on."""
+    cancel_reservation(instance)
@@ -1,12 +1,8 @@
 """
-Celery tasks and scheduling helpers for library due date reminders.
+Celery tasks for library circulation.
 Includes a safe fallback when Celery is not installed.
 """
-from datetime import datetime, timedelta
-
-from django.utils import timezone
-
-from .models import BookIssue
+from .circulation import CirculationSweep
 
 try:
     from celery import shared_task  # type: ignore
@@ -34,57 +30,12 @@ except ImportError:  # pragma: no cover - fallback when Celery is not available
 
 
 @shared_task
-def send_due_date_reminder(issue_id, stage):
+def run_circulation_sweep(college_id=None):
     """
-    Send reminder for a book issue based on stage.
-    Stages: due_in_3_days, due_tomorrow, overdue
+    Daily circulation sweep: overdue fines and statuses, and due date
+    reminders for every open issue, in one batch. Schedule it once a day
+    (Celery beat or the run_library_sweep management command from cron).
     """
-    try:
-        issue = BookIssue.objects.select_related('book', 'member').get(pk=issue_id)
-    except BookIssue.DoesNotExist:
-        return f"Issue {issue_id} not found"
-
-    message_map = {
-        'due_in_3_days': f"Reminder: '{issue.book}' is due on {issue.due_date} (3 days left).",
-        'due_tomorrow': f"Reminder: '{issue.book}' is due tomorrow ({issue.due_date}).",
-        'overdue': f"Overdue: '{issue.book}' was due on {issue.due_date}. Please return immediately.",
-    }
-    message = message_map.get(stage, f"Reminder for issue {issue_id} ({stage}).")
-
-    # Placeholder - integrate with notification system
-    print(f"[LibraryReminder] {message} -> Member {issue.member}")
-    return message
-
-
-def _eta_from_offset(due_date, days_offset):
-    target_date = due_date + timedelta(days=days_offset)
-    target_dt = datetime.combine(target_date, datetime.min.time())
-    if timezone.is_naive(target_dt):
-        target_dt = timezone.make_aware(target_dt, timezone.get_current_timezone())
-    return target_dt
-
-
-def schedule_due_date_reminders(issue_id):
-    """
-    Schedule reminders at -3 days, -1 day, and +1 day relative to due date.
-    Falls back to synchronous execution if Celery is unavailable.
-    """
-    try:
-        issue = BookIssue.objects.get(pk=issue_id)
-    except BookIssue.DoesNotExist:
-        return
-
-    schedule = [
-        (-3, 'due_in_3_days'),
-        (-1, 'due_tomorrow'),
-        (1, 'overdue'),  # 1 day after due date
-    ]
-    for days_offset, stage in schedule:
-        eta = _eta_from_offset(issue.due_date, days_offset)
-        apply_async = getattr(send_due_date_reminder, 'apply_async', None)
-        if callable(apply_async):
-            apply_async(args=[issue.id, stage], eta=eta)
-        else:
-            # Fallback: run immediately if target time already passed
-            if eta.date() <= timezone.now().date():
-                send_due_date_reminder(issue.id, stage)
+    summary = CirculationSweep(college_id=college_id).run()
+    summary['date'] = summary['date'].isoformat()
+    return summary
@@ -0,0 +1,220 @@
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserType
+from apps.core.models import College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.library.availability import book_availability, expire_holds
+from apps.library.models import (
+    Book,
+    BookCategory,
+    BookIssue,
+    BookReservation,
+    BookReturn,
+    LibraryMember,
+    MemberType,
+    ReservationStatus,
+)
+from apps.teachers.models import Teacher
+
+
+class BookAvailabilityTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="AVL",
+            name="Availability College",
+            short_name="AVL",
+            email="info@avl.test",
+            phone="9999999990",
+            address_line1="1 Shelf Rd",
+            city="City",
+            state="State",
+            pincode="000014",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        category = BookCategory.objects.create(college=self.college, name="Science", code="SCI")
+        self.book = Book.objects.create(
+            college=self.college, category=category, title="Optics", author="Huygens", quantity=1,
+        )
+        self.other_book = Book.objects.create(
+            college=self.college, category=category, title="Mechanics", author="Newton", quantity=3,
+        )
+        self.users = {}
+        self.members = {}
+        for name in ("ada", "ben", "cy"):
+            self.users[name] = User.objects.create_user(
+                username=f"avl_{name}",
+                email=f"{name}@avl.test",
+                password="dummy-pass",
+                college=self.college,
+                user_type=UserType.TEACHER,
+            )
+            # Teacher users get a profile from the accounts post_save signal
+            self.members[name] = LibraryMember.objects.create(
+                college=self.college, member_type=MemberType.TEACHER,
+                teacher=Teacher.objects.get(user=self.users[name]),
+                member_id=f"AVL-{name.upper()}", joining_date=date(2025, 6, 2),
+            )
+
+    def _issue(self, book, name):
+        return BookIssue.objects.create(
+            book=book, member=self.members[name], issue_date=date(2026, 3, 1), due_date=date(2026, 3, 15),
+        )
+
+    def _reserve(self, name, day):
+        return BookReservation.objects.create(
+            book=self.book, member=self.members[name], reservation_date=date(2026, 3, day),
+        )
+
+    def _available(self, book):
+        return Book.objects.values_list('available_quantity', flat=True).get(pk=book.pk)
+
+    def test_returned_copy_goes_to_the_head_of_the_queue(self):
+        issue = self._issue(self.book, "ada")
+        self.assertEqual(self._available(self.book), 0)
+        with self.assertRaises(ValidationError):
+            self._issue(self.book, "ben")
+
+        cy = self._reserve("cy", 3)
+        ben = self._reserve("ben", 2)
+        BookReturn.objects.create(issue=issue, return_date=date(2026, 3, 10))
+
+        # The copy is held for ben, first in line, instead of going back on the shelf
+        ben.refresh_from_db()
+        self.assertEqual(ben.status, ReservationStatus.APPROVED)
+        self.assertEqual(self._available(self.book), 0)
+        with self.assertRaises(ValidationError):
+            self._issue(self.book, "cy")
+
+        self._issue(self.book, "ben")
+        ben.refresh_from_db()
+        cy.refresh_from_db()
+        self.assertEqual((ben.status, cy.status), (ReservationStatus.FULFILLED, ReservationStatus.PENDING))
+        self.assertEqual(self._available(self.book), 0)
+
+        # Returning the same issue again passes no phantom copy on
+        BookReturn.objects.create(issue=issue, return_date=date(2026, 3, 11))
+        cy.refresh_from_db()
+        self.assertEqual((cy.status, self._available(self.book)), (ReservationStatus.PENDING, 0))
+
+    def test_bulk_availability_lookup(self):
+        self._issue(self.book, "ada")
+        self._issue(self.other_book, "ben")
+        self._reserve("cy", 4)
+
+        with self.assertNumQueries(3):
+            availability = book_availability([self.book.id, self.other_book.id, 0])
+
+        self.assertEqual(set(availability), {self.book.id, self.other_book.id})
+        self.assertEqual(availability[self.book.id], {
+            'book': self.book.id, 'quantity': 1, 'available': 0,
+            'queue_length': 1, 'held': 0, 'next_due_date': date(2026, 3, 15),
+        })
+        self.assertEqual(
+            (availability[self.other_book.id]['available'], availability[self.other_book.id]['queue_length']),
+            (2, 0),
+        )
+
+    def test_api_rejects_unavailable_issue_and_cancel_passes_on_held_copy(self):
+        admin = User.objects.create_user(
+            username="avl_admin",
+            email="admin@avl.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        headers = {'HTTP_X_COLLEGE_ID': str(self.college.id)}
+
+        issue = self._issue(self.book, "ada")
+        response = client.post(
+            reverse('bookissue-list'),
+            {'book': self.book.id, 'member': self.members["ben"].id,
+             'issue_date': '2026-03-02', 'due_date': '2026-03-16'},
+            format='json',
+            **headers,
+        )
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertIn('book', response.data)
+        self.assertEqual(BookIssue.objects.count(), 1)
+
+        ben = self._reserve("ben", 2)
+        cy = self._reserve("cy", 3)
+        BookReturn.objects.create(issue=issue, return_date=date(2026, 3, 10))
+        response = client.get(reverse('book-queue', args=[self.book.id]), **headers)
+        self.assertEqual([(row['id'], row['position']) for row in response.data], [(cy.id, 1)])
+
+        response = client.post(reverse('bookreservation-cancel', args=[ben.id]), **headers)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['status'], response.data['passed_to']), (ReservationStatus.CANCELLED, cy.id))
+
+        response = client.get(
+            reverse('book-availability'), {'ids': f'{self.book.id},{self.other_book.id}'}, **headers
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = {row['book']: row for row in response.data}
+        self.assertEqual((rows[self.book.id]['available'], rows[self.book.id]['held']), (0, 1))
+        self.assertEqual(rows[self.other_book.id]['available'], 3)
+
+        response = client.post(
+            reverse('bookreturn-list'), {'issue': issue.id, 'return_date': '2026-03-12'}, format='json', **headers,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('issue', response.data)
+        self.assertEqual(client.get(reverse('book-availability'), {'ids': 'x'}, **headers).status_code, 400)
+
+    def test_reservation_status_is_read_only_and_delete_passes_on_held_copy(self):
+        admin = User.objects.create_user(
+            username="avl_admin", email="admin@avl.test", password="dummy-pass",
+            college=self.college, user_type=UserType.COLLEGE_ADMIN,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        headers = {'HTTP_X_COLLEGE_ID': str(self.college.id)}
+
+        issue = self._issue(self.book, "ada")
+        ben = self._reserve("ben", 2)
+        cy = self._reserve("cy", 3)
+        BookReturn.objects.create(issue=issue, return_date=date(2026, 3, 10))
+        ben.refresh_from_db()
+        self.assertEqual(ben.status, ReservationStatus.APPROVED)
+
+        response = client.patch(
+            reverse('bookreservation-detail', args=[ben.id]), {'status': 'cancelled'}, format='json', **headers
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        ben.refresh_from_db()
+        self.assertEqual(ben.status, ReservationStatus.APPROVED)
+
+        response = client.delete(reverse('bookreservation-detail', args=[ben.id]), **headers)
+        self.assertEqual(response.status_code, 204)
+        set_current_college_id(self.college.id)
+        cy.refresh_from_db()
+        self.assertEqual(cy.status, ReservationStatus.APPROVED)
+        self.assertEqual(self._available(self.book), 0)
+
+    def test_uncollected_and_soft_deleted_holds_expire(self):
+        issue = self._issue(self.book, "ada")
+        ben = self._reserve("ben", 2)
+        cy = self._reserve("cy", 3)
+        BookReturn.objects.create(issue=issue, return_date=date(2026, 3, 10))
+        ben.refresh_from_db()
+        self.assertIsNotNone(ben.hold_until)
+
+        self.assertEqual(expire_holds(today=ben.hold_until), 0)
+        self.assertEqual(expire_holds(today=ben.hold_until + timedelta(days=1)), 1)
+        ben.refresh_from_db()
+        cy.refresh_from_db()
+        self.assertEqual((ben.status, cy.status), (ReservationStatus.EXPIRED, ReservationStatus.APPROVED))
+
+        cy.soft_delete()
+        self.assertEqual(expire_holds(), 1)
+        self.assertEqual(self._available(self.book), 1)
@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from apps.academic.models import Faculty, Program
+from apps.accounts.models import User, UserType
+from apps.communication.models import BulkMessage, MessageLog
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.library.circulation import CirculationSweep
+from apps.library.models import (
+    Book,
+    BookCategory,
+    BookIssue,
+    BookReturn,
+    IssueStatus,
+    LibraryFine,
+    LibraryMember,
+    MemberType,
+)
+from apps.students.models import Student
+from apps.teachers.models import Teacher
+
+TODAY = date(2026, 3, 10)
+
+
+@override_settings(LIBRARY_FINE_PER_DAY={MemberType.TEACHER: '2.00'})
+class CirculationSweepTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="CIR",
+            name="Circulation College",
+            short_name="CIR",
+            email="info@cir.test",
+            phone="9999999991",
+            address_line1="1 Stack Rd",
+            city="City",
+            state="State",
+            pincode="000013",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        student_user = User.objects.create_user(
+            username="cir_student",
+            email="student@cir.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        student = Student.objects.create(
+            user=student_user,
+            college=self.college,
+            admission_number="CIR-001",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number="CIR-REG-001",
+            program=program,
+            academic_year=year,
+            first_name="Stu",
+            last_name="Dent",
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email="student@cir.test",
+        )
+        teacher_user = User.objects.create_user(
+            username="cir_teacher",
+            email="teacher@cir.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.TEACHER,
+        )
+        # Teacher users get a profile from the accounts post_save signal
+        teacher = Teacher.objects.get(user=teacher_user)
+        category = BookCategory.objects.create(college=self.college, name="Science", code="SCI")
+        self.book = Book.objects.create(
+            college=self.college, category=category, title="Optics", author="Huygens", quantity=10,
+        )
+        self.student_member = LibraryMember.objects.create(
+            college=self.college, member_type=MemberType.STUDENT, student=student,
+            member_id="CIR-STU", joining_date=date(2025, 6, 2),
+        )
+        self.teacher_member = LibraryMember.objects.create(
+            college=self.college, member_type=MemberType.TEACHER, teacher=teacher,
+            member_id="CIR-TEA", joining_date=date(2025, 6, 2),
+        )
+
+    def _issue(self, member, due_in):
+        due_date = TODAY + timedelta(days=due_in)
+        return BookIssue.objects.create(
+            book=self.book, member=member, issue_date=due_date - timedelta(days=14), due_date=due_date,
+        )
+
+    def _run(self, today=TODAY):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CirculationSweep(today=today).run()
+
+    def test_sweep_fines_flags_and_queues_reminders(self):
+        late = self._issue(self.student_member, -4)
+        teacher_late = self._issue(self.teacher_member, -1)
+        due_soon = self._issue(self.student_member, 3)
+        due_tomorrow = self._issue(self.student_member, 1)
+        later = self._issue(self.student_member, 10)
+
+        # Reminder delivery runs on commit, outside the sweep's own queries
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(10):
+                summary = CirculationSweep(today=TODAY).run()
+
+        self.assertEqual(
+            (summary['open_issues'], summary['overdue'], summary['marked_overdue']), (4, 2, 2)
+        )
+        self.assertEqual((summary['fines_created'], summary['reminders_queued']), (2, 3))
+        statuses = dict(BookIssue.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[late.id], IssueStatus.OVERDUE)
+        self.assertEqual(statuses[due_soon.id], IssueStatus.ISSUED)
+        self.assertEqual(statuses[later.id], IssueStatus.ISSUED)
+        fines = dict(LibraryFine.objects.values_list('book_issue_id', 'amount'))
+        self.assertEqual(fines, {late.id: Decimal('20.00'), teacher_late.id: Decimal('2.00')})
+
+        bulk = BulkMessage.objects.get()
+        self.assertEqual(bulk.status, 'completed')
+        self.assertEqual(bulk.sent_count, 3)
+        messages = list(MessageLog.objects.order_by('message').values_list('message', flat=True))
+        self.assertIn(f"Reminder: 'Optics' is due tomorrow ({due_tomorrow.due_date}).", messages)
+        self.assertIn(f"Overdue: 'Optics' was due on {teacher_late.due_date}. Please return immediately.", messages)
+
+        # Re-running the same day sends nothing new
+        self.assertEqual(self._run()['reminders_queued'], 0)
+        self.assertEqual(BulkMessage.objects.count(), 1)
+
+    def test_fines_accrue_into_one_row_settled_on_return(self):
+        late = self._issue(self.student_member, -2)
+        self._run()
+        self._run(TODAY + timedelta(days=1))
+        fine = LibraryFine.objects.get(book_issue=late)
+        self.assertEqual((fine.amount, fine.fine_date), (Decimal('15.00'), TODAY + timedelta(days=1)))
+
+        fine.is_paid = True
+        fine.save()
+        self._run(TODAY + timedelta(days=2))
+        self.assertEqual(
+            list(LibraryFine.objects.filter(book_issue=late, is_paid=False).values_list('amount', flat=True)),
+            [Decimal('5.00')],
+        )
+
+        BookReturn.objects.create(issue=late, return_date=TODAY + timedelta(days=3))
+        self.assertEqual(
+            list(LibraryFine.objects.filter(book_issue=late).order_by('id').values_list('amount', flat=True)),
+            [Decimal('15.00'), Decimal('10.00')],
+        )
@@ -1,9 +1,12 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
 from apps.core.mixins import CollegeScopedMixin, CollegeScopedModelViewSet
+from .availability import book_availability, cancel_reservation, reservation_queue
 from .models import (
     BookCategory,
     Book,
@@ -17,6 +20,7 @@ from .models import (
 from .serializers import (
     BookCategorySerializer,
     BookSerializer,
+    BookAvailabilitySerializer,
     LibraryMemberSerializer,
     LibraryCardSerializer,
     BookIssueSerializer,
@@ -25,6 +29,8 @@ from .serializers import (
     BookReservationSerializer,
 )
 
+MAX_AVAILABILITY_IDS = 200
+
 
 class LibraryScopedModelViewSet(CollegeScopedMixin, viewsets.ModelViewSet):
     """
@@ -72,6 +78,32 @@ class BookViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['title', 'author', 'publication_year', 'available_quantity', 'created_at']
     ordering = ['title']
 
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        """Availability of the books listed in `?ids=1,2,3`, in one batch."""
+        try:
+            book_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            book_ids = None
+        if not book_ids or len(book_ids) > MAX_AVAILABILITY_IDS:
+            return Response(
+                {'detail': f'ids must list between 1 and {MAX_AVAILABILITY_IDS} book ids.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        availability = book_availability(book_ids, books=self.get_queryset())
+        serializer = BookAvailabilitySerializer(availability.values(), many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def queue(self, request, pk=None):
+        """The book's pending reservations, first in line first."""
+        book = self.get_object()
+        reservations = reservation_queue(book.pk).select_related('book', 'member')
+        data = BookReservationSerializer(reservations, many=True).data
+        for position, row in enumerate(data, start=1):
+            row['position'] = position
+        return Response(data, status=status.HTTP_200_OK)
+
 
 class LibraryMemberViewSet(CollegeScopedModelViewSet):
     queryset = LibraryMember.objects.all_colleges()
@@ -129,3 +161,12 @@ class BookReservationViewSet(LibraryScopedModelViewSet):
     filterset_fields = ['book', 'member', 'status', 'reservation_date', 'is_active']
     ordering_fields = ['reservation_date', 'created_at']
     ordering = ['-reservation_date']
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a reservation; a copy it held goes to the next member in line."""
+        reservation = self.get_object()
+        successor = cancel_reservation(reservation)
+        data = self.get_serializer(reservation).data
+        data['passed_to'] = successor
+        return Response(data, status=status.HTTP_200_OK)
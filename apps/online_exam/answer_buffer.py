@@ -0,0 +1,273 @@
+"""
+Write-behind buffer for online exam autosave.
+
+Clients send answer changes (and tab switches) as batched deltas per attempt.
+Deltas are staged in Redis -- or in process memory when
+ONLINE_EXAM_ANSWER_BUFFER = 'memory' (tests, single-process setups) -- and
+written to StudentAnswer with one bulk INSERT ... ON CONFLICT UPDATE per
+flush instead of one transactional write per keystroke.
+
+Autosave requests only stage deltas. Dirty attempts are written outside the
+request path every ONLINE_EXAM_FLUSH_SECONDS by the flush_exam_answers task
+(Celery beat) or the flush_exam_answers management command. Submitting an
+attempt flushes its remaining answers and closes the attempt in one
+transaction. Answers are stamped with the attempt's own student as
+created_by/updated_by, whoever triggers the flush.
+"""
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import StudentAnswer, StudentExamAttempt
+
+DEFAULT_FLUSH_SECONDS = 5
+STATUS_IN_PROGRESS = 'in_progress'
+STATUS_SUBMITTED = 'submitted'
+
+
+def flush_interval():
+    return getattr(settings, 'ONLINE_EXAM_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)
+
+
+class MemoryAnswerStore:
+    """Process-local store; answers are lost if the process dies before a flush."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._answers = {}
+        self._tabs = {}
+        self._dirty = set()
+
+    def stage(self, attempt_id, answers, tab_switches):
+        with self._lock:
+            self._answers.setdefault(attempt_id, {}).update(answers)
+            if tab_switches:
+                self._tabs[attempt_id] = self._tabs.get(attempt_id, 0) + tab_switches
+            self._dirty.add(attempt_id)
+
+    def drain(self, attempt_id):
+        with self._lock:
+            self._dirty.discard(attempt_id)
+            return self._answers.pop(attempt_id, {}), self._tabs.pop(attempt_id, 0)
+
+    def restore(self, attempt_id, answers, tab_switches):
+        """Put drained data back without overwriting newer answers."""
+        with self._lock:
+            staged = self._answers.setdefault(attempt_id, {})
+            for question_id, answer in answers.items():
+                staged.setdefault(question_id, answer)
+            if tab_switches:
+                self._tabs[attempt_id] = self._tabs.get(attempt_id, 0) + tab_switches
+            self._dirty.add(attempt_id)
+
+    def dirty_attempts(self):
+        with self._lock:
+            return list(self._dirty)
+
+    def clear(self):
+        with self._lock:
+            self._answers.clear()
+            self._tabs.clear()
+            self._dirty.clear()
+
+
+class RedisAnswerStore:
+    """Redis store shared by all web workers: one hash of answers per attempt."""
+
+    DIRTY_KEY = 'online_exam:dirty'
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def _answers_key(attempt_id):
+        return f'online_exam:answers:{attempt_id}'
+
+    @staticmethod
+    def _tabs_key(attempt_id):
+        return f'online_exam:tabs:{attempt_id}'
+
+    def stage(self, attempt_id, answers, tab_switches):
+        pipe = self.client.pipeline(transaction=True)
+        if answers:
+            pipe.hset(self._answers_key(attempt_id), mapping={
+                str(question_id): json.dumps(answer) for question_id, answer in answers.items()
+            })
+        if tab_switches:
+            pipe.incrby(self._tabs_key(attempt_id), tab_switches)
+        pipe.sadd(self.DIRTY_KEY, attempt_id)
+        pipe.execute()
+
+    def drain(self, attempt_id):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self._answers_key(attempt_id))
+        pipe.get(self._tabs_key(attempt_id))
+        pipe.delete(self._answers_key(attempt_id), self._tabs_key(attempt_id))
+        pipe.srem(self.DIRTY_KEY, attempt_id)
+        raw_answers, tabs, _, _ = pipe.execute()
+        answers = {int(question_id): json.loads(value) for question_id, value in raw_answers.items()}
+        return answers, int(tabs or 0)
+
+    def restore(self, attempt_id, answers, tab_switches):
+        pipe = self.client.pipeline(transaction=True)
+        for question_id, answer in answers.items():
+            pipe.hsetnx(self._answers_key(attempt_id), str(question_id), json.dumps(answer))
+        if tab_switches:
+            pipe.incrby(self._tabs_key(attempt_id), tab_switches)
+        pipe.sadd(self.DIRTY_KEY, attempt_id)
+        pipe.execute()
+
+    def dirty_attempts(self):
+        return [int(attempt_id) for attempt_id in self.client.smembers(self.DIRTY_KEY)]
+
+
+_memory_store = MemoryAnswerStore()
+
+
+def get_answer_store():
+    """
+    The configured store, or None when Redis is configured but unreachable
+    (callers then write straight to the database).
+    """
+    if getattr(settings, 'ONLINE_EXAM_ANSWER_BUFFER', 'redis') == 'memory':
+        return _memory_store
+    try:
+        from apps.communication.redis_pubsub import get_redis
+        client = get_redis()
+    except Exception:  # pragma: no cover - redis package missing
+        client = None
+    return RedisAnswerStore(client) if client is not None else None
+
+
+def _write_answers(rows):
+    """
+    Upsert (attempt_id, question_id, answer) rows into StudentAnswer in one
+    statement per batch. Later answers for the same question win. Each row
+    is stamped with its attempt's student.
+    """
+    if not rows:
+        return 0
+    owners = dict(
+        StudentExamAttempt.objects.filter(
+            pk__in={attempt_id for attempt_id, _, _ in rows}
+        ).values_list('pk', 'student__user_id')
+    )
+    answers = [
+        StudentAnswer(
+            attempt_id=attempt_id,
+            question_id=question_id,
+            selected_option_id=answer.get('selected_option'),
+            answer_text=answer.get('answer_text'),
+            time_taken=answer.get('time_taken'),
+            created_by_id=owners.get(attempt_id),
+            updated_by_id=owners.get(attempt_id),
+        )
+        for attempt_id, question_id, answer in rows
+    ]
+    StudentAnswer.objects.bulk_create(
+        answers,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['attempt', 'question'],
+        update_fields=['selected_option', 'answer_text', 'time_taken', 'updated_by', 'updated_at'],
+    )
+    return len(answers)
+
+
+def _apply_tab_switches(tabs):
+    for attempt_id, count in tabs.items():
+        if count:
+            StudentExamAttempt.objects.filter(pk=attempt_id).update(
+                tab_switch_count=F('tab_switch_count') + count
+            )
+
+
+def _flush(store, attempt_ids):
+    drained = {attempt_id: store.drain(attempt_id) for attempt_id in attempt_ids}
+    rows = [
+        (attempt_id, question_id, answer)
+        for attempt_id, (answers, _) in drained.items()
+        for question_id, answer in answers.items()
+    ]
+    try:
+        with transaction.atomic():
+            written = _write_answers(rows)
+            _apply_tab_switches({attempt_id: tabs for attempt_id, (_, tabs) in drained.items()})
+    except Exception:
+        for attempt_id, (answers, tabs) in drained.items():
+            store.restore(attempt_id, answers, tabs)
+        raise
+    return written
+
+
+def record(attempt, answers, tab_switches=0):
+    """
+    Stage answer deltas ({question_id: {selected_option, answer_text,
+    time_taken}}) and a tab-switch increment for an in-progress attempt.
+    Returns the number of answers accepted.
+    """
+    store = get_answer_store()
+    if store is None:
+        with transaction.atomic():
+            _write_answers([(attempt.pk, question_id, answer) for question_id, answer in answers.items()])
+            _apply_tab_switches({attempt.pk: tab_switches})
+        return len(answers)
+
+    store.stage(attempt.pk, answers, tab_switches)
+    return len(answers)
+
+
+def flush_all(store=None):
+    """Flush every attempt with buffered deltas. Returns answers written."""
+    store = store or get_answer_store()
+    if store is None:
+        return 0
+    attempt_ids = store.dirty_attempts()
+    if not attempt_ids:
+        return 0
+    return _flush(store, attempt_ids)
+
+
+def flush_attempts(attempts, store=None):
+    """
+    Flush only the buffered deltas of `attempts` (a StudentExamAttempt
+    queryset), e.g. the attempts about to be graded. Returns answers written.
+    """
+    store = store or get_answer_store()
+    if store is None:
+        return 0
+    dirty = store.dirty_attempts()
+    if not dirty:
+        return 0
+    attempt_ids = list(attempts.filter(pk__in=dirty).values_list('pk', flat=True))
+    if not attempt_ids:
+        return 0
+    return _flush(store, attempt_ids)
+
+
+def submit(attempt, user=None):
+    """
+    Flush the attempt's remaining answers and mark it submitted, atomically.
+    Submitting twice is a no-op that returns the stored attempt.
+    """
+    store = get_answer_store()
+    with transaction.atomic():
+        locked = StudentExamAttempt.objects.select_for_update().get(pk=attempt.pk)
+        if locked.status == STATUS_SUBMITTED:
+            return locked
+        if store is not None:
+            _flush(store, [locked.pk])
+        now = timezone.now()
+        StudentExamAttempt.objects.filter(pk=locked.pk).update(
+            status=STATUS_SUBMITTED,
+            submission_time=now,
+            end_time=now,
+            updated_by=user,
+            updated_at=now,
+        )
+    locked.refresh_from_db()
+    return locked
@@ -0,0 +1,31 @@
+"""
+Management command to write buffered online exam answers to the database.
+
+Autosave requests only buffer answers. Unless the flush_exam_answers Celery
+task is scheduled, run this with --interval as a long-running process (or
+from cron) so buffered answers reach the database.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.online_exam.answer_buffer import flush_all, flush_interval
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered online exam answers to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, nargs='?', default=0, const=flush_interval(),
+            help='Keep running and flush every N seconds (no value: ONLINE_EXAM_FLUSH_SECONDS; default: flush once)',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            written = flush_all()
+            self.stdout.write(self.style.SUCCESS(f'Buffered answers written: {written}'))
+            if interval <= 0:
+                return
+            time.sleep(interval)
@@ -0,0 +1,36 @@
+"""
+Management command to auto-grade online exams whose window has closed.
+
+Run it from cron every few minutes so objective results are available
+shortly after an exam ends.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.online_exam.models import OnlineExam
+from apps.online_exam.services import OnlineExamGradingService
+
+
+class Command(BaseCommand):
+    help = 'Auto-grade closed online exams that have ungraded attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Grade one exam ID regardless of its state')
+
+    def handle(self, *args, **options):
+        exams = OnlineExam.objects.all_colleges().filter(is_active=True)
+        if options.get('exam'):
+            exams = exams.filter(pk=options['exam'])
+        else:
+            exams = exams.filter(
+                is_published=True,
+                end_datetime__lte=timezone.now(),
+                attempts__is_active=True,
+                attempts__marks_obtained__isnull=True,
+            ).distinct()
+
+        for exam in exams:
+            summary = OnlineExamGradingService(exam).grade()
+            self.stdout.write(self.style.SUCCESS(
+                f"{exam}: {summary['attempts_graded']} attempts, {summary['answers_graded']} answers graded"
+            ))
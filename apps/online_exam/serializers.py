@@ -51,3 +51,51 @@ class StudentAnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudentAnswer
         fields = '__all__'
+
+
+class AnswerDeltaSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    selected_option = serializers.IntegerField(required=False, allow_null=True)
+    answer_text = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    time_taken = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+
+
+class AttemptAutosaveSerializer(serializers.Serializer):
+    """A batch of answer changes and tab switches since the last autosave."""
+    answers = AnswerDeltaSerializer(many=True, required=False, default=list)
+    tab_switches = serializers.IntegerField(required=False, default=0, min_value=0)
+
+    def validate(self, attrs):
+        attempt = self.context['attempt']
+        answers = attrs['answers']
+        question_ids = {answer['question'] for answer in answers}
+        valid_questions = set(
+            ExamQuestion.objects.filter(
+                exam_id=attempt.exam_id, question_id__in=question_ids, is_active=True
+            ).values_list('question_id', flat=True)
+        )
+        if question_ids - valid_questions:
+            raise serializers.ValidationError({
+                'answers': f"Questions not in this exam: {sorted(question_ids - valid_questions)}"
+            })
+        option_ids = {answer['selected_option'] for answer in answers if answer.get('selected_option')}
+        if option_ids:
+            option_questions = dict(
+                QuestionOption.objects.filter(id__in=option_ids).values_list('id', 'question_id')
+            )
+            for answer in answers:
+                option_id = answer.get('selected_option')
+                if option_id and option_questions.get(option_id) != answer['question']:
+                    raise serializers.ValidationError({
+                        'answers': f"Option {option_id} does not belong to question {answer['question']}"
+                    })
+        # Later deltas for the same question within a batch win
+        attrs['answers'] = {
+            answer['question']: {
+                'selected_option': answer.get('selected_option'),
+                'answer_text': answer.get('answer_text'),
+                'time_taken': answer.get('time_taken'),
+            }
+            for answer in answers
+        }
+        return attrs
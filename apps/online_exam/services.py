@@ -0,0 +1,172 @@
+"""
+Online exam auto-grading.
+
+OnlineExamGradingService evaluates the objective answers of a whole exam
+with a fixed number of set-based queries, independent of the number of
+attempts:
+
+1. one UPDATE grades every option-based answer (MCQ / true-false) by
+   checking the selected option's is_correct flag, awarding the exam's
+   marks for the question or the negative marks;
+2. one UPDATE grades fill-in-the-blank answers against the question's
+   correct answer (case and surrounding whitespace ignored);
+3. one GROUP BY query sums marks per attempt, and one bulk UPDATE writes
+   attempt totals and percentages.
+
+Subjective answers keep whatever marks_awarded a teacher has entered and are
+included in the attempt totals as they stand.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import (
+    BooleanField, Case, DecimalField, Exists, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Lower, Trim
+from django.utils import timezone
+
+from . import answer_buffer
+from .answer_buffer import STATUS_IN_PROGRESS, STATUS_SUBMITTED
+from .models import ExamQuestion, Question, QuestionOption, StudentAnswer, StudentExamAttempt
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0')
+OPTION_QUESTION_TYPES = ('mcq', 'single_choice', 'true_false', 'tf')
+TEXT_QUESTION_TYPES = ('fill_blank', 'fill_in_the_blank', 'one_word')
+
+
+def _type_filter(types):
+    query = Q()
+    for question_type in types:
+        query |= Q(question__question_type__iexact=question_type)
+    return query
+
+
+class OnlineExamGradingService:
+    """Evaluate objective answers and attempt totals for an online exam."""
+
+    def __init__(self, exam, user=None):
+        self.exam = exam
+        self.user = user
+
+    def attempts(self, attempt_ids=None):
+        queryset = StudentExamAttempt.objects.filter(exam=self.exam, is_active=True).exclude(
+            status=STATUS_IN_PROGRESS
+        )
+        if attempt_ids is not None:
+            queryset = queryset.filter(pk__in=attempt_ids)
+        return queryset
+
+    def close_expired_attempts(self, now=None):
+        """Mark attempts still in progress after the exam window as submitted."""
+        now = now or timezone.now()
+        if self.exam.end_datetime > now:
+            return 0
+        return StudentExamAttempt.objects.filter(
+            exam=self.exam, status=STATUS_IN_PROGRESS
+        ).update(
+            status=STATUS_SUBMITTED,
+            submission_time=self.exam.end_datetime,
+            end_time=self.exam.end_datetime,
+            updated_at=now,
+        )
+
+    def _answers(self, attempt_ids=None):
+        return StudentAnswer.objects.filter(
+            attempt__in=self.attempts(attempt_ids), is_active=True
+        )
+
+    def _question_marks(self):
+        return Subquery(
+            ExamQuestion.objects.filter(
+                exam_id=self.exam.pk, question_id=OuterRef('question_id')
+            ).values('marks')[:1]
+        )
+
+    def _penalty(self):
+        if self.exam.negative_marking and self.exam.negative_marks:
+            return Value(-self.exam.negative_marks)
+        return Value(ZERO)
+
+    def _update(self, answers, correct, answered):
+        return answers.update(
+            is_correct=Case(When(answered, then=correct), default=Value(None), output_field=BooleanField()),
+            marks_awarded=Case(
+                When(~answered, then=Value(ZERO)),
+                When(correct, then=self._question_marks()),
+                default=self._penalty(),
+                output_field=DecimalField(max_digits=5, decimal_places=2),
+            ),
+            updated_by=self.user,
+            updated_at=timezone.now(),
+        )
+
+    def grade_option_answers(self, attempt_ids=None):
+        correct = Exists(QuestionOption.objects.filter(pk=OuterRef('selected_option_id'), is_correct=True))
+        return self._update(
+            self._answers(attempt_ids).filter(_type_filter(OPTION_QUESTION_TYPES)),
+            correct,
+            Q(selected_option__isnull=False),
+        )
+
+    def grade_text_answers(self, attempt_ids=None):
+        correct = Exists(
+            Question.objects.annotate(key=Lower(Trim('correct_answer'))).filter(
+                pk=OuterRef('question_id'), key=Lower(Trim(OuterRef('answer_text')))
+            )
+        )
+        return self._update(
+            self._answers(attempt_ids).filter(_type_filter(TEXT_QUESTION_TYPES)),
+            correct,
+            Q(answer_text__isnull=False) & ~Q(answer_text=''),
+        )
+
+    def total_marks(self):
+        total = ExamQuestion.objects.filter(exam=self.exam, is_active=True).aggregate(total=Sum('marks'))['total']
+        return total or Decimal(self.exam.total_marks)
+
+    def update_attempt_totals(self, attempt_ids=None):
+        total = self.total_marks()
+        obtained = dict(
+            self._answers(attempt_ids).values('attempt_id').annotate(
+                obtained=Coalesce(Sum('marks_awarded'), Value(ZERO))
+            ).values_list('attempt_id', 'obtained').order_by()
+        )
+        now = timezone.now()
+        attempts = list(self.attempts(attempt_ids).only('id'))
+        for attempt in attempts:
+            marks = max(Decimal(obtained.get(attempt.pk, ZERO)), ZERO)
+            attempt.total_marks = total
+            attempt.marks_obtained = marks
+            attempt.percentage = (marks * 100 / total).quantize(CENT, rounding=ROUND_HALF_UP) if total else ZERO
+            attempt.updated_by = self.user
+            attempt.updated_at = now
+        StudentExamAttempt.objects.bulk_update(
+            attempts,
+            ['total_marks', 'marks_obtained', 'percentage', 'updated_by', 'updated_at'],
+            batch_size=500,
+        )
+        return len(attempts)
+
+    def grade(self, attempt_ids=None):
+        """
+        Grade objective answers and refresh attempt totals for submitted
+        attempts (all of the exam's, or only `attempt_ids`). Safe to re-run,
+        e.g. after an answer key is corrected. Returns a summary dict.
+        """
+        # Buffered autosaves of the attempts being graded must reach the database first
+        buffered = StudentExamAttempt.objects.filter(exam=self.exam)
+        if attempt_ids is not None:
+            buffered = buffered.filter(pk__in=attempt_ids)
+        answer_buffer.flush_attempts(buffered)
+        with transaction.atomic():
+            closed = self.close_expired_attempts() if attempt_ids is None else 0
+            option_answers = self.grade_option_answers(attempt_ids)
+            text_answers = self.grade_text_answers(attempt_ids)
+            attempts = self.update_attempt_totals(attempt_ids)
+        return {
+            'exam': self.exam.pk,
+            'attempts_closed': closed,
+            'answers_graded': option_answers + text_answers,
+            'attempts_graded': attempts,
+        }
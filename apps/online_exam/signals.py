@@ -16,11 +16,11 @@ def online_exam_post_save(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=StudentExamAttempt)
 def student_exam_attempt_post_save(sender, instance, created, **kwargs):
-    # TODO: on completion, auto-evaluate objective answers and update marks
+    # Objective answers are graded in bulk by OnlineExamGradingService
     return
 
 
 @receiver(post_save, sender=StudentAnswer)
 def student_answer_post_save(sender, instance, created, **kwargs):
-    # TODO: auto-check MCQ/TF and assign marks/negative marks
+    # Per-answer grading is deliberately not done here; see services.py
     return
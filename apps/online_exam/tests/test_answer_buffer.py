@@ -0,0 +1,209 @@
+from datetime import date, datetime
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import AcademicSession, Class, Faculty, Program, Section, Subject
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.online_exam import answer_buffer
+from apps.online_exam.models import (
+    ExamQuestion,
+    OnlineExam,
+    Question,
+    QuestionBank,
+    QuestionOption,
+    StudentAnswer,
+    StudentExamAttempt,
+)
+from apps.online_exam.serializers import AttemptAutosaveSerializer
+from apps.online_exam.tasks import flush_exam_answers
+from apps.students.models import Student
+
+
+@override_settings(ONLINE_EXAM_ANSWER_BUFFER='memory')
+class AnswerBufferTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="ABF",
+            name="Autosave College",
+            short_name="ABF",
+            email="info@abf.test",
+            phone="9999999992",
+            address_line1="1 Save St",
+            city="City",
+            state="State",
+            pincode="000012",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+        answer_buffer._memory_store.clear()
+        self.addCleanup(answer_buffer._memory_store.clear)
+
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        class_obj = Class.objects.create(
+            college=self.college,
+            program=program,
+            academic_session=session,
+            name="BSC-1",
+            semester=1,
+            year=1,
+        )
+        section = Section.objects.create(class_obj=class_obj, name="A")
+        subject = Subject.objects.create(
+            college=self.college,
+            code="MA101",
+            name="Mathematics",
+            short_name="MA",
+            subject_type="theory",
+            credits="4.00",
+            max_marks=100,
+            pass_marks=40,
+        )
+        user = User.objects.create_user(
+            username="student_abf",
+            email="student@abf.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        student = Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number="ADM-ABF-1",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number="REG-ABF-1",
+            program=program,
+            current_class=class_obj,
+            current_section=section,
+            academic_year=year,
+            first_name="Ava",
+            last_name="Save",
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email="student@abf.test",
+        )
+        bank = QuestionBank.objects.create(college=self.college, subject=subject, name="Algebra")
+        self.exam = OnlineExam.objects.create(
+            college=self.college,
+            subject=subject,
+            class_obj=class_obj,
+            name="Quiz",
+            duration=30,
+            total_marks=4,
+            pass_marks=2,
+            start_datetime=datetime(2025, 7, 1, 10, 0),
+            end_datetime=datetime(2025, 7, 1, 10, 30),
+        )
+        self.questions = []
+        self.options = []
+        for number in range(2):
+            question = Question.objects.create(
+                bank=bank, question_type="MCQ", question_text=f"Q{number}", marks=2
+            )
+            ExamQuestion.objects.create(exam=self.exam, question=question, marks=2, order=number)
+            self.questions.append(question)
+            self.options.append(QuestionOption.objects.create(question=question, option_text="A"))
+        self.attempt = StudentExamAttempt.objects.create(
+            exam=self.exam, student=student, start_time=datetime(2025, 7, 1, 10, 0), status="in_progress"
+        )
+        self.student_user = student.user
+
+    def _answer(self, index, **values):
+        return {self.questions[index].pk: {'selected_option': self.options[index].pk, **values}}
+
+    def test_autosave_is_buffered_until_flush(self):
+        answer_buffer.record(self.attempt, self._answer(0, time_taken=5), tab_switches=1)
+        answer_buffer.record(self.attempt, self._answer(0, time_taken=9), tab_switches=2)
+        self.assertFalse(StudentAnswer.objects.filter(attempt=self.attempt).exists())
+
+        self.assertEqual(answer_buffer.flush_all(), 1)
+        answer = StudentAnswer.objects.get(attempt=self.attempt)
+        self.assertEqual(answer.selected_option, self.options[0])
+        self.assertEqual(answer.time_taken, 9)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.tab_switch_count, 3)
+
+        # A later flush updates the existing row instead of inserting a duplicate
+        answer_buffer.record(self.attempt, self._answer(0, answer_text="changed"))
+        answer_buffer.flush_all()
+        self.assertEqual(StudentAnswer.objects.filter(attempt=self.attempt).count(), 1)
+        self.assertEqual(StudentAnswer.objects.get(attempt=self.attempt).answer_text, "changed")
+
+    def test_submit_flushes_and_closes_attempt(self):
+        answer_buffer.record(self.attempt, {**self._answer(0), **self._answer(1)}, tab_switches=1)
+
+        attempt = answer_buffer.submit(self.attempt)
+
+        self.assertEqual(attempt.status, answer_buffer.STATUS_SUBMITTED)
+        self.assertIsNotNone(attempt.submission_time)
+        self.assertEqual(attempt.tab_switch_count, 1)
+        self.assertEqual(StudentAnswer.objects.filter(attempt=self.attempt).count(), 2)
+        self.assertEqual(answer_buffer._memory_store.dirty_attempts(), [])
+
+    def test_flush_stamps_each_attempt_with_its_student(self):
+        other_user = User.objects.create_user(
+            username="abf_other", email="other@abf.test", password="dummy-pass",
+            college=self.college, user_type=UserType.STUDENT,
+        )
+        other_student = Student.objects.create(
+            user=other_user, college=self.college, admission_number="ADM-ABF-2",
+            admission_date=date(2025, 6, 1), admission_type="regular", registration_number="REG-ABF-2",
+            program=self.attempt.student.program, academic_year=self.attempt.student.academic_year,
+            first_name="Ben", last_name="Save", date_of_birth=date(2007, 1, 1), gender="male",
+            email="other@abf.test",
+        )
+        other_attempt = StudentExamAttempt.objects.create(
+            exam=self.exam, student=other_student, start_time=datetime(2025, 7, 1, 10, 0), status="in_progress"
+        )
+        answer_buffer.record(self.attempt, self._answer(0))
+        answer_buffer.record(other_attempt, self._answer(0))
+
+        self.assertEqual(flush_exam_answers(), 2)
+        self.assertEqual(
+            dict(StudentAnswer.objects.values_list('attempt_id', 'created_by_id')),
+            {self.attempt.pk: self.student_user.pk, other_attempt.pk: other_user.pk},
+        )
+
+    def test_autosave_rejects_foreign_questions_and_options(self):
+        other = Question.objects.create(
+            bank=self.questions[0].bank, question_type="MCQ", question_text="Other", marks=1
+        )
+        serializer = AttemptAutosaveSerializer(
+            data={'answers': [{'question': other.pk}]}, context={'attempt': self.attempt}
+        )
+        self.assertFalse(serializer.is_valid())
+
+        serializer = AttemptAutosaveSerializer(
+            data={'answers': [{'question': self.questions[0].pk, 'selected_option': self.options[1].pk}]},
+            context={'attempt': self.attempt},
+        )
+        self.assertFalse(serializer.is_valid())
@@ -0,0 +1,212 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import AcademicSession, Class, Faculty, Program, Section, Subject
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.online_exam import answer_buffer
+from apps.online_exam.models import (
+    ExamQuestion,
+    OnlineExam,
+    Question,
+    QuestionBank,
+    QuestionOption,
+    StudentAnswer,
+    StudentExamAttempt,
+)
+from apps.online_exam.services import OnlineExamGradingService
+from apps.students.models import Student
+
+
+@override_settings(ONLINE_EXAM_ANSWER_BUFFER='memory')
+class OnlineExamGradingTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="GRD",
+            name="Grading College",
+            short_name="GRD",
+            email="info@grd.test",
+            phone="9999999991",
+            address_line1="2 Key Rd",
+            city="City",
+            state="State",
+            pincode="000013",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        class_obj = Class.objects.create(
+            college=self.college,
+            program=program,
+            academic_session=session,
+            name="BSC-1",
+            semester=1,
+            year=1,
+        )
+        section = Section.objects.create(class_obj=class_obj, name="A")
+        subject = Subject.objects.create(
+            college=self.college,
+            code="MA101",
+            name="Mathematics",
+            short_name="MA",
+            subject_type="theory",
+            credits="4.00",
+            max_marks=100,
+            pass_marks=40,
+        )
+        user = User.objects.create_user(
+            username="student_grd",
+            email="student@grd.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        student = Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number="ADM-GRD-1",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number="REG-GRD-1",
+            program=program,
+            current_class=class_obj,
+            current_section=section,
+            academic_year=year,
+            first_name="Ava",
+            last_name="Key",
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email="student@grd.test",
+        )
+        bank = QuestionBank.objects.create(college=self.college, subject=subject, name="Algebra")
+        self.exam = OnlineExam.objects.create(
+            college=self.college,
+            subject=subject,
+            class_obj=class_obj,
+            name="Quiz",
+            duration=30,
+            total_marks=4,
+            pass_marks=2,
+            start_datetime=datetime(2025, 7, 1, 10, 0),
+            end_datetime=datetime(2025, 7, 1, 10, 30),
+        )
+        self.exam.negative_marking = True
+        self.exam.negative_marks = Decimal('0.50')
+        self.exam.save()
+        self.exam.refresh_from_db()
+        self.mcq = Question.objects.create(bank=bank, question_type="MCQ", question_text="2+2?", marks=1)
+        self.right = QuestionOption.objects.create(question=self.mcq, option_text="4", is_correct=True)
+        self.wrong = QuestionOption.objects.create(question=self.mcq, option_text="5")
+        self.blank = Question.objects.create(
+            bank=bank, question_type="fill_blank", question_text="Capital of France?",
+            correct_answer="Paris", marks=1,
+        )
+        self.essay = Question.objects.create(bank=bank, question_type="essay", question_text="Discuss", marks=1)
+        ExamQuestion.objects.create(exam=self.exam, question=self.mcq, marks=2, order=1)
+        ExamQuestion.objects.create(exam=self.exam, question=self.blank, marks=1, order=2)
+        ExamQuestion.objects.create(exam=self.exam, question=self.essay, marks=1, order=3)
+        self.student = student
+        self.attempt = StudentExamAttempt.objects.create(
+            exam=self.exam, student=student, start_time=datetime(2025, 7, 1, 10, 0), status="submitted"
+        )
+
+    def _answer(self, question, **values):
+        return StudentAnswer.objects.create(attempt=self.attempt, question=question, **values)
+
+    def test_grades_objective_answers_and_totals(self):
+        mcq = self._answer(self.mcq, selected_option=self.right)
+        blank = self._answer(self.blank, answer_text="  paris ")
+        essay = self._answer(self.essay, answer_text="...", marks_awarded=Decimal('0.50'))
+
+        summary = OnlineExamGradingService(self.exam).grade()
+
+        self.assertEqual(summary['answers_graded'], 2)
+        mcq.refresh_from_db()
+        blank.refresh_from_db()
+        essay.refresh_from_db()
+        self.assertTrue(mcq.is_correct)
+        self.assertEqual(mcq.marks_awarded, Decimal('2.00'))
+        self.assertTrue(blank.is_correct)
+        self.assertEqual(blank.marks_awarded, Decimal('1.00'))
+        self.assertIsNone(essay.is_correct)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.total_marks, Decimal('4.00'))
+        self.assertEqual(self.attempt.marks_obtained, Decimal('3.50'))
+        self.assertEqual(self.attempt.percentage, Decimal('87.50'))
+
+    def test_wrong_answers_take_negative_marks_and_totals_floor_at_zero(self):
+        mcq = self._answer(self.mcq, selected_option=self.wrong)
+        blank = self._answer(self.blank, answer_text="")
+
+        OnlineExamGradingService(self.exam).grade()
+
+        mcq.refresh_from_db()
+        blank.refresh_from_db()
+        self.assertFalse(mcq.is_correct)
+        self.assertEqual(mcq.marks_awarded, Decimal('-0.50'))
+        self.assertIsNone(blank.is_correct)
+        self.assertEqual(blank.marks_awarded, Decimal('0.00'))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.marks_obtained, Decimal('0.00'))
+
+    def test_grading_is_set_based(self):
+        self._answer(self.mcq, selected_option=self.right)
+        service = OnlineExamGradingService(self.exam)
+        with self.assertNumQueries(9):
+            # savepoint, close expired, 2 grading updates, exam total,
+            # per-attempt sums, attempts, bulk update, release
+            service.grade()
+
+    def test_grading_flushes_only_its_own_buffered_attempts(self):
+        answer_buffer._memory_store.clear()
+        self.addCleanup(answer_buffer._memory_store.clear)
+        other_exam = OnlineExam.objects.create(
+            college=self.college, subject=self.exam.subject, class_obj=self.exam.class_obj, name="Other quiz",
+            duration=30, total_marks=2, pass_marks=1,
+            start_datetime=datetime(2025, 7, 2, 10, 0), end_datetime=datetime(2025, 7, 2, 10, 30),
+        )
+        other_attempt = StudentExamAttempt.objects.create(
+            exam=other_exam, student=self.student, start_time=datetime(2025, 7, 2, 10, 0), status="in_progress"
+        )
+        answer_buffer.record(self.attempt, {self.mcq.pk: {'selected_option': self.right.pk}})
+        answer_buffer.record(other_attempt, {self.mcq.pk: {'selected_option': self.right.pk}})
+        grader = User.objects.create_user(username="grd_grader", email="grader@grd.test", password="dummy-pass")
+
+        OnlineExamGradingService(self.exam, user=grader).grade()
+
+        answer = StudentAnswer.objects.get(attempt=self.attempt)
+        self.assertTrue(answer.is_correct)
+        self.assertEqual(answer.created_by_id, self.student.user_id)
+        self.assertFalse(StudentAnswer.objects.filter(attempt=other_attempt).exists())
+        self.assertEqual(answer_buffer._memory_store.dirty_attempts(), [other_attempt.pk])
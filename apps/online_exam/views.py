@@ -1,9 +1,14 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.core.cache_mixins import CachedReadOnlyMixin
 
 from apps.core.mixins import CollegeScopedModelViewSet, RelatedCollegeScopedModelViewSet
+from . import answer_buffer
+from .services import OnlineExamGradingService
 from .models import (
     QuestionBank,
     Question,
@@ -21,6 +26,7 @@ from .serializers import (
     ExamQuestionSerializer,
     StudentExamAttemptSerializer,
     StudentAnswerSerializer,
+    AttemptAutosaveSerializer,
 )
 
 
@@ -68,6 +74,15 @@ class OnlineExamViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     ordering_fields = ['start_datetime', 'end_datetime', 'created_at']
     ordering = ['-start_datetime']
 
+    @action(detail=True, methods=['post'])
+    def evaluate(self, request, pk=None):
+        """
+        Auto-grade the exam's objective answers and recompute attempt
+        totals. Attempts still open after the exam window are closed first.
+        """
+        summary = OnlineExamGradingService(self.get_object(), user=request.user).grade()
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class ExamQuestionViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelViewSet):
     queryset = ExamQuestion.objects.select_related('exam', 'question__bank')
@@ -90,6 +105,39 @@ class StudentExamAttemptViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelVi
     ordering = ['-start_time']
     related_college_lookup = 'exam__college_id'
 
+    def _own_attempt(self):
+        attempt = self.get_object()
+        student = getattr(self.request.user, 'student_profile', None)
+        if student is not None and attempt.student_id != student.pk:
+            raise PermissionDenied("You can only answer your own exam attempt.")
+        return attempt
+
+    @action(detail=True, methods=['post'], serializer_class=AttemptAutosaveSerializer)
+    def autosave(self, request, pk=None):
+        """
+        Accept a batch of answer changes and tab switches. Answers are
+        buffered and written to the database in bulk by the periodic flush.
+        """
+        attempt = self._own_attempt()
+        if attempt.status != answer_buffer.STATUS_IN_PROGRESS:
+            raise ValidationError({'status': f"Attempt is {attempt.status}, not in progress."})
+        serializer = AttemptAutosaveSerializer(data=request.data, context={'attempt': attempt})
+        serializer.is_valid(raise_exception=True)
+        accepted = answer_buffer.record(
+            attempt,
+            serializer.validated_data['answers'],
+            serializer.validated_data['tab_switches'],
+        )
+        return Response({'attempt': attempt.pk, 'accepted': accepted}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        """Write any buffered answers and close the attempt."""
+        attempt = answer_buffer.submit(self._own_attempt(), user=request.user)
+        OnlineExamGradingService(attempt.exam, user=request.user).grade(attempt_ids=[attempt.pk])
+        attempt.refresh_from_db()
+        return Response(StudentExamAttemptSerializer(attempt).data, status=status.HTTP_200_OK)
+
 
 class StudentAnswerViewSet(CachedReadOnlyMixin, RelatedCollegeScopedModelViewSet):
     queryset = StudentAnswer.objects.select_related('attempt__exam', 'question__bank', 'selected_option')
@@ -0,0 +1,321 @@
+"""
+Registry of PDF document types the batch renderer can produce.
+
+Each definition selects the document rows for a batch (creating missing
+ones where the document is derived from other data, e.g. one mark sheet per
+exam result), bulk-loads everything the template needs in a few queries and
+builds the per-document template context.
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.utils import timezone
+
+
+class DocumentDefinition:
+    """
+    Describes how to render one document type.
+
+    Args:
+        document_type (str): Key used by DocumentBatch.document_type
+        template (str): Template path rendered to HTML, then PDF
+        file_field (str): FileField on the document model receiving the PDF
+        queryset (callable): (college_id, params) -> document rows
+        context (callable): (document, shared) -> template context
+        shared (callable): (college_id, params, documents) -> data loaded once per batch
+        prepare (callable): (college_id, params, user) -> create missing document rows
+        filename (callable): document -> file name
+        required_params (tuple): Params that must be supplied
+    """
+
+    def __init__(self, document_type, template, file_field, queryset, context, filename,
+                 shared=None, prepare=None, required_params=()):
+        self.document_type = document_type
+        self.template = template
+        self.file_field = file_field
+        self._queryset = queryset
+        self._context = context
+        self._shared = shared
+        self._prepare = prepare
+        self.filename = filename
+        self.required_params = required_params
+
+    def missing_params(self, params):
+        return [name for name in self.required_params if params.get(name) in (None, '')]
+
+    def prepare(self, college_id, params, user=None):
+        if self._prepare:
+            self._prepare(college_id, params, user)
+
+    def documents(self, college_id, params):
+        return list(self._queryset(college_id, params))
+
+    def shared(self, college_id, params, documents):
+        return self._shared(college_id, params, documents) if self._shared else {}
+
+    def context(self, document, shared):
+        return self._context(document, shared)
+
+
+_REGISTRY = {}
+
+
+def register_document(definition):
+    _REGISTRY[definition.document_type] = definition
+    return definition
+
+
+def get_document_definition(document_type):
+    return _REGISTRY.get(document_type)
+
+
+def registered_document_types():
+    return sorted(_REGISTRY)
+
+
+# ---------------------------------------------------------------------------
+# Exam documents
+# ---------------------------------------------------------------------------
+
+
+def _exam_results(college_id, params):
+    from apps.examinations.models import ExamResult
+    results = ExamResult.objects.filter(
+        exam_id=params['exam'], exam__college_id=college_id, is_active=True
+    )
+    if params.get('section'):
+        results = results.filter(student__current_section_id=params['section'])
+    return results
+
+
+def _prepare_student_documents(model_label, number_field=None, prefix=''):
+    """Create one document row per exam result that does not have one yet."""
+
+    def prepare(college_id, params, user=None):
+        model = apps.get_model(model_label)
+        student_ids = set(_exam_results(college_id, params).values_list('student_id', flat=True))
+        existing = set(
+            model.objects.filter(exam_id=params['exam'], student_id__in=student_ids)
+            .values_list('student_id', flat=True)
+        )
+        today = timezone.localdate()
+        rows = []
+        for student_id in sorted(student_ids - existing):
+            row = model(
+                student_id=student_id, exam_id=params['exam'], issue_date=today,
+                created_by=user, updated_by=user,
+            )
+            if number_field:
+                setattr(row, number_field, f"{prefix}-{params['exam']}-{student_id}")
+            rows.append(row)
+        model.objects.bulk_create(rows, ignore_conflicts=True)
+
+    return prepare
+
+
+def _student_documents(model_label):
+    def queryset(college_id, params):
+        documents = apps.get_model(model_label).objects.filter(
+            exam_id=params['exam'], exam__college_id=college_id, is_active=True
+        ).select_related('student', 'exam__class_obj', 'exam__college')
+        if params.get('section'):
+            documents = documents.filter(student__current_section_id=params['section'])
+        return documents.order_by('student__roll_number', 'student_id')
+
+    return queryset
+
+
+def _exam_marks_by_student(college_id, params, documents):
+    from apps.examinations.models import StudentMarks
+    student_ids = [document.student_id for document in documents]
+    marks = defaultdict(list)
+    for mark in StudentMarks.objects.filter(
+        register__exam_id=params['exam'], student_id__in=student_ids, is_active=True
+    ).select_related('register__subject').order_by('register__subject__name'):
+        marks[mark.student_id].append(mark)
+    results = {
+        result.student_id: result
+        for result in _exam_results(college_id, params).filter(student_id__in=student_ids)
+    }
+    return {'marks': marks, 'results': results}
+
+
+def _student_exam_context(document, shared):
+    return {
+        'document': document,
+        'student': document.student,
+        'exam': document.exam,
+        'college': document.exam.college,
+        'marks': shared['marks'].get(document.student_id, []),
+        'result': shared['results'].get(document.student_id),
+    }
+
+
+def _prepare_tabulation(college_id, params, user=None):
+    from apps.examinations.models import Exam, TabulationSheet
+    exam = Exam.objects.all_colleges().get(pk=params['exam'], college_id=college_id)
+    TabulationSheet.objects.get_or_create(
+        exam=exam, class_obj_id=exam.class_obj_id, section_id=params.get('section') or None,
+        defaults={'issue_date': timezone.localdate(), 'created_by': user, 'updated_by': user},
+    )
+
+
+def _tabulation_sheets(college_id, params):
+    from apps.examinations.models import TabulationSheet
+    sheets = TabulationSheet.objects.filter(
+        exam_id=params['exam'], exam__college_id=college_id, is_active=True
+    ).select_related('exam__college', 'class_obj', 'section')
+    if params.get('section'):
+        sheets = sheets.filter(section_id=params['section'])
+    return sheets
+
+
+def _tabulation_shared(college_id, params, documents):
+    from apps.academic.models import Subject
+    from apps.examinations.models import StudentMarks
+    subjects = list(
+        Subject.objects.all_colleges().filter(
+            marks_registers__exam_id=params['exam'], marks_registers__is_active=True
+        ).distinct().order_by('name')
+    )
+    marks = defaultdict(dict)
+    for student_id, subject_id, total, absent in StudentMarks.objects.filter(
+        register__exam_id=params['exam'], is_active=True
+    ).values_list('student_id', 'register__subject_id', 'total_marks', 'is_absent'):
+        marks[student_id][subject_id] = 'AB' if absent else total
+    results = list(
+        _exam_results(college_id, {'exam': params['exam']}).select_related('student')
+        .order_by('rank', 'student__roll_number')
+    )
+    return {'subjects': subjects, 'marks': marks, 'results': results}
+
+
+def _tabulation_context(document, shared):
+    rows = []
+    for result in shared['results']:
+        if document.section_id and result.student.current_section_id != document.section_id:
+            continue
+        student_marks = shared['marks'].get(result.student_id, {})
+        rows.append({
+            'result': result,
+            'student': result.student,
+            'marks': [student_marks.get(subject.pk, '-') for subject in shared['subjects']],
+        })
+    return {
+        'document': document,
+        'exam': document.exam,
+        'college': document.exam.college,
+        'subjects': shared['subjects'],
+        'rows': rows,
+    }
+
+
+register_document(DocumentDefinition(
+    document_type='mark_sheet',
+    template='reports/pdf/mark_sheet.html',
+    file_field='sheet_file',
+    queryset=_student_documents('examinations.MarkSheet'),
+    shared=_exam_marks_by_student,
+    context=_student_exam_context,
+    prepare=_prepare_student_documents('examinations.MarkSheet', 'sheet_number', 'MS'),
+    filename=lambda document: f"{document.sheet_number}.pdf",
+    required_params=('exam',),
+))
+
+register_document(DocumentDefinition(
+    document_type='progress_card',
+    template='reports/pdf/progress_card.html',
+    file_field='card_file',
+    queryset=_student_documents('examinations.ProgressCard'),
+    shared=_exam_marks_by_student,
+    context=_student_exam_context,
+    prepare=_prepare_student_documents('examinations.ProgressCard'),
+    filename=lambda document: f"progress_{document.exam_id}_{document.student_id}.pdf",
+    required_params=('exam',),
+))
+
+register_document(DocumentDefinition(
+    document_type='tabulation_sheet',
+    template='reports/pdf/tabulation_sheet.html',
+    file_field='sheet_file',
+    queryset=_tabulation_sheets,
+    shared=_tabulation_shared,
+    context=_tabulation_context,
+    prepare=_prepare_tabulation,
+    filename=lambda document: f"tabulation_{document.exam_id}_{document.section_id or 'all'}.pdf",
+    required_params=('exam',),
+))
+
+
+# ---------------------------------------------------------------------------
+# Payroll documents
+# ---------------------------------------------------------------------------
+
+
+def _payrolls(college_id, params):
+    from apps.hr.models import Payroll
+    return Payroll.objects.filter(
+        teacher__college_id=college_id, month=params['month'], year=params['year'], is_active=True
+    )
+
+
+def _prepare_payslips(college_id, params, user=None):
+    from apps.hr.models import Payslip
+    payroll_ids = set(_payrolls(college_id, params).values_list('id', flat=True))
+    existing = set(Payslip.objects.filter(payroll_id__in=payroll_ids).values_list('payroll_id', flat=True))
+    today = timezone.localdate()
+    Payslip.objects.bulk_create([
+        Payslip(
+            payroll_id=payroll_id,
+            slip_number=f"PS-{params['year']}{int(params['month']):02d}-{payroll_id}",
+            issue_date=today,
+            created_by=user,
+            updated_by=user,
+        )
+        for payroll_id in sorted(payroll_ids - existing)
+    ], ignore_conflicts=True)
+
+
+def _payslips(college_id, params):
+    from apps.hr.models import Payslip
+    return Payslip.objects.filter(
+        payroll__in=_payrolls(college_id, params), is_active=True
+    ).select_related(
+        'payroll__teacher__college', 'payroll__teacher__faculty', 'payroll__salary_structure'
+    ).order_by('payroll__teacher__employee_id', 'id')
+
+
+def _payslip_shared(college_id, params, documents):
+    from apps.hr.models import PayrollItem
+    items = defaultdict(list)
+    for item in PayrollItem.objects.filter(
+        payroll_id__in=[document.payroll_id for document in documents], is_active=True
+    ).order_by('component_type', 'component_name'):
+        items[item.payroll_id].append(item)
+    return {'items': items}
+
+
+def _payslip_context(document, shared):
+    payroll = document.payroll
+    items = shared['items'].get(payroll.pk, [])
+    return {
+        'document': document,
+        'payroll': payroll,
+        'teacher': payroll.teacher,
+        'college': payroll.teacher.college,
+        'allowances': [item for item in items if item.component_type == 'allowance'],
+        'deductions': [item for item in items if item.component_type == 'deduction'],
+    }
+
+
+register_document(DocumentDefinition(
+    document_type='payslip',
+    template='reports/pdf/payslip.html',
+    file_field='slip_file',
+    queryset=_payslips,
+    shared=_payslip_shared,
+    context=_payslip_context,
+    prepare=_prepare_payslips,
+    filename=lambda document: f"{document.slip_number}.pdf",
+    required_params=('month', 'year'),
+))
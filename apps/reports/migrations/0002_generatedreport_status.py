@@ -0,0 +1,58 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, help_text='Generation end time', null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='error_message',
+            field=models.TextField(blank=True, help_text='Failure reason', null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='file_format',
+            field=models.CharField(default='csv', help_text='Output format (csv/xlsx)', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='filter_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash of template, effective filters and format, used to de-duplicate requests', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='row_count',
+            field=models.IntegerField(blank=True, help_text='Rows written', null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='Generation start time', null=True),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='completed', help_text='Generation status', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['template', 'filter_hash', 'status'], name='generated_r_templat_82b837_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='generatedreport',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('template', 'filter_hash'), name='uniq_inflight_generated_report'),
+        ),
+    ]
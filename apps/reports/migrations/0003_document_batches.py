@@ -0,0 +1,58 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dynamicrole_hierarchypermission_hierarchyuserrole_and_more'),
+        ('reports', '0002_generatedreport_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(help_text='Document type', max_length=50)),
+                ('object_id', models.PositiveIntegerField(help_text='Primary key of the document row')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the rendered HTML', max_length=64)),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rendered_document',
+                'unique_together': {('document_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when the record was created')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Timestamp when the record was last updated')),
+                ('is_active', models.BooleanField(db_index=True, default=True, help_text='Indicates if the record is active (soft delete)')),
+                ('document_type', models.CharField(help_text='Document type', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Selection parameters (exam, section, month...)')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='Job status', max_length=20)),
+                ('total', models.IntegerField(default=0, help_text='Documents selected')),
+                ('rendered', models.IntegerField(default=0, help_text='Documents rendered')),
+                ('skipped', models.IntegerField(default=0, help_text='Unchanged documents skipped')),
+                ('failed', models.IntegerField(default=0, help_text='Documents that could not be rendered')),
+                ('error_message', models.TextField(blank=True, help_text='Failure reason', null=True)),
+                ('started_at', models.DateTimeField(blank=True, help_text='Start time', null=True)),
+                ('completed_at', models.DateTimeField(blank=True, help_text='End time', null=True)),
+                ('college', models.ForeignKey(help_text='College reference', on_delete=django.db.models.deletion.CASCADE, related_name='document_batches', to='core.college')),
+                ('created_by', models.ForeignKey(blank=True, help_text='User who created this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('requested_by', models.ForeignKey(help_text='Requested by', on_delete=django.db.models.deletion.CASCADE, related_name='document_batches', to=settings.AUTH_USER_MODEL)),
+                ('updated_by', models.ForeignKey(blank=True, help_text='User who last updated this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'document_batch',
+                'indexes': [models.Index(fields=['college', 'document_type', 'status'], name='document_ba_college_f202d6_idx')],
+            },
+        ),
+    ]
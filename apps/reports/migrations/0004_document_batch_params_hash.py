@@ -0,0 +1,56 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:04
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+IN_FLIGHT_STATUSES = ('pending', 'running')
+
+
+def _params_hash(document_type, params):
+    payload = json.dumps({'document_type': document_type, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def backfill_params_hash(apps, schema_editor):
+    """Hash existing batches and fail all but the newest in-flight batch of each request."""
+    DocumentBatch = apps.get_model('reports', 'DocumentBatch')
+    batches = list(DocumentBatch.objects.order_by('-created_at', '-pk'))
+    in_flight = set()
+    for batch in batches:
+        batch.params_hash = _params_hash(batch.document_type, batch.params)
+        if batch.status in IN_FLIGHT_STATUSES:
+            key = (batch.college_id, batch.params_hash)
+            if key in in_flight:
+                batch.status = 'failed'
+                batch.error_message = 'Superseded by a newer identical batch.'
+                batch.completed_at = timezone.now()
+            in_flight.add(key)
+    DocumentBatch.objects.bulk_update(
+        batches, ['params_hash', 'status', 'error_message', 'completed_at'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_uploaded_file'),
+        ('reports', '0003_document_batches'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentbatch',
+            name='params_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash of document type and parameters, used to de-duplicate requests', max_length=64),
+        ),
+        migrations.RunPython(backfill_params_hash, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='documentbatch',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('college', 'params_hash'), name='uniq_inflight_document_batch'),
+        ),
+    ]
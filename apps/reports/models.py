@@ -3,6 +3,7 @@ Reports models for templates and generated reports.
 """
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
 from apps.core.models import CollegeScopedModel, AuditModel, College
 
@@ -31,6 +32,18 @@ class ReportTemplate(CollegeScopedModel):
 
 
 class GeneratedReport(AuditModel):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    IN_FLIGHT_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
     template = models.ForeignKey(
         ReportTemplate,
         on_delete=models.SET_NULL,
@@ -48,11 +61,37 @@ class GeneratedReport(AuditModel):
     file = models.FileField(upload_to='reports/generated/', null=True, blank=True, help_text="Report file")
     filters = models.JSONField(null=True, blank=True, help_text="Applied filters")
     generation_date = models.DateField(help_text="Generation date")
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_COMPLETED,
+        help_text="Generation status"
+    )
+    file_format = models.CharField(max_length=10, default='csv', help_text="Output format (csv/xlsx)")
+    filter_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Hash of template, effective filters and format, used to de-duplicate requests"
+    )
+    row_count = models.IntegerField(null=True, blank=True, help_text="Rows written")
+    error_message = models.TextField(null=True, blank=True, help_text="Failure reason")
+    started_at = models.DateTimeField(null=True, blank=True, help_text="Generation start time")
+    completed_at = models.DateTimeField(null=True, blank=True, help_text="Generation end time")
 
     class Meta:
         db_table = 'generated_report'
         indexes = [
             models.Index(fields=['template', 'generated_by', 'generation_date']),
+            models.Index(fields=['template', 'filter_hash', 'status']),
+        ]
+        constraints = [
+            # At most one in-flight run per identical request
+            models.UniqueConstraint(
+                fields=['template', 'filter_hash'],
+                condition=Q(status__in=['pending', 'running']),
+                name='uniq_inflight_generated_report',
+            ),
         ]
 
     def __str__(self):
@@ -85,3 +124,75 @@ class SavedReport(CollegeScopedModel):
 
     def __str__(self):
         return f"{self.name} ({self.report_type})"
+
+
+class DocumentBatch(AuditModel):
+    """
+    A batch PDF rendering job (mark sheets, progress cards, tabulation
+    sheets, payslips) for a whole exam/section or payroll month.
+    """
+    college = models.ForeignKey(
+        College,
+        on_delete=models.CASCADE,
+        related_name='document_batches',
+        help_text="College reference"
+    )
+    document_type = models.CharField(max_length=50, help_text="Document type")
+    params = models.JSONField(default=dict, blank=True, help_text="Selection parameters (exam, section, month...)")
+    params_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Hash of document type and parameters, used to de-duplicate requests"
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='document_batches',
+        help_text="Requested by"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=GeneratedReport.STATUS_CHOICES,
+        default=GeneratedReport.STATUS_PENDING,
+        help_text="Job status"
+    )
+    total = models.IntegerField(default=0, help_text="Documents selected")
+    rendered = models.IntegerField(default=0, help_text="Documents rendered")
+    skipped = models.IntegerField(default=0, help_text="Unchanged documents skipped")
+    failed = models.IntegerField(default=0, help_text="Documents that could not be rendered")
+    error_message = models.TextField(null=True, blank=True, help_text="Failure reason")
+    started_at = models.DateTimeField(null=True, blank=True, help_text="Start time")
+    completed_at = models.DateTimeField(null=True, blank=True, help_text="End time")
+
+    class Meta:
+        db_table = 'document_batch'
+        indexes = [
+            models.Index(fields=['college', 'document_type', 'status']),
+        ]
+        constraints = [
+            # At most one in-flight batch per identical request
+            models.UniqueConstraint(
+                fields=['college', 'params_hash'],
+                condition=Q(status__in=['pending', 'running']),
+                name='uniq_inflight_document_batch',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.document_type} batch {self.id} ({self.status})"
+
+
+class RenderedDocument(models.Model):
+    """Content hash of the last rendered PDF per document, used to skip unchanged ones."""
+    document_type = models.CharField(max_length=50, help_text="Document type")
+    object_id = models.PositiveIntegerField(help_text="Primary key of the document row")
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the rendered HTML")
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rendered_document'
+        unique_together = ['document_type', 'object_id']
+
+    def __str__(self):
+        return f"{self.document_type}:{self.object_id}"
@@ -0,0 +1,197 @@
+"""
+Registry of report types the generation engine knows how to run.
+
+A ReportTemplate's report_type selects a definition here; its query_params
+supply default filters that callers may override per request. Only filters
+declared on the definition are applied, so templates cannot inject arbitrary
+ORM lookups.
+"""
+from apps.core.exports import ExportColumn
+
+
+def _full_name(first, middle, last):
+    return ' '.join(part for part in (first, middle, last) if part)
+
+
+class ReportDefinition:
+    """
+    Describes how to build one report type.
+
+    Args:
+        report_type (str): Key matched against ReportTemplate.report_type
+        title (str): Human readable title, used as the sheet name
+        queryset (callable): college_id -> base queryset
+        columns (list[ExportColumn]): Output columns
+        filters (dict): Public filter name -> ORM lookup
+    """
+
+    def __init__(self, report_type, title, queryset, columns, filters=None):
+        self.report_type = report_type
+        self.title = title
+        self._queryset = queryset
+        self.columns = columns
+        self.filters = filters or {}
+
+    def clean_filters(self, raw_filters):
+        """Drop unknown and empty filters so equivalent requests hash the same."""
+        return {
+            key: value
+            for key, value in (raw_filters or {}).items()
+            if key in self.filters and value not in (None, '', [])
+        }
+
+    def build_queryset(self, college_id, filters):
+        queryset = self._queryset(college_id)
+        lookups = {self.filters[key]: value for key, value in self.clean_filters(filters).items()}
+        if lookups:
+            queryset = queryset.filter(**lookups)
+        return queryset
+
+
+_REGISTRY = {}
+
+
+def register_report(definition):
+    _REGISTRY[definition.report_type] = definition
+    return definition
+
+
+def get_report_definition(report_type):
+    return _REGISTRY.get(report_type)
+
+
+def registered_report_types():
+    return sorted(_REGISTRY)
+
+
+def _students(college_id):
+    from apps.students.models import Student
+    return Student.objects.all_colleges().filter(
+        college_id=college_id, is_active=True
+    ).order_by('admission_number')
+
+
+def _fee_collections(college_id):
+    from apps.fees.models import FeeCollection
+    return FeeCollection.objects.filter(
+        student__college_id=college_id, is_active=True
+    ).order_by('payment_date', 'id')
+
+
+def _fee_defaulters(college_id):
+    from apps.fees.models import FeeStructure
+    return FeeStructure.objects.filter(
+        student__college_id=college_id, is_active=True, is_paid=False, balance__gt=0
+    ).order_by('due_date', 'student__admission_number')
+
+
+def _subject_attendance(college_id):
+    from django.db.models import ExpressionWrapper, F, FloatField
+    from apps.attendance.models import StudentSubjectAttendance
+    return StudentSubjectAttendance.objects.filter(
+        college_id=college_id, total_count__gt=0
+    ).annotate(
+        percentage=ExpressionWrapper(F('present_count') * 100.0 / F('total_count'), output_field=FloatField())
+    ).order_by('percentage', 'student__admission_number')
+
+
+register_report(ReportDefinition(
+    report_type='student_list',
+    title='Students',
+    queryset=_students,
+    columns=[
+        ExportColumn('Admission No', 'admission_number'),
+        ExportColumn('Name', 'first_name', 'middle_name', 'last_name', formatter=_full_name),
+        ExportColumn('Program', 'program__name'),
+        ExportColumn('Class', 'current_class__name'),
+        ExportColumn('Section', 'current_section__name'),
+        ExportColumn('Email', 'email'),
+        ExportColumn('Phone', 'phone'),
+        ExportColumn('Admission Date', 'admission_date'),
+    ],
+    filters={
+        'program': 'program_id',
+        'class': 'current_class_id',
+        'section': 'current_section_id',
+        'academic_year': 'academic_year_id',
+        'category': 'category_id',
+        'is_alumni': 'is_alumni',
+    },
+))
+
+register_report(ReportDefinition(
+    report_type='fee_collection',
+    title='Fee Collections',
+    queryset=_fee_collections,
+    columns=[
+        ExportColumn('Payment Date', 'payment_date'),
+        ExportColumn('Admission No', 'student__admission_number'),
+        ExportColumn(
+            'Student', 'student__first_name', 'student__middle_name', 'student__last_name',
+            formatter=_full_name
+        ),
+        ExportColumn('Amount', 'amount'),
+        ExportColumn('Payment Method', 'payment_method'),
+        ExportColumn('Status', 'status'),
+        ExportColumn('Transaction ID', 'transaction_id'),
+    ],
+    filters={
+        'from_date': 'payment_date__gte',
+        'to_date': 'payment_date__lte',
+        'status': 'status',
+        'payment_method': 'payment_method',
+        'program': 'student__program_id',
+        'class': 'student__current_class_id',
+    },
+))
+
+register_report(ReportDefinition(
+    report_type='fee_defaulters',
+    title='Fee Defaulters',
+    queryset=_fee_defaulters,
+    columns=[
+        ExportColumn('Admission No', 'student__admission_number'),
+        ExportColumn(
+            'Student', 'student__first_name', 'student__middle_name', 'student__last_name',
+            formatter=_full_name
+        ),
+        ExportColumn('Fee Type', 'fee_master__fee_type__name'),
+        ExportColumn('Due Date', 'due_date'),
+        ExportColumn('Amount', 'amount'),
+        ExportColumn('Paid', 'paid_amount'),
+        ExportColumn('Balance', 'balance'),
+    ],
+    filters={
+        'program': 'student__program_id',
+        'class': 'student__current_class_id',
+        'section': 'student__current_section_id',
+        'academic_year': 'fee_master__academic_year_id',
+        'due_before': 'due_date__lte',
+    },
+))
+
+register_report(ReportDefinition(
+    report_type='subject_attendance',
+    title='Subject Attendance',
+    queryset=_subject_attendance,
+    columns=[
+        ExportColumn('Admission No', 'student__admission_number'),
+        ExportColumn(
+            'Student', 'student__first_name', 'student__middle_name', 'student__last_name',
+            formatter=_full_name
+        ),
+        ExportColumn('Subject', 'subject_assignment__subject__name'),
+        ExportColumn('Class', 'subject_assignment__class_obj__name'),
+        ExportColumn('Section', 'subject_assignment__section__name'),
+        ExportColumn('Classes Held', 'total_count'),
+        ExportColumn('Present', 'present_count'),
+        ExportColumn('Percentage', 'percentage', formatter=lambda value: round(value, 2)),
+    ],
+    filters={
+        'below': 'percentage__lt',
+        'subject': 'subject_assignment__subject_id',
+        'class': 'subject_assignment__class_obj_id',
+        'section': 'subject_assignment__section_id',
+        'teacher': 'subject_assignment__teacher_id',
+    },
+))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from .models import ReportTemplate, GeneratedReport, SavedReport
+from .documents import registered_document_types
+from .models import ReportTemplate, GeneratedReport, SavedReport, DocumentBatch
 
 
 class ReportTemplateSerializer(serializers.ModelSerializer):
@@ -13,6 +14,47 @@ class GeneratedReportSerializer(serializers.ModelSerializer):
     class Meta:
         model = GeneratedReport
         fields = '__all__'
+        read_only_fields = [
+            'status', 'filter_hash', 'row_count', 'error_message', 'started_at', 'completed_at',
+        ]
+
+
+class GeneratedReportStatusSerializer(serializers.ModelSerializer):
+    """Lightweight payload for polling a report run."""
+
+    class Meta:
+        model = GeneratedReport
+        fields = [
+            'id', 'template', 'status', 'file', 'file_format', 'row_count',
+            'error_message', 'started_at', 'completed_at',
+        ]
+        read_only_fields = fields
+
+
+class ReportGenerateSerializer(serializers.Serializer):
+    filters = serializers.DictField(required=False, default=dict)
+    file_format = serializers.ChoiceField(choices=['csv', 'xlsx'], default='csv')
+
+
+class DocumentBatchSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DocumentBatch
+        fields = [
+            'id', 'college', 'document_type', 'params', 'requested_by', 'status',
+            'total', 'rendered', 'skipped', 'failed', 'error_message',
+            'started_at', 'completed_at', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class DocumentBatchRequestSerializer(serializers.Serializer):
+    document_type = serializers.ChoiceField(choices=registered_document_types())
+    params = serializers.DictField(
+        child=serializers.IntegerField(),
+        required=False,
+        default=dict,
+        help_text="exam/section for exam documents, month/year for payslips",
+    )
 
 
 class SavedReportSerializer(serializers.ModelSerializer):
@@ -0,0 +1,419 @@
+"""
+Report generation engine.
+
+Requests are recorded as pending GeneratedReport rows and executed by a
+worker (Celery when installed, otherwise an in-process thread pool), so
+heavy reports never run inside the request cycle. Identical in-flight
+requests share one run via GeneratedReport.filter_hash (DocumentBatch.params_hash
+for document batches); an in-flight run older than REPORT_STALE_MINUTES is
+taken as orphaned by a dead worker, marked failed and queued again.
+
+DocumentBatchService renders PDF documents (mark sheets, progress cards,
+tabulation sheets, payslips) for a whole exam or payroll month on the same
+worker, converting HTML to PDF on a process pool and skipping documents
+whose rendered content has not changed since the last run.
+"""
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.core.documents import compiled_template, content_hash, convert_many
+from apps.core.exports import EXPORT_FORMATS, iter_csv, iter_export_rows, iter_xlsx
+from .documents import get_document_definition, registered_document_types
+from .models import DocumentBatch, GeneratedReport, RenderedDocument
+from .registry import get_report_definition, registered_report_types
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STALE_MINUTES = 60
+
+
+def compute_filter_hash(template_id, filters, file_format):
+    """Stable hash of everything that determines a report's content."""
+    payload = json.dumps(
+        {'template': template_id, 'filters': filters, 'format': file_format},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def compute_params_hash(document_type, params):
+    """Stable hash of everything that determines a document batch's selection."""
+    payload = json.dumps({'document_type': document_type, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _stale_before():
+    return timezone.now() - timedelta(minutes=getattr(settings, 'REPORT_STALE_MINUTES', DEFAULT_STALE_MINUTES))
+
+
+class ReportGenerationService:
+    """Queue and execute report runs for a ReportTemplate."""
+
+    def __init__(self, template):
+        self.template = template
+        self.definition = get_report_definition(template.report_type)
+        if self.definition is None:
+            raise ValidationError({
+                'report_type': (
+                    f"Report type '{template.report_type}' cannot be generated. "
+                    f"Available types: {', '.join(registered_report_types())}."
+                )
+            })
+
+    def effective_filters(self, filters=None):
+        """Template defaults overridden by request filters, restricted to known keys."""
+        merged = dict(self.template.query_params or {})
+        merged.update(filters or {})
+        return self.definition.clean_filters(merged)
+
+    def request(self, user, filters=None, file_format='csv'):
+        """
+        Queue a run, or join an identical one that is already in flight.
+
+        Returns:
+            tuple[GeneratedReport, bool]: The report and whether a new run was queued
+        """
+        file_format = (file_format or 'csv').lower()
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({'file_format': f"Unsupported format '{file_format}'."})
+
+        effective = self.effective_filters(filters)
+        filter_hash = compute_filter_hash(self.template.pk, effective, file_format)
+        stale_before = _stale_before()
+
+        with transaction.atomic():
+            in_flight = GeneratedReport.objects.select_for_update().filter(
+                template=self.template,
+                filter_hash=filter_hash,
+                status__in=GeneratedReport.IN_FLIGHT_STATUSES,
+            ).first()
+            if in_flight and in_flight.created_at >= stale_before:
+                return in_flight, False
+            if in_flight:
+                # Worker died mid-run; release the slot so the request can be retried
+                in_flight.status = GeneratedReport.STATUS_FAILED
+                in_flight.error_message = 'Timed out waiting for a worker.'
+                in_flight.completed_at = timezone.now()
+                in_flight.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+
+            try:
+                with transaction.atomic():
+                    report = GeneratedReport.objects.create(
+                        template=self.template,
+                        generated_by=user,
+                        created_by=user,
+                        updated_by=user,
+                        filters=effective,
+                        file_format=file_format,
+                        filter_hash=filter_hash,
+                        generation_date=timezone.localdate(),
+                        status=GeneratedReport.STATUS_PENDING,
+                    )
+            except IntegrityError:
+                # Lost the race against a concurrent identical request
+                return GeneratedReport.objects.get(
+                    template=self.template,
+                    filter_hash=filter_hash,
+                    status__in=GeneratedReport.IN_FLIGHT_STATUSES,
+                ), False
+
+            from .tasks import enqueue_report
+            transaction.on_commit(lambda: enqueue_report(report.pk))
+
+        return report, True
+
+    @staticmethod
+    def run(report_id):
+        """
+        Execute a pending report. Safe to call more than once: only the
+        caller that flips pending -> running does the work.
+        """
+        claimed = GeneratedReport.objects.filter(
+            pk=report_id, status=GeneratedReport.STATUS_PENDING
+        ).update(status=GeneratedReport.STATUS_RUNNING, started_at=timezone.now())
+        if not claimed:
+            return None
+
+        report = GeneratedReport.objects.select_related('template').get(pk=report_id)
+        try:
+            definition = get_report_definition(report.template.report_type)
+            queryset = definition.build_queryset(report.template.college_id, report.filters)
+            row_count = _write_report_file(report, definition, queryset)
+        except Exception as exc:
+            logger.exception("Report %s failed", report_id)
+            report.status = GeneratedReport.STATUS_FAILED
+            report.error_message = str(exc)
+            report.completed_at = timezone.now()
+            report.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+        else:
+            report.status = GeneratedReport.STATUS_COMPLETED
+            report.row_count = row_count
+            report.error_message = None
+            report.completed_at = timezone.now()
+            report.save(update_fields=[
+                'file', 'status', 'row_count', 'error_message', 'completed_at', 'updated_at'
+            ])
+
+        _notify_report_finished(report)
+        return report
+
+
+def _write_report_file(report, definition, queryset):
+    """Stream rows into a temporary file, then hand it to the storage backend."""
+    row_count = 0
+
+    def counted_rows():
+        nonlocal row_count
+        for row in iter_export_rows(queryset, definition.columns):
+            row_count += 1
+            yield row
+
+    headers = [column.header for column in definition.columns]
+    if report.file_format == 'xlsx':
+        chunks = iter_xlsx(headers, counted_rows(), sheet_name=definition.title)
+    else:
+        chunks = iter_csv(headers, counted_rows())
+
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in chunks:
+            tmp.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        tmp.seek(0)
+        filename = (
+            f"{definition.report_type}_{report.pk}_"
+            f"{timezone.now().strftime('%Y%m%d%H%M%S')}.{report.file_format}"
+        )
+        report.file.save(filename, File(tmp), save=False)
+
+    return row_count
+
+
+class DocumentBatchService:
+    """Queue and execute batch PDF rendering jobs."""
+
+    @staticmethod
+    def request(college_id, user, document_type, params=None):
+        """
+        Queue a batch, or return an identical batch that is still in flight.
+
+        Returns:
+            tuple[DocumentBatch, bool]: The batch and whether a new one was queued
+        """
+        definition = get_document_definition(document_type)
+        if definition is None:
+            raise ValidationError({
+                'document_type': (
+                    f"Document type '{document_type}' cannot be rendered. "
+                    f"Available types: {', '.join(registered_document_types())}."
+                )
+            })
+        params = {key: value for key, value in (params or {}).items() if value not in (None, '')}
+        missing = definition.missing_params(params)
+        if missing:
+            raise ValidationError({'params': f"Missing required parameters: {', '.join(missing)}."})
+
+        params_hash = compute_params_hash(document_type, params)
+        stale_before = _stale_before()
+
+        with transaction.atomic():
+            in_flight = DocumentBatch.objects.select_for_update().filter(
+                college_id=college_id,
+                params_hash=params_hash,
+                status__in=GeneratedReport.IN_FLIGHT_STATUSES,
+            ).first()
+            if in_flight and in_flight.created_at >= stale_before:
+                return in_flight, False
+            if in_flight:
+                # Worker died mid-run (restart or deploy); release the slot so the request can be retried
+                in_flight.status = GeneratedReport.STATUS_FAILED
+                in_flight.error_message = 'Timed out waiting for a worker.'
+                in_flight.completed_at = timezone.now()
+                in_flight.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+
+            try:
+                with transaction.atomic():
+                    batch = DocumentBatch.objects.create(
+                        college_id=college_id,
+                        document_type=document_type,
+                        params=params,
+                        params_hash=params_hash,
+                        requested_by=user,
+                        created_by=user,
+                        updated_by=user,
+                    )
+            except IntegrityError:
+                # Lost the race against a concurrent identical request
+                return DocumentBatch.objects.get(
+                    college_id=college_id,
+                    params_hash=params_hash,
+                    status__in=GeneratedReport.IN_FLIGHT_STATUSES,
+                ), False
+
+            from .tasks import enqueue_document_batch
+            transaction.on_commit(lambda: enqueue_document_batch(batch.pk))
+        return batch, True
+
+    @staticmethod
+    def run(batch_id):
+        """Execute a pending batch; only the caller that claims it does the work."""
+        claimed = DocumentBatch.objects.filter(
+            pk=batch_id, status=GeneratedReport.STATUS_PENDING
+        ).update(status=GeneratedReport.STATUS_RUNNING, started_at=timezone.now())
+        if not claimed:
+            return None
+
+        batch = DocumentBatch.objects.get(pk=batch_id)
+        try:
+            _render_batch(batch)
+        except Exception as exc:
+            logger.exception("Document batch %s failed", batch_id)
+            batch.status = GeneratedReport.STATUS_FAILED
+            batch.error_message = str(exc)
+        else:
+            if batch.failed and not batch.rendered:
+                batch.status = GeneratedReport.STATUS_FAILED
+                batch.error_message = batch.error_message or 'No document could be rendered.'
+            else:
+                batch.status = GeneratedReport.STATUS_COMPLETED
+        batch.completed_at = timezone.now()
+        batch.save(update_fields=[
+            'status', 'total', 'rendered', 'skipped', 'failed', 'error_message', 'completed_at', 'updated_at',
+        ])
+        _notify_batch_finished(batch)
+        return batch
+
+
+def _render_batch(batch):
+    """
+    Render every document of the batch to HTML with one compiled template,
+    convert the changed ones to PDF on the process pool and store them
+    through the documents' FileFields.
+    """
+    definition = get_document_definition(batch.document_type)
+    definition.prepare(batch.college_id, batch.params, batch.requested_by)
+    documents = definition.documents(batch.college_id, batch.params)
+    batch.total = len(documents)
+    if not documents:
+        return
+
+    shared = definition.shared(batch.college_id, batch.params, documents)
+    template = compiled_template(definition.template)
+    previous = dict(
+        RenderedDocument.objects.filter(
+            document_type=batch.document_type, object_id__in=[document.pk for document in documents]
+        ).values_list('object_id', 'content_hash')
+    )
+
+    by_pk = {}
+    hashes = {}
+    pending = []
+    for document in documents:
+        html = template.render(definition.context(document, shared))
+        digest = content_hash(html)
+        if previous.get(document.pk) == digest and getattr(document, definition.file_field):
+            batch.skipped += 1
+            continue
+        by_pk[document.pk] = document
+        hashes[document.pk] = digest
+        pending.append((document.pk, html))
+
+    changed = []
+    superseded = []
+    for pk, pdf, error in convert_many(pending):
+        document = by_pk[pk]
+        if error or not pdf:
+            batch.failed += 1
+            batch.error_message = error or 'PDF rendering is unavailable (WeasyPrint is not installed).'
+            if error:
+                logger.warning("Document %s %s failed to render: %s", batch.document_type, pk, error)
+            continue
+        field = getattr(document, definition.file_field)
+        old_name = field.name
+        try:
+            field.save(definition.filename(document), ContentFile(pdf), save=False)
+        except Exception as exc:
+            logger.exception("Storing document %s %s failed", batch.document_type, pk)
+            field.name = old_name
+            batch.failed += 1
+            batch.error_message = str(exc)
+            continue
+        if old_name and old_name != field.name:
+            superseded.append(old_name)
+        changed.append(document)
+
+    if changed:
+        model = type(changed[0])
+        storage = getattr(changed[0], definition.file_field).storage
+        try:
+            with transaction.atomic():
+                model.objects.bulk_update(changed, [definition.file_field], batch_size=500)
+                RenderedDocument.objects.bulk_create(
+                    [
+                        RenderedDocument(
+                            document_type=batch.document_type, object_id=document.pk, content_hash=hashes[document.pk]
+                        )
+                        for document in changed
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['document_type', 'object_id'],
+                    update_fields=['content_hash', 'rendered_at'],
+                )
+                # Rows point at the new files only once this commits
+                transaction.on_commit(lambda: _delete_files(storage, superseded))
+        except Exception:
+            _delete_files(storage, [getattr(document, definition.file_field).name for document in changed])
+            raise
+    batch.rendered = len(changed)
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("Could not delete stored document %s", name, exc_info=True)
+
+
+def _notify_batch_finished(batch):
+    """Push a documents_ready/documents_failed event to the requester's SSE channel."""
+    try:
+        from apps.communication.redis_pubsub import publish_event
+        event_type = 'documents_ready' if batch.status == GeneratedReport.STATUS_COMPLETED else 'documents_failed'
+        publish_event(f"user:{batch.requested_by_id}", event_type, {
+            'batch_id': batch.pk,
+            'document_type': batch.document_type,
+            'status': batch.status,
+            'rendered': batch.rendered,
+            'skipped': batch.skipped,
+            'failed': batch.failed,
+            'error': batch.error_message,
+        })
+    except Exception as exc:  # pragma: no cover - notification is best effort
+        logger.warning("Could not publish document batch event for %s: %s", batch.pk, exc)
+
+
+def _notify_report_finished(report):
+    """Push a report_ready/report_failed event to the requester's SSE channel."""
+    try:
+        from apps.communication.redis_pubsub import publish_event
+        event_type = 'report_ready' if report.status == GeneratedReport.STATUS_COMPLETED else 'report_failed'
+        publish_event(f"user:{report.generated_by_id}", event_type, {
+            'report_id': report.pk,
+            'template_id': report.template_id,
+            'status': report.status,
+            'row_count': report.row_count,
+            'file': report.file.name if report.file else None,
+            'error': report.error_message,
+        })
+    except Exception as exc:  # pragma: no cover - notification is best effort
+        logger.warning("Could not publish report event for %s: %s", report.pk, exc)
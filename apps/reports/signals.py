@@ -10,5 +10,5 @@ from .models import GeneratedReport
 
 @receiver(post_save, sender=GeneratedReport)
 def generated_report_post_save(sender, instance, created, **kwargs):
-    if created:
+    if created and instance.status == GeneratedReport.STATUS_COMPLETED:
         print(f"[Reports] Report generated by {instance.generated_by} on {instance.generation_date}.")
@@ -0,0 +1,109 @@
+"""
+Celery tasks and dispatch helpers for report generation and batch
+document rendering.
+When Celery is not installed, runs are handed to an in-process thread pool
+so they still execute outside the request/response cycle.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+try:
+    from celery import shared_task  # type: ignore
+    CELERY_AVAILABLE = True
+except ImportError:  # pragma: no cover - fallback when Celery is not available
+    CELERY_AVAILABLE = False
+
+    def shared_task(*dargs, **dkwargs):
+        def decorator(func):
+            def wrapped(*args, **kwargs):
+                return func(*args, **kwargs)
+
+            wrapped.apply_async = lambda args=None, kwargs=None, eta=None: func(*(args or []), **(kwargs or {}))
+            wrapped.delay = lambda *args, **kwargs: func(*args, **kwargs)
+            return wrapped
+
+        if dargs and callable(dargs[0]) and len(dargs) == 1 and not dkwargs:
+            return decorator(dargs[0])
+        return decorator
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'REPORT_WORKERS', 2),
+                thread_name_prefix='report-worker',
+            )
+    return _executor
+
+
+@shared_task
+def generate_report(report_id):
+    """Execute a queued GeneratedReport."""
+    from .services import ReportGenerationService
+
+    report = ReportGenerationService.run(report_id)
+    return f"Report {report_id}: {report.status if report else 'skipped'}"
+
+
+def _run_in_worker(report_id):
+    close_old_connections()
+    try:
+        generate_report(report_id)
+    except Exception:  # pragma: no cover - run() records failures itself
+        logger.exception("Report worker crashed for %s", report_id)
+    finally:
+        # Worker threads own their DB connections
+        connections.close_all()
+
+
+def enqueue_report(report_id):
+    """
+    Dispatch a report run. Set REPORTS_RUN_SYNC = True to run inline
+    (useful for tests and management commands).
+    """
+    if getattr(settings, 'REPORTS_RUN_SYNC', False):
+        generate_report(report_id)
+    elif CELERY_AVAILABLE:
+        generate_report.delay(report_id)
+    else:
+        _get_executor().submit(_run_in_worker, report_id)
+
+
+@shared_task
+def render_document_batch(batch_id):
+    """Execute a queued DocumentBatch."""
+    from .services import DocumentBatchService
+
+    batch = DocumentBatchService.run(batch_id)
+    return f"Document batch {batch_id}: {batch.status if batch else 'skipped'}"
+
+
+def _render_in_worker(batch_id):
+    close_old_connections()
+    try:
+        render_document_batch(batch_id)
+    except Exception:  # pragma: no cover - run() records failures itself
+        logger.exception("Document worker crashed for %s", batch_id)
+    finally:
+        connections.close_all()
+
+
+def enqueue_document_batch(batch_id):
+    """Dispatch a document batch; honours REPORTS_RUN_SYNC like enqueue_report."""
+    if getattr(settings, 'REPORTS_RUN_SYNC', False):
+        render_document_batch(batch_id)
+    elif CELERY_AVAILABLE:
+        render_document_batch.delay(batch_id)
+    else:
+        _get_executor().submit(_render_in_worker, batch_id)
@@ -0,0 +1,165 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import AcademicSession, Class, Faculty, Program, Section, Subject
+from apps.core.models import AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.examinations.models import Exam, ExamType, MarkSheet, MarksGrade, MarksRegister, StudentMarks
+from apps.examinations.services import ExamResultService
+from apps.reports.models import DocumentBatch, GeneratedReport
+from apps.reports.services import DocumentBatchService
+from apps.students.models import Student
+
+
+def fake_pdf(html):
+    return b"%PDF-1.4 " + html.encode("utf-8")[:64]
+
+
+@mock.patch("apps.core.documents.html_to_pdf", side_effect=fake_pdf)
+class DocumentBatchServiceTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, REPORTS_RUN_SYNC=True, DOCUMENT_RENDER_WORKERS=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.college = College.objects.create(
+            code="DOC",
+            name="Document College",
+            short_name="DOC",
+            email="info@doc.test",
+            phone="9999999996",
+            address_line1="1 Print Rd",
+            city="City",
+            state="State",
+            pincode="000012",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        year = AcademicYear.objects.create(
+            college=self.college, year="2025-2026",
+            start_date=date(2025, 6, 1), end_date=date(2026, 5, 31), is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college, academic_year=year, name="Semester 1", semester=1,
+            start_date=date(2025, 6, 1), end_date=date(2025, 11, 30), is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        program = Program.objects.create(
+            college=self.college, faculty=faculty, code="BSC", name="B.Sc", short_name="BSC",
+            program_type="ug", duration=3, duration_type="year",
+        )
+        class_obj = Class.objects.create(
+            college=self.college, program=program, academic_session=session, name="BSC-1", semester=1, year=1,
+        )
+        section = Section.objects.create(class_obj=class_obj, name="A")
+        MarksGrade.objects.create(college=self.college, name="Pass", grade="P", min_percentage=0, max_percentage=100)
+        exam_type = ExamType.objects.create(college=self.college, name="Final", code="FIN")
+        self.exam = Exam.objects.create(
+            college=self.college, name="Final Exam", exam_type=exam_type, class_obj=class_obj,
+            academic_session=session, start_date=date(2025, 11, 1), end_date=date(2025, 11, 15),
+        )
+        subject = Subject.objects.create(
+            college=self.college, code="PHY", name="Physics", short_name="PHY", subject_type="theory",
+            credits=4, max_marks=100, pass_marks=40,
+        )
+        register = MarksRegister.objects.create(
+            exam=self.exam, subject=subject, section=section, max_marks=100, pass_marks=40
+        )
+        self.user = User.objects.create_user(
+            username="doc_admin", email="admin@doc.test", password="dummy-pass",
+            college=self.college, user_type=UserType.COLLEGE_ADMIN,
+        )
+        for roll in (1, 2):
+            student_user = User.objects.create_user(
+                username=f"doc_student_{roll}", email=f"doc{roll}@doc.test", password="dummy-pass",
+                college=self.college, user_type=UserType.STUDENT,
+            )
+            student = Student.objects.create(
+                user=student_user, college=self.college, admission_number=f"DOC-{roll}",
+                admission_date=date(2025, 6, 1), admission_type="regular", registration_number=f"DOC-REG-{roll}",
+                roll_number=str(roll), program=program, current_class=class_obj, current_section=section,
+                academic_year=year, first_name="Stu", last_name=str(roll), date_of_birth=date(2007, 1, 1),
+                gender="female", email=f"doc{roll}@doc.test",
+            )
+            StudentMarks.objects.create(register=register, student=student, total_marks=50 + roll)
+        ExamResultService(self.exam).process()
+
+    def _render(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            batch, created = DocumentBatchService.request(
+                self.college.id, self.user, 'mark_sheet', {'exam': self.exam.id}
+            )
+        self.assertTrue(created)
+        batch.refresh_from_db()
+        return batch
+
+    def test_mark_sheets_are_rendered_once_per_content(self, html_to_pdf):
+        first = self._render()
+
+        self.assertEqual(first.status, GeneratedReport.STATUS_COMPLETED)
+        self.assertEqual((first.total, first.rendered, first.skipped), (2, 2, 0))
+        sheets = MarkSheet.objects.filter(exam=self.exam)
+        self.assertTrue(all(sheet.sheet_file for sheet in sheets))
+        self.assertTrue(sheets[0].sheet_file.read().startswith(b"%PDF"))
+
+        second = self._render()
+        self.assertEqual((second.rendered, second.skipped), (0, 2))
+
+        StudentMarks.objects.filter(student__roll_number="2").update(total_marks=60)
+        ExamResultService(self.exam).process()
+        third = self._render()
+        self.assertEqual((third.rendered, third.skipped), (1, 1))
+        self.assertEqual(html_to_pdf.call_count, 3)
+
+    def test_identical_request_joins_in_flight_batch_until_it_is_stale(self, html_to_pdf):
+        # on_commit callbacks are not run, so the batch stays pending as if its worker died
+        batch, created = DocumentBatchService.request(self.college.id, self.user, 'mark_sheet', {'exam': self.exam.id})
+        self.assertTrue(created)
+        joined, created = DocumentBatchService.request(self.college.id, self.user, 'mark_sheet', {'exam': self.exam.id})
+        self.assertEqual((joined.pk, created), (batch.pk, False))
+
+        DocumentBatch.objects.filter(pk=batch.pk).update(created_at=timezone.now() - timedelta(hours=2))
+        retried, created = DocumentBatchService.request(self.college.id, self.user, 'mark_sheet', {'exam': self.exam.id})
+        self.assertTrue(created)
+        batch.refresh_from_db()
+        self.assertEqual((batch.status, retried.status), (GeneratedReport.STATUS_FAILED, GeneratedReport.STATUS_PENDING))
+
+    def test_missing_params_are_rejected(self, html_to_pdf):
+        from rest_framework.exceptions import ValidationError
+
+        with self.assertRaises(ValidationError):
+            DocumentBatchService.request(self.college.id, self.user, 'payslip', {'month': 6})
+        self.assertFalse(DocumentBatch.objects.exists())
+
+    def test_failed_document_keeps_its_file_and_is_counted(self, html_to_pdf):
+        self._render()
+        old_names = dict(MarkSheet.objects.filter(exam=self.exam).values_list('pk', 'sheet_file'))
+
+        StudentMarks.objects.update(total_marks=70)
+        ExamResultService(self.exam).process()
+        html_to_pdf.side_effect = [b"%PDF-1.4 new", RuntimeError("layout failed")]
+        batch = self._render()
+
+        self.assertEqual(batch.status, GeneratedReport.STATUS_COMPLETED)
+        self.assertEqual((batch.rendered, batch.failed), (1, 1))
+        self.assertEqual(batch.error_message, "layout failed")
+        for sheet in MarkSheet.objects.filter(exam=self.exam):
+            storage = sheet.sheet_file.storage
+            self.assertTrue(storage.exists(sheet.sheet_file.name))
+            if sheet.sheet_file.name != old_names[sheet.pk]:
+                self.assertFalse(storage.exists(old_names[sheet.pk]))
+        self.assertEqual(
+            sum(sheet.sheet_file.name == old_names[sheet.pk] for sheet in MarkSheet.objects.filter(exam=self.exam)), 1
+        )
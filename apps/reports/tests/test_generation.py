@@ -0,0 +1,81 @@
+import csv
+import io
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, UserType
+from apps.core.models import College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.reports.models import GeneratedReport, ReportTemplate
+from apps.reports.services import ReportGenerationService
+
+
+class ReportGenerationServiceTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, REPORTS_RUN_SYNC=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.college = College.objects.create(
+            code="GEN",
+            name="Generation College",
+            short_name="GEN",
+            email="info@gen.test",
+            phone="9999999995",
+            address_line1="1 Report Rd",
+            city="City",
+            state="State",
+            pincode="000006",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.user = User.objects.create_user(
+            username="gen_user",
+            email="gen@gen.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STAFF,
+        )
+        self.template = ReportTemplate.objects.create(
+            college=self.college,
+            name="Defaulters",
+            report_type="fee_defaulters",
+            query_params={"due_before": "2030-01-01", "unknown": "ignored"},
+        )
+
+    def test_request_runs_and_stores_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            report, created = ReportGenerationService(self.template).request(self.user)
+
+        self.assertTrue(created)
+        report.refresh_from_db()
+        self.assertEqual(report.status, GeneratedReport.STATUS_COMPLETED)
+        self.assertEqual(report.row_count, 0)
+        self.assertEqual(report.filters, {"due_before": "2030-01-01"})
+        with report.file.open('rb') as handle:
+            header = next(csv.reader(io.StringIO(handle.read().decode('utf-8'))))
+        self.assertEqual(header[0], 'Admission No')
+
+    def test_identical_in_flight_requests_are_deduplicated(self):
+        service = ReportGenerationService(self.template)
+        first, first_created = service.request(self.user, filters={"class": ""})
+        second, second_created = service.request(self.user)
+        other, other_created = service.request(self.user, file_format='xlsx')
+
+        self.assertTrue(first_created)
+        self.assertFalse(second_created)
+        self.assertEqual(first.pk, second.pk)
+        self.assertTrue(other_created)
+        self.assertNotEqual(first.pk, other.pk)
+
+    def test_run_is_claimed_once(self):
+        report, _ = ReportGenerationService(self.template).request(self.user)
+
+        self.assertIsNotNone(ReportGenerationService.run(report.pk))
+        self.assertIsNone(ReportGenerationService.run(report.pk))
@@ -8,12 +8,14 @@ from .views import (
     ReportTemplateViewSet,
     GeneratedReportViewSet,
     SavedReportViewSet,
+    DocumentBatchViewSet,
 )
 
 router = DefaultRouter()
 router.register(r'templates', ReportTemplateViewSet, basename='reporttemplate')
 router.register(r'generated', GeneratedReportViewSet, basename='generatedreport')
 router.register(r'saved', SavedReportViewSet, basename='savedreport')
+router.register(r'document-batches', DocumentBatchViewSet, basename='documentbatch')
 
 urlpatterns = [
     path('', include(router.urls)),
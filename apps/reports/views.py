@@ -1,14 +1,21 @@
-from rest_framework import filters, viewsets
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from apps.core.mixins import CollegeScopedMixin, CollegeScopedModelViewSet
-from .models import ReportTemplate, GeneratedReport, SavedReport
+from apps.core.mixins import CollegeScopedMixin, CollegeScopedModelViewSet, CollegeScopedReadOnlyModelViewSet
+from .models import ReportTemplate, GeneratedReport, SavedReport, DocumentBatch
 from .serializers import (
+    DocumentBatchRequestSerializer,
+    DocumentBatchSerializer,
     ReportTemplateSerializer,
     GeneratedReportSerializer,
+    GeneratedReportStatusSerializer,
+    ReportGenerateSerializer,
     SavedReportSerializer,
 )
+from .services import DocumentBatchService, ReportGenerationService
 
 
 class RelatedCollegeScopedModelViewSet(CollegeScopedMixin, viewsets.ModelViewSet):
@@ -45,15 +52,77 @@ class ReportTemplateViewSet(CollegeScopedModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+    @action(detail=True, methods=['post'])
+    def generate(self, request, pk=None):
+        """
+        Queue a report run for this template.
+        Identical in-flight requests return the existing run (200) instead of
+        queuing a new one (202). Poll generated/{id}/status/ or listen for the
+        report_ready SSE event.
+        """
+        template = self.get_object()
+        serializer = ReportGenerateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        report, created = ReportGenerationService(template).request(
+            request.user,
+            filters=serializer.validated_data['filters'],
+            file_format=serializer.validated_data['file_format'],
+        )
+        return Response(
+            GeneratedReportStatusSerializer(report, context={'request': request}).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
 
 class GeneratedReportViewSet(RelatedCollegeScopedModelViewSet):
     queryset = GeneratedReport.objects.select_related('template', 'generated_by')
     serializer_class = GeneratedReportSerializer
     related_college_lookup = 'template__college_id'
-    filterset_fields = ['template', 'generated_by', 'generation_date', 'is_active']
+    filterset_fields = ['template', 'generated_by', 'generation_date', 'is_active', 'status']
     ordering_fields = ['generation_date', 'created_at']
     ordering = ['-generation_date']
 
+    @action(detail=True, methods=['get'], url_path='status')
+    def run_status(self, request, pk=None):
+        """Poll the state of a report run."""
+        report = self.get_object()
+        return Response(GeneratedReportStatusSerializer(report, context={'request': request}).data)
+
+
+class DocumentBatchViewSet(CollegeScopedReadOnlyModelViewSet):
+    queryset = DocumentBatch.objects.select_related('requested_by')
+    serializer_class = DocumentBatchSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['document_type', 'status', 'requested_by']
+    ordering_fields = ['created_at', 'completed_at']
+    ordering = ['-created_at']
+
+    def create(self, request, *args, **kwargs):
+        """
+        Queue a batch render (e.g. mark sheets for an exam/section, payslips
+        for a payroll month). Returns the running batch (200) when an
+        identical one is still in flight. Poll {id}/status/.
+        """
+        serializer = DocumentBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        batch, created = DocumentBatchService.request(
+            self.get_college_id(required=True),
+            request.user,
+            serializer.validated_data['document_type'],
+            serializer.validated_data['params'],
+        )
+        return Response(
+            DocumentBatchSerializer(batch).data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+    @action(detail=True, methods=['get'], url_path='status')
+    def run_status(self, request, pk=None):
+        """Poll the progress of a document batch."""
+        return Response(DocumentBatchSerializer(self.get_object()).data)
+
 
 class SavedReportViewSet(CollegeScopedModelViewSet):
     queryset = SavedReport.objects.all_colleges().select_related('college', 'user')
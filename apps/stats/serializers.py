@@ -447,6 +447,13 @@ class TeacherAttendanceStatsSerializer(serializers.Serializer):
     attendance_percentage = serializers.FloatField()
 
 
+class TeacherStudentAttendanceStatsSerializer(serializers.Serializer):
+    """Attendance of students in the teacher's subjects"""
+    students_tracked = serializers.IntegerField()
+    average_percentage = serializers.FloatField()
+    low_attendance_count = serializers.IntegerField()
+
+
 class TeacherLeaveStatsSerializer(serializers.Serializer):
     """Teacher leave stats"""
     total_applications = serializers.IntegerField()
@@ -461,5 +468,6 @@ class TeacherOverviewStatsSerializer(serializers.Serializer):
     assignments = TeacherAssignmentStatsSerializer()
     study_materials = TeacherStudyMaterialStatsSerializer()
     attendance = TeacherAttendanceStatsSerializer()
+    student_attendance = TeacherStudentAttendanceStatsSerializer()
     leave = TeacherLeaveStatsSerializer()
     generated_at = serializers.DateTimeField()
@@ -1,10 +1,11 @@
 from django.db.models import Avg, Count, Sum, Q, F, Case, When, FloatField, DecimalField
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 from apps.students.models import Student
-from apps.attendance.models import StudentAttendance
+from apps.attendance.models import StudentAttendance, StudentMonthlyAttendance
 from apps.examinations.models import StudentMarks, ExamResult, Exam
 from apps.teachers.models import AssignmentSubmission, HomeworkSubmission, Assignment
 from apps.academic.models import Subject
@@ -95,10 +96,11 @@ class AcademicStatsService:
     def get_attendance_stats(self):
         """Calculate attendance statistics"""
         # Date range (default: current month)
-        from_date = self.filters.get('from_date', timezone.now().replace(day=1).date())
-        to_date = self.filters.get('to_date', timezone.now().date())
+        today = timezone.now().date()
+        from_date = self.filters.get('from_date', today.replace(day=1))
+        to_date = self.filters.get('to_date', today)
 
-        attendance_qs = StudentAttendance.objects.filter(
+        attendance_qs = StudentAttendance.objects.all_colleges().filter(
             student__college_id=self.college_id,
             date__gte=from_date,
             date__lte=to_date
@@ -110,20 +112,55 @@ class AcademicStatsService:
         if self.filters.get('section'):
             attendance_qs = attendance_qs.filter(section=self.filters['section'])
 
-        total_records = attendance_qs.count()
-        present_count = attendance_qs.filter(status='PRESENT').count()
-        absent_count = attendance_qs.filter(status='ABSENT').count()
-        late_count = attendance_qs.filter(status='LATE').count()
-        leave_count = attendance_qs.filter(status='LEAVE').count()
+        if self._covers_whole_months(from_date, to_date, today):
+            # Whole months are answered from the monthly rollup
+            counters_qs = StudentMonthlyAttendance.objects.filter(
+                college_id=self.college_id,
+                month__gte=from_date.replace(day=1),
+                month__lte=to_date.replace(day=1),
+            )
+            if self.filters.get('class'):
+                counters_qs = counters_qs.filter(student__current_class=self.filters['class'])
+            if self.filters.get('section'):
+                counters_qs = counters_qs.filter(student__current_section=self.filters['section'])
+            totals = counters_qs.aggregate(
+                total=Coalesce(Sum('total_count'), 0),
+                present=Coalesce(Sum('present_count'), 0),
+                absent=Coalesce(Sum('absent_count'), 0),
+                late=Coalesce(Sum('late_count'), 0),
+                leave=Coalesce(Sum('leave_count'), 0),
+            )
+            student_attendance = counters_qs.values('student').annotate(
+                total_days=Sum('total_count'),
+                present_days=Sum('present_count'),
+            )
+        else:
+            totals = attendance_qs.aggregate(
+                total=Count('id'),
+                present=Count('id', filter=Q(status__iexact='present')),
+                absent=Count('id', filter=Q(status__iexact='absent')),
+                late=Count('id', filter=Q(status__iexact='late')),
+                leave=Count('id', filter=Q(status__iexact='leave')),
+            )
+            student_attendance = attendance_qs.values('student').annotate(
+                total_days=Count('id'),
+                present_days=Count('id', filter=Q(status__iexact='present')),
+            )
+
+        total_records = totals['total']
+        present_count = totals['present']
+        absent_count = totals['absent']
+        late_count = totals['late']
+        leave_count = totals['leave']
 
         attendance_rate = (present_count / total_records * 100) if total_records > 0 else 0
 
         # Daily attendance trend
         daily_trend_qs = attendance_qs.values('date').annotate(
             total=Count('id'),
-            present=Count('id', filter=Q(status='PRESENT')),
-            absent=Count('id', filter=Q(status='ABSENT')),
-            late=Count('id', filter=Q(status='LATE')),
+            present=Count('id', filter=Q(status__iexact='present')),
+            absent=Count('id', filter=Q(status__iexact='absent')),
+            late=Count('id', filter=Q(status__iexact='late')),
         ).order_by('date')
 
         daily_trend = []
@@ -138,11 +175,6 @@ class AcademicStatsService:
             })
 
         # Chronic absentees (attendance < 75%) and perfect attendance (100%)
-        student_attendance = attendance_qs.values('student').annotate(
-            total_days=Count('id'),
-            present_days=Count('id', filter=Q(status='PRESENT')),
-        )
-
         chronic_absentees = 0
         perfect_attendance = 0
         for student_stat in student_attendance:
@@ -165,6 +197,13 @@ class AcademicStatsService:
             'daily_trend': daily_trend,
         }
 
+    @staticmethod
+    def _covers_whole_months(from_date, to_date, today):
+        """True when the range starts on a month start and ends on a month end (or today)."""
+        if from_date.day != 1 or to_date < from_date:
+            return False
+        return to_date >= today or (to_date + timedelta(days=1)).day == 1
+
     def get_assignment_stats(self):
         """Calculate assignment submission statistics"""
         from_date = self.filters.get('from_date')
@@ -4,7 +4,7 @@ from django.utils import timezone
 from datetime import datetime
 from decimal import Decimal
 
-from apps.fees.models import FeeCollection, FeeStructure, FeeInstallment
+from apps.fees.models import FeeCollection, FeeStructure, FeeInstallment, StudentFeeBalance
 from apps.accounting.models import Income, Expense, IncomeCategory, ExpenseCategory
 from apps.students.models import Student
 
@@ -72,8 +72,19 @@ class FinancialStatsService:
         total_outstanding = total_fee_amount - total_collected
         collection_rate = (total_collected / total_fee_amount * 100) if total_fee_amount > 0 else 0
 
-        # Defaulters (students with balance > 0)
-        defaulters_count = fee_structures.filter(balance__gt=0).values('student').distinct().count()
+        # Defaulters (students with balance > 0). The per-student ledger balance
+        # spans all years, so a year filter still needs the structure scan.
+        if self.filters.get('academic_year'):
+            defaulters_count = fee_structures.filter(balance__gt=0).values('student').distinct().count()
+        else:
+            balances = StudentFeeBalance.objects.filter(
+                college_id=self.college_id, outstanding__gt=0, student__is_active=True
+            )
+            if self.filters.get('program'):
+                balances = balances.filter(student__program=self.filters['program'])
+            if self.filters.get('class'):
+                balances = balances.filter(student__current_class=self.filters['class'])
+            defaulters_count = balances.count()
 
         # Fully paid students
         fully_paid_count = fee_structures.filter(is_paid=True).values('student').distinct().count()
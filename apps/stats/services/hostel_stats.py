@@ -4,6 +4,7 @@ from django.utils import timezone
 from decimal import Decimal
 
 from apps.hostel.models import Hostel, Room, Bed, HostelAllocation, HostelFee
+from apps.hostel.occupancy import BED_OCCUPIED, BED_VACANT
 
 
 class HostelStatsService:
@@ -24,8 +25,8 @@ class HostelStatsService:
 
         beds = Bed.objects.filter(room__hostel__college_id=self.college_id, room__hostel__is_active=True)
         total_beds = beds.count()
-        occupied_beds = beds.filter(status='OCCUPIED').count()
-        vacant_beds = beds.filter(status='VACANT').count()
+        occupied_beds = beds.filter(status=BED_OCCUPIED).count()
+        vacant_beds = beds.filter(status=BED_VACANT).count()
 
         occupancy_rate = (occupied_beds / total_beds * 100) if total_beds > 0 else 0
 
@@ -29,11 +29,11 @@ class HRStatsService:
             leaves = leaves.filter(teacher__department=self.filters['department'])
 
         total_applications = leaves.count()
-        approved_count = leaves.filter(status='APPROVED').count()
-        pending_count = leaves.filter(status='PENDING').count()
-        rejected_count = leaves.filter(status='REJECTED').count()
+        approved_count = leaves.filter(status='approved').count()
+        pending_count = leaves.filter(status='pending').count()
+        rejected_count = leaves.filter(status='rejected').count()
 
-        total_leave_days = leaves.filter(status='APPROVED').aggregate(
+        total_leave_days = leaves.filter(status='approved').aggregate(
             total=Coalesce(Sum('total_days'), 0)
         )['total']
 
@@ -41,10 +41,10 @@ class HRStatsService:
 
         # Leave type distribution
         leave_types = leaves.values('leave_type__name').annotate(
-            approved_count=Count('id', filter=Q(status='APPROVED')),
-            pending_count=Count('id', filter=Q(status='PENDING')),
-            rejected_count=Count('id', filter=Q(status='REJECTED')),
-            total_days=Coalesce(Sum('total_days', filter=Q(status='APPROVED')), 0)
+            approved_count=Count('id', filter=Q(status='approved')),
+            pending_count=Count('id', filter=Q(status='pending')),
+            rejected_count=Count('id', filter=Q(status='rejected')),
+            total_days=Coalesce(Sum('total_days', filter=Q(status='approved')), 0)
         )
 
         leave_type_distribution = []
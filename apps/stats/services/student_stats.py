@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from apps.students.models import Student
-from apps.attendance.models import StudentAttendance
+from apps.attendance.models import StudentAttendance, StudentMonthlyAttendance
 from apps.examinations.models import StudentMarks, ExamResult
 from apps.teachers.models import AssignmentSubmission, HomeworkSubmission
 from apps.fees.models import FeeCollection, FeeStructure, FeeFine
@@ -29,12 +29,17 @@ class StudentStatsService:
         except Student.DoesNotExist:
             return self._empty_response()
 
-        # Attendance stats
-        attendance_qs = StudentAttendance.objects.filter(student_id=self.student_id)
-        total_days = attendance_qs.count()
-        present_days = attendance_qs.filter(status='PRESENT').count()
-        absent_days = attendance_qs.filter(status='ABSENT').count()
-        late_days = attendance_qs.filter(status='LATE').count()
+        # Attendance stats (summed from the monthly rollup)
+        attendance = StudentMonthlyAttendance.objects.filter(student_id=self.student_id).aggregate(
+            total=Coalesce(Sum('total_count'), 0),
+            present=Coalesce(Sum('present_count'), 0),
+            absent=Coalesce(Sum('absent_count'), 0),
+            late=Coalesce(Sum('late_count'), 0),
+        )
+        total_days = attendance['total']
+        present_days = attendance['present']
+        absent_days = attendance['absent']
+        late_days = attendance['late']
 
         attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
 
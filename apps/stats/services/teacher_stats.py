@@ -5,10 +5,13 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from apps.teachers.models import Teacher, Assignment, AssignmentSubmission, StudyMaterial
-from apps.attendance.models import StaffAttendance
+from apps.attendance.models import StaffAttendance, StudentSubjectAttendance
 from apps.academic.models import SubjectAssignment, ClassTeacher
 from apps.hr.models import LeaveApplication, Payroll
 
+# Students below this subject attendance percentage are flagged
+LOW_ATTENDANCE_THRESHOLD = 75
+
 
 class TeacherStatsService:
     """Service class for individual teacher statistics"""
@@ -58,11 +61,22 @@ class TeacherStatsService:
         present_days = attendance.filter(status='PRESENT').count()
         attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
 
+        # Attendance of students in the teacher's subjects (subject-wise rollup)
+        student_attendance = StudentSubjectAttendance.objects.filter(
+            subject_assignment__teacher_id=self.teacher_id, total_count__gt=0
+        ).annotate(
+            pct=F('present_count') * 100.0 / F('total_count')
+        ).aggregate(
+            students=Count('student', distinct=True),
+            average=Avg('pct'),
+            low=Count('student', distinct=True, filter=Q(pct__lt=LOW_ATTENDANCE_THRESHOLD)),
+        )
+
         # Leave
         leaves = LeaveApplication.objects.filter(teacher_id=self.teacher_id)
         total_leaves = leaves.count()
-        approved_leaves = leaves.filter(status='APPROVED').count()
-        pending_leaves = leaves.filter(status='PENDING').count()
+        approved_leaves = leaves.filter(status='approved').count()
+        pending_leaves = leaves.filter(status='pending').count()
 
         return {
             'teacher_info': {
@@ -93,6 +107,11 @@ class TeacherStatsService:
                 'present_days': present_days,
                 'attendance_percentage': round(attendance_percentage, 2),
             },
+            'student_attendance': {
+                'students_tracked': student_attendance['students'],
+                'average_percentage': round(float(student_attendance['average'] or 0), 2),
+                'low_attendance_count': student_attendance['low'],
+            },
             'leave': {
                 'total_applications': total_leaves,
                 'approved': approved_leaves,
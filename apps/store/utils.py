@@ -1,15 +1,8 @@
-from io import BytesIO
-
 from django.core.files.base import ContentFile
 from django.db import transaction
-from django.template.loader import render_to_string
 from django.utils import timezone
 
-try:
-    from weasyprint import HTML
-    WEASYPRINT_AVAILABLE = True
-except Exception:
-    WEASYPRINT_AVAILABLE = False
+from apps.core.documents import render_pdf
 
 
 def generate_document_number(prefix, model_class, field_name='created_at'):
@@ -45,12 +38,7 @@ def generate_document_number(prefix, model_class, field_name='created_at'):
 
 
 def _render_pdf(template_path, context):
-    if not WEASYPRINT_AVAILABLE:
-        return None
-    html_string = render_to_string(template_path, context)
-    pdf_buffer = BytesIO()
-    HTML(string=html_string).write_pdf(pdf_buffer)
-    return pdf_buffer.getvalue()
+    return render_pdf(template_path, context)
 
 
 def _save_pdf(field, filename, pdf_bytes):
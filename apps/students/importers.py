@@ -0,0 +1,240 @@
+"""
+Bulk student import for admission season.
+
+Creates User, Student, Guardian and StudentGuardian rows with bulk_create and
+applies the work normally done by post_save signals (user profile, medical
+record, activity log, team assignment) once per chunk.
+"""
+from django.utils import timezone
+
+from apps.accounts.models import User, UserType
+from apps.attendance.roster import invalidate_rosters
+from apps.academic.models import Class, Program, Section
+from apps.core.hierarchy_services import TeamAutoAssignmentService
+from apps.core.imports import (
+    BulkImportPipeline,
+    create_user_profiles,
+    import_password,
+    parse_date,
+    record_bulk_activity,
+)
+from apps.core.models import AcademicYear
+from .models import Guardian, Student, StudentCategory, StudentGuardian, StudentMedicalRecord
+
+GUARDIAN_COLUMNS = ('guardian_first_name', 'guardian_last_name', 'guardian_relation', 'guardian_phone')
+
+
+class StudentImportPipeline(BulkImportPipeline):
+    """
+    Expected columns (headers are case/space insensitive):
+
+    Required: admission_number, registration_number, admission_date,
+              admission_type, program_code, first_name, last_name,
+              date_of_birth, gender, email
+    Optional: roll_number, class_name, section, category_code, academic_year,
+              middle_name, blood_group, phone, alternate_phone, nationality,
+              religion, caste, mother_tongue, aadhar_number, password,
+              guardian_first_name, guardian_last_name, guardian_relation,
+              guardian_phone, guardian_email, guardian_occupation
+
+    Accounts are created without a usable password unless a password column
+    is supplied; hashing thousands of passwords would dominate the import.
+    """
+    required_columns = (
+        'admission_number', 'registration_number', 'admission_date', 'admission_type',
+        'program_code', 'first_name', 'last_name', 'date_of_birth', 'gender', 'email',
+    )
+    key_column = 'admission_number'
+
+    def prepare(self):
+        college_id = self.college_id
+        self.programs = dict(
+            Program.objects.all_colleges().filter(college_id=college_id).values_list('code', 'id')
+        )
+        # Class names are only unique per program; the newest active class wins
+        self.classes = {}
+        for class_id, program_id, name in Class.objects.all_colleges().filter(
+            college_id=college_id, is_active=True
+        ).order_by('id').values_list('id', 'program_id', 'name'):
+            self.classes[(program_id, name.lower())] = class_id
+        self.sections = {
+            (class_id, name.lower()): section_id
+            for section_id, class_id, name in Section.objects.filter(
+                class_obj__college_id=college_id, is_active=True
+            ).values_list('id', 'class_obj_id', 'name')
+        }
+        self.categories = dict(
+            StudentCategory.objects.all_colleges().filter(college_id=college_id).values_list('code', 'id')
+        )
+        self.academic_years = dict(
+            AcademicYear.objects.all_colleges().filter(college_id=college_id).values_list('year', 'id')
+        )
+        self.current_academic_year = AcademicYear.objects.all_colleges().filter(
+            college_id=college_id, is_current=True
+        ).values_list('id', flat=True).first()
+
+    def clean_row(self, row):
+        data = row.data
+        cleaned = row.cleaned
+        for field in (
+            'admission_number', 'registration_number', 'admission_type', 'roll_number',
+            'first_name', 'middle_name', 'last_name', 'gender', 'blood_group', 'phone',
+            'alternate_phone', 'nationality', 'religion', 'caste', 'mother_tongue',
+            'aadhar_number', 'password',
+        ):
+            cleaned[field] = str(data.get(field) or '').strip() or None
+        cleaned['email'] = str(data.get('email') or '').strip().lower()
+
+        for field in ('admission_date', 'date_of_birth'):
+            cleaned[field] = parse_date(data.get(field))
+            if cleaned[field] is None:
+                row.error(field, 'Enter a valid date (YYYY-MM-DD or DD-MM-YYYY).')
+
+        cleaned['program_id'] = self.programs.get(data.get('program_code'))
+        if not cleaned['program_id']:
+            row.error('program_code', f"Unknown program code '{data.get('program_code')}'.")
+
+        cleaned['current_class_id'] = None
+        cleaned['current_section_id'] = None
+        class_name = str(data.get('class_name') or '').strip()
+        if class_name and cleaned['program_id']:
+            cleaned['current_class_id'] = self.classes.get((cleaned['program_id'], class_name.lower()))
+            if not cleaned['current_class_id']:
+                row.error('class_name', f"Unknown class '{class_name}' for this program.")
+        section_name = str(data.get('section') or '').strip()
+        if section_name:
+            if not cleaned['current_class_id']:
+                row.error('section', 'A section requires a valid class_name.')
+            else:
+                cleaned['current_section_id'] = self.sections.get((cleaned['current_class_id'], section_name.lower()))
+                if not cleaned['current_section_id']:
+                    row.error('section', f"Unknown section '{section_name}' for class '{class_name}'.")
+
+        category_code = data.get('category_code')
+        cleaned['category_id'] = self.categories.get(category_code) if category_code else None
+        if category_code and not cleaned['category_id']:
+            row.error('category_code', f"Unknown category code '{category_code}'.")
+
+        year = data.get('academic_year')
+        cleaned['academic_year_id'] = self.academic_years.get(year) if year else self.current_academic_year
+        if not cleaned['academic_year_id']:
+            row.error('academic_year', 'Unknown academic year and no current academic year is set.')
+
+        guardian = {col: str(data.get(col) or '').strip() for col in GUARDIAN_COLUMNS}
+        if any(guardian.values()):
+            for col, value in guardian.items():
+                if not value:
+                    row.error(col, 'Required when guardian details are provided.')
+            guardian['guardian_email'] = str(data.get('guardian_email') or '').strip() or None
+            guardian['guardian_occupation'] = str(data.get('guardian_occupation') or '').strip() or None
+            cleaned['guardian'] = guardian
+        else:
+            cleaned['guardian'] = None
+
+    def existing_keys(self, keys):
+        return set(
+            Student.objects.all_colleges().filter(
+                college_id=self.college_id, admission_number__in=keys
+            ).values_list('admission_number', flat=True)
+        )
+
+    def validate_chunk(self, rows):
+        self.flag_duplicates(rows, 'admission_number', Student.objects.all_colleges())
+        self.flag_duplicates(rows, 'registration_number', Student.objects.all_colleges())
+        self.flag_duplicates(rows, 'email', User.objects.all())
+        # Usernames are derived from admission numbers
+        taken = set(User.objects.filter(
+            username__in=[row.cleaned['admission_number'].lower() for row in rows]
+        ).values_list('username', flat=True))
+        for row in rows:
+            if row.cleaned['admission_number'].lower() in taken:
+                row.error('admission_number', 'A user account with this admission number already exists.')
+
+    def persist(self, rows):
+        now = timezone.now()
+        users = []
+        students = []
+        for row in rows:
+            c = row.cleaned
+            user = User(
+                username=c['admission_number'].lower(),
+                email=c['email'],
+                first_name=c['first_name'],
+                middle_name=c['middle_name'],
+                last_name=c['last_name'],
+                phone=c['phone'],
+                date_of_birth=c['date_of_birth'],
+                college_id=self.college_id,
+                user_type=UserType.STUDENT,
+                password=import_password(c['password']),
+                date_joined=now,
+            )
+            users.append(user)
+            students.append(Student(
+                user=user,
+                college_id=self.college_id,
+                admission_number=c['admission_number'],
+                admission_date=c['admission_date'],
+                admission_type=c['admission_type'],
+                roll_number=c['roll_number'],
+                registration_number=c['registration_number'],
+                program_id=c['program_id'],
+                current_class_id=c['current_class_id'],
+                current_section_id=c['current_section_id'],
+                academic_year_id=c['academic_year_id'],
+                category_id=c['category_id'],
+                first_name=c['first_name'],
+                middle_name=c['middle_name'],
+                last_name=c['last_name'],
+                date_of_birth=c['date_of_birth'],
+                gender=c['gender'],
+                blood_group=c['blood_group'],
+                email=c['email'],
+                phone=c['phone'],
+                alternate_phone=c['alternate_phone'],
+                nationality=c['nationality'] or 'Indian',
+                religion=c['religion'],
+                caste=c['caste'],
+                mother_tongue=c['mother_tongue'],
+                aadhar_number=c['aadhar_number'],
+                created_by=self.user,
+                updated_by=self.user,
+            ))
+
+        User.objects.bulk_create(users)
+        Student.objects.bulk_create(students)
+
+        guardians = []
+        guardian_students = []
+        for row, student in zip(rows, students):
+            g = row.cleaned['guardian']
+            if g:
+                guardians.append(Guardian(
+                    first_name=g['guardian_first_name'],
+                    last_name=g['guardian_last_name'],
+                    relation=g['guardian_relation'].lower(),
+                    phone=g['guardian_phone'],
+                    email=g['guardian_email'],
+                    occupation=g['guardian_occupation'],
+                ))
+                guardian_students.append(student)
+        if guardians:
+            Guardian.objects.bulk_create(guardians)
+            StudentGuardian.objects.bulk_create([
+                StudentGuardian(student=student, guardian=guardian, is_primary=True, is_emergency_contact=True)
+                for student, guardian in zip(guardian_students, guardians)
+            ])
+
+        self.after_persist(users, students)
+        return len(students)
+
+    def after_persist(self, users, students):
+        """Batched replacement for the per-row post_save side effects."""
+        create_user_profiles(self.college_id, users)
+        StudentMedicalRecord.objects.bulk_create([
+            StudentMedicalRecord(student=student, blood_group=student.blood_group, created_by=self.user)
+            for student in students
+        ], ignore_conflicts=True)
+        record_bulk_activity(self.college_id, self.user, 'Student', students)
+        TeamAutoAssignmentService.assign_students_to_teams_bulk(students)
+        invalidate_rosters(self.college_id)
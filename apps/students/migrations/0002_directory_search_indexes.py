@@ -0,0 +1,28 @@
+from django.db import migrations
+
+from apps.core.search import create_search_indexes, drop_search_indexes
+
+# Must match StudentViewSet.search_fields and GuardianViewSet.search_fields
+STUDENT_SEARCH_FIELDS = ['first_name', 'last_name', 'admission_number', 'registration_number', 'email', 'phone']
+GUARDIAN_SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'phone']
+
+
+def create_indexes(apps, schema_editor):
+    create_search_indexes(schema_editor, 'student', STUDENT_SEARCH_FIELDS)
+    create_search_indexes(schema_editor, 'guardian', GUARDIAN_SEARCH_FIELDS)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_search_indexes(schema_editor, 'student')
+    drop_search_indexes(schema_editor, 'guardian')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
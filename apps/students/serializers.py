@@ -8,7 +8,10 @@ from .models import (
     StudentAddress, StudentDocument, StudentMedicalRecord, PreviousAcademicRecord,
     StudentPromotion, Certificate, StudentIDCard
 )
+from apps.academic.models import Class, Program, Section
+from apps.core.models import AcademicYear
 from apps.core.serializers import UserBasicSerializer, TenantAuditMixin
+from apps.examinations.models import Exam
 
 User = get_user_model()
 
@@ -327,6 +330,90 @@ class StudentPromotionSerializer(TenantAuditMixin, serializers.ModelSerializer):
         ]
 
 
+class ClassMappingSerializer(serializers.Serializer):
+    """One from -> to class pair of a promotion rule set."""
+    from_class = serializers.IntegerField(help_text="Current class ID")
+    to_class = serializers.IntegerField(help_text="Next class ID")
+
+
+class SectionMappingSerializer(serializers.Serializer):
+    """One from -> to section pair of a promotion rule set."""
+    from_section = serializers.IntegerField(help_text="Current section ID")
+    to_section = serializers.IntegerField(help_text="Next section ID")
+
+
+class BulkPromotionSerializer(serializers.Serializer):
+    """Rule set for promoting a whole program at year end."""
+    program = serializers.IntegerField(help_text="Program ID")
+    academic_year = serializers.IntegerField(help_text="Academic year students are promoted into")
+    promotion_date = serializers.DateField(required=False, help_text="Promotion date (default: today)")
+    class_map = serializers.ListField(
+        child=ClassMappingSerializer(), required=False, default=list,
+        help_text="Next class for each current class"
+    )
+    section_map = serializers.ListField(
+        child=SectionMappingSerializer(), required=False, default=list,
+        help_text="Next section overrides (default: same section name in the next class)"
+    )
+    graduate_classes = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list,
+        help_text="Final classes whose passing students become alumni"
+    )
+    exams = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list,
+        help_text="Exams a student must have passed to be promoted"
+    )
+    min_percentage = serializers.DecimalField(
+        max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False, allow_null=True,
+        help_text="Minimum percentage in each exam"
+    )
+    detained_students = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list,
+        help_text="Student IDs held back regardless of results"
+    )
+    remarks = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    dry_run = serializers.BooleanField(default=False, help_text="Preview without saving")
+
+    def validate(self, attrs):
+        college_id = self.context['college_id']
+        if not Program.objects.all_colleges().filter(pk=attrs['program'], college_id=college_id).exists():
+            raise serializers.ValidationError({'program': 'Program not found in this college.'})
+        if not AcademicYear.objects.all_colleges().filter(pk=attrs['academic_year'], college_id=college_id).exists():
+            raise serializers.ValidationError({'academic_year': 'Academic year not found in this college.'})
+
+        class_map = {pair['from_class']: pair['to_class'] for pair in attrs['class_map']}
+        graduate_classes = set(attrs['graduate_classes'])
+        if not class_map and not graduate_classes:
+            raise serializers.ValidationError({'class_map': 'Map at least one class or graduate class.'})
+        if graduate_classes & set(class_map):
+            raise serializers.ValidationError({'graduate_classes': 'A class cannot be both promoted and graduated.'})
+        class_ids = set(class_map) | set(class_map.values()) | graduate_classes
+        known = set(Class.objects.all_colleges().filter(pk__in=class_ids, college_id=college_id)
+                    .values_list('id', flat=True))
+        if known != class_ids:
+            raise serializers.ValidationError({'class_map': f'Unknown classes: {sorted(class_ids - known)}'})
+
+        section_map = {pair['from_section']: pair['to_section'] for pair in attrs['section_map']}
+        sections = dict(Section.objects.filter(
+            pk__in=set(section_map) | set(section_map.values()), class_obj__college_id=college_id
+        ).values_list('id', 'class_obj_id'))
+        for from_section, to_section in section_map.items():
+            if from_section not in sections or to_section not in sections:
+                raise serializers.ValidationError({'section_map': 'Unknown sections.'})
+            if class_map.get(sections[from_section]) != sections[to_section]:
+                raise serializers.ValidationError({
+                    'section_map': f'Section {to_section} is not in the next class of section {from_section}.'
+                })
+
+        exams = set(attrs['exams'])
+        if len(exams) != Exam.objects.all_colleges().filter(pk__in=exams, college_id=college_id).count():
+            raise serializers.ValidationError({'exams': 'Unknown exams.'})
+
+        attrs['class_map'] = class_map
+        attrs['section_map'] = section_map
+        return attrs
+
+
 # ============================================================================
 # CERTIFICATE SERIALIZERS
 # ============================================================================
@@ -0,0 +1,227 @@
+"""
+Year-end student promotion.
+
+StudentPromotionService promotes a whole program from a rule set with a
+handful of set-based queries per class section rather than one save
+per student:
+
+1. one query loads the program's students and one more finds those who
+   passed every exam in the rule set (an ExamResult with result_status
+   PASS and at least min_percentage);
+2. students are split into promoted, graduated (their class maps to no
+   next class), held back (failed) and detained (listed by id);
+3. one UPDATE per (from section -> to section) move writes the new class,
+   section and academic year, one UPDATE moves held-back and detained
+   students to the new academic year, and one bulk INSERT writes the
+   StudentPromotion history.
+
+Students already in the target academic year are left out, and the
+students are locked before the plan is made, so a retried or double-submitted
+promotion never moves anyone twice.
+
+Queryset updates skip Student.save() and its signals, so once the promotion
+commits the cached attendance rosters are expired and promoted students are
+moved from their old class teacher's team to the new one's. A dry run
+returns the same summary without writing.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.academic.models import Section
+from apps.attendance.roster import invalidate_rosters
+from apps.core.hierarchy_services import TeamAutoAssignmentService
+from apps.examinations.models import ExamResult
+from apps.examinations.services import RESULT_PASS
+
+from .models import Student, StudentPromotion
+
+OUTCOME_PROMOTED = 'promoted'
+OUTCOME_GRADUATED = 'graduated'
+OUTCOME_FAILED = 'failed'
+OUTCOME_DETAINED = 'detained'
+GRADUATION_REMARKS = 'Graduated'
+UPDATE_BATCH_SIZE = 500
+
+
+def _reassign_teams(student_ids_by_section):
+    """Move promoted students from their old class teacher's team to their new one's."""
+    student_ids = [student_id for ids in student_ids_by_section.values() for student_id in ids]
+    if not student_ids:
+        return
+    students = list(
+        Student.objects.all_colleges().filter(pk__in=student_ids).only('id', 'user_id', 'current_section_id')
+    )
+    TeamAutoAssignmentService.remove_students_from_section_teams(
+        [student.user_id for student in students], [section_id for section_id in student_ids_by_section if section_id]
+    )
+    TeamAutoAssignmentService.assign_students_to_teams_bulk(students)
+
+
+class StudentPromotionService:
+    """Promote a program's students to their next class for a new academic year."""
+
+    def __init__(self, college_id, program_id, academic_year_id, promotion_date=None, class_map=None,
+                 section_map=None, exam_ids=(), min_percentage=None, detained_ids=(),
+                 graduate_class_ids=(), remarks=None, user=None):
+        self.college_id = college_id
+        self.program_id = program_id
+        self.academic_year_id = academic_year_id
+        self.promotion_date = promotion_date or timezone.localdate()
+        self.class_map = dict(class_map or {})
+        self.section_map = dict(section_map or {})
+        self.exam_ids = list(exam_ids)
+        self.min_percentage = min_percentage
+        self.detained_ids = set(detained_ids)
+        self.graduate_class_ids = set(graduate_class_ids)
+        self.remarks = remarks
+        self.user = user
+
+    def students(self):
+        """
+        The program's active, non-alumni students in a mapped class, except
+        those already in the target academic year (a retried promotion).
+        """
+        return Student.objects.all_colleges().filter(
+            college_id=self.college_id,
+            program_id=self.program_id,
+            current_class_id__in=set(self.class_map) | self.graduate_class_ids,
+            is_active=True,
+            is_alumni=False,
+        ).exclude(academic_year_id=self.academic_year_id)
+
+    def passing(self):
+        """Students that passed every exam of the rule set."""
+        queryset = self.students()
+        for exam_id in self.exam_ids:
+            results = ExamResult.objects.filter(
+                student_id=OuterRef('pk'), exam_id=exam_id, result_status=RESULT_PASS, is_active=True,
+            )
+            if self.min_percentage is not None:
+                results = results.filter(percentage__gte=self.min_percentage)
+            queryset = queryset.filter(Exists(results))
+        return queryset
+
+    def target_sections(self):
+        """
+        from_section -> to_section for every section of the mapped classes.
+        Sections without an explicit mapping go to the target class's section
+        of the same name, or to no section.
+        """
+        sections = Section.objects.filter(
+            class_obj_id__in=set(self.class_map) | set(self.class_map.values()), is_active=True
+        ).values_list('id', 'class_obj_id', 'name')
+        by_name = {(class_id, name.lower()): section_id for section_id, class_id, name in sections}
+        targets = {}
+        for section_id, class_id, name in sections:
+            if class_id in self.class_map:
+                targets[section_id] = self.section_map.get(
+                    section_id, by_name.get((self.class_map[class_id], name.lower()))
+                )
+        return targets
+
+    def plan(self):
+        """Classify students and group promotions into moves. Returns (moves, held, summary)."""
+        passing = set(self.passing().values_list('id', flat=True)) if self.exam_ids else None
+        rows = self.students().values_list('id', 'current_class_id', 'current_section_id').order_by('id')
+        targets = self.target_sections()
+
+        moves = defaultdict(list)        # (from_class, from_section, to_class, to_section) -> ids
+        outcomes = defaultdict(list)
+        for student_id, class_id, section_id in rows:
+            if student_id in self.detained_ids:
+                outcomes[OUTCOME_DETAINED].append(student_id)
+            elif passing is not None and student_id not in passing:
+                outcomes[OUTCOME_FAILED].append(student_id)
+            elif class_id in self.graduate_class_ids:
+                outcomes[OUTCOME_GRADUATED].append(student_id)
+                moves[(class_id, section_id, None, None)].append(student_id)
+            else:
+                outcomes[OUTCOME_PROMOTED].append(student_id)
+                to_section = self.section_map.get(section_id, targets.get(section_id))
+                moves[(class_id, section_id, self.class_map[class_id], to_section)].append(student_id)
+
+        summary = {
+            'program': self.program_id,
+            'academic_year': self.academic_year_id,
+            'promotion_date': self.promotion_date,
+            'promoted': len(outcomes[OUTCOME_PROMOTED]),
+            'graduated': len(outcomes[OUTCOME_GRADUATED]),
+            'failed': outcomes[OUTCOME_FAILED],
+            'detained': outcomes[OUTCOME_DETAINED],
+            'moves': [
+                {
+                    'from_class': from_class,
+                    'from_section': from_section,
+                    'to_class': to_class,
+                    'to_section': to_section,
+                    'students': len(student_ids),
+                }
+                for (from_class, from_section, to_class, to_section), student_ids in sorted(
+                    moves.items(), key=lambda item: [value or 0 for value in item[0]]
+                )
+            ],
+        }
+        held = outcomes[OUTCOME_FAILED] + outcomes[OUTCOME_DETAINED]
+        return moves, held, summary
+
+    def _update(self, student_ids, **values):
+        updated = 0
+        for start in range(0, len(student_ids), UPDATE_BATCH_SIZE):
+            updated += Student.objects.all_colleges().filter(
+                pk__in=student_ids[start:start + UPDATE_BATCH_SIZE]
+            ).update(**values)
+        return updated
+
+    def promote(self, dry_run=False):
+        """
+        Apply the promotion in one transaction unless `dry_run`. Returns the
+        plan summary with `written` set.
+        """
+        if dry_run:
+            moves, held, summary = self.plan()
+            summary['written'] = False
+            return summary
+
+        now = timezone.now()
+        common = {'academic_year_id': self.academic_year_id, 'updated_by': self.user, 'updated_at': now}
+        history = []
+        with transaction.atomic():
+            # Lock the students first, so a concurrent identical request plans after this one commits
+            list(self.students().select_for_update().values_list('id', flat=True))
+            moves, held, summary = self.plan()
+            for (from_class, from_section, to_class, to_section), student_ids in moves.items():
+                if to_class is None:
+                    self._update(student_ids, is_alumni=True, **common)
+                else:
+                    self._update(student_ids, current_class_id=to_class, current_section_id=to_section, **common)
+                history.extend(
+                    StudentPromotion(
+                        student_id=student_id,
+                        from_class_id=from_class,
+                        to_class_id=to_class or from_class,
+                        from_section_id=from_section,
+                        to_section_id=to_section if to_class else from_section,
+                        promotion_date=self.promotion_date,
+                        academic_year_id=self.academic_year_id,
+                        remarks=self.remarks if to_class else GRADUATION_REMARKS,
+                        created_by=self.user,
+                        updated_by=self.user,
+                    )
+                    for student_id in student_ids
+                )
+            # Held-back students repeat their class in the new academic year
+            self._update(held, **common)
+            StudentPromotion.objects.bulk_create(history, batch_size=1000)
+            # .update() skips the post_save that expires the section rosters
+            college_id = self.college_id
+            transaction.on_commit(lambda: invalidate_rosters(college_id))
+            promoted = {
+                from_section: student_ids
+                for (_, from_section, to_class, _), student_ids in moves.items() if to_class is not None
+            }
+            transaction.on_commit(lambda: _reassign_teams(promoted))
+        summary['written'] = True
+        return summary
@@ -0,0 +1,160 @@
+import io
+from datetime import date
+
+import openpyxl
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserProfile, UserType
+from apps.academic.models import Class, Faculty, Program, Section
+from apps.core.imports import read_tabular_file
+from apps.core.models import AcademicSession, AcademicYear, College
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.students.importers import StudentImportPipeline
+from apps.students.models import Student, StudentGuardian, StudentMedicalRecord
+
+HEADER = (
+    "Admission Number,Registration Number,Admission Date,Admission Type,Program Code,"
+    "Class Name,Section,First Name,Last Name,Date of Birth,Gender,Email,"
+    "Guardian First Name,Guardian Last Name,Guardian Relation,Guardian Phone\n"
+)
+
+
+def _csv(*lines):
+    return SimpleUploadedFile(
+        "students.csv",
+        (HEADER + "".join(line + "\n" for line in lines)).encode("utf-8"),
+        content_type="text/csv",
+    )
+
+
+class StudentImportTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="IMP",
+            name="Import College",
+            short_name="IMP",
+            email="info@imp.test",
+            phone="9999999994",
+            address_line1="1 Import Rd",
+            city="City",
+            state="State",
+            pincode="000007",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(
+            college=self.college, code="SCI", name="Science", short_name="SCI"
+        )
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.class_obj = Class.objects.create(
+            college=self.college,
+            program=self.program,
+            academic_session=session,
+            name="BSC-1",
+            semester=1,
+            year=1,
+        )
+        self.section = Section.objects.create(class_obj=self.class_obj, name="A", max_students=60)
+        self.user = User.objects.create_user(
+            username="imp_admin",
+            email="admin@imp.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+
+    def test_valid_rows_are_created_with_side_effects(self):
+        upload = _csv(
+            "IMP001,REG001,2025-06-10,regular,BSC,bsc-1,a,Asha,Rao,2007-01-02,female,Asha@imp.test,"
+            "Ravi,Rao,Father,9000000001",
+            "IMP002,REG002,10-06-2025,regular,BSC,,,Ben,Das,2007-03-04,male,ben@imp.test,,,,",
+        )
+        result = StudentImportPipeline(self.college.id, user=self.user).run(read_tabular_file(upload))
+
+        self.assertEqual((result['created'], result['failed']), (2, 0))
+        student = Student.objects.get(admission_number="IMP001")
+        self.assertEqual(student.current_section_id, self.section.id)
+        self.assertEqual(student.email, "asha@imp.test")
+        self.assertFalse(student.user.has_usable_password())
+        self.assertTrue(UserProfile.objects.filter(user=student.user).exists())
+        self.assertEqual(StudentMedicalRecord.objects.filter(student__college=self.college).count(), 2)
+        self.assertEqual(StudentGuardian.objects.filter(student=student, is_primary=True).count(), 1)
+
+    def test_invalid_rows_are_reported_and_reruns_skip_existing(self):
+        rows = (
+            "IMP001,REG001,2025-06-10,regular,BSC,,,Asha,Rao,2007-01-02,female,asha@imp.test,,,,",
+            "IMP002,REG001,2025-06-10,regular,NOPE,,,Ben,Das,not-a-date,male,ben@imp.test,,,,",
+        )
+        first = StudentImportPipeline(self.college.id).run(read_tabular_file(_csv(*rows)))
+        self.assertEqual((first['created'], first['failed']), (1, 1))
+        self.assertEqual(first['errors'][0]['row'], 3)
+        self.assertIn('program_code', first['errors'][0]['errors'])
+        self.assertIn('date_of_birth', first['errors'][0]['errors'])
+
+        rerun = StudentImportPipeline(self.college.id).run(read_tabular_file(_csv(*rows)))
+        self.assertEqual((rerun['created'], rerun['skipped']), (0, 1))
+        self.assertEqual(Student.objects.filter(college=self.college).count(), 1)
+
+    def test_dry_run_via_api_writes_nothing(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            reverse('student-bulk-import'),
+            {
+                'file': _csv("IMP009,REG009,2025-06-10,regular,BSC,,,Cara,Roy,2007-05-06,female,cara@imp.test,,,,"),
+                'dry_run': 'true',
+            },
+            format='multipart',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(Student.objects.filter(admission_number="IMP009").exists())
+
+    def test_xlsx_rows_are_read(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append([header.strip() for header in HEADER.split(",")])
+        sheet.append([
+            "IMP010", "REG010", date(2025, 6, 10), "regular", "BSC", "BSC-1", "A", "Dev", "Iyer",
+            date(2007, 7, 8), "male", "dev@imp.test", None, None, None, None,
+        ])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        upload = SimpleUploadedFile("students.xlsx", buffer.getvalue())
+
+        result = StudentImportPipeline(self.college.id).run(read_tabular_file(upload))
+        self.assertEqual((result['created'], result['failed']), (1, 0), result['errors'])
+        self.assertEqual(Student.objects.get(admission_number="IMP010").date_of_birth, date(2007, 7, 8))
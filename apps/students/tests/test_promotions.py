@@ -0,0 +1,285 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import AcademicSession, Class, ClassTeacher, Faculty, Program, Section
+from apps.attendance.roster import class_attendance_rows
+from apps.core.models import AcademicYear, College, HierarchyTeamMember, OrganizationNode
+from apps.core.utils import clear_current_college_id, set_current_college_id
+from apps.examinations.models import Exam, ExamResult, ExamType
+from apps.students.models import Student, StudentPromotion
+from apps.students.services import StudentPromotionService
+
+
+class StudentPromotionServiceTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(
+            code="PRM",
+            name="Promotion College",
+            short_name="PRM",
+            email="info@prm.test",
+            phone="9999999992",
+            address_line1="1 Ladder Rd",
+            city="City",
+            state="State",
+            pincode="000012",
+            country="Testland",
+        )
+        set_current_college_id(self.college.id)
+        self.addCleanup(clear_current_college_id)
+
+        self.year = AcademicYear.objects.create(
+            college=self.college,
+            year="2025-2026",
+            start_date=date(2025, 6, 1),
+            end_date=date(2026, 5, 31),
+            is_current=True,
+        )
+        self.next_year = AcademicYear.objects.create(
+            college=self.college,
+            year="2026-2027",
+            start_date=date(2026, 6, 1),
+            end_date=date(2027, 5, 31),
+        )
+        session = AcademicSession.objects.create(
+            college=self.college,
+            academic_year=self.year,
+            name="Semester 1",
+            semester=1,
+            start_date=date(2025, 6, 1),
+            end_date=date(2025, 11, 30),
+            is_current=True,
+        )
+        faculty = Faculty.objects.create(college=self.college, code="SCI", name="Science", short_name="SCI")
+        self.program = Program.objects.create(
+            college=self.college,
+            faculty=faculty,
+            code="BSC",
+            name="B.Sc",
+            short_name="BSC",
+            program_type="ug",
+            duration=3,
+            duration_type="year",
+        )
+        self.first, self.second, self.final = [
+            Class.objects.create(
+                college=self.college,
+                program=self.program,
+                academic_session=session,
+                name=f"BSC-{number}",
+                semester=number,
+                year=number,
+            )
+            for number in (1, 2, 3)
+        ]
+        self.first_a = Section.objects.create(class_obj=self.first, name="A")
+        self.first_b = Section.objects.create(class_obj=self.first, name="B")
+        self.second_a = Section.objects.create(class_obj=self.second, name="a")
+        self.second_c = Section.objects.create(class_obj=self.second, name="C")
+        self.final_a = Section.objects.create(class_obj=self.final, name="A")
+
+        exam_type = ExamType.objects.create(college=self.college, name="Final", code="FIN")
+        self.exam = Exam.objects.create(
+            college=self.college,
+            name="Annual Exam",
+            exam_type=exam_type,
+            class_obj=self.first,
+            academic_session=session,
+            start_date=date(2026, 4, 1),
+            end_date=date(2026, 4, 15),
+        )
+        self.user = User.objects.create_user(
+            username="prm_admin",
+            email="admin@prm.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+
+    def _student(self, roll, section, result=None, percentage=70):
+        user = User.objects.create_user(
+            username=f"prm_student_{roll}",
+            email=f"prm{roll}@prm.test",
+            password="dummy-pass",
+            college=self.college,
+            user_type=UserType.STUDENT,
+        )
+        student = Student.objects.create(
+            user=user,
+            college=self.college,
+            admission_number=f"PRM-{roll}",
+            admission_date=date(2025, 6, 1),
+            admission_type="regular",
+            registration_number=f"PRM-REG-{roll}",
+            program=self.program,
+            current_class=section.class_obj,
+            current_section=section,
+            academic_year=self.year,
+            first_name="Stu",
+            last_name=str(roll),
+            date_of_birth=date(2007, 1, 1),
+            gender="female",
+            email=f"prm{roll}@prm.test",
+        )
+        if result:
+            ExamResult.objects.create(
+                student=student, exam=self.exam, total_marks=100, marks_obtained=percentage,
+                percentage=percentage, result_status=result,
+            )
+        return student
+
+    def _service(self, **rules):
+        return StudentPromotionService(
+            self.college.id,
+            self.program.id,
+            self.next_year.id,
+            promotion_date=date(2026, 5, 31),
+            class_map={self.first.id: self.second.id, self.second.id: self.final.id},
+            user=self.user,
+            **rules,
+        )
+
+    def test_program_is_promoted_with_history(self):
+        passed_a = self._student(1, self.first_a, 'PASS', 75)
+        passed_b = self._student(2, self.first_b, 'PASS', 60)
+        failed = self._student(3, self.first_a, 'FAIL', 30)
+        low = self._student(4, self.first_a, 'PASS', 45)
+        detained = self._student(5, self.first_a, 'PASS', 90)
+        graduate = self._student(6, self.final_a, 'PASS', 80)
+
+        service = self._service(
+            exam_ids=[self.exam.id],
+            min_percentage=50,
+            section_map={self.first_b.id: self.second_c.id},
+            detained_ids=[detained.id],
+            graduate_class_ids=[self.final.id],
+        )
+        summary = service.promote()
+
+        self.assertTrue(summary['written'])
+        self.assertEqual((summary['promoted'], summary['graduated']), (2, 1))
+        self.assertEqual(sorted(summary['failed']), [failed.id, low.id])
+        self.assertEqual(summary['detained'], [detained.id])
+
+        placements = dict(
+            Student.objects.filter(college=self.college).values_list('id', 'current_section_id')
+        )
+        # Section A maps to the next class's section of the same name, B by the explicit mapping
+        self.assertEqual(placements[passed_a.id], self.second_a.id)
+        self.assertEqual(placements[passed_b.id], self.second_c.id)
+        self.assertEqual(placements[failed.id], self.first_a.id)
+        self.assertEqual(placements[detained.id], self.first_a.id)
+        self.assertEqual(
+            Student.objects.filter(college=self.college, academic_year=self.next_year).count(), 6
+        )
+        graduate.refresh_from_db()
+        self.assertTrue(graduate.is_alumni)
+
+        history = StudentPromotion.objects.filter(academic_year=self.next_year)
+        self.assertEqual(history.count(), 3)
+        record = history.get(student=passed_b)
+        self.assertEqual(
+            (record.from_class_id, record.to_class_id, record.from_section_id, record.to_section_id),
+            (self.first.id, self.second.id, self.first_b.id, self.second_c.id),
+        )
+        self.assertEqual(history.get(student=graduate).remarks, 'Graduated')
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        'attendance_roster': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'prm-rosters'},
+    })
+    def test_promotion_expires_cached_rosters(self):
+        promoted = self._student(1, self.first_a, 'PASS', 75)
+        held = self._student(2, self.first_a, 'FAIL', 30)
+
+        def roster():
+            rows = class_attendance_rows(self.first.id, self.first_a.id, "2025-07-01", self.college.id)
+            return [row['student_id'] for row in rows]
+
+        self.assertEqual(sorted(roster()), sorted([promoted.id, held.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self._service(exam_ids=[self.exam.id], min_percentage=50).promote()
+
+        self.assertEqual(roster(), [held.id])
+
+    def test_retried_promotion_moves_nobody_twice_and_reassigns_teams(self):
+        promoted = self._student(1, self.first_a, 'PASS', 75)
+        teams = {}
+        for section in (self.first_a, self.second_a):
+            teacher = User.objects.create_user(
+                username=f"prm_teacher_{section.id}",
+                email=f"teacher{section.id}@prm.test",
+                password="dummy-pass",
+                college=self.college,
+                user_type=UserType.TEACHER,
+            )
+            ClassTeacher.objects.create(
+                class_obj=section.class_obj, section=section, teacher=teacher,
+                assigned_from=date(2025, 6, 1), is_current=True,
+            )
+            node = OrganizationNode.objects.create(
+                name=f"Teacher {section.id}", node_type='teacher', user=teacher, college=self.college,
+            )
+            teams[section.id] = node.team.id
+        HierarchyTeamMember.objects.create(team_id=teams[self.first_a.id], user=promoted.user, auto_assigned=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._service().promote()['promoted'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._service().promote()['promoted'], 0)
+
+        promoted.refresh_from_db()
+        self.assertEqual(promoted.current_class_id, self.second.id)
+        self.assertEqual(StudentPromotion.objects.filter(student=promoted).count(), 1)
+        self.assertEqual(
+            list(HierarchyTeamMember.objects.filter(user=promoted.user).values_list('team_id', flat=True)),
+            [teams[self.second_a.id]],
+        )
+
+    def test_dry_run_via_api_writes_nothing(self):
+        student = self._student(1, self.first_a, 'PASS')
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            reverse('studentpromotion-bulk-promote'),
+            {
+                'program': self.program.id,
+                'academic_year': self.next_year.id,
+                'class_map': [{'from_class': self.first.id, 'to_class': self.second.id}],
+                'exams': [self.exam.id],
+                'dry_run': True,
+            },
+            format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(response.data['written'])
+        self.assertEqual(response.data['moves'], [{
+            'from_class': self.first.id, 'from_section': self.first_a.id,
+            'to_class': self.second.id, 'to_section': self.second_a.id, 'students': 1,
+        }])
+        student.refresh_from_db()
+        self.assertEqual(student.current_class_id, self.first.id)
+        self.assertFalse(StudentPromotion.objects.exists())
+
+    def test_section_mapping_must_target_the_next_class(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(
+            reverse('studentpromotion-bulk-promote'),
+            {
+                'program': self.program.id,
+                'academic_year': self.next_year.id,
+                'class_map': [{'from_class': self.first.id, 'to_class': self.second.id}],
+                'section_map': [{'from_section': self.first_a.id, 'to_section': self.final_a.id}],
+            },
+            format='json',
+            HTTP_X_COLLEGE_ID=str(self.college.id),
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('section_map', response.data)
@@ -5,6 +5,7 @@ from rest_framework import status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
 from drf_spectacular.utils import (
@@ -32,11 +33,16 @@ from .serializers import (
     StudentMedicalRecordSerializer,
     PreviousAcademicRecordSerializer,
     StudentPromotionSerializer,
+    BulkPromotionSerializer,
     CertificateSerializer,
     StudentIDCardSerializer,
     BulkDeleteSerializer,
 )
 from apps.core.mixins import CollegeScopedModelViewSet, RelatedCollegeScopedModelViewSet
+from apps.core.imports import BulkImportRequestSerializer, run_bulk_import
+from apps.core.search import DirectorySearchFilter
+from .importers import StudentImportPipeline
+from .services import StudentPromotionService
 
 
 # ============================================================================
@@ -233,7 +239,7 @@ class StudentViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     queryset = Student.objects.all_colleges()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, DirectorySearchFilter]
     filterset_fields = ['program', 'current_class', 'current_section', 'category', 'group', 'is_active', 'is_alumni', 'gender']
     search_fields = ['first_name', 'last_name', 'admission_number', 'registration_number', 'email', 'phone']
     ordering_fields = ['admission_number', 'first_name', 'admission_date', 'created_at']
@@ -274,6 +280,28 @@ class StudentViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
     def perform_destroy(self, instance):
         instance.soft_delete()
 
+    @extend_schema(
+        summary="Bulk import students",
+        description=(
+            "Import students from a CSV or XLSX file (one row per student, headers in row 1). "
+            "Rows are written in chunks; rows whose admission number already exists are skipped, "
+            "so a failed import can be re-run or resumed with start_row. "
+            "Use dry_run to validate without writing. "
+            "Accounts created without a password column get an unusable password; "
+            "users set theirs through the password reset flow (POST /api/v1/auth/password/reset/)."
+        ),
+        request={'multipart/form-data': BulkImportRequestSerializer},
+        responses={
+            200: OpenApiResponse(description="Import summary with per-row errors"),
+            400: OpenApiResponse(description="Invalid file or no rows could be imported"),
+        },
+        tags=['Students']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """Bulk import students from a spreadsheet."""
+        return run_bulk_import(self, request, StudentImportPipeline)
+
 
 # ============================================================================
 # GUARDIAN VIEWSET
@@ -325,7 +353,7 @@ class GuardianViewSet(RelatedCollegeScopedModelViewSet):
     related_college_lookup = 'students__student__college_id'
     serializer_class = GuardianSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, DirectorySearchFilter]
     filterset_fields = ['relation']
     search_fields = ['first_name', 'last_name', 'email', 'phone']
     ordering_fields = ['first_name', 'created_at']
@@ -764,6 +792,40 @@ class StudentPromotionViewSet(RelatedCollegeScopedModelViewSet):
     def perform_destroy(self, instance):
         instance.soft_delete()
 
+    @extend_schema(
+        summary="Promote a program",
+        description=(
+            "Year-end promotion of a program's students in one transaction. Students who passed "
+            "the given exams move to the mapped class and section for the new academic year, "
+            "passing students of graduate classes become alumni, and failed or detained students "
+            "repeat their class. Use dry_run to preview the moves."
+        ),
+        request=BulkPromotionSerializer,
+        responses={200: OpenApiResponse(description="Promotion summary")},
+        tags=['Students - Promotions']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-promote')
+    def bulk_promote(self, request):
+        college_id = self.get_college_id(required=True)
+        serializer = BulkPromotionSerializer(data=request.data, context={'college_id': college_id})
+        serializer.is_valid(raise_exception=True)
+        rules = serializer.validated_data
+        service = StudentPromotionService(
+            college_id,
+            rules['program'],
+            rules['academic_year'],
+            promotion_date=rules.get('promotion_date'),
+            class_map=rules['class_map'],
+            section_map=rules['section_map'],
+            exam_ids=rules['exams'],
+            min_percentage=rules.get('min_percentage'),
+            detained_ids=rules['detained_students'],
+            graduate_class_ids=rules['graduate_classes'],
+            remarks=rules.get('remarks'),
+            user=request.user,
+        )
+        return Response(service.promote(dry_run=rules['dry_run']), status=status.HTTP_200_OK)
+
 
 # ============================================================================
 # CERTIFICATE VIEWSET
@@ -0,0 +1,124 @@
+"""
+Bulk staff import.
+
+Creates User and Teacher rows with bulk_create. Because bulk_create bypasses
+post_save, auto_create_teacher_profile never races the import, and the user
+profile and activity log rows are written once per chunk instead.
+"""
+from django.utils import timezone
+
+from apps.accounts.models import User, UserType
+from apps.academic.models import Faculty
+from apps.core.imports import (
+    BulkImportPipeline,
+    create_user_profiles,
+    import_password,
+    parse_date,
+    record_bulk_activity,
+)
+from .models import Teacher
+
+
+class TeacherImportPipeline(BulkImportPipeline):
+    """
+    Expected columns (headers are case/space insensitive):
+
+    Required: employee_id, joining_date, first_name, last_name, date_of_birth,
+              gender, email, phone
+    Optional: middle_name, alternate_phone, address, specialization,
+              faculty_code, password
+    """
+    required_columns = (
+        'employee_id', 'joining_date', 'first_name', 'last_name',
+        'date_of_birth', 'gender', 'email', 'phone',
+    )
+    key_column = 'employee_id'
+
+    def prepare(self):
+        self.faculties = dict(
+            Faculty.objects.all_colleges().filter(college_id=self.college_id).values_list('code', 'id')
+        )
+
+    def clean_row(self, row):
+        data = row.data
+        cleaned = row.cleaned
+        for field in (
+            'employee_id', 'first_name', 'middle_name', 'last_name', 'gender', 'phone',
+            'alternate_phone', 'address', 'specialization', 'password',
+        ):
+            cleaned[field] = str(data.get(field) or '').strip() or None
+        cleaned['email'] = str(data.get('email') or '').strip().lower()
+
+        for field in ('joining_date', 'date_of_birth'):
+            cleaned[field] = parse_date(data.get(field))
+            if cleaned[field] is None:
+                row.error(field, 'Enter a valid date (YYYY-MM-DD or DD-MM-YYYY).')
+
+        faculty_code = data.get('faculty_code')
+        cleaned['faculty_id'] = self.faculties.get(faculty_code) if faculty_code else None
+        if faculty_code and not cleaned['faculty_id']:
+            row.error('faculty_code', f"Unknown faculty code '{faculty_code}'.")
+
+    def existing_keys(self, keys):
+        return set(
+            Teacher.objects.all_colleges().filter(
+                college_id=self.college_id, employee_id__in=keys
+            ).values_list('employee_id', flat=True)
+        )
+
+    def validate_chunk(self, rows):
+        self.flag_duplicates(rows, 'employee_id', Teacher.objects.all_colleges())
+        self.flag_duplicates(rows, 'email', User.objects.all())
+        taken = set(User.objects.filter(
+            username__in=[row.cleaned['employee_id'].lower() for row in rows]
+        ).values_list('username', flat=True))
+        for row in rows:
+            if row.cleaned['employee_id'].lower() in taken:
+                row.error('employee_id', 'A user account with this employee ID already exists.')
+
+    def persist(self, rows):
+        now = timezone.now()
+        users = []
+        teachers = []
+        for row in rows:
+            c = row.cleaned
+            user = User(
+                username=c['employee_id'].lower(),
+                email=c['email'],
+                first_name=c['first_name'],
+                middle_name=c['middle_name'],
+                last_name=c['last_name'],
+                phone=c['phone'],
+                date_of_birth=c['date_of_birth'],
+                college_id=self.college_id,
+                user_type=UserType.TEACHER,
+                password=import_password(c['password']),
+                date_joined=now,
+            )
+            users.append(user)
+            teachers.append(Teacher(
+                user=user,
+                college_id=self.college_id,
+                employee_id=c['employee_id'],
+                joining_date=c['joining_date'],
+                faculty_id=c['faculty_id'],
+                first_name=c['first_name'],
+                middle_name=c['middle_name'],
+                last_name=c['last_name'],
+                date_of_birth=c['date_of_birth'],
+                gender=c['gender'],
+                email=c['email'],
+                phone=c['phone'],
+                alternate_phone=c['alternate_phone'],
+                address=c['address'],
+                specialization=c['specialization'],
+                created_by=self.user,
+                updated_by=self.user,
+            ))
+
+        User.objects.bulk_create(users)
+        Teacher.objects.bulk_create(teachers)
+
+        create_user_profiles(self.college_id, users)
+        record_bulk_activity(self.college_id, self.user, 'Teacher', teachers)
+        return len(teachers)
@@ -6,6 +6,7 @@ from rest_framework import status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     extend_schema,
@@ -29,6 +30,8 @@ from .serializers import (
     BulkDeleteSerializer,
 )
 from apps.core.mixins import CollegeScopedModelViewSet, RelatedCollegeScopedModelViewSet
+from apps.core.imports import BulkImportRequestSerializer, run_bulk_import
+from .importers import TeacherImportPipeline
 
 
 # ============================================================================
@@ -124,6 +127,27 @@ class TeacherViewSet(CachedReadOnlyMixin, CollegeScopedModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @extend_schema(
+        summary="Bulk import teachers",
+        description=(
+            "Import teaching staff from a CSV or XLSX file (headers in row 1). "
+            "Rows whose employee ID already exists are skipped, so a failed import can be "
+            "re-run or resumed with start_row. Use dry_run to validate without writing. "
+            "Accounts created without a password column get an unusable password; "
+            "users set theirs through the password reset flow (POST /api/v1/auth/password/reset/)."
+        ),
+        request={'multipart/form-data': BulkImportRequestSerializer},
+        responses={
+            200: OpenApiResponse(description="Import summary with per-row errors"),
+            400: OpenApiResponse(description="Invalid file or no rows could be imported"),
+        },
+        tags=['Teachers']
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """Bulk import teachers from a spreadsheet."""
+        return run_bulk_import(self, request, TeacherImportPipeline)
+
 
 # ============================================================================
 # STUDY MATERIAL VIEWSET
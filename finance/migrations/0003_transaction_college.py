@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dynamicrole_hierarchypermission_hierarchyuserrole_and_more'),
+        ('finance', '0002_financetransaction_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financetransaction',
+            name='college',
+            field=models.ForeignKey(blank=True, help_text='College of the source record, when known', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='finance_transactions', to='core.college'),
+        ),
+        migrations.AddIndex(
+            model_name='financetransaction',
+            index=models.Index(fields=['college', 'date'], name='finance_tra_college_896699_idx'),
+        ),
+    ]
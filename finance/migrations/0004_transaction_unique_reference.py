@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def drop_duplicate_references(apps, schema_editor):
+    """Keep the first transaction of each source record; sync_finance_data rebuilds the totals."""
+    FinanceTransaction = apps.get_model('finance', 'FinanceTransaction')
+    earlier = FinanceTransaction.objects.filter(
+        reference_model=OuterRef('reference_model'),
+        reference_id=OuterRef('reference_id'),
+        pk__lt=OuterRef('pk'),
+    )
+    FinanceTransaction.objects.filter(reference_id__isnull=False).filter(Exists(earlier)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_transaction_college'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_references, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='financetransaction',
+            name='finance_tra_referen_27d956_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='financetransaction',
+            constraint=models.UniqueConstraint(
+                fields=('reference_model', 'reference_id'), name='finance_transaction_unique_reference'
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# reference_model -> (source model, lookup of its college), as finance.signals.COLLEGE_PATHS
+SOURCE_COLLEGES = {
+    'FeeCollection': ('fees.FeeCollection', 'student__college_id'),
+    'FeeFine': ('fees.FeeFine', 'student__college_id'),
+    'FeeRefund': ('fees.FeeRefund', 'student__college_id'),
+    'LibraryFine': ('library.LibraryFine', 'member__college_id'),
+    'HostelFee': ('hostel.HostelFee', 'allocation__hostel__college_id'),
+    'Payroll': ('hr.Payroll', 'teacher__college_id'),
+    'StoreSale': ('store.StoreSale', 'college_id'),
+}
+
+
+def backfill_college(apps, schema_editor):
+    """Set the college of transactions posted before FinanceTransaction.college existed."""
+    FinanceTransaction = apps.get_model('finance', 'FinanceTransaction')
+    for reference_model, (source, lookup) in SOURCE_COLLEGES.items():
+        model = apps.get_model(source)
+        FinanceTransaction.objects.filter(
+            reference_model=reference_model, reference_id__isnull=False, college__isnull=True,
+        ).update(college_id=Subquery(
+            model._base_manager.filter(pk=OuterRef('reference_id')).values(lookup)[:1]
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_transaction_unique_reference'),
+        ('fees', '0003_fee_allocation_ledger'),
+        ('library', '0002_reservation_hold_until'),
+        ('hostel', '0003_occupancy_counters'),
+        ('hr', '0002_leave_ledger'),
+        ('store', '0008_alter_goodsreceiptitem_item_description_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_college, migrations.RunPython.noop),
+    ]
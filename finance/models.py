@@ -210,6 +210,14 @@ class FinanceTransaction(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES, default='cash')
     reference_id = models.IntegerField(null=True, blank=True, help_text="ID from source app")
     reference_model = models.CharField(max_length=100, blank=True, help_text="Source model name")
+    college = models.ForeignKey(
+        'core.College',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='finance_transactions',
+        help_text="College of the source record, when known"
+    )
     date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -219,7 +227,14 @@ class FinanceTransaction(models.Model):
         indexes = [
             models.Index(fields=['app', 'type']),
             models.Index(fields=['date']),
-            models.Index(fields=['reference_model', 'reference_id']),
+            models.Index(fields=['college', 'date']),
+        ]
+        constraints = [
+            # One row per source record; batch bookings have no reference_id and never conflict
+            models.UniqueConstraint(
+                fields=['reference_model', 'reference_id'],
+                name='finance_transaction_unique_reference',
+            ),
         ]
 
     def __str__(self):
@@ -0,0 +1,236 @@
+"""
+Finance report queries.
+
+Every report of FinanceReportViewSet is built from one grouped pass:
+
+- unsliced reports read the monthly rollups, one
+  values('app_name', 'month').annotate(Sum) query per table (AppIncome,
+  AppExpense);
+- per-college reports read FinanceTransaction, which carries the college
+  of its source record, with one values('app', 'type', month).annotate(Sum)
+  query.
+
+The (app, month) cells of that pass answer app summaries, totals, monthly
+ranges, the dashboard and projections in Python. Results are cached under
+a key holding the rollup version (latest FinanceTotal update and month
+count, or the latest transaction id of the college), so a sync or a new
+posting makes the next request recompute.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import AppExpense, AppIncome, FinanceTotal, FinanceTransaction
+
+APPS = ['fees', 'library', 'hostel', 'hr', 'store', 'other']
+INCOME_APPS = ['fees', 'library', 'hostel', 'store']
+EXPENSE_APPS = ['fees', 'hr', 'store', 'other']
+ZERO = Decimal('0.00')
+
+
+def _cache_timeout():
+    return getattr(settings, 'FINANCE_REPORT_CACHE_SECONDS', 15 * 60)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def months_between(start, end):
+    """First days of every month from start to end, inclusive."""
+    months = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current += relativedelta(months=1)
+    return months
+
+
+def _flow(income, expense):
+    return {'income': float(income), 'expense': float(expense), 'net': float(income - expense)}
+
+
+class FinanceReport:
+    """Finance figures between two months (inclusive, open-ended when None), optionally for one college."""
+
+    def __init__(self, start=None, end=None, college_id=None):
+        self.start = month_start(start) if start else None
+        self.end = month_start(end) if end else None
+        self.college_id = college_id
+        self._cells = None
+
+    # ------------------------------------------------------------------
+    # Grouped pass
+    # ------------------------------------------------------------------
+
+    def version(self):
+        if self.college_id:
+            latest = FinanceTransaction.objects.filter(college_id=self.college_id).aggregate(
+                latest=Max('id'), rows=Count('id')
+            )
+        else:
+            latest = FinanceTotal.objects.aggregate(latest=Max('last_updated'), rows=Count('id'))
+            # A timestamp keeps the key free of the spaces and '+' of a datetime
+            if latest['latest'] is not None:
+                latest['latest'] = latest['latest'].timestamp()
+        return f"{latest['latest']}:{latest['rows']}"
+
+    def _month_range(self, queryset, field):
+        if self.start:
+            queryset = queryset.filter(**{f'{field}__gte': self.start})
+        if self.end:
+            queryset = queryset.filter(**{f'{field}__lt': self.end + relativedelta(months=1)})
+        return queryset
+
+    def _rows(self):
+        """(app, month, kind, amount) rows of the grouped pass."""
+        if self.college_id:
+            transactions = self._month_range(
+                FinanceTransaction.objects.filter(college_id=self.college_id), 'date'
+            ).annotate(month=TruncMonth('date'))
+            for row in transactions.values('app', 'type', 'month').annotate(total=Sum('amount')).order_by():
+                yield row['app'], month_start(row['month']), row['type'], row['total']
+            return
+        for model, kind in ((AppIncome, 'income'), (AppExpense, 'expense')):
+            rollups = self._month_range(model.objects.all(), 'month')
+            for row in rollups.values('app_name', 'month').annotate(total=Sum('amount')).order_by():
+                yield row['app_name'], row['month'], kind, row['total']
+
+    @property
+    def cells(self):
+        """{(app, month): {'income': Decimal, 'expense': Decimal}}"""
+        if self._cells is None:
+            cells = defaultdict(lambda: {'income': ZERO, 'expense': ZERO})
+            for app, month, kind, total in self._rows():
+                cells[(app, month)][kind] += total or ZERO
+            self._cells = dict(cells)
+        return self._cells
+
+    def _sum(self, kind, app=None, months=None):
+        return sum((
+            values[kind] for (cell_app, month), values in self.cells.items()
+            if (app is None or cell_app == app) and (months is None or month in months)
+        ), ZERO)
+
+    def _cached(self, name, build, *parts):
+        key = ':'.join(str(part) for part in (
+            'finance_report', name, self.college_id or 'all', self.start, self.end, *parts, self.version()
+        ))
+        result = cache.get(key)
+        if result is None:
+            result = build()
+            cache.set(key, result, _cache_timeout())
+        return result
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def app_summary(self):
+        return self._cached('app_summary', lambda: {
+            app: {
+                'income': float(self._sum('income', app)),
+                'expense': float(self._sum('expense', app)),
+                'total': float(self._sum('income', app) - self._sum('expense', app)),
+            }
+            for app in APPS
+        })
+
+    def totals(self):
+        def build():
+            income, expense = self._sum('income'), self._sum('expense')
+            return {'total_income': float(income), 'total_expense': float(expense), 'net_total': float(income - expense)}
+        return self._cached('totals', build)
+
+    def months(self):
+        """Months covered: the requested range, or the first to the last month with data."""
+        data_months = sorted({month for _, month in self.cells})
+        start = self.start or (data_months[0] if data_months else None)
+        end = self.end or (data_months[-1] if data_months else None)
+        if start is None or end is None:
+            return []
+        return months_between(start, end)
+
+    def monthly(self):
+        def build():
+            rows = []
+            for month in self.months():
+                income, expense = self._sum('income', months={month}), self._sum('expense', months={month})
+                rows.append({
+                    'month': month.strftime('%Y-%m'),
+                    'apps': {
+                        app: {
+                            'income': float(self.cells.get((app, month), {}).get('income', ZERO)),
+                            'expense': float(self.cells.get((app, month), {}).get('expense', ZERO)),
+                        }
+                        for app in APPS
+                    },
+                    'total_income': float(income),
+                    'total_expense': float(expense),
+                    'net': float(income - expense),
+                })
+            return rows
+        return self._cached('monthly', build)
+
+    def dashboard(self, today):
+        current = month_start(today)
+        previous = current - relativedelta(months=1)
+        year_months = set(months_between(date(today.year, 1, 1), current))
+
+        def top(kind, apps):
+            sources = [{'app': app, 'amount': self._sum(kind, app)} for app in apps]
+            sources = sorted((s for s in sources if s['amount'] > 0), key=lambda s: s['amount'], reverse=True)
+            return [{'app': s['app'], 'amount': float(s['amount'])} for s in sources[:5]]
+
+        def build():
+            return {
+                'current_month': _flow(self._sum('income', months={current}), self._sum('expense', months={current})),
+                'previous_month': _flow(
+                    self._sum('income', months={previous}), self._sum('expense', months={previous})
+                ),
+                'current_year': _flow(
+                    self._sum('income', months=year_months), self._sum('expense', months=year_months)
+                ),
+                'top_income_sources': top('income', INCOME_APPS),
+                'top_expense_sources': top('expense', EXPENSE_APPS),
+            }
+        return self._cached('dashboard', build, current)
+
+    def projections(self):
+        def build():
+            # Average over every calendar month of the span, including months without postings
+            total_months = len(self.months()) or 1
+            monthly_income = self._sum('income') / total_months
+            monthly_expense = self._sum('expense') / total_months
+            monthly_net = monthly_income - monthly_expense
+
+            def spread(value, months):
+                return {
+                    'min': float(value * months * Decimal('0.8')),
+                    'avg': float(value * months),
+                    'max': float(value * months * Decimal('1.2')),
+                }
+
+            return {
+                'based_on_months': total_months,
+                'monthly_average': {
+                    'income': float(monthly_income),
+                    'expense': float(monthly_expense),
+                    'net': float(monthly_net),
+                },
+                'projections': {
+                    f'{years}_year': {
+                        'income': spread(monthly_income, years * 12),
+                        'expense': spread(monthly_expense, years * 12),
+                        'net': spread(monthly_net, years * 12),
+                    }
+                    for years in (1, 3, 5)
+                },
+            }
+        return self._cached('projections', build)
@@ -1,6 +1,6 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Sum
+from django.db.models import F, Sum
 from datetime import date
 from decimal import Decimal
 
@@ -67,7 +67,8 @@ def update_finance_totals(month):
     )
 
 
-def log_transaction(app, trans_type, amount, description, reference_id, reference_model, trans_date, payment_method='cash'):
+def log_transaction(app, trans_type, amount, description, reference_id, reference_model, trans_date,
+                    payment_method='cash', college_id=None):
     """Log transaction in FinanceTransaction"""
     from .models import FinanceTransaction
 
@@ -79,10 +80,73 @@ def log_transaction(app, trans_type, amount, description, reference_id, referenc
         payment_method=payment_method,
         reference_id=reference_id,
         reference_model=reference_model,
+        college_id=college_id,
         date=trans_date
     )
 
 
+# Path from each source record to its college, for per-college finance reports
+COLLEGE_PATHS = {
+    'FeeCollection': 'student.college_id',
+    'FeeFine': 'student.college_id',
+    'FeeRefund': 'student.college_id',
+    'LibraryFine': 'member.college_id',
+    'HostelFee': 'allocation.hostel.college_id',
+    'Payroll': 'teacher.college_id',
+    'StoreSale': 'college_id',
+}
+
+
+def college_of(instance):
+    """College id of a finance source record, or None when it has none."""
+    value = instance
+    for attr in COLLEGE_PATHS.get(type(instance).__name__, 'college_id').split('.'):
+        value = getattr(value, attr, None)
+        if value is None:
+            return None
+    return value
+
+
+def _record_app_batch(model, app_name, trans_type, amount, count, description, reference_model, month, college_id):
+    if not count or not amount:
+        return
+    month_start = get_month_start(month)
+    model.objects.get_or_create(app_name=app_name, month=month_start)
+    model.objects.filter(app_name=app_name, month=month_start).update(
+        amount=F('amount') + amount,
+        transaction_count=F('transaction_count') + count,
+    )
+    log_transaction(
+        app=app_name,
+        trans_type=trans_type,
+        amount=amount,
+        description=description,
+        reference_id=None,
+        reference_model=reference_model,
+        trans_date=month_start,
+        college_id=college_id
+    )
+    update_app_totals(app_name, month_start)
+    update_finance_totals(month_start)
+
+
+def record_app_income(app_name, amount, count, description, reference_model, month, college_id=None):
+    """
+    Book a batch of income written without per-row signals (bulk_create):
+    one AppIncome delta, one logged transaction and one totals refresh.
+    """
+    from .models import AppIncome
+
+    _record_app_batch(AppIncome, app_name, 'income', amount, count, description, reference_model, month, college_id)
+
+
+def record_app_expense(app_name, amount, count, description, reference_model, month, college_id=None):
+    """Book a batch of expenses the same way as record_app_income()."""
+    from .models import AppExpense
+
+    _record_app_batch(AppExpense, app_name, 'expense', amount, count, description, reference_model, month, college_id)
+
+
 # ============ FEES APP SIGNALS ============
 
 @receiver(post_save, sender='fees.FeeCollection')
@@ -112,7 +176,8 @@ def sync_fee_collection(sender, instance, created, **kwargs):
                 description='Fee collection',
                 reference_id=instance.id,
                 reference_model='FeeCollection',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -147,7 +212,8 @@ def sync_fee_fine(sender, instance, created, **kwargs):
                 description='Fee fine',
                 reference_id=instance.id,
                 reference_model='FeeFine',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -182,7 +248,8 @@ def sync_fee_refund(sender, instance, created, **kwargs):
                 description='Fee refund',
                 reference_id=instance.id,
                 reference_model='FeeRefund',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -219,7 +286,8 @@ def sync_library_fine(sender, instance, created, **kwargs):
                 description='Library fine',
                 reference_id=instance.id,
                 reference_model='LibraryFine',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -256,7 +324,8 @@ def sync_hostel_fee(sender, instance, created, **kwargs):
                 description='Hostel fee',
                 reference_id=instance.id,
                 reference_model='HostelFee',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -293,7 +362,8 @@ def sync_payroll(sender, instance, created, **kwargs):
                 description='Payroll payment',
                 reference_id=instance.id,
                 reference_model='Payroll',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -330,7 +400,8 @@ def sync_store_sale(sender, instance, created, **kwargs):
                 description='Store sale',
                 reference_id=instance.id,
                 reference_model='StoreSale',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -365,7 +436,8 @@ def sync_purchase_order(sender, instance, created, **kwargs):
                 description='Purchase order',
                 reference_id=instance.id,
                 reference_model='PurchaseOrder',
-                trans_date=month_start
+                trans_date=month_start,
+                college_id=college_of(instance)
             )
 
         # Update totals
@@ -403,7 +475,8 @@ def sync_other_expense(sender, instance, created, **kwargs):
                 reference_id=instance.id,
                 reference_model='OtherExpense',
                 trans_date=instance.date,
-                payment_method=instance.payment_method
+                payment_method=instance.payment_method,
+                college_id=college_of(instance)
             )
 
         # Update totals
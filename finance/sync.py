@@ -0,0 +1,237 @@
+"""
+Finance resync.
+
+Rebuilds the finance tables from the source apps' records:
+
+1. each source app (fees, library, hostel, hr, store, other) runs in its
+   own worker thread with its own database connection;
+2. a worker streams its source tables with values().iterator() and upserts
+   one FinanceTransaction per source record in batches, with
+   bulk_create(update_conflicts=True) on (reference_model, reference_id);
+3. in the same transaction, transactions of the source model whose record
+   is gone (or no longer has an amount), and the per-run batch bookings
+   (reference_id NULL) that the per-record rows replace, are deleted with
+   one DELETE;
+4. once every worker is done, one grouped aggregate over FinanceTransaction
+   (app, type, month) gives every AppIncome, AppExpense, AppTotal and
+   FinanceTotal row, upserted on (app_name, month) / month. Rows the
+   aggregate no longer produces are deleted.
+
+Re-running the sync therefore converges instead of adding the source
+records a second time.
+"""
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AppExpense, AppIncome, AppTotal, FinanceTotal, FinanceTransaction
+
+BATCH_SIZE = 2000
+ZERO = Decimal('0.00')
+# Date of records booked for a billing period (year, month) instead of a date field
+PERIOD = None
+
+Source = namedtuple(
+    'Source',
+    'app type model amount date description college title payment_method exact_date',
+    defaults=(None, None, None, False),
+)
+
+SOURCES = (
+    Source('fees', 'income', 'fees.FeeCollection', 'amount', 'payment_date', 'Fee collection', 'student__college'),
+    Source('fees', 'income', 'fees.FeeFine', 'amount', 'fine_date', 'Fee fine', 'student__college'),
+    Source('fees', 'expense', 'fees.FeeRefund', 'amount', 'refund_date', 'Fee refund', 'student__college'),
+    Source('library', 'income', 'library.LibraryFine', 'amount', 'fine_date', 'Library fine', 'member__college'),
+    Source('hostel', 'income', 'hostel.HostelFee', 'amount', PERIOD, 'Hostel fee', 'allocation__hostel__college'),
+    Source('hr', 'expense', 'hr.Payroll', 'net_salary', PERIOD, 'Payroll payment', 'teacher__college'),
+    Source('store', 'income', 'store.StoreSale', 'total_amount', 'sale_date', 'Store sale', 'college'),
+    Source('store', 'expense', 'store.PurchaseOrder', 'grand_total', 'po_date', 'Purchase order'),
+    Source(
+        'other', 'expense', 'finance.OtherExpense', 'amount', 'date', 'Other expense',
+        title='title', payment_method='payment_method', exact_date=True,
+    ),
+)
+SOURCE_APPS = list(dict.fromkeys(source.app for source in SOURCES))
+UPSERT_FIELDS = ['app', 'type', 'amount', 'description', 'payment_method', 'college', 'date']
+
+
+def _reference_model(source):
+    return source.model.split('.')[1]
+
+
+def _source_rows(source):
+    """Source records with an amount, unscoped (the sync runs for every college)."""
+    model = apps.get_model(source.model)
+    return model._base_manager.filter(**{f'{source.amount}__gt': 0})
+
+
+def _transaction_date(source, row):
+    if source.date is PERIOD:
+        return date(row['year'], row['month'], 1)
+    value = row[source.date] or timezone.localdate(row['created_at'])
+    return value if source.exact_date else date(value.year, value.month, 1)
+
+
+def _transaction(source, row):
+    return FinanceTransaction(
+        app=source.app,
+        type=source.type,
+        amount=row[source.amount],
+        description=(row[source.title] if source.title else source.description)[:500],
+        payment_method=row[source.payment_method] if source.payment_method else 'cash',
+        reference_id=row['pk'],
+        reference_model=_reference_model(source),
+        college_id=row['source_college'] if source.college else None,
+        date=_transaction_date(source, row),
+    )
+
+
+def _upsert(transactions):
+    FinanceTransaction.objects.bulk_create(
+        transactions,
+        update_conflicts=True,
+        unique_fields=['reference_model', 'reference_id'],
+        update_fields=UPSERT_FIELDS,
+    )
+
+
+def sync_source(source):
+    """Upsert the source's transactions and drop the stale ones; returns the number of records."""
+    fields = ['pk', source.amount, 'created_at']
+    fields += ['year', 'month'] if source.date is PERIOD else [source.date]
+    fields += [field for field in (source.title, source.payment_method) if field]
+    expressions = {'source_college': F(source.college)} if source.college else {}
+
+    count = 0
+    with transaction.atomic():
+        batch = []
+        for row in _source_rows(source).values(*fields, **expressions).iterator(chunk_size=BATCH_SIZE):
+            batch.append(_transaction(source, row))
+            if len(batch) >= BATCH_SIZE:
+                _upsert(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            _upsert(batch)
+            count += len(batch)
+        FinanceTransaction.objects.filter(reference_model=_reference_model(source)).filter(
+            Q(reference_id__isnull=True) | ~Q(reference_id__in=_source_rows(source).values('pk'))
+        ).delete()
+    return count
+
+
+def rebuild_totals():
+    """Rebuild the monthly rollups from one grouped pass over FinanceTransaction; returns the month count."""
+    started = timezone.now()
+    cells = defaultdict(lambda: {'income': ZERO, 'expense': ZERO, 'income_count': 0, 'expense_count': 0})
+    rows = FinanceTransaction.objects.annotate(month=TruncMonth('date')).values('app', 'type', 'month').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    for row in rows:
+        month = date(row['month'].year, row['month'].month, 1)
+        cell = cells[(row['app'], month)]
+        cell[row['type']] += row['total'] or ZERO
+        cell[f"{row['type']}_count"] += row['count']
+
+    months = defaultdict(lambda: {'income': ZERO, 'expense': ZERO})
+    for (_, month), cell in cells.items():
+        months[month]['income'] += cell['income']
+        months[month]['expense'] += cell['expense']
+
+    with transaction.atomic():
+        for model, kind in ((AppIncome, 'income'), (AppExpense, 'expense')):
+            model.objects.bulk_create(
+                [
+                    model(app_name=app, month=month, amount=cell[kind], transaction_count=cell[f'{kind}_count'])
+                    for (app, month), cell in cells.items() if cell[f'{kind}_count']
+                ],
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['app_name', 'month'],
+                update_fields=['amount', 'transaction_count', 'last_synced'],
+            )
+            model.objects.filter(last_synced__lt=started).delete()
+        AppTotal.objects.bulk_create(
+            [
+                AppTotal(
+                    app_name=app, month=month, income=cell['income'], expense=cell['expense'],
+                    net_total=cell['income'] - cell['expense'],
+                )
+                for (app, month), cell in cells.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['app_name', 'month'],
+            update_fields=['income', 'expense', 'net_total', 'last_updated'],
+        )
+        AppTotal.objects.filter(last_updated__lt=started).delete()
+        FinanceTotal.objects.bulk_create(
+            [
+                FinanceTotal(
+                    month=month, total_income=total['income'], total_expense=total['expense'],
+                    net_total=total['income'] - total['expense'],
+                )
+                for month, total in months.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['month'],
+            update_fields=['total_income', 'total_expense', 'net_total', 'last_updated'],
+        )
+        FinanceTotal.objects.filter(last_updated__lt=started).delete()
+    return len(months)
+
+
+class FinanceSync:
+    """Resync the finance tables from the source apps, one worker per app."""
+
+    def __init__(self, source_apps=None, workers=None):
+        self.source_apps = list(source_apps or SOURCE_APPS)
+        self.workers = len(self.source_apps) if workers is None else workers
+
+    def _sync_app(self, app):
+        """{reference_model: records} and {reference_model: error} of the app's sources."""
+        synced, errors = {}, {}
+        for source in SOURCES:
+            if source.app != app:
+                continue
+            try:
+                synced[_reference_model(source)] = sync_source(source)
+            except Exception as exc:
+                errors[_reference_model(source)] = str(exc)
+        return synced, errors
+
+    def _threaded(self, app):
+        try:
+            return self._sync_app(app)
+        finally:
+            # Worker threads open their own connections; release them with the thread
+            connections.close_all()
+
+    def run(self, clear=False):
+        if clear:
+            for model in (AppIncome, AppExpense, AppTotal, FinanceTotal, FinanceTransaction):
+                model.objects.all().delete()
+
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='finance-sync') as pool:
+                results = list(pool.map(self._threaded, self.source_apps))
+        else:
+            results = [self._sync_app(app) for app in self.source_apps]
+
+        synced, errors = {}, {}
+        for app_synced, app_errors in results:
+            synced.update(app_synced)
+            errors.update(app_errors)
+        return {
+            'synced': synced,
+            'errors': errors,
+            'months': rebuild_totals(),
+        }
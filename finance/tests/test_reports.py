@@ -0,0 +1,112 @@
+import warnings
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, UserType
+from apps.core.models import College
+from finance.reports import FinanceReport
+from finance.signals import record_app_expense, record_app_income
+
+
+class FinanceReportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.north, self.south = [
+            College.objects.create(
+                code=code,
+                name=f"{code} College",
+                short_name=code,
+                email=f"info@{code.lower()}.test",
+                phone=phone,
+                address_line1="1 Report Rd",
+                city="City",
+                state="State",
+                pincode="000019",
+                country="Testland",
+            )
+            for code, phone in (("FRN", "9999999985"), ("FRS", "9999999984"))
+        ]
+        record_app_income('fees', Decimal('1000'), 4, 'Fees', 'FeeCollection', date(2025, 1, 1), college_id=self.north.id)
+        record_app_income('fees', Decimal('500'), 2, 'Fees', 'FeeCollection', date(2025, 1, 1), college_id=self.south.id)
+        record_app_income('hostel', Decimal('300'), 1, 'Hostel', 'HostelFee', date(2025, 3, 1), college_id=self.north.id)
+        record_app_expense('hr', Decimal('600'), 3, 'Payroll', 'Payroll', date(2025, 3, 1), college_id=self.south.id)
+
+    def test_monthly_range_is_one_pass_per_table_and_cached(self):
+        report = FinanceReport(date(2025, 1, 1), date(2025, 3, 1))
+        with self.assertNumQueries(3), warnings.catch_warnings():
+            # The rollup version must make a valid (memcached-safe) cache key
+            warnings.simplefilter('error', CacheKeyWarning)
+            months = report.monthly()
+        self.assertEqual([row['month'] for row in months], ['2025-01', '2025-02', '2025-03'])
+        self.assertEqual(
+            [(row['total_income'], row['total_expense']) for row in months],
+            [(1500.0, 0.0), (0.0, 0.0), (300.0, 600.0)],
+        )
+        self.assertEqual(months[2]['apps']['hostel'], {'income': 300.0, 'expense': 0.0})
+
+        # A repeat only checks the rollup version; a new posting invalidates it
+        with self.assertNumQueries(1):
+            FinanceReport(date(2025, 1, 1), date(2025, 3, 1)).monthly()
+        record_app_income('store', Decimal('50'), 1, 'Sale', 'StoreSale', date(2025, 2, 1))
+        self.assertEqual(FinanceReport(date(2025, 1, 1), date(2025, 3, 1)).monthly()[1]['total_income'], 50.0)
+
+    def test_college_slice_and_projections(self):
+        north = FinanceReport(college_id=self.north.id)
+        with self.assertNumQueries(2):
+            summary = north.app_summary()
+        self.assertEqual((summary['fees']['income'], summary['hostel']['income']), (1000.0, 300.0))
+        self.assertEqual(FinanceReport(college_id=self.south.id).totals()['net_total'], -100.0)
+
+        # Months without postings count towards the average
+        projections = FinanceReport().projections()
+        self.assertEqual(projections['based_on_months'], 3)
+        self.assertEqual(projections['monthly_average']['income'], 600.0)
+
+    def test_report_endpoints(self):
+        admin = User.objects.create_user(
+            username="fr_admin",
+            email="admin@frn.test",
+            password="dummy-pass",
+            college=self.north,
+            user_type=UserType.COLLEGE_ADMIN,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        # A college user only ever sees their own college, whatever they ask for
+        response = client.get(
+            reverse('reports-monthly'), {'year': 2025, 'month': 1, 'college': self.south.id},
+            HTTP_X_COLLEGE_ID=str(self.south.id),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['month'], response.data['total_income']), ('2025-01', 1000.0))
+
+        response = client.get(reverse('reports-monthly'), {'from': '2025-01', 'to': '2025-03'})
+        self.assertEqual((len(response.data['months']), response.data['net']), (3, 1300.0))
+        self.assertEqual(client.get(reverse('reports-monthly'), {'from': '2025-13'}).status_code, 400)
+
+        response = client.get(reverse('reports-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['top_income_sources'][0], {'app': 'fees', 'amount': 1000.0})
+
+        superadmin = User.objects.create_user(
+            username="fr_super",
+            email="super@frn.test",
+            password="dummy-pass",
+            user_type=UserType.SUPER_ADMIN,
+            is_superadmin=True,
+        )
+        client.force_authenticate(superadmin)
+        response = client.get(
+            reverse('reports-monthly'), {'year': 2025, 'month': 1}, HTTP_X_COLLEGE_ID=str(self.south.id)
+        )
+        self.assertEqual(response.data['total_income'], 500.0)
+        response = client.get(reverse('reports-monthly'), {'year': 2025, 'month': 1})
+        self.assertEqual(response.data['total_income'], 1500.0)
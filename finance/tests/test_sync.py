@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.core.models import College
+from apps.store.models import StoreSale
+from finance.models import AppExpense, AppIncome, AppTotal, FinanceTotal, FinanceTransaction, OtherExpense
+from finance.signals import record_app_income
+from finance.sync import FinanceSync
+
+
+class FinanceSyncTest(TestCase):
+    def setUp(self):
+        self.rent = OtherExpense.objects.create(
+            title="Hall rent", amount=Decimal('100'), category='utilities', date=date(2025, 1, 15),
+        )
+        self.removed = OtherExpense.objects.create(
+            title="Chairs", amount=Decimal('50'), category='supplies', date=date(2025, 2, 3),
+        )
+        OtherExpense.objects.filter(pk=self.removed.pk).delete()
+        # A batch booking without source records and a stale rollup month
+        record_app_income('store', Decimal('70'), 2, 'Sales', 'StoreSale', date(2025, 1, 1))
+        AppIncome.objects.create(app_name='library', month=date(2024, 12, 1), amount=5, transaction_count=1)
+
+    def _state(self):
+        return (
+            list(FinanceTransaction.objects.order_by('pk').values_list('reference_model', 'reference_id', 'amount', 'date')),
+            list(AppIncome.objects.values_list('app_name', 'month', 'amount')),
+            list(AppExpense.objects.values_list('app_name', 'month', 'amount', 'transaction_count')),
+            list(AppTotal.objects.values_list('app_name', 'month', 'net_total')),
+            list(FinanceTotal.objects.values_list('month', 'total_income', 'total_expense')),
+        )
+
+    def test_resync_rebuilds_from_sources_and_converges(self):
+        summary = FinanceSync(workers=1).run()
+        self.assertEqual(summary['errors'], {})
+        self.assertEqual((summary['synced']['OtherExpense'], summary['synced']['StoreSale'], summary['months']), (1, 0, 1))
+
+        state = self._state()
+        self.assertEqual(state, (
+            [('OtherExpense', self.rent.pk, Decimal('100.00'), date(2025, 1, 15))],
+            [],
+            [('other', date(2025, 1, 1), Decimal('100.00'), 1)],
+            [('other', date(2025, 1, 1), Decimal('-100.00'))],
+            [(date(2025, 1, 1), Decimal('0.00'), Decimal('100.00'))],
+        ))
+
+        FinanceSync(workers=1).run()
+        self.assertEqual(self._state(), state)
+
+    def test_command_clears_and_resyncs_one_app(self):
+        out = StringIO()
+        call_command('sync_finance_data', '--clear', '--app', 'other', '--workers', '1', stdout=out)
+        self.assertIn('OtherExpense: 1 synced', out.getvalue())
+        self.assertNotIn('StoreSale', out.getvalue())
+        self.assertEqual(
+            list(FinanceTotal.objects.values_list('month', 'total_expense')), [(date(2025, 1, 1), Decimal('100.00'))]
+        )
+
+    def test_migration_backfills_transaction_college_from_source(self):
+        college = College.objects.create(
+            code="FSY", name="Sync College", short_name="FSY", email="info@fsy.test", phone="9999999983",
+            address_line1="1 Ledger Rd", city="City", state="State", pincode="000020", country="Testland",
+        )
+        sale = StoreSale.objects.all_colleges().create(
+            college=college, sale_date=date(2025, 1, 5), total_amount=Decimal('40'), payment_method='cash',
+        )
+        FinanceSync(['store'], workers=1).run()
+        FinanceTransaction.objects.filter(reference_model='StoreSale').update(college=None)
+
+        backfill = import_module('finance.migrations.0005_backfill_transaction_college').backfill_college
+        backfill(django_apps, None)
+        self.assertEqual(
+            FinanceTransaction.objects.get(reference_model='StoreSale', reference_id=sale.pk).college_id, college.id
+        )
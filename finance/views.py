@@ -1,12 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum, Q
 from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 
+from apps.core.exports import ExportColumn, iter_export_rows, streaming_export_response
+from apps.core.mixins import CollegeScopedMixin
+
 from .models import (
     AppIncome,
     AppExpense,
@@ -26,6 +29,7 @@ from .serializers import (
     DashboardSerializer,
     MonthlyReportSerializer
 )
+from .reports import FinanceReport
 
 
 class AppIncomeViewSet(viewsets.ModelViewSet):
@@ -91,58 +95,93 @@ class FinanceTransactionViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class FinanceReportViewSet(viewsets.ViewSet):
+class FinanceReportViewSet(CollegeScopedMixin, viewsets.ViewSet):
     """Custom viewset for finance reports and analytics"""
     permission_classes = [IsAuthenticated]
 
+    def _college_id(self):
+        """
+        College of the request scope: a college user's own college, else the
+        X-College-ID header; None ('all' or no header) reports every college
+        and is only allowed for superadmins and central managers.
+        """
+        user = self.request.user
+        is_global_user = (
+            getattr(user, 'is_superadmin', False) or
+            getattr(user, 'is_superuser', False) or
+            getattr(user, 'user_type', None) == 'central_manager'
+        )
+        if not is_global_user and getattr(user, 'college_id', None):
+            return user.college_id
+        college_id = self.get_college_id(required=True)
+        if college_id == 'all':
+            if not is_global_user:
+                raise ValidationError({
+                    'detail': f"{self.college_header}: 'all' is allowed only for superadmin or central manager."
+                })
+            return None
+        return college_id
+
+    def _report(self, request):
+        """
+        FinanceReport of the request's college for `?from=YYYY-MM&to=YYYY-MM`
+        (both optional); raises ValueError on malformed parameters.
+        """
+        months = []
+        for name in ('from', 'to'):
+            value = request.query_params.get(name)
+            months.append(datetime.strptime(value, '%Y-%m').date() if value else None)
+        if months[0] and months[1] and months[0] > months[1]:
+            raise ValueError('from is after to')
+        return FinanceReport(months[0], months[1], college_id=self._college_id())
+
+    def _invalid(self):
+        return Response(
+            {'error': 'Invalid from/to (YYYY-MM)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
     @action(detail=False, methods=['get'])
     def app_summary(self, request):
         """Get app-wise income/expense summary"""
-        apps = ['fees', 'library', 'hostel', 'hr', 'store', 'other']
-        summary = {}
-
-        for app in apps:
-            # Get income
-            income = AppIncome.objects.filter(app_name=app).aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
-
-            # Get expense
-            expense = AppExpense.objects.filter(app_name=app).aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
-
-            summary[app] = {
-                'income': float(income),
-                'expense': float(expense),
-                'total': float(income - expense)
-            }
-
-        return Response(summary)
+        try:
+            report = self._report(request)
+        except ValueError:
+            return self._invalid()
+        return Response(report.app_summary())
 
     @action(detail=False, methods=['get'])
     def totals(self, request):
         """Get overall finance totals"""
-        total_income = AppIncome.objects.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-
-        total_expense = AppExpense.objects.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-
+        try:
+            report = self._report(request)
+        except ValueError:
+            return self._invalid()
         latest = FinanceTotal.objects.first()
-
         return Response({
-            'total_income': float(total_income),
-            'total_expense': float(total_expense),
-            'net_total': float(total_income - total_expense),
+            **report.totals(),
             'last_updated': latest.last_updated if latest else None
         })
 
     @action(detail=False, methods=['get'])
     def monthly(self, request):
-        """Get monthly report"""
+        """
+        Get monthly report for `?year=&month=` (default: current month), or
+        every month of a `?from=YYYY-MM&to=YYYY-MM` range as `months`.
+        """
+        if 'from' in request.query_params or 'to' in request.query_params:
+            try:
+                report = self._report(request)
+            except ValueError:
+                return self._invalid()
+            rows = report.monthly()
+            return Response({
+                'months': rows,
+                'total_income': sum(row['total_income'] for row in rows),
+                'total_expense': sum(row['total_expense'] for row in rows),
+                'net': sum(row['net'] for row in rows)
+            })
+
         year = request.query_params.get('year', datetime.now().year)
         month = request.query_params.get('month', datetime.now().month)
 
@@ -156,181 +195,44 @@ class FinanceReportViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        apps = ['fees', 'library', 'hostel', 'hr', 'store', 'other']
-        apps_data = {}
-        total_income = Decimal('0.00')
-        total_expense = Decimal('0.00')
-
-        for app in apps:
-            income = AppIncome.objects.filter(
-                app_name=app,
-                month=target_date
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-            expense = AppExpense.objects.filter(
-                app_name=app,
-                month=target_date
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-            apps_data[app] = {
-                'income': float(income),
-                'expense': float(expense)
-            }
-
-            total_income += income
-            total_expense += expense
-
-        return Response({
-            'month': target_date.strftime('%Y-%m'),
-            'apps': apps_data,
-            'total_income': float(total_income),
-            'total_expense': float(total_expense),
-            'net': float(total_income - total_expense)
-        })
+        return Response(FinanceReport(target_date, target_date, college_id=self._college_id()).monthly()[0])
 
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Get dashboard statistics"""
-        today = date.today()
-        current_month = date(today.year, today.month, 1)
-        previous_month = current_month - relativedelta(months=1)
-        year_start = date(today.year, 1, 1)
-
-        # Current month stats
-        current_income = AppIncome.objects.filter(
-            month=current_month
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        current_expense = AppExpense.objects.filter(
-            month=current_month
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Previous month stats
-        prev_income = AppIncome.objects.filter(
-            month=previous_month
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        prev_expense = AppExpense.objects.filter(
-            month=previous_month
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Current year stats
-        year_income = AppIncome.objects.filter(
-            month__gte=year_start
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        year_expense = AppExpense.objects.filter(
-            month__gte=year_start
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-        # Top income sources
-        top_income = []
-        for app in ['fees', 'library', 'hostel', 'store']:
-            amount = AppIncome.objects.filter(
-                app_name=app
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            if amount > 0:
-                top_income.append({'app': app, 'amount': float(amount)})
-        top_income = sorted(top_income, key=lambda x: x['amount'], reverse=True)[:5]
-
-        # Top expense sources
-        top_expense = []
-        for app in ['fees', 'hr', 'store', 'other']:
-            amount = AppExpense.objects.filter(
-                app_name=app
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            if amount > 0:
-                top_expense.append({'app': app, 'amount': float(amount)})
-        top_expense = sorted(top_expense, key=lambda x: x['amount'], reverse=True)[:5]
-
-        return Response({
-            'current_month': {
-                'income': float(current_income),
-                'expense': float(current_expense),
-                'net': float(current_income - current_expense)
-            },
-            'previous_month': {
-                'income': float(prev_income),
-                'expense': float(prev_expense),
-                'net': float(prev_income - prev_expense)
-            },
-            'current_year': {
-                'income': float(year_income),
-                'expense': float(year_expense),
-                'net': float(year_income - year_expense)
-            },
-            'top_income_sources': top_income,
-            'top_expense_sources': top_expense
-        })
+        try:
+            report = self._report(request)
+        except ValueError:
+            return self._invalid()
+        return Response(report.dashboard(date.today()))
 
     @action(detail=False, methods=['get'])
     def projections(self, request):
         """Calculate financial projections for 1, 3, 5 years"""
-        # Get average monthly income/expense from all available data
-        avg_income = AppIncome.objects.aggregate(
-            avg=Sum('amount')
-        )['avg'] or Decimal('0.00')
-
-        avg_expense = AppExpense.objects.aggregate(
-            avg=Sum('amount')
-        )['avg'] or Decimal('0.00')
-
-        # Count total months with data
-        total_months = AppIncome.objects.values('month').distinct().count()
-        if total_months == 0:
-            total_months = 1
-
-        # Calculate monthly average
-        monthly_income = avg_income / total_months
-        monthly_expense = avg_expense / total_months
-        monthly_net = monthly_income - monthly_expense
-
-        # Calculate projections
-        projections = {}
-        for years in [1, 3, 5]:
-            months = years * 12
-            projections[f'{years}_year'] = {
-                'income': {
-                    'min': float(monthly_income * months * Decimal('0.8')),
-                    'avg': float(monthly_income * months),
-                    'max': float(monthly_income * months * Decimal('1.2'))
-                },
-                'expense': {
-                    'min': float(monthly_expense * months * Decimal('0.8')),
-                    'avg': float(monthly_expense * months),
-                    'max': float(monthly_expense * months * Decimal('1.2'))
-                },
-                'net': {
-                    'min': float(monthly_net * months * Decimal('0.8')),
-                    'avg': float(monthly_net * months),
-                    'max': float(monthly_net * months * Decimal('1.2'))
-                }
-            }
-
-        return Response({
-            'based_on_months': total_months,
-            'monthly_average': {
-                'income': float(monthly_income),
-                'expense': float(monthly_expense),
-                'net': float(monthly_net)
-            },
-            'projections': projections
-        })
+        try:
+            report = self._report(request)
+        except ValueError:
+            return self._invalid()
+        return Response(report.projections())
 
     @action(detail=False, methods=['get'])
     def export_summary(self, request):
-        """Export app summary as JSON for Excel/PDF conversion"""
+        """
+        Export app summary as JSON for Excel/PDF conversion.
+        Pass ?file_format=csv|xlsx to download the file directly.
+        """
         apps = ['fees', 'library', 'hostel', 'hr', 'store', 'other']
+        income_by_app = dict(
+            AppIncome.objects.values_list('app_name').annotate(total=Sum('amount')).order_by()
+        )
+        expense_by_app = dict(
+            AppExpense.objects.values_list('app_name').annotate(total=Sum('amount')).order_by()
+        )
         data = []
 
         for app in apps:
-            income = AppIncome.objects.filter(app_name=app).aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
-
-            expense = AppExpense.objects.filter(app_name=app).aggregate(
-                total=Sum('amount')
-            )['total'] or Decimal('0.00')
+            income = income_by_app.get(app) or Decimal('0.00')
+            expense = expense_by_app.get(app) or Decimal('0.00')
 
             data.append({
                 'app': app.upper(),
@@ -339,8 +241,19 @@ class FinanceReportViewSet(viewsets.ViewSet):
                 'net': float(income - expense)
             })
 
+        filename = f'finance_summary_{date.today().strftime("%Y%m%d")}'
+        file_format = request.query_params.get('file_format')
+        if file_format:
+            return streaming_export_response(
+                ['App', 'Income', 'Expense', 'Net'],
+                ([row['app'], row['income'], row['expense'], row['net']] for row in data),
+                filename,
+                file_format=file_format,
+                sheet_name='Finance Summary',
+            )
+
         return Response({
-            'filename': f'finance_summary_{date.today().strftime("%Y%m%d")}',
+            'filename': filename,
             'data': data,
             'totals': {
                 'income': sum(d['income'] for d in data),
@@ -351,7 +264,11 @@ class FinanceReportViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def export_transactions(self, request):
-        """Export transactions as JSON for Excel/PDF conversion"""
+        """
+        Export transactions as JSON for Excel/PDF conversion.
+        Pass ?file_format=csv|xlsx to stream every matching row as a file
+        instead of the first 1000 as JSON.
+        """
         from_date = request.query_params.get('from_date')
         to_date = request.query_params.get('to_date')
 
@@ -362,19 +279,41 @@ class FinanceReportViewSet(viewsets.ViewSet):
         if to_date:
             queryset = queryset.filter(date__lte=to_date)
 
+        filename = f'transactions_{date.today().strftime("%Y%m%d")}'
+        file_format = request.query_params.get('file_format')
+        if file_format:
+            columns = [
+                ExportColumn('Date', 'date'),
+                ExportColumn('App', 'app', formatter=str),
+                ExportColumn('Type', 'type', formatter=str),
+                ExportColumn('Amount', 'amount'),
+                ExportColumn('Payment Method', 'payment_method', formatter=str),
+                ExportColumn('Description', 'description'),
+            ]
+            return streaming_export_response(
+                [column.header for column in columns],
+                iter_export_rows(queryset, columns),
+                filename,
+                file_format=file_format,
+                sheet_name='Transactions',
+            )
+
         data = []
-        for txn in queryset[:1000]:  # Limit to 1000 rows
+        rows = queryset.values_list(
+            'date', 'app', 'type', 'amount', 'payment_method', 'description'
+        )[:1000]  # Limit to 1000 rows
+        for txn_date, app, txn_type, amount, payment_method, description in rows:
             data.append({
-                'date': txn.date.strftime('%Y-%m-%d'),
-                'app': txn.app,
-                'type': txn.type,
-                'amount': float(txn.amount),
-                'payment_method': txn.payment_method,
-                'description': txn.description
+                'date': txn_date.strftime('%Y-%m-%d'),
+                'app': app,
+                'type': txn_type,
+                'amount': float(amount),
+                'payment_method': payment_method,
+                'description': description
             })
 
         return Response({
-            'filename': f'transactions_{date.today().strftime("%Y%m%d")}',
+            'filename': filename,
             'data': data,
             'count': len(data)
         })
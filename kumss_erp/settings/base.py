@@ -84,6 +84,18 @@ CACHES = {
     }
 }
 
+# Attendance roster cache (apps/attendance/roster.py). It must be shared by
+# every worker process, i.e. Redis: enrolment changes expire rosters by bumping
+# a version key that all workers read. Without it rosters are read from the
+# database on every request.
+ATTENDANCE_ROSTER_CACHE_URL = config('ATTENDANCE_ROSTER_CACHE_URL', default='')
+if ATTENDANCE_ROSTER_CACHE_URL:
+    CACHES['attendance_roster'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ATTENDANCE_ROSTER_CACHE_URL,
+        'KEY_PREFIX': 'kumss',
+    }
+
 # Channel Layers - Disabled (Using SSE instead of WebSocket)
 # CHANNEL_LAYERS = {
 #     'default': {
@@ -219,6 +231,8 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
 AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='main-bucket-digitech')
 AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default='ap-south-1')
 AWS_S3_CUSTOM_DOMAIN = config('AWS_S3_CUSTOM_DOMAIN', default=None)
+# S3-compatible endpoint such as MinIO; unset for AWS
+AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)
 AWS_DEFAULT_ACL = 'private'
 AWS_S3_FILE_OVERWRITE = False
 AWS_QUERYSTRING_AUTH = True  # Generate signed URLs for private files
@@ -40,9 +40,7 @@ CHANNEL_LAYERS = {
     }
 }
 # Cache - use local memory in development to avoid Redis dependency
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "kumss-dev-cache",
-    }
+CACHES["default"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "kumss-dev-cache",
 }